@@ -17,7 +17,10 @@ from loguru import logger
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from fluent_integration import CodeGeneratorBridge, FluentWrapper, UDFGenerator
+from fluent_integration import CaseIndex, CodeGeneratorBridge, FluentWrapper, JobScheduler, UDFGenerator, replay_journal
+from fluent_integration.autotune import ProcessorAutotuner
+from fluent_integration.command_tree import CommandTree
+from fluent_integration.scheduler import read_state
 
 console = Console()
 
@@ -193,6 +196,290 @@ def generate_examples(output_dir):
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--dir', '-d', 'directories', multiple=True, default=['cases'], help='案例目录（可多次指定）')
+@click.option('--db', default='.case_index.sqlite', help='索引数据库路径')
+def index_cases(directories, db):
+    """增量索引案例文件元数据（无需启动 Fluent）"""
+    console.print(f"\n🗂️  索引案例: {', '.join(directories)}", style="bold cyan")
+    
+    try:
+        with CaseIndex(db_path=db) as index:
+            with console.status("[bold green]正在读取案例文件头..."):
+                counts = index.update(directories)
+        
+        console.print(
+            f"✅ 新增 {counts['added']}，更新 {counts['updated']}，"
+            f"删除 {counts['removed']}，未变化 {counts['unchanged']}",
+            style="bold green"
+        )
+    
+    except Exception as e:
+        console.print(f"❌ 索引失败: {e}", style="bold red")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--db', default='.case_index.sqlite', help='索引数据库路径')
+@click.option('--name', help='文件名包含的子串')
+@click.option('--min-cells', type=int, help='最小网格数')
+@click.option('--max-cells', type=int, help='最大网格数')
+@click.option('--version', 'fluent_version', help='Fluent 版本')
+@click.option('--dimension', type=int, help='维度 (2/3)')
+@click.option('--zone', help='包含的 zone 名称')
+@click.option('--model', help='启用的模型 (energy/viscous/...)')
+@click.option('--json', 'as_json', is_flag=True, help='以 JSON 输出')
+def query_cases(db, name, min_cells, max_cells, fluent_version, dimension, zone, model, as_json):
+    """查询案例索引"""
+    try:
+        with CaseIndex(db_path=db) as index:
+            cases = index.query(
+                name=name,
+                min_cells=min_cells,
+                max_cells=max_cells,
+                version=fluent_version,
+                dimension=dimension,
+                zone=zone,
+                model=model
+            )
+        
+        if as_json:
+            click.echo(json.dumps(cases, indent=2, ensure_ascii=False))
+            return
+        
+        table = Table(title=f"案例 ({len(cases)})")
+        table.add_column("文件", style="cyan")
+        table.add_column("版本", style="green")
+        table.add_column("维度")
+        table.add_column("网格数", justify="right")
+        table.add_column("Zone 数", justify="right")
+        table.add_column("模型", style="yellow")
+        
+        for case in cases:
+            table.add_row(
+                case["path"],
+                case["fluent_version"] or "-",
+                str(case["dimension"] or "-"),
+                f"{case['cell_count']:,}" if case["cell_count"] is not None else "-",
+                str(len(case["zones"])),
+                ", ".join(case["models"]) or "-"
+            )
+        
+        console.print(table)
+    
+    except Exception as e:
+        console.print(f"❌ 查询失败: {e}", style="bold red")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('jobs_file', type=click.Path(exists=True))
+@click.option('--state', default=None, help='状态快照路径（默认取 scheduler.state_file 配置）')
+@click.option('--no-backfill', is_flag=True, help='严格按优先级顺序启动')
+def schedule(jobs_file, state, no_backfill):
+    """按许可证和核数调度回放一批 journal 任务
+    
+    JOBS_FILE 为 JSON 列表，每项 {"journal", "cores", "priority", "name", "estimated_runtime"}
+    """
+    console.print(f"\n📋 调度任务: {jobs_file}", style="bold cyan")
+    
+    try:
+        with open(jobs_file, 'r', encoding='utf-8') as f:
+            specs = json.load(f)
+        
+        scheduler = JobScheduler(state_file=state, backfill=False if no_backfill else None)
+        jobs = []
+        for spec in specs:
+            journal = spec["journal"]
+            jobs.append(scheduler.submit(
+                lambda job, journal=journal: replay_journal(journal, processor_count=job.cores),
+                cores=spec.get("cores", 1),
+                priority=spec.get("priority", 0),
+                name=spec.get("name", Path(journal).stem),
+                estimated_runtime=spec.get("estimated_runtime")
+            ))
+        
+        with console.status(f"[bold green]运行 {len(jobs)} 个任务..."):
+            scheduler.shutdown(wait=True)
+        
+        _print_queue(scheduler.stats(), scheduler.jobs())
+        if any(job.status == "failed" for job in jobs):
+            sys.exit(1)
+    
+    except Exception as e:
+        console.print(f"❌ 调度失败: {e}", style="bold red")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--state', default='.scheduler_state.json', help='状态快照路径')
+@click.option('--json', 'as_json', is_flag=True, help='以 JSON 输出')
+def queue_status(state, as_json):
+    """显示调度队列和许可证/核利用率"""
+    try:
+        snapshot = read_state(state)
+        
+        if as_json:
+            click.echo(json.dumps(snapshot, indent=2, ensure_ascii=False))
+            return
+        
+        _print_queue(snapshot["stats"], snapshot["jobs"])
+    
+    except Exception as e:
+        console.print(f"❌ 读取队列状态失败: {e}", style="bold red")
+        sys.exit(1)
+
+
+def _print_queue(stats, jobs):
+    """显示任务表和利用率"""
+    table = Table(title=f"任务 ({len(jobs)})")
+    table.add_column("ID", justify="right")
+    table.add_column("名称", style="cyan")
+    table.add_column("状态", style="green")
+    table.add_column("优先级", justify="right")
+    table.add_column("核数", justify="right")
+    table.add_column("许可证")
+    table.add_column("等待 (s)", justify="right")
+    
+    for job in jobs:
+        status = job["status"] + (" (backfill)" if job["backfilled"] else "")
+        table.add_row(
+            str(job["job_id"]),
+            job["name"],
+            status,
+            str(job["priority"]),
+            str(job["cores"]),
+            ", ".join(f"{feature}×{count}" for feature, count in job["licenses"].items()),
+            f"{job['waited']:.1f}"
+        )
+    console.print(table)
+    
+    lines = [
+        f"排队 {stats['queued']}，运行 {stats['running']}，完成 {stats['done']}，"
+        f"失败 {stats['failed']}，backfill {stats['backfilled']}",
+        f"核: {stats['cores']['in_use']}/{stats['cores']['total']} 使用中，"
+        f"利用率 {stats['core_utilization']:.0%}",
+    ]
+    for feature, usage in stats["licenses"].items():
+        utilization = stats["license_utilization"].get(feature)
+        lines.append(
+            f"{feature}: {usage['in_use']}/{usage['total']} 使用中"
+            + (f"，利用率 {utilization:.0%}，空闲 {stats['idle_license_seconds'][feature] / 3600:.1f} 许可证·小时"
+               if utilization is not None else "")
+        )
+    lines.append(f"平均等待 {stats['mean_wait']:.1f}s")
+    console.print(Panel("\n".join(lines), title="利用率"))
+
+
+@cli.command()
+@click.option('--case', 'case_file', required=True, type=click.Path(exists=True), help='案例文件')
+@click.option('--cores', help='测量的进程数，逗号分隔（默认取 autotune 配置）')
+@click.option('--iterations', type=int, help='每个进程数下计时的迭代步数')
+@click.option('--warmup', type=int, help='计时前的迭代步数')
+@click.option('--objective', type=click.Choice(['throughput', 'walltime']), default='throughput', help='推荐目标')
+@click.option('--min-efficiency', type=float, help='throughput 目标的最低并行效率')
+@click.option('--wall-time', type=float, help='walltime 目标的墙钟时间（秒）')
+@click.option('--target-iterations', type=int, help='walltime 目标的总迭代步数')
+@click.option('--db', default='.case_index.sqlite', help='索引数据库路径（缓存调优结果）')
+@click.option('--force', is_flag=True, help='忽略缓存重新测量')
+@click.option('--json', 'as_json', is_flag=True, help='以 JSON 输出')
+def autotune(case_file, cores, iterations, warmup, objective, min_efficiency, wall_time, target_iterations, db, force, as_json):
+    """测量不同进程数下的迭代速度并推荐 processor_count"""
+    try:
+        tuner = ProcessorAutotuner(
+            case_file,
+            core_counts=[int(value) for value in cores.split(",")] if cores else None,
+            iterations=iterations,
+            warmup=warmup
+        )
+        
+        with CaseIndex(db_path=db) as index:
+            with console.status(f"[bold green]测量 {tuner.core_counts} 个进程..."):
+                result = tuner.tune(
+                    objective=objective,
+                    min_efficiency=min_efficiency,
+                    wall_time=wall_time,
+                    target_iterations=target_iterations,
+                    index=index,
+                    force=force
+                )
+        
+        if as_json:
+            click.echo(json.dumps(result, indent=2, ensure_ascii=False))
+            return
+        
+        measured = {item["cores"]: item["seconds_per_iteration"] for item in result["measurements"] if not item["error"]}
+        single = measured.get(min(measured)) * min(measured) if measured else None
+        table = Table(title=f"扩展测量{'（缓存）' if result['cached'] else ''}: {case_file}")
+        table.add_column("进程数", justify="right")
+        table.add_column("s/迭代", justify="right")
+        table.add_column("加速比", justify="right")
+        table.add_column("并行效率", justify="right")
+        for item in result["measurements"]:
+            seconds = item["seconds_per_iteration"]
+            if item["error"]:
+                table.add_row(str(item["cores"]), f"[red]{item['error']}[/red]", "-", "-")
+                continue
+            speedup = single / seconds
+            table.add_row(str(item["cores"]), f"{seconds:.4g}", f"{speedup:.2f}", f"{speedup / item['cores']:.0%}")
+        console.print(table)
+        
+        recommendation = result["recommendation"]
+        console.print(
+            f"✅ 推荐 processor_count = {recommendation['processor_count']} "
+            f"（预计 {recommendation['seconds_per_iteration']:.4g} s/迭代，"
+            f"加速比 {recommendation['speedup']:.2f}，效率 {recommendation['efficiency']:.0%}）",
+            style="bold green" if recommendation["meets_target"] else "bold yellow"
+        )
+        if not recommendation["meets_target"]:
+            console.print("⚠️  没有进程数满足目标，已给出最接近的选择", style="yellow")
+    
+    except Exception as e:
+        console.print(f"❌ 调优失败: {e}", style="bold red")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('journal_file', type=click.Path(exists=True))
+@click.option('--version', 'fluent_version', default=None, help='Fluent 版本（默认取 FLUENT_VERSION 环境变量）')
+@click.option('--cache-dir', default=None, help='命令树索引目录（默认取 command_tree.cache_dir 配置）')
+def check_journal(journal_file, fluent_version, cache_dir):
+    """用缓存的命令树离线检查 journal 中的 TUI 命令"""
+    try:
+        fluent_version = fluent_version or os.getenv("FLUENT_VERSION", "2024.1")
+        if cache_dir is None:
+            with open("config/fluent_config.json", 'r', encoding='utf-8') as f:
+                cache_dir = json.load(f).get("command_tree", {}).get("cache_dir", ".fluent_commands")
+        
+        tree = CommandTree.load(cache_dir, fluent_version)
+        if tree is None:
+            console.print(
+                f"❌ 没有 Fluent {fluent_version} 的命令树索引（{cache_dir}），"
+                "先用该版本启动一次会话并执行任意 TUI 命令以生成索引",
+                style="bold red"
+            )
+            sys.exit(1)
+        
+        problems = tree.validate_journal(journal_file)
+        if not problems:
+            console.print(f"✅ {journal_file}: 全部 TUI 命令有效（Fluent {fluent_version}）", style="bold green")
+            return
+        
+        table = Table(title=f"无效命令: {journal_file}")
+        table.add_column("行", justify="right")
+        table.add_column("命令")
+        table.add_column("错误", style="red")
+        table.add_column("建议")
+        for problem in problems:
+            table.add_row(str(problem["line"]), problem["command"], problem["error"], ", ".join(problem["suggestions"]))
+        console.print(table)
+        sys.exit(1)
+    
+    except Exception as e:
+        console.print(f"❌ 检查失败: {e}", style="bold red")
+        sys.exit(1)
+
+
 @cli.command()
 def config():
     """显示配置信息"""
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+FluentWrapper 基准测试 - 基于进程内模拟后端，无需 Fluent 许可证
+
+测量 wrapper 自身的调用开销、批处理相对逐条调用的收益、期望状态设置的差异应用，
+以及求解数据缓存和 UDF 构建缓存的效果。远程调用延迟和数据规模可通过参数调整。
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from fluent_integration import FluentWrapper, UDFBuildCache
+from fluent_integration.fake_backend import DEFAULT_SETTINGS, FakeFluentBackend
+
+console = Console()
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "fluent_config.json"
+
+
+def make_wrapper(backend, work_dir):
+    """创建连接到模拟后端的 FluentWrapper"""
+    wrapper = FluentWrapper(config_path=str(CONFIG_PATH), launcher=backend.launch_fluent)
+    wrapper.udf_build_dir = str(work_dir)
+    wrapper.udf_cache = UDFBuildCache(cache_dir=str(Path(work_dir) / ".udf_cache"))
+    wrapper.start_fluent()
+    return wrapper
+
+
+def timed(func, repeat=1):
+    """多次运行取中位数耗时（秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_call_overhead(args, work_dir):
+    """wrapper 调用开销：零延迟后端上 execute_tui_command 与直接调用求解器的差值"""
+    backend = FakeFluentBackend(work_dir=work_dir)
+    wrapper = make_wrapper(backend, work_dir)
+    count = args.commands
+    
+    direct = timed(lambda: [wrapper.solver.execute_command("define/models/energy yes") for _ in range(count)], args.repeat)
+    wrapped = timed(lambda: [wrapper.execute_tui_command("define/models/energy yes") for _ in range(count)], args.repeat)
+    
+    overhead_us = (wrapped - direct) / count * 1e6
+    return {
+        "name": "调用开销",
+        "detail": f"{count} 条 TUI 命令",
+        "baseline_s": direct,
+        "optimized_s": wrapped,
+        "metric": f"{overhead_us:.1f} µs/调用"
+    }
+
+
+def bench_batching(args, work_dir):
+    """批处理收益：逐条调用与 execute_batch 在相同 RPC 延迟下的耗时"""
+    backend = FakeFluentBackend(latency={"rpc": args.rpc_latency_ms / 1000}, work_dir=work_dir)
+    wrapper = make_wrapper(backend, work_dir)
+    commands = [f"solve/set/under-relaxation/pressure 0.{index % 9 + 1}" for index in range(args.commands)]
+    
+    backend.reset_counters()
+    single = timed(lambda: [wrapper.execute_tui_command(command) for command in commands], args.repeat)
+    single_rpc = backend.calls["rpc"] // args.repeat
+    
+    backend.reset_counters()
+    batched = timed(lambda: wrapper.execute_batch(commands), args.repeat)
+    batch_rpc = backend.calls["rpc"] // args.repeat
+    
+    return {
+        "name": "批处理",
+        "detail": f"{len(commands)} 条命令, RPC {args.rpc_latency_ms} ms ({single_rpc} → {batch_rpc} 次调用)",
+        "baseline_s": single,
+        "optimized_s": batched,
+        "metric": f"{single / batched:.1f}x"
+    }
+
+
+def bench_desired_state(args, work_dir):
+    """期望状态设置：逐个叶子赋值与 apply_settings 差异应用，在相邻设计点间只改入口速度"""
+    backend = FakeFluentBackend(latency={"rpc": args.rpc_latency_ms / 1000}, work_dir=work_dir)
+    wrapper = make_wrapper(backend, work_dir)
+    points = [copy.deepcopy(DEFAULT_SETTINGS) for _ in range(args.points)]
+    for index, desired in enumerate(points):
+        desired["setup"]["boundary_conditions"]["velocity_inlet"]["inlet"]["momentum"]["velocity"]["value"] = 1.0 + index
+    
+    def leaves(state, path=()):
+        for key, value in state.items():
+            if isinstance(value, dict):
+                yield from leaves(value, path + (key,))
+            else:
+                yield path, key, value
+    
+    def assign_each():
+        for desired in points:
+            for path, key, value in leaves(desired):
+                node = wrapper.solver.settings
+                for name in path:
+                    # 具名对象容器（如 velocity_inlet）与 PyFluent 一样按名称索引
+                    node = node[name] if hasattr(node, "child_object_type") else getattr(node, name)
+                node.set_state({key: value})
+    
+    backend.reset_counters()
+    each = timed(assign_each, args.repeat)
+    each_rpc = backend.calls["rpc"] // args.repeat
+    
+    wrapper.apply_settings(points[-1])
+    backend.reset_counters()
+    diffed = timed(lambda: [wrapper.apply_settings(desired) for desired in points], args.repeat)
+    diff_rpc = backend.calls["rpc"] // args.repeat
+    
+    return {
+        "name": "期望状态设置",
+        "detail": f"{len(points)} 个设计点, RPC {args.rpc_latency_ms} ms ({each_rpc} → {diff_rpc} 次调用)",
+        "baseline_s": each,
+        "optimized_s": diffed,
+        "metric": f"{each / max(diffed, 1e-9):.1f}x"
+    }
+
+
+def bench_solution_cache(args, work_dir):
+    """求解数据缓存：同一状态下重复读取场数据"""
+    backend = FakeFluentBackend(
+        latency={"rpc": args.rpc_latency_ms / 1000, "field_bytes_per_second": args.bandwidth_mb * 1e6},
+        zones=args.zones,
+        cells_per_zone=args.cells,
+        work_dir=work_dir
+    )
+    wrapper = make_wrapper(backend, work_dir)
+    variables = ["pressure", "temperature", "velocity-magnitude"]
+    
+    cold = timed(lambda: wrapper.get_solution_data(variables, use_cache=False), args.repeat)
+    wrapper.get_solution_data(variables)
+    warm = timed(lambda: wrapper.get_solution_data(variables), args.repeat)
+    stats = wrapper.solution_cache.stats()
+    
+    payload_mb = len(variables) * args.zones * args.cells * 8 / 1e6
+    return {
+        "name": "求解数据缓存",
+        "detail": f"{payload_mb:.1f} MB, 命中率 {stats['hit_rate']:.0%}",
+        "baseline_s": cold,
+        "optimized_s": warm,
+        "metric": f"{cold / max(warm, 1e-9):.0f}x"
+    }
+
+
+def bench_udf_cache(args, work_dir):
+    """UDF 构建缓存：源码未变化时第二次编译"""
+    backend = FakeFluentBackend(latency={"compile": args.compile_s}, work_dir=work_dir)
+    wrapper = make_wrapper(backend, work_dir)
+    source = Path(work_dir) / "bench_udf.c"
+    source.write_text('#include "udf.h"\nDEFINE_ADJUST(bench_adjust, d) {}\n', encoding="utf-8")
+    
+    first = timed(lambda: wrapper.compile_udf(str(source)))
+    second = timed(lambda: wrapper.compile_udf(str(source)))
+    
+    return {
+        "name": "UDF 构建缓存",
+        "detail": f"编译延迟 {args.compile_s} s, 编译 {backend.calls['compile']} 次",
+        "baseline_s": first,
+        "optimized_s": second,
+        "metric": f"{first / max(second, 1e-9):.0f}x"
+    }
+
+
+BENCHMARKS = [bench_call_overhead, bench_batching, bench_desired_state, bench_solution_cache, bench_udf_cache]
+
+
+def run_benchmarks(args):
+    """运行全部基准测试"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fcm-bench-") as work_dir:
+        for benchmark in BENCHMARKS:
+            with console.status(f"[bold green]{benchmark.__doc__.split('：')[0]}..."):
+                results.append(benchmark(args, work_dir))
+    return results
+
+
+def print_results(results):
+    """以表格显示结果"""
+    table = Table(title="FluentWrapper 基准测试（模拟后端）")
+    table.add_column("项目", style="cyan")
+    table.add_column("条件")
+    table.add_column("基线 (s)", justify="right")
+    table.add_column("优化 (s)", justify="right")
+    table.add_column("结果", style="bold green", justify="right")
+    
+    for result in results:
+        table.add_row(
+            result["name"],
+            result["detail"],
+            f"{result['baseline_s']:.4f}",
+            f"{result['optimized_s']:.4f}",
+            result["metric"]
+        )
+    console.print(table)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="FluentWrapper 基准测试（模拟后端）")
+    parser.add_argument("--commands", type=int, default=200, help="命令数量")
+    parser.add_argument("--points", type=int, default=20, help="期望状态设置的设计点数")
+    parser.add_argument("--rpc-latency-ms", type=float, default=2.0, help="每次远程调用的模拟延迟 (ms)")
+    parser.add_argument("--zones", type=int, default=16, help="zone 数量")
+    parser.add_argument("--cells", type=int, default=50000, help="每个 zone 的数据点数")
+    parser.add_argument("--bandwidth-mb", type=float, default=500.0, help="场数据传输带宽 (MB/s)")
+    parser.add_argument("--compile-s", type=float, default=1.0, help="UDF 编译的模拟耗时 (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（取中位数）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+    
+    # 基准测试时关闭逐调用日志，避免日志本身成为开销的主要部分
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    results = run_benchmarks(args)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
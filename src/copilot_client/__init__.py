@@ -2,7 +2,11 @@
 Copilot Client Package
 """
 
-from .client import CopilotClient
-from .prompt_builder import PromptBuilder
+from .client import GitHubAPIClient
+from .prompt_builder import PromptBuilder, estimate_tokens
+from .udf_index import UDFSnippetIndex
 
-__all__ = ["CopilotClient", "PromptBuilder"]
+# 保留向后兼容的别名
+CopilotClient = GitHubAPIClient
+
+__all__ = ["GitHubAPIClient", "CopilotClient", "PromptBuilder", "UDFSnippetIndex", "estimate_tokens"]
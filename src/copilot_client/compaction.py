@@ -0,0 +1,270 @@
+"""
+Context Compaction - 压缩发送给模型的代码上下文
+
+去除注释、折叠空白、删除重复片段，并可选地省略任务未引用的函数体，
+在不改变代码语义的前提下减少提示词 token 数。
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+SUPPORTED_LANGUAGES = ("c", "python", "scheme")
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_C_FUNCTION_RE = re.compile(
+    r"^(?:[A-Za-z_][A-Za-z0-9_ \t\*]*?[ \t\*])?([A-Za-z_][A-Za-z0-9_]*)\s*\(([^;{}]*)\)\s*\{",
+    re.MULTILINE
+)
+_PY_FUNCTION_RE = re.compile(r"^([ \t]*)def[ \t]+([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数（约 4 个字符 / token）"""
+    return (len(text) + 3) // 4
+
+
+def strip_comments(code: str, language: str) -> str:
+    """
+    去除注释（跳过字符串字面量中的注释符号）
+    
+    Args:
+        code: 源代码
+        language: 编程语言 (c, python, scheme)
+    
+    Returns:
+        去除注释后的代码
+    """
+    if language == "c":
+        return _strip_comments(code, line_markers=("//",), block=("/*", "*/"), quotes=('"', "'"))
+    if language == "python":
+        return _strip_comments(code, line_markers=("#",), block=None, quotes=('"""', "'''", '"', "'"))
+    if language == "scheme":
+        return _strip_comments(code, line_markers=(";",), block=("#|", "|#"), quotes=('"',))
+    return code
+
+
+def collapse_whitespace(code: str, language: str) -> str:
+    """
+    折叠空白：去除空行和行尾空白；C/Scheme 额外去除缩进并合并连续空格
+    
+    Python 的缩进有语义，只去除空行和行尾空白。
+    
+    Args:
+        code: 源代码
+        language: 编程语言
+    
+    Returns:
+        折叠空白后的代码
+    """
+    lines = []
+    for line in code.split("\n"):
+        line = line.rstrip()
+        if not line.strip():
+            continue
+        if language != "python":
+            line = line.strip()
+            # 含字符串字面量的行保持原样，避免改变字符串内容
+            if '"' not in line and "'" not in line:
+                line = re.sub(r"[ \t]+", " ", line)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def compact_code(code: str, language: str) -> str:
+    """
+    压缩单段代码（去注释 + 折叠空白）
+    
+    Args:
+        code: 源代码
+        language: 编程语言
+    
+    Returns:
+        压缩后的代码
+    """
+    if language not in SUPPORTED_LANGUAGES:
+        return code.strip()
+    return collapse_whitespace(strip_comments(code, language), language)
+
+
+def elide_unreferenced_functions(code: str, language: str, task: str) -> str:
+    """
+    省略任务描述未引用的函数体，仅保留签名
+    
+    对 DEFINE_ 宏，以宏的第一个参数（UDF 名称）作为函数名。
+    
+    Args:
+        code: 源代码
+        language: 编程语言 (c, python)
+        task: 任务描述
+    
+    Returns:
+        处理后的代码
+    """
+    referenced = set(_IDENTIFIER_RE.findall(task or ""))
+    
+    if language == "c":
+        return _elide_c_functions(code, referenced)
+    if language == "python":
+        return _elide_python_functions(code, referenced)
+    return code
+
+
+def compact_snippets(
+    snippets: List[str],
+    language: str,
+    task: Optional[str] = None,
+    elide_unreferenced: bool = False
+) -> Tuple[List[str], Dict[str, float]]:
+    """
+    压缩上下文片段列表并去重
+    
+    Args:
+        snippets: 上下文片段
+        language: 编程语言
+        task: 任务描述（用于判断函数是否被引用）
+        elide_unreferenced: 是否省略未被任务引用的函数体
+    
+    Returns:
+        (压缩后的片段列表, 统计信息)
+    """
+    compacted = []
+    seen = set()
+    for snippet in snippets:
+        code = compact_code(snippet, language)
+        if elide_unreferenced and task:
+            code = elide_unreferenced_functions(code, language, task)
+        if not code or code in seen:
+            continue
+        seen.add(code)
+        compacted.append(code)
+    
+    tokens_before = sum(estimate_tokens(snippet) for snippet in snippets)
+    tokens_after = sum(estimate_tokens(snippet) for snippet in compacted)
+    stats = {
+        "snippets_before": len(snippets),
+        "snippets_after": len(compacted),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "saved_ratio": 1 - tokens_after / tokens_before if tokens_before else 0.0
+    }
+    return compacted, stats
+
+
+def _strip_comments(code: str, line_markers: Tuple[str, ...], block: Optional[Tuple[str, str]], quotes: Tuple[str, ...]) -> str:
+    """按字符扫描去除注释，保留字符串字面量和换行"""
+    out = []
+    i = 0
+    n = len(code)
+    while i < n:
+        # 字符串字面量
+        quote = next((q for q in quotes if code.startswith(q, i)), None)
+        if quote:
+            end = i + len(quote)
+            while end < n and not code.startswith(quote, end):
+                end += 2 if code[end] == "\\" else 1
+            end = min(end + len(quote), n)
+            out.append(code[i:end])
+            i = end
+            continue
+        
+        # 块注释（保留其中的换行，维持行结构）
+        if block and code.startswith(block[0], i):
+            end = code.find(block[1], i + len(block[0]))
+            end = n if end == -1 else end + len(block[1])
+            out.append("\n" * code.count("\n", i, end))
+            i = end
+            continue
+        
+        # 行注释
+        if any(code.startswith(marker, i) for marker in line_markers):
+            end = code.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        
+        out.append(code[i])
+        i += 1
+    return "".join(out)
+
+
+def _matching_brace(code: str, open_index: int) -> int:
+    """返回与 open_index 处 '{' 匹配的 '}' 的位置（忽略字符串中的括号）"""
+    depth = 0
+    i = open_index
+    in_string = None
+    while i < len(code):
+        char = code[i]
+        if in_string:
+            if char == "\\":
+                i += 2
+                continue
+            if char == in_string:
+                in_string = None
+        elif char in "\"'":
+            in_string = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(code) - 1
+
+
+def _elide_c_functions(code: str, referenced: set) -> str:
+    """C: 将未引用函数的函数体替换为占位注释"""
+    out = []
+    position = 0
+    skip_until = 0
+    for match in _C_FUNCTION_RE.finditer(code):
+        # 跳过函数体内部的匹配（循环宏、控制语句等）
+        if match.start() < skip_until:
+            continue
+        name = match.group(1)
+        if name.startswith("DEFINE_"):
+            args = [arg.strip() for arg in match.group(2).split(",")]
+            name = args[0] if args and args[0] else name
+        if name in ("if", "for", "while", "switch"):
+            continue
+        
+        open_index = match.end() - 1
+        close_index = _matching_brace(code, open_index)
+        skip_until = close_index + 1
+        if name in referenced:
+            continue
+        
+        out.append(code[position:open_index])
+        out.append("{ /* body elided */ }")
+        position = close_index + 1
+    out.append(code[position:])
+    return "".join(out)
+
+
+def _elide_python_functions(code: str, referenced: set) -> str:
+    """Python: 将未引用函数的函数体替换为 ..."""
+    lines = code.split("\n")
+    out = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        match = _PY_FUNCTION_RE.match(line)
+        if not match or match.group(2) in referenced or not line.rstrip().endswith(":"):
+            out.append(line)
+            i += 1
+            continue
+        
+        indent = len(match.group(1))
+        out.append(line)
+        i += 1
+        body_indent = None
+        while i < len(lines):
+            current = lines[i]
+            current_indent = len(current) - len(current.lstrip())
+            if current.strip() and current_indent <= indent:
+                break
+            if body_indent is None and current.strip():
+                body_indent = current_indent
+            i += 1
+        out.append(" " * (body_indent or indent + 4) + "...")
+    return "\n".join(out)
@@ -2,9 +2,12 @@
 Prompt Builder - 构建优化的提示词
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 
+from .compaction import compact_code, compact_snippets, estimate_tokens
+from .udf_index import UDFSnippetIndex
+
 
 class PromptBuilder:
     """提示词构建器"""
@@ -23,9 +26,92 @@ UDF Programming Guidelines:
 - Handle parallel processing with #if !RP_HOST
 - Proper memory management
 """
+
+    # 提示词布局版本：静态前缀或可变部分的顺序变化时递增，便于对比缓存命中率
+    LAYOUT_VERSION = "2"
+    
+    # Chat 请求的静态系统前缀 - 所有请求逐字节一致，以命中服务端前缀缓存
+    # 注意: 不要在此处插入任何随请求变化的内容（时间戳、描述、上下文等）
+    SYSTEM_PROMPT = """You are an expert in ANSYS Fluent CFD and code generation.
+
+Environment:
+- ANSYS Fluent CFD solver, driven through PyFluent, compiled UDFs (C) and TUI/Scheme commands.
+
+UDF (C) guidelines:
+- Include "udf.h" and use the appropriate DEFINE_ macros.
+- Use thread, cell and face loop macros (begin_c_loop, begin_f_loop) correctly.
+- Guard parallel code with #if !RP_HOST / #if !RP_NODE where required.
+- Declare all variables at the top of each function; avoid dynamic memory in hot loops.
+
+PyFluent (Python) guidelines:
+- Use the modern ansys.fluent.core settings API; include all imports.
+- Add error handling and follow PEP 8.
+
+Scheme / TUI guidelines:
+- Emit valid Fluent Scheme expressions or TUI command paths only.
+
+Output rules:
+- Return only code for the requested language, without prose before or after it.
+- The variable part of the request (language, context, task) follows in the user message."""
     
-    def __init__(self):
-        """初始化 Prompt Builder"""
+    # 各类提示词的静态要求段落（不含任何请求相关内容）
+    UDF_REQUIREMENTS = """
+Requirements:
+1. Complete, compilable C code
+2. Proper error handling
+3. Comments explaining key sections
+4. Follow Fluent UDF conventions
+"""
+
+    PYTHON_REQUIREMENTS = """
+Requirements:
+1. Use modern PyFluent API
+2. Include proper imports
+3. Add error handling
+4. Include docstrings
+5. Follow PEP 8 style
+"""
+
+    OPTIMIZATION_INSTRUCTIONS = """
+Optimize the Fluent code given at the end of this prompt.
+Provide optimized code with explanations.
+"""
+
+    EXPLANATION_INSTRUCTIONS = """
+Explain the ANSYS Fluent code given at the end of this prompt.
+
+Provide:
+1. Overall purpose
+2. Key components and their functions
+3. Important variables and their roles
+4. Any Fluent-specific features used
+5. Potential improvements
+"""
+    
+    def __init__(
+        self,
+        snippet_index: Optional[UDFSnippetIndex] = None,
+        example_top_k: int = 3,
+        example_token_budget: int = 800,
+        compaction: bool = False,
+        elide_unreferenced: bool = False
+    ):
+        """
+        初始化 Prompt Builder
+        
+        Args:
+            snippet_index: 示例 UDF 检索索引（None 表示不检索示例）
+            example_top_k: 最多引用的示例片段数
+            example_token_budget: 示例片段的 token 预算
+            compaction: 是否压缩上下文和待处理代码（去注释、折叠空白、去重）
+            elide_unreferenced: 压缩时是否省略任务未引用的函数体
+        """
+        self.snippet_index = snippet_index
+        self.example_top_k = example_top_k
+        self.example_token_budget = example_token_budget
+        self.compaction = compaction
+        self.elide_unreferenced = elide_unreferenced
+        self.last_compaction_stats: Optional[Dict[str, float]] = None
         logger.info("PromptBuilder initialized")
     
     def build_udf_prompt(
@@ -47,24 +133,200 @@ UDF Programming Guidelines:
         Returns:
             完整提示词
         """
-        prompt_parts = [
-            self.FLUENT_CONTEXT,
-            self.UDF_CONTEXT,
-            f"\nTask: Generate a {udf_type} UDF named '{function_name}'",
-            f"Description: {description}",
-            "\nRequirements:",
-            "1. Complete, compilable C code",
-            "2. Proper error handling",
-            "3. Comments explaining key sections",
-            "4. Follow Fluent UDF conventions"
-        ]
+        # 静态前缀在前，示例、上下文和任务描述等可变部分在后
+        prompt_parts = [self.static_prefix("udf")]
+        
+        examples = self.retrieve_examples(description, udf_type)
+        if examples:
+            prompt_parts.append("\nReference Examples (known-good UDFs):")
+            for example in examples:
+                prompt_parts.extend(["```c", example["text"], "```"])
         
         if additional_context:
+            if self.compaction:
+                additional_context, _ = self.compact_context(additional_context, "c", task=description)
             prompt_parts.append("\nAdditional Context:")
             prompt_parts.extend(additional_context)
         
+        prompt_parts.append(f"\nTask: Generate a {udf_type} UDF named '{function_name}'")
+        prompt_parts.append(f"Description: {description}")
+        
         return "\n".join(prompt_parts)
     
+    def build_messages(self, user_prompt: str) -> List[Dict[str, str]]:
+        """
+        构建 Chat 消息：静态系统前缀 + 用户消息
+        
+        Args:
+            user_prompt: 用户消息（build_request_prompt 的结果）
+        
+        Returns:
+            消息列表
+        """
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def build_request_prompt(
+        self,
+        task: str,
+        language: str,
+        context: Optional[List[str]] = None,
+        syntax_hints: Optional[List[str]] = None
+    ) -> str:
+        """
+        构建 Chat 请求的用户消息（前缀稳定布局）
+        
+        布局顺序从最稳定到最易变：语言提示（按语言固定）-> 上下文 -> 任务描述，
+        保证同一语言的请求共享尽可能长的相同前缀。
+        
+        Args:
+            task: 任务描述
+            language: 编程语言 (c, python, scheme)
+            context: 上下文代码片段
+            syntax_hints: 语言的语法提示
+        
+        Returns:
+            用户消息
+        """
+        parts = []
+        
+        # 语法提示（同一语言下不变）
+        if syntax_hints:
+            parts.append(f"Language: {language}. Use syntax like: {', '.join(syntax_hints)}")
+        else:
+            parts.append(f"Language: {language}.")
+        
+        if context:
+            parts.append("Context:\n" + "\n\n".join(context))
+        
+        # 任务描述放在最后
+        parts.append(f"Task:\n{task}")
+        
+        return "\n\n".join(parts)
+    
+    def static_prefix(self, kind: str) -> str:
+        """
+        获取指定类型提示词的静态前缀
+        
+        静态前缀在不同请求之间逐字节一致，可作为系统消息发送以命中
+        服务端的前缀缓存。
+        
+        Args:
+            kind: 提示词类型 (udf, python, optimization, explanation)
+        
+        Returns:
+            静态前缀文本
+        """
+        prefixes = {
+            "udf": [self.FLUENT_CONTEXT, self.UDF_CONTEXT, self.UDF_REQUIREMENTS],
+            "python": [self.FLUENT_CONTEXT, self.PYTHON_REQUIREMENTS],
+            "optimization": [self.FLUENT_CONTEXT, self.OPTIMIZATION_INSTRUCTIONS],
+            "explanation": [self.FLUENT_CONTEXT, self.EXPLANATION_INSTRUCTIONS]
+        }
+        if kind not in prefixes:
+            raise ValueError(f"Unknown prompt kind: {kind}")
+        return "\n".join(prefixes[kind])
+    
+    def compact_context(
+        self,
+        snippets: List[str],
+        language: str,
+        task: Optional[str] = None,
+        elide_unreferenced: Optional[bool] = None
+    ) -> Tuple[List[str], Dict[str, float]]:
+        """
+        压缩上下文片段：去注释、折叠空白、去重，可选省略未引用的函数体
+        
+        Args:
+            snippets: 上下文片段
+            language: 编程语言 (c, python, scheme)
+            task: 任务描述（用于判断函数是否被引用）
+            elide_unreferenced: 是否省略未引用的函数体（默认使用实例设置）
+        
+        Returns:
+            (压缩后的片段列表, 统计信息)，统计信息包含压缩前后的 token 数
+        """
+        if elide_unreferenced is None:
+            elide_unreferenced = self.elide_unreferenced
+        
+        compacted, stats = compact_snippets(snippets, language, task=task, elide_unreferenced=elide_unreferenced)
+        self.last_compaction_stats = stats
+        logger.info(
+            f"Context compacted: {stats['tokens_before']} -> {stats['tokens_after']} tokens, "
+            f"{stats['snippets_before']} -> {stats['snippets_after']} snippets"
+        )
+        return compacted, stats
+    
+    def compact_code(self, code: str, language: str) -> str:
+        """
+        压缩单段代码（去注释、折叠空白）
+        
+        Args:
+            code: 源代码
+            language: 编程语言
+        
+        Returns:
+            压缩后的代码
+        """
+        compacted = compact_code(code, language)
+        self.last_compaction_stats = {
+            "snippets_before": 1,
+            "snippets_after": 1,
+            "tokens_before": estimate_tokens(code),
+            "tokens_after": estimate_tokens(compacted),
+            "saved_ratio": 1 - estimate_tokens(compacted) / estimate_tokens(code) if code else 0.0
+        }
+        logger.info(
+            f"Code compacted: {self.last_compaction_stats['tokens_before']} -> "
+            f"{self.last_compaction_stats['tokens_after']} tokens"
+        )
+        return compacted
+    
+    def retrieve_examples(
+        self,
+        description: str,
+        udf_type: str,
+        top_k: Optional[int] = None,
+        token_budget: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        从示例索引中检索与任务相关的 UDF 片段
+        
+        Args:
+            description: 功能描述
+            udf_type: UDF 类型 (profile 或 DEFINE_PROFILE)
+            top_k: 最多返回的片段数
+            token_budget: 片段总 token 预算
+        
+        Returns:
+            片段列表（按相关度降序，总长度不超过预算）
+        """
+        top_k = top_k if top_k is not None else self.example_top_k
+        token_budget = token_budget if token_budget is not None else self.example_token_budget
+        if not self.snippet_index or top_k <= 0:
+            return []
+        macro = udf_type if udf_type.upper().startswith("DEFINE_") else f"DEFINE_{udf_type.upper()}"
+        
+        # 多取一些候选，便于在预算内跳过过长的片段
+        candidates = self.snippet_index.search(description, macro=macro, top_k=top_k * 3)
+        
+        selected = []
+        used = 0
+        for candidate in candidates:
+            cost = estimate_tokens(candidate["text"])
+            if used + cost > token_budget:
+                continue
+            selected.append(candidate)
+            used += cost
+            if len(selected) >= top_k:
+                break
+        
+        if selected:
+            logger.info(f"Retrieved {len(selected)} example snippets (~{used} tokens)")
+        return selected
+    
     def build_python_prompt(
         self,
         description: str,
@@ -82,22 +344,17 @@ UDF Programming Guidelines:
         Returns:
             完整提示词
         """
-        prompt_parts = [
-            self.FLUENT_CONTEXT,
-            f"\nTask: Generate a Python script using {api_type}",
-            f"Description: {description}",
-            "\nRequirements:",
-            "1. Use modern PyFluent API",
-            "2. Include proper imports",
-            "3. Add error handling",
-            "4. Include docstrings",
-            "5. Follow PEP 8 style"
-        ]
+        prompt_parts = [self.static_prefix("python")]
         
         if additional_context:
+            if self.compaction:
+                additional_context, _ = self.compact_context(additional_context, "python", task=description)
             prompt_parts.append("\nAdditional Context:")
             prompt_parts.extend(additional_context)
         
+        prompt_parts.append(f"\nTask: Generate a Python script using {api_type}")
+        prompt_parts.append(f"Description: {description}")
+        
         return "\n".join(prompt_parts)
     
     def build_optimization_prompt(
@@ -117,6 +374,9 @@ UDF Programming Guidelines:
         Returns:
             完整提示词
         """
+        if self.compaction:
+            code = self.compact_code(code, language)
+        
         goals = optimization_goals or [
             "Improve performance",
             "Reduce memory usage",
@@ -124,13 +384,13 @@ UDF Programming Guidelines:
         ]
         
         prompt_parts = [
-            f"Optimize the following {language} code for Fluent:",
-            f"\n```{language}",
-            code,
-            "```",
+            self.static_prefix("optimization"),
             "\nOptimization goals:",
             *[f"- {goal}" for goal in goals],
-            "\nProvide optimized code with explanations."
+            f"\nLanguage: {language}",
+            f"```{language}",
+            code,
+            "```"
         ]
         
         return "\n".join(prompt_parts)
@@ -146,17 +406,12 @@ UDF Programming Guidelines:
         Returns:
             完整提示词
         """
-        return f"""
-Explain the following {language} code used in ANSYS Fluent:
-
-```{language}
-{code}
-```
-
-Provide:
-1. Overall purpose
-2. Key components and their functions
-3. Important variables and their roles
-4. Any Fluent-specific features used
-5. Potential improvements
-"""
+        prompt_parts = [
+            self.static_prefix("explanation"),
+            f"\nLanguage: {language}",
+            f"```{language}",
+            code,
+            "```"
+        ]
+        
+        return "\n".join(prompt_parts)
@@ -0,0 +1,318 @@
+"""
+UDF Snippet Index - 已验证 UDF 代码片段的本地倒排索引（BM25 检索）
+
+用于在构建提示词时检索相似的示例 UDF，提升首次生成的准确率。
+"""
+
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from loguru import logger
+
+
+class UDFSnippetIndex:
+    """UDF 代码片段倒排索引"""
+    
+    # BM25 参数
+    K1 = 1.5
+    B = 0.75
+    
+    DEFAULT_PATTERNS = ("*.c", "*.h")
+    
+    STOPWORDS = {
+        "the", "a", "an", "and", "or", "of", "to", "in", "for", "on", "with",
+        "is", "at", "by", "be", "this", "that", "int", "real", "return", "if",
+        "else", "include", "udf", "h"
+    }
+    
+    _TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+    _DEFINE_RE = re.compile(r"^[ \t]*(DEFINE_[A-Z_]+)\s*\(\s*([A-Za-z_][A-Za-z0-9_]*)", re.MULTILINE)
+    
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        初始化索引
+        
+        Args:
+            index_path: 索引持久化文件路径（None 表示仅内存）
+        """
+        self.index_path = Path(index_path) if index_path else None
+        self.files: Dict[str, Dict] = {}
+        self.snippets: Dict[str, Dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+        
+        if self.index_path and self.index_path.exists():
+            self._load()
+    
+    @classmethod
+    def from_directories(
+        cls,
+        directories: Iterable[str],
+        index_path: Optional[str] = None
+    ) -> "UDFSnippetIndex":
+        """
+        加载已有索引并按目录增量更新
+        
+        Args:
+            directories: 语料目录（如 examples/, udfs/）
+            index_path: 索引持久化文件路径
+        
+        Returns:
+            索引实例
+        """
+        index = cls(index_path)
+        index.update(directories)
+        return index
+    
+    def update(self, directories: Iterable[str], patterns: Iterable[str] = DEFAULT_PATTERNS) -> Dict[str, int]:
+        """
+        增量更新索引（按 mtime 和文件大小判断变化）
+        
+        Args:
+            directories: 语料目录
+            patterns: 文件匹配模式
+        
+        Returns:
+            更新统计 {"added": n, "updated": n, "removed": n, "unchanged": n}
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        roots = []
+        
+        for directory in directories:
+            root = Path(directory)
+            if not root.is_dir():
+                continue
+            roots.append(root.as_posix().rstrip("/") + "/")
+            for pattern in patterns:
+                for path in sorted(root.rglob(pattern)):
+                    key = path.as_posix()
+                    seen.add(key)
+                    stat = path.stat()
+                    signature = {"mtime": stat.st_mtime, "size": stat.st_size}
+                    
+                    known = self.files.get(key)
+                    if known and known["mtime"] == signature["mtime"] and known["size"] == signature["size"]:
+                        stats["unchanged"] += 1
+                        continue
+                    
+                    if known:
+                        self._remove_file(key)
+                        stats["updated"] += 1
+                    else:
+                        stats["added"] += 1
+                    
+                    text = path.read_text(encoding="utf-8", errors="replace")
+                    self._add_file(key, text, signature)
+        
+        # 仅清理本次扫描目录下已删除的文件，add_text() 添加的片段不受影响
+        removed = [
+            key for key in self.files
+            if key not in seen and any(key.startswith(root) for root in roots)
+        ]
+        for key in removed:
+            self._remove_file(key)
+            stats["removed"] += 1
+        
+        if stats["added"] or stats["updated"] or stats["removed"]:
+            logger.info(f"UDF index updated: {stats}")
+            self.save()
+        
+        return stats
+    
+    def add_text(self, source: str, text: str) -> List[str]:
+        """
+        直接索引一段代码文本（不对应磁盘文件）
+        
+        Args:
+            source: 来源标识
+            text: 代码文本
+        
+        Returns:
+            新增片段 ID 列表
+        """
+        if source in self.files:
+            self._remove_file(source)
+        return self._add_file(source, text, {"mtime": None, "size": len(text)})
+    
+    def search(self, query: str, macro: Optional[str] = None, top_k: int = 3) -> List[Dict]:
+        """
+        BM25 检索
+        
+        Args:
+            query: 查询文本（功能描述、关键词）
+            macro: 期望的 DEFINE_ 宏类型，匹配的片段额外加权
+            top_k: 返回数量
+        
+        Returns:
+            按得分降序排列的片段列表（包含 score 字段）
+        """
+        if not self.snippets:
+            return []
+        
+        query_terms = Counter(self.tokenize(query))
+        if macro:
+            # 宏类型作为高权重查询词参与评分
+            for term in self.tokenize(macro):
+                query_terms[term] += 2
+        
+        n_docs = len(self.snippets)
+        avg_length = self._total_length / n_docs
+        scores: Dict[str, float] = defaultdict(float)
+        
+        for term, query_weight in query_terms.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for snippet_id, tf in postings.items():
+                length = self.snippets[snippet_id]["length"]
+                norm = tf + self.K1 * (1 - self.B + self.B * length / avg_length)
+                scores[snippet_id] += query_weight * idf * tf * (self.K1 + 1) / norm
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [
+            {**self._public(self.snippets[snippet_id]), "score": score}
+            for snippet_id, score in ranked
+        ]
+    
+    def save(self):
+        """持久化索引"""
+        if not self.index_path:
+            return
+        
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": 1,
+            "files": self.files,
+            "snippets": self.snippets
+        }
+        tmp_path = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        tmp_path.replace(self.index_path)
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """分词：提取标识符，转小写，并拆分下划线复合词"""
+        terms = []
+        for token in cls._TOKEN_RE.findall(text):
+            token = token.lower()
+            parts = [part for part in token.split("_") if part]
+            if len(parts) > 1:
+                terms.append(token)
+            terms.extend(parts)
+        return [term for term in terms if len(term) > 1 and term not in cls.STOPWORDS]
+    
+    def _load(self):
+        """从磁盘加载索引并重建倒排表"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load UDF index {self.index_path}, rebuilding: {e}")
+            return
+        
+        self.files = payload.get("files", {})
+        self.snippets = payload.get("snippets", {})
+        for snippet_id, snippet in self.snippets.items():
+            self._index_snippet(snippet_id, snippet)
+        
+        logger.info(f"UDF index loaded: {len(self.snippets)} snippets from {len(self.files)} files")
+    
+    def _add_file(self, key: str, text: str, signature: Dict) -> List[str]:
+        """切分文件为片段并加入索引"""
+        snippet_ids = []
+        for position, (macro, name, snippet_text) in enumerate(self._split_snippets(text)):
+            snippet_id = f"{key}#{position}"
+            terms = self.tokenize(snippet_text)
+            snippet = {
+                "source": key,
+                "macro": macro,
+                "name": name,
+                "text": snippet_text,
+                "length": len(terms),
+                "terms": dict(Counter(terms))
+            }
+            self.snippets[snippet_id] = snippet
+            self._index_snippet(snippet_id, snippet)
+            snippet_ids.append(snippet_id)
+        
+        self.files[key] = {**signature, "snippets": snippet_ids}
+        return snippet_ids
+    
+    def _remove_file(self, key: str):
+        """从索引中移除文件的全部片段"""
+        for snippet_id in self.files.pop(key, {}).get("snippets", []):
+            snippet = self.snippets.pop(snippet_id, None)
+            if not snippet:
+                continue
+            self._total_length -= snippet["length"]
+            for term in snippet["terms"]:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(snippet_id, None)
+                    if not postings:
+                        del self._postings[term]
+    
+    def _index_snippet(self, snippet_id: str, snippet: Dict):
+        """将片段加入倒排表"""
+        self._total_length += snippet["length"]
+        for term, tf in snippet["terms"].items():
+            self._postings[term][snippet_id] = tf
+    
+    def _split_snippets(self, text: str) -> List[tuple]:
+        """
+        按 DEFINE_ 宏切分代码，每个片段包含紧邻的前置注释和完整函数体
+        
+        Returns:
+            [(macro, function_name, snippet_text), ...]
+        """
+        matches = list(self._DEFINE_RE.finditer(text))
+        if not matches:
+            return [(None, None, text.strip())] if text.strip() else []
+        
+        snippets = []
+        for match in matches:
+            start = self._leading_comment_start(text, match.start())
+            end = self._function_end(text, match.end())
+            snippets.append((match.group(1), match.group(2), text[start:end].strip()))
+        return snippets
+    
+    @staticmethod
+    def _leading_comment_start(text: str, position: int) -> int:
+        """向前扩展到紧邻的注释块起点"""
+        lines = text[:position].split("\n")
+        # 最后一项是宏所在行的前缀，保留
+        keep = len(lines) - 1
+        while keep > 0:
+            stripped = lines[keep - 1].strip()
+            if stripped.startswith(("/*", "*", "//")) or stripped.endswith("*/"):
+                keep -= 1
+            else:
+                break
+        return len("\n".join(lines[:keep])) + (1 if keep else 0)
+    
+    @staticmethod
+    def _function_end(text: str, position: int) -> int:
+        """从宏参数之后找到匹配的函数体结束位置"""
+        depth = 0
+        opened = False
+        for index in range(position, len(text)):
+            char = text[index]
+            if char == "{":
+                depth += 1
+                opened = True
+            elif char == "}":
+                depth -= 1
+                if opened and depth == 0:
+                    return index + 1
+        return len(text)
+    
+    @staticmethod
+    def _public(snippet: Dict) -> Dict:
+        """去掉内部字段"""
+        return {key: value for key, value in snippet.items() if key != "terms"}
@@ -9,15 +9,36 @@ __author__ = "Fluent-Copilot Integration Team"
 
 from .copilot_bridge import CodeGeneratorBridge
 from .fluent_wrapper import FluentWrapper
+from .session_pool import FluentSessionPool
+from .placement import CorePlacement
+from .async_wrapper import AsyncFluentWrapper
+from .checkpoint import CheckpointManager
 from .udf_generator import UDFGenerator
+from .profile_writer import ProfileWriter
+from .field_data import FieldDataExtractor
+from .solution_cache import SolutionDataCache
+from .udf_cache import UDFBuildCache
+from .case_index import CaseIndex
+from .sweep import SweepEngine
+from .scheduler import JobScheduler, LocalLicenseServer
+from .autotune import ProcessorAutotuner
+from .multiplexer import SessionMultiplexer
+from .warm_start import WarmStartRegistry
+from .fake_backend import FakeFluentBackend
+from .journal import JournalRecorder, replay_journal
+from .command_tree import CommandTree
+from .convergence import MonitorHistory, ConvergenceCriterion, RelativeDrop, Plateau, Stability
+from .stream_guard import StreamGuard
 from .exceptions import (
     FluentIntegrationError,
     FluentSessionError,
     FluentStartupError,
     FluentCaseError,
     FluentUDFError,
+    FluentSolveError,
     CodeGenerationError,
     UDFGenerationError,
+    GenerationAbortedError,
     APIMissingError,
     OpenAIAPIError,
     ConfigurationError,
@@ -31,15 +52,42 @@ __all__ = [
     "CodeGeneratorBridge",
     "CopilotBridge",  # 向后兼容
     "FluentWrapper",
+    "FluentSessionPool",
+    "CorePlacement",
+    "AsyncFluentWrapper",
+    "CheckpointManager",
     "UDFGenerator",
+    "ProfileWriter",
+    "FieldDataExtractor",
+    "SolutionDataCache",
+    "UDFBuildCache",
+    "CaseIndex",
+    "SweepEngine",
+    "JobScheduler",
+    "LocalLicenseServer",
+    "ProcessorAutotuner",
+    "SessionMultiplexer",
+    "WarmStartRegistry",
+    "FakeFluentBackend",
+    "JournalRecorder",
+    "replay_journal",
+    "CommandTree",
+    "MonitorHistory",
+    "ConvergenceCriterion",
+    "RelativeDrop",
+    "Plateau",
+    "Stability",
+    "StreamGuard",
     # Exceptions
     "FluentIntegrationError",
     "FluentSessionError",
     "FluentStartupError",
     "FluentCaseError",
     "FluentUDFError",
+    "FluentSolveError",
     "CodeGenerationError",
     "UDFGenerationError",
+    "GenerationAbortedError",
     "APIMissingError",
     "OpenAIAPIError",
     "ConfigurationError",
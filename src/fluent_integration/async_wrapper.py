@@ -0,0 +1,197 @@
+"""
+Async Fluent Wrapper - 基于 asyncio 的 Fluent 会话封装
+
+PyFluent 调用都是阻塞的。AsyncFluentWrapper 为每个会话分配一个专用的
+单线程执行器，阻塞调用在执行器中按提交顺序执行，事件循环不被阻塞，
+一个编排进程即可并发驱动多个求解器会话。
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Union
+from loguru import logger
+
+from .fluent_wrapper import FluentWrapper
+
+
+ProgressCallback = Callable[[int, int], Union[None, Awaitable[None]]]
+
+
+class AsyncFluentWrapper:
+    """FluentWrapper 的异步封装（每个会话一个专用执行线程）"""
+    
+    def __init__(
+        self,
+        config_path: str = "config/fluent_config.json",
+        wrapper: Optional[FluentWrapper] = None
+    ):
+        """
+        初始化异步封装
+        
+        Args:
+            config_path: 配置文件路径
+            wrapper: 已有的 FluentWrapper（例如从会话池租借），None 表示新建
+        """
+        self.wrapper = wrapper or FluentWrapper(config_path)
+        # PyFluent 会话不是线程安全的：单线程执行器保证同一会话的调用串行执行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fluent-session")
+        self._closed = False
+        
+        logger.info("AsyncFluentWrapper initialized")
+    
+    @property
+    def session(self):
+        """底层 PyFluent 会话"""
+        return self.wrapper.session
+    
+    @property
+    def solver(self):
+        """底层 PyFluent 求解器"""
+        return self.wrapper.solver
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在会话执行器中运行任意阻塞调用
+        
+        Args:
+            func: 阻塞函数（例如 lambda: wrapper.solver.setup.models...）
+            *args: 位置参数
+            **kwargs: 关键字参数
+        
+        Returns:
+            函数返回值
+        """
+        if self._closed:
+            raise RuntimeError("AsyncFluentWrapper is closed")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def start_fluent(
+        self,
+        dimension: str = "3d",
+        precision: str = "dp",
+        processor_count: int = 1,
+        show_gui: bool = False
+    ) -> Any:
+        """
+        异步启动 Fluent 会话
+        
+        Args:
+            dimension: 维度 (2d 或 3d)
+            precision: 精度 (sp 或 dp)
+            processor_count: 处理器数量
+            show_gui: 是否显示 GUI
+        
+        Returns:
+            Fluent 会话对象
+        """
+        return await self.run(
+            self.wrapper.start_fluent,
+            dimension=dimension,
+            precision=precision,
+            processor_count=processor_count,
+            show_gui=show_gui
+        )
+    
+    async def stop_fluent(self):
+        """异步停止 Fluent 会话"""
+        await self.run(self.wrapper.stop_fluent)
+    
+    async def load_case(self, case_file: str) -> bool:
+        """异步加载案例文件（参见 FluentWrapper.load_case）"""
+        return await self.run(self.wrapper.load_case, case_file)
+    
+    async def save_case(self, case_file: str) -> bool:
+        """异步保存案例文件（参见 FluentWrapper.save_case）"""
+        return await self.run(self.wrapper.save_case, case_file)
+    
+    async def read_profile(self, profile_file: str) -> bool:
+        """异步读取 Profile 文件（参见 FluentWrapper.read_profile）"""
+        return await self.run(self.wrapper.read_profile, profile_file)
+    
+    async def execute_tui_command(self, command: str, mode: str = "tui") -> bool:
+        """异步执行 TUI/Scheme 命令（参见 FluentWrapper.execute_tui_command）"""
+        return await self.run(self.wrapper.execute_tui_command, command, mode)
+    
+    async def compile_udf(self, udf_file: str, lib_name: str = "libudf") -> bool:
+        """异步编译 UDF（参见 FluentWrapper.compile_udf）"""
+        return await self.run(self.wrapper.compile_udf, udf_file, lib_name)
+    
+    async def load_udf(self, lib_name: str = "libudf") -> bool:
+        """异步加载 UDF 库（参见 FluentWrapper.load_udf）"""
+        return await self.run(self.wrapper.load_udf, lib_name)
+    
+    async def iterate(
+        self,
+        iterations: int,
+        chunk_size: int = 10,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> int:
+        """
+        异步运行求解迭代
+        
+        进度回调在事件循环线程中调用，可以是普通函数或协程函数。
+        任务被取消时，求解器在当前块结束后停止，等待其停止后再抛出 CancelledError，
+        保证会话处于一致状态。
+        
+        Args:
+            iterations: 迭代步数
+            chunk_size: 每块迭代步数（决定进度报告和取消的粒度）
+            progress_callback: 进度回调 (已完成步数, 总步数)
+        
+        Returns:
+            实际完成的迭代步数
+        
+        Raises:
+            FluentSolveError: 迭代失败时抛出
+            asyncio.CancelledError: 任务被取消时抛出
+        """
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+        
+        def report(completed: int, total: int):
+            if progress_callback is not None:
+                loop.call_soon_threadsafe(self._dispatch_progress, progress_callback, completed, total)
+        
+        future = asyncio.ensure_future(self.run(
+            self.wrapper.iterate,
+            iterations,
+            chunk_size=chunk_size,
+            progress_callback=report,
+            cancel_event=cancel_event
+        ))
+        
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            completed = await future
+            logger.warning(f"Async iterate cancelled after {completed}/{iterations} iterations")
+            raise
+    
+    async def close(self):
+        """停止会话并关闭执行器"""
+        if self._closed:
+            return
+        if self.wrapper.session:
+            await self.stop_fluent()
+        self._closed = True
+        self._executor.shutdown(wait=False)
+    
+    async def __aenter__(self) -> "AsyncFluentWrapper":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    @staticmethod
+    def _dispatch_progress(callback: ProgressCallback, completed: int, total: int):
+        """调用进度回调；协程回调调度为任务"""
+        try:
+            result = callback(completed, total)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
@@ -0,0 +1,285 @@
+"""
+Autotune - 为给定案例选择 processor_count
+
+在若干进程数下各运行一小段计时迭代，拟合扩展曲线
+t(p) = serial + parallel / p + communication * (p - 1)（每步迭代耗时），
+再按目标推荐进程数：throughput 取并行效率不低于阈值的最大进程数（同样的核数下
+整个集群完成的迭代最多），walltime 取满足墙钟时间目标的最小进程数。测量结果和
+推荐写入案例索引，案例文件不变时直接复用。
+"""
+
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from .case_index import CaseIndex
+from .exceptions import ValidationError
+from .fluent_wrapper import FluentWrapper
+
+
+MODEL_TERMS = ("serial", "parallel", "communication")
+
+
+class ProcessorAutotuner:
+    """案例的进程数调优"""
+    
+    def __init__(
+        self,
+        case_file: str,
+        core_counts: Optional[Sequence[int]] = None,
+        iterations: Optional[int] = None,
+        warmup: Optional[int] = None,
+        launch_options: Optional[Dict[str, Any]] = None,
+        config_path: str = "config/fluent_config.json",
+        wrapper_factory: Optional[Callable[[], FluentWrapper]] = None,
+        clock: Optional[Callable[[], float]] = None
+    ):
+        """
+        初始化调优
+        
+        Args:
+            case_file: 案例文件
+            core_counts: 测量的进程数
+            iterations: 每个进程数下计时的迭代步数
+            warmup: 计时前先运行的迭代步数（排除初始化和首步的开销）
+            launch_options: 其余 start_fluent 参数（dimension, precision）
+            config_path: Fluent 配置文件路径（读取 autotune 段）
+            wrapper_factory: 创建 FluentWrapper 的工厂函数
+            clock: 计时函数（秒），默认 time.perf_counter
+        """
+        autotune_config = self._load_config(config_path).get("autotune", {})
+        
+        if not Path(case_file).exists():
+            raise ValidationError(f"Case file does not exist: {case_file}", field="case_file")
+        self.case_file = case_file
+        self.core_counts = sorted(set(core_counts or autotune_config.get("core_counts", [1, 2, 4, 8])))
+        self.iterations = iterations or autotune_config.get("iterations", 20)
+        self.warmup = autotune_config.get("warmup", 5) if warmup is None else warmup
+        self.min_efficiency = autotune_config.get("min_efficiency", 0.7)
+        self.launch_options = launch_options or {}
+        self.wrapper_factory = wrapper_factory or (lambda: FluentWrapper(config_path))
+        self.clock = clock or time.perf_counter
+        
+        if not self.core_counts or self.core_counts[0] <= 0:
+            raise ValidationError("core_counts must be positive", field="core_counts")
+    
+    def _load_config(self, config_path: str) -> Dict:
+        """加载配置文件"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Config file {config_path} not found, using defaults")
+            return {}
+    
+    def measure(self, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        在每个进程数下启动会话，读入案例并初始化，计时一段迭代
+        
+        Args:
+            progress_callback: 每个进程数测量完成后的回调 (测量结果)
+        
+        Returns:
+            [{"cores", "seconds_per_iteration", "error"}]
+        """
+        measurements = []
+        for cores in self.core_counts:
+            wrapper = self.wrapper_factory()
+            try:
+                wrapper.start_fluent(processor_count=cores, **self.launch_options)
+                wrapper.load_case(self.case_file)
+                wrapper.initialize_flow_field("hybrid")
+                if self.warmup:
+                    wrapper.iterate(self.warmup)
+                start = self.clock()
+                completed = wrapper.iterate(self.iterations)
+                elapsed = self.clock() - start
+                result = {"cores": cores, "seconds_per_iteration": elapsed / max(completed, 1), "error": None}
+                logger.info(f"{cores} cores: {result['seconds_per_iteration']:.4g} s/iteration")
+            except Exception as e:
+                logger.warning(f"Autotune measurement at {cores} cores failed: {e}")
+                result = {"cores": cores, "seconds_per_iteration": None, "error": str(e)}
+            finally:
+                wrapper.stop_fluent()
+            measurements.append(result)
+            if progress_callback is not None:
+                progress_callback(result)
+        return measurements
+    
+    def tune(
+        self,
+        objective: str = "throughput",
+        min_efficiency: Optional[float] = None,
+        wall_time: Optional[float] = None,
+        target_iterations: Optional[int] = None,
+        index: Optional[CaseIndex] = None,
+        force: bool = False,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        测量（或复用索引中的测量）、拟合并推荐进程数
+        
+        Args:
+            objective: "throughput" 或 "walltime"
+            min_efficiency: throughput 目标的最低并行效率
+            wall_time: walltime 目标的墙钟时间（秒）
+            target_iterations: walltime 目标的总迭代步数
+            index: 缓存结果的案例索引
+            force: 忽略缓存重新测量
+            progress_callback: 每个进程数测量完成后的回调
+        
+        Returns:
+            {"case", "measurements", "model", "recommendation", "cached"}
+        """
+        cached = index.get_tuning(self.case_file) if index is not None and not force else None
+        if cached is not None and set(self.core_counts) <= {item["cores"] for item in cached["measurements"]}:
+            logger.info(f"Using cached autotune measurements for {self.case_file}")
+            measurements, model = cached["measurements"], cached["model"]
+        else:
+            cached = None
+            measurements = self.measure(progress_callback)
+            model = fit_scaling(
+                [item["cores"] for item in measurements if item["error"] is None],
+                [item["seconds_per_iteration"] for item in measurements if item["error"] is None]
+            )
+        
+        max_cores = max(item["cores"] for item in measurements if item["error"] is None)
+        recommendation = recommend(
+            model,
+            max_cores,
+            objective=objective,
+            min_efficiency=self.min_efficiency if min_efficiency is None else min_efficiency,
+            wall_time=wall_time,
+            target_iterations=target_iterations
+        )
+        result = {
+            "case": str(Path(self.case_file).resolve()),
+            "measurements": measurements,
+            "model": model,
+            "recommendation": recommendation
+        }
+        if index is not None:
+            index.set_tuning(self.case_file, result)
+        logger.success(f"Recommended processor_count for {self.case_file}: {recommendation['processor_count']}")
+        return {**result, "cached": cached is not None}
+
+
+def fit_scaling(core_counts: Sequence[int], seconds: Sequence[float]) -> Dict[str, float]:
+    """
+    最小二乘拟合 t(p) = serial + parallel / p + communication * (p - 1)，各项系数非负
+    
+    Args:
+        core_counts: 进程数
+        seconds: 对应的每步迭代耗时
+    
+    Returns:
+        {"serial", "parallel", "communication"}
+    
+    Raises:
+        ValidationError: 没有成功的测量时抛出
+    """
+    if not core_counts:
+        raise ValidationError("No successful measurements to fit", field="measurements")
+    
+    p = np.asarray(core_counts, dtype=float)
+    t = np.asarray(seconds, dtype=float)
+    basis = np.column_stack([np.ones_like(p), 1.0 / p, p - 1.0])
+    
+    # 只有三项，逐个子集求解即可得到非负最小二乘解
+    best, best_residual = np.zeros(3), float("inf")
+    for size in range(1, 4):
+        for terms in itertools.combinations(range(3), size):
+            if len(set(core_counts)) < size:
+                continue
+            coefficients, *_ = np.linalg.lstsq(basis[:, terms], t, rcond=None)
+            if np.any(coefficients < 0):
+                continue
+            residual = float(np.sum((basis[:, terms] @ coefficients - t) ** 2))
+            if residual < best_residual - 1e-15:
+                best = np.zeros(3)
+                best[list(terms)] = coefficients
+                best_residual = residual
+    
+    return dict(zip(MODEL_TERMS, (float(value) for value in best)))
+
+
+def predict(model: Dict[str, float], cores: int) -> float:
+    """
+    模型预测的每步迭代耗时
+    
+    Args:
+        model: fit_scaling 的结果
+        cores: 进程数
+    
+    Returns:
+        秒/步
+    """
+    return model["serial"] + model["parallel"] / cores + model["communication"] * (cores - 1)
+
+
+def recommend(
+    model: Dict[str, float],
+    max_cores: int,
+    objective: str = "throughput",
+    min_efficiency: float = 0.7,
+    wall_time: Optional[float] = None,
+    target_iterations: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    按目标推荐进程数（不超出测量范围外推）
+    
+    Args:
+        model: fit_scaling 的结果
+        max_cores: 候选进程数上限
+        objective: "throughput" 并行效率不低于 min_efficiency 的最大进程数；
+            "walltime" 在 wall_time 内完成 target_iterations 步的最小进程数
+        min_efficiency: 最低并行效率
+        wall_time: 墙钟时间目标（秒）
+        target_iterations: 总迭代步数
+    
+    Returns:
+        {"processor_count", "objective", "seconds_per_iteration", "speedup", "efficiency", "meets_target"}
+    
+    Raises:
+        ValidationError: 目标未知或 walltime 目标缺少参数时抛出
+    """
+    if objective not in ("throughput", "walltime"):
+        raise ValidationError(f"Unknown autotune objective: {objective}", field="objective")
+    if objective == "walltime" and (not wall_time or not target_iterations):
+        raise ValidationError(
+            "walltime objective needs wall_time and target_iterations",
+            field="wall_time"
+        )
+    
+    candidates = range(1, max_cores + 1)
+    single = predict(model, 1)
+    times = {cores: predict(model, cores) for cores in candidates}
+    fastest = min(candidates, key=lambda cores: (times[cores], cores))
+    
+    if objective == "throughput":
+        # 超过最快点后增加进程只会变慢，不在候选之内
+        efficient = [
+            cores for cores in candidates
+            if cores <= fastest and single / (cores * times[cores]) >= min_efficiency
+        ]
+        chosen = max(efficient) if efficient else 1
+        meets_target = bool(efficient)
+    else:
+        fitting = [cores for cores in candidates if times[cores] * target_iterations <= wall_time]
+        chosen = min(fitting) if fitting else fastest
+        meets_target = bool(fitting)
+    
+    seconds = times[chosen]
+    return {
+        "processor_count": chosen,
+        "objective": objective,
+        "seconds_per_iteration": seconds,
+        "speedup": single / seconds if seconds > 0 else 1.0,
+        "efficiency": single / (chosen * seconds) if seconds > 0 else 1.0,
+        "meets_target": meets_target
+    }
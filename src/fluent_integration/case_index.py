@@ -0,0 +1,484 @@
+"""
+Case Index - 离线的案例文件元数据索引
+
+不启动求解器，直接读取 .cas.h5 (HDF5/CFF) 和 .cas/.cas.gz (传统格式) 文件头，
+提取网格规模、zone、模型、Fluent 版本等信息并存入本地 SQLite 索引。
+按 mtime 和文件大小增量更新，批量选择案例只需查询索引。
+"""
+
+import gzip
+import json
+import platform
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from loguru import logger
+
+from .exceptions import FluentIntegrationError, ValidationError
+
+
+CASE_PATTERNS = ("*.cas.h5", "*.cas.gz", "*.cas")
+
+# 传统格式的节标记
+_VERSION_RE = re.compile(rb'\(1 "([^"]*)"\)')
+_DIMENSION_RE = re.compile(rb"\(2 (\d)\)")
+_COUNT_RE = re.compile(rb"\((10|12|13|2010|2012|2013|3010|3012|3013) \(0 ([0-9a-fA-F]+) ([0-9a-fA-F]+)")
+_ZONE_RE = re.compile(rb"\((?:39|45) \((\d+) ([\w-]+) ([^\s()]+)")
+_BINARY_SECTION_RE = re.compile(rb"\((20|30)(10|12|13) \(")
+
+# 设置（rp 变量）中的模型特征（尽力识别）
+MODEL_PATTERNS = {
+    "energy": re.compile(rb"\((?:energy/enabled\?|models/energy\?) #t\)"),
+    "viscous": re.compile(rb"\((?:viscous/model|models/viscous) ([\w-]+)\)"),
+    "multiphase": re.compile(rb"\((?:mp/model|models/multiphase) ([\w-]+)\)"),
+    "species": re.compile(rb"\((?:species/model\?|models/species\?) #t\)"),
+    "radiation": re.compile(rb"\((?:radiation/model|models/radiation) ([\w-]+)\)"),
+    "dpm": re.compile(rb"\((?:dpm/injections\?|models/dpm\?) #t\)"),
+    "unsteady": re.compile(rb"\(rp-unsteady\? #t\)")
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    format TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    fluent_version TEXT,
+    dimension INTEGER,
+    precision TEXT,
+    cell_count INTEGER,
+    face_count INTEGER,
+    node_count INTEGER,
+    zones TEXT,
+    models TEXT,
+    error TEXT,
+    indexed_at REAL NOT NULL
+)
+"""
+
+# 处理器数调优结果：与主机相关，案例文件变化后失效
+_TUNING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tuning (
+    path TEXT NOT NULL,
+    host TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    tuned_at REAL NOT NULL,
+    PRIMARY KEY (path, host)
+)
+"""
+
+
+class CaseIndex:
+    """案例文件元数据的 SQLite 索引"""
+    
+    def __init__(self, db_path: str = ".case_index.sqlite"):
+        """
+        初始化索引
+        
+        Args:
+            db_path: SQLite 数据库文件路径
+        """
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_TUNING_SCHEMA)
+        self._conn.commit()
+    
+    def update(self, directories: Iterable[str], patterns: Sequence[str] = CASE_PATTERNS) -> Dict[str, int]:
+        """
+        增量更新索引：只重新读取 mtime 或大小变化的文件，删除扫描目录下已不存在的文件
+        
+        Args:
+            directories: 扫描的目录
+            patterns: 文件名模式
+        
+        Returns:
+            {"added", "updated", "removed", "unchanged"} 计数
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        known = {
+            row["path"]: (row["mtime"], row["size"])
+            for row in self._conn.execute("SELECT path, mtime, size FROM cases")
+        }
+        
+        for directory in directories:
+            root = Path(directory).resolve()
+            if not root.is_dir():
+                logger.warning(f"Case directory not found: {directory}")
+                continue
+            
+            seen = set()
+            for pattern in patterns:
+                for path in root.rglob(pattern):
+                    key = str(path)
+                    if key in seen or not path.is_file():
+                        continue
+                    seen.add(key)
+                    stat = path.stat()
+                    if known.get(key) == (stat.st_mtime, stat.st_size):
+                        counts["unchanged"] += 1
+                        continue
+                    self._index_file(path, stat)
+                    counts["updated" if key in known else "added"] += 1
+            
+            for key in known:
+                if key not in seen and Path(key).is_relative_to(root):
+                    self._conn.execute("DELETE FROM cases WHERE path = ?", (key,))
+                    self._conn.execute("DELETE FROM tuning WHERE path = ?", (key,))
+                    counts["removed"] += 1
+        
+        self._conn.commit()
+        logger.info(f"Case index updated: {counts}")
+        return counts
+    
+    def query(
+        self,
+        name: Optional[str] = None,
+        min_cells: Optional[int] = None,
+        max_cells: Optional[int] = None,
+        version: Optional[str] = None,
+        dimension: Optional[int] = None,
+        zone: Optional[str] = None,
+        model: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        查询案例
+        
+        Args:
+            name: 文件名包含的子串
+            min_cells: 最小网格数
+            max_cells: 最大网格数
+            version: Fluent 版本字符串包含的子串
+            dimension: 维度 (2 或 3)
+            zone: 包含该名称的 zone
+            model: 启用的模型（如 energy, viscous）
+            limit: 返回的最大条数
+        
+        Returns:
+            案例元数据列表（按路径排序）
+        """
+        clauses, params = [], []
+        if name:
+            clauses.append("name LIKE ?")
+            params.append(f"%{name}%")
+        if min_cells is not None:
+            clauses.append("cell_count >= ?")
+            params.append(min_cells)
+        if max_cells is not None:
+            clauses.append("cell_count <= ?")
+            params.append(max_cells)
+        if version:
+            clauses.append("fluent_version LIKE ?")
+            params.append(f"%{version}%")
+        if dimension is not None:
+            clauses.append("dimension = ?")
+            params.append(dimension)
+        if zone:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(cases.zones) WHERE json_extract(value, '$.name') = ?)")
+            params.append(zone)
+        if model:
+            clauses.append("json_extract(models, ?) IS NOT NULL")
+            params.append(f'$."{model}"')
+        
+        sql = "SELECT * FROM cases"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY path"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        
+        return [self._row_to_dict(row) for row in self._conn.execute(sql, params)]
+    
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        获取单个案例的元数据
+        
+        Args:
+            path: 案例文件路径
+        
+        Returns:
+            元数据，未索引时返回 None
+        """
+        row = self._conn.execute(
+            "SELECT * FROM cases WHERE path = ?", (str(Path(path).resolve()),)
+        ).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def set_tuning(self, path: str, result: Dict[str, Any], host: Optional[str] = None):
+        """
+        保存案例的处理器数调优结果
+        
+        Args:
+            path: 案例文件路径
+            result: 调优结果（可 JSON 序列化）
+            host: 主机名，默认为本机
+        """
+        case = Path(path).resolve()
+        stat = case.stat()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tuning (path, host, mtime, size, result, tuned_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (str(case), host or platform.node(), stat.st_mtime, stat.st_size, json.dumps(result), time.time())
+        )
+        self._conn.commit()
+    
+    def get_tuning(self, path: str, host: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        读取案例的处理器数调优结果
+        
+        Args:
+            path: 案例文件路径
+            host: 主机名，默认为本机
+        
+        Returns:
+            调优结果，未调优或案例文件已变化时返回 None
+        """
+        case = Path(path).resolve()
+        row = self._conn.execute(
+            "SELECT mtime, size, result FROM tuning WHERE path = ? AND host = ?",
+            (str(case), host or platform.node())
+        ).fetchone()
+        if row is None or not case.exists():
+            return None
+        stat = case.stat()
+        if (row["mtime"], row["size"]) != (stat.st_mtime, stat.st_size):
+            return None
+        return json.loads(row["result"])
+    
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+    
+    def __enter__(self) -> "CaseIndex":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _index_file(self, path: Path, stat):
+        """读取单个文件的元数据并写入索引"""
+        try:
+            metadata = read_case_metadata(str(path))
+            error = None
+        except Exception as e:
+            logger.warning(f"Failed to read case header {path}: {e}")
+            metadata, error = {}, str(e)
+        
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO cases
+                (path, name, format, mtime, size, fluent_version, dimension, precision,
+                 cell_count, face_count, node_count, zones, models, error, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                str(path), path.name, _case_format(path), stat.st_mtime, stat.st_size,
+                metadata.get("fluent_version"), metadata.get("dimension"), metadata.get("precision"),
+                metadata.get("cell_count"), metadata.get("face_count"), metadata.get("node_count"),
+                json.dumps(metadata.get("zones", [])), json.dumps(metadata.get("models", {})),
+                error, time.time()
+            )
+        )
+    
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """数据库行转换为字典（解析 JSON 列）"""
+        data = dict(row)
+        data["zones"] = json.loads(data["zones"] or "[]")
+        data["models"] = json.loads(data["models"] or "{}")
+        return data
+
+
+def read_case_metadata(path: str) -> Dict[str, Any]:
+    """
+    读取案例文件头中的元数据（不启动求解器）
+    
+    Args:
+        path: .cas.h5 / .cas.gz / .cas 文件路径
+    
+    Returns:
+        {"fluent_version", "dimension", "precision", "cell_count", "face_count",
+         "node_count", "zones": [{"id", "type", "name"}], "models": {名称: 值}}
+    
+    Raises:
+        ValidationError: 不支持的文件格式
+        FluentIntegrationError: 读取 .cas.h5 需要的 h5py 未安装
+    """
+    case_format = _case_format(Path(path))
+    if case_format == "h5":
+        return _read_h5_metadata(path)
+    if case_format in ("gz", "legacy"):
+        return _read_legacy_metadata(path, compressed=case_format == "gz")
+    raise ValidationError(f"Unsupported case file format: {path}", field="path")
+
+
+def _case_format(path: Path) -> str:
+    """根据扩展名判断案例格式"""
+    name = path.name.lower()
+    if name.endswith(".cas.h5"):
+        return "h5"
+    if name.endswith(".cas.gz"):
+        return "gz"
+    if name.endswith(".cas"):
+        return "legacy"
+    return "unknown"
+
+
+def _read_legacy_metadata(path: str, compressed: bool, chunk_size: int = 1 << 20) -> Dict[str, Any]:
+    """
+    按块流式扫描传统格式文件中的节头（不加载整个文件）
+    
+    整个文件都会被读取一遍，二进制数据节也按文本匹配节头：网格数据之后的 zone 节和
+    设置节同样需要读取，.cas.gz 只能顺序解压，混合类型的面数据节也没有声明字节长度，
+    因此不按长度跳过二进制数据。内存占用只与 chunk_size 有关。
+    """
+    metadata: Dict[str, Any] = {"zones": [], "models": {}}
+    zone_ids = set()
+    opener = gzip.open if compressed else open
+    tail = b""
+    
+    with opener(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            # 保留上一块末尾，避免节头跨块被截断
+            text = tail + chunk
+            _scan_legacy_text(text, metadata, zone_ids)
+            tail = text[-512:]
+    
+    return metadata
+
+
+def _scan_legacy_text(text: bytes, metadata: Dict[str, Any], zone_ids: set):
+    """从一段文本中提取节头信息"""
+    if "fluent_version" not in metadata:
+        match = _VERSION_RE.search(text)
+        if match:
+            metadata["fluent_version"] = match.group(1).decode("latin-1")
+    if "dimension" not in metadata:
+        match = _DIMENSION_RE.search(text)
+        if match:
+            metadata["dimension"] = int(match.group(1))
+    
+    for match in _COUNT_RE.finditer(text):
+        section = int(match.group(1)) % 1000
+        key = {10: "node_count", 12: "cell_count", 13: "face_count"}[section]
+        metadata.setdefault(key, int(match.group(3), 16) - int(match.group(2), 16) + 1)
+    
+    if "precision" not in metadata:
+        match = _BINARY_SECTION_RE.search(text)
+        if match:
+            metadata["precision"] = "dp" if match.group(1) == b"30" else "sp"
+    
+    for match in _ZONE_RE.finditer(text):
+        zone_id = int(match.group(1))
+        if zone_id not in zone_ids:
+            zone_ids.add(zone_id)
+            metadata["zones"].append({
+                "id": zone_id,
+                "type": match.group(2).decode("latin-1"),
+                "name": match.group(3).decode("latin-1")
+            })
+    
+    for model, pattern in MODEL_PATTERNS.items():
+        if model in metadata["models"]:
+            continue
+        match = pattern.search(text)
+        if match:
+            metadata["models"][model] = match.group(1).decode("latin-1") if match.groups() else True
+
+
+def _read_h5_metadata(path: str) -> Dict[str, Any]:
+    """读取 CFF (.cas.h5) 文件的属性和设置"""
+    try:
+        import h5py
+    except ImportError:
+        error = FluentIntegrationError(
+            "h5py is required to index .cas.h5 files",
+            error_code="DEPENDENCY_MISSING",
+            details={"fix": "pip install h5py", "path": path}
+        )
+        logger.error(str(error))
+        raise error
+    
+    metadata: Dict[str, Any] = {"zones": [], "models": {}}
+    with h5py.File(path, "r") as f:
+        version = _first_attr(f, ("version", "Version", "FileVersion"))
+        if version is not None:
+            metadata["fluent_version"] = _to_str(version)
+        
+        meshes = f.get("meshes")
+        mesh = meshes[sorted(meshes.keys())[0]] if meshes is not None and len(meshes) else None
+        if mesh is not None:
+            for key, names in (
+                ("dimension", ("dimension",)),
+                ("cell_count", ("cellCount",)),
+                ("face_count", ("faceCount",)),
+                ("node_count", ("nodeCount",))
+            ):
+                value = _first_attr(mesh, names)
+                if value is not None:
+                    metadata[key] = int(value)
+            metadata["zones"] = _h5_zones(mesh)
+        
+        settings = f.get("settings")
+        if settings is not None:
+            for name in settings.keys():
+                dataset = settings[name]
+                if not hasattr(dataset, "shape"):
+                    continue
+                text = dataset[()]
+                text = text.tobytes() if hasattr(text, "tobytes") else bytes(text)
+                _scan_legacy_text(text, metadata, set())
+        
+        precision = _first_attr(f, ("precision", "Precision"))
+        if precision is not None:
+            metadata["precision"] = "dp" if int(precision) == 2 else "sp"
+    
+    return metadata
+
+
+def _h5_zones(mesh) -> List[Dict[str, Any]]:
+    """从 CFF 网格的 zoneTopology 中读取 zone 名称和类型"""
+    zones = []
+    for kind in ("cells", "faces"):
+        topology = mesh.get(f"{kind}/zoneTopology")
+        if topology is None or "name" not in topology:
+            continue
+        names = _to_str(topology["name"][()]).split(";")
+        ids = list(topology["id"][()]) if "id" in topology else list(range(1, len(names) + 1))
+        types = list(topology["zoneType"][()]) if "zoneType" in topology else [None] * len(names)
+        for zone_id, zone_type, name in zip(ids, types, names):
+            zones.append({
+                "id": int(zone_id),
+                "type": kind[:-1] if zone_type is None else str(int(zone_type)),
+                "name": name
+            })
+    return zones
+
+
+def _first_attr(node, names: Sequence[str]) -> Any:
+    """返回第一个存在的属性值"""
+    for name in names:
+        if name in node.attrs:
+            value = node.attrs[name]
+            return value[0] if hasattr(value, "__len__") and not isinstance(value, (str, bytes)) and len(value) == 1 else value
+    return None
+
+
+def _to_str(value: Any) -> str:
+    """HDF5 字符串值转换为 str"""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if hasattr(value, "tobytes"):
+        return value.tobytes().decode("utf-8", errors="replace").rstrip("\x00")
+    return str(value)
@@ -0,0 +1,276 @@
+"""
+Checkpoint Manager - 双缓冲的案例/数据检查点
+
+求解器在调用线程中以压缩 HDF5 格式 (.cas.h5/.dat.h5) 写出检查点（PyFluent 会话
+不是线程安全的，写出必须与迭代等其他调用串行，检查点才对应请求时的状态）；
+复制、重命名和轮转在后台发布线程中进行，调用方随即返回。
+指定本地 scratch 目录时采用双缓冲：求解器先写到本地两个交替的缓冲槽，
+再由发布线程复制到目标目录，慢速存储的 I/O 不占用求解器。
+文件写完后原子重命名，目录中只会出现完整的检查点；按 "最近 N 个 + 每第 K 个"
+轮转保留。
+"""
+
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .exceptions import FluentCaseError, ValidationError
+from .fluent_wrapper import FluentWrapper
+
+
+class CheckpointManager:
+    """检查点管理器"""
+    
+    CASE_SUFFIX = ".cas.h5"
+    DATA_SUFFIX = ".dat.h5"
+    
+    def __init__(
+        self,
+        wrapper: FluentWrapper,
+        directory: str = "checkpoints",
+        keep_last: int = 3,
+        keep_every: int = 10,
+        prefix: str = "checkpoint",
+        scratch_dir: Optional[str] = None
+    ):
+        """
+        初始化检查点管理器
+        
+        Args:
+            wrapper: 已启动会话的 FluentWrapper
+            directory: 检查点目录
+            keep_last: 保留最近的检查点数
+            keep_every: 额外保留序号为该值倍数的检查点，0 表示不额外保留
+            prefix: 检查点文件名前缀
+            scratch_dir: 本地缓冲目录（启用双缓冲），None 表示直接写入目标目录
+        """
+        if keep_last <= 0:
+            raise ValidationError("keep_last must be positive", field="keep_last")
+        if keep_every < 0:
+            raise ValidationError("keep_every must not be negative", field="keep_every")
+        
+        self.wrapper = wrapper
+        self.directory = Path(directory)
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        self.prefix = prefix
+        self.scratch_dir = Path(scratch_dir) if scratch_dir else None
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pattern = re.compile(rf"^{re.escape(prefix)}-(\d+){re.escape(self.CASE_SUFFIX)}$")
+        existing = [entry["index"] for entry in self.list_checkpoints()]
+        self._next_index = max(existing, default=0) + 1
+        
+        self._publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-publisher")
+        self._slot_futures: Dict[int, Future] = {}
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+        
+        logger.info(f"CheckpointManager initialized (directory={self.directory}, next index={self._next_index})")
+    
+    def checkpoint(self, wait: bool = False) -> Future:
+        """
+        写出一个检查点：求解器在当前线程写出，发布在后台进行
+        
+        Args:
+            wait: 是否等待检查点发布完成
+        
+        Returns:
+            Future，结果为最终的案例文件路径；写出或发布失败时为异常
+        """
+        if not self.wrapper.session:
+            raise FluentCaseError("Fluent session not started")
+        
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+        
+        final_case = self.directory / f"{self.prefix}-{index:06d}{self.CASE_SUFFIX}"
+        future: Future = Future()
+        self._write(index, final_case, future)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()] + [future]
+        
+        logger.info(f"Checkpoint {index} requested")
+        if wait:
+            future.result()
+        return future
+    
+    def wait(self, timeout: Optional[float] = None):
+        """
+        等待所有未完成的检查点
+        
+        Args:
+            timeout: 每个检查点的等待超时（秒）
+        """
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+    
+    def iterate(self, iterations: int, interval: int, **iterate_kwargs) -> int:
+        """
+        运行迭代并每隔 interval 步写一个检查点（最多丢失一个间隔的计算）
+        
+        Args:
+            iterations: 总迭代步数
+            interval: 检查点间隔（迭代步数）
+            **iterate_kwargs: 传给 FluentWrapper.iterate 的其他参数
+        
+        Returns:
+            实际完成的迭代步数
+        """
+        if interval <= 0:
+            raise ValidationError("interval must be positive", field="interval")
+        
+        completed = 0
+        while completed < iterations:
+            count = min(interval, iterations - completed)
+            done = self.wrapper.iterate(count, **iterate_kwargs)
+            completed += done
+            if done < count:
+                break
+            self.checkpoint()
+        return completed
+    
+    def list_checkpoints(self) -> List[Dict[str, Any]]:
+        """
+        列出完整的检查点（案例和数据文件都存在）
+        
+        Returns:
+            按序号排序的 [{"index", "case", "data"}]
+        """
+        entries = []
+        for path in self.directory.glob(f"{self.prefix}-*{self.CASE_SUFFIX}"):
+            match = self._pattern.match(path.name)
+            data = self._data_path(path)
+            if match and data.exists():
+                entries.append({"index": int(match.group(1)), "case": str(path), "data": str(data)})
+        return sorted(entries, key=lambda entry: entry["index"])
+    
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """
+        获取最新的完整检查点
+        
+        Returns:
+            {"index", "case", "data"}，没有检查点时返回 None
+        """
+        checkpoints = self.list_checkpoints()
+        return checkpoints[-1] if checkpoints else None
+    
+    def restore_latest(self) -> Optional[str]:
+        """
+        从最新的完整检查点恢复案例和数据
+        
+        Returns:
+            读入的案例文件路径，没有检查点时返回 None
+        """
+        self.wait()
+        latest = self.latest()
+        if latest is None:
+            logger.warning(f"No checkpoint found in {self.directory}")
+            return None
+        
+        self.wrapper.load_case_data(latest["case"])
+        logger.success(f"Restored checkpoint {latest['index']}")
+        return latest["case"]
+    
+    def close(self, wait: bool = True):
+        """
+        关闭管理器
+        
+        Args:
+            wait: 是否等待未完成的检查点
+        """
+        self._publisher.shutdown(wait=wait)
+    
+    def __enter__(self) -> "CheckpointManager":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _write(self, index: int, final_case: Path, result: Future):
+        """求解器在调用线程中写出检查点，发布交给发布线程，完成后设置 result"""
+        try:
+            if self.scratch_dir is None:
+                temp_case = self.directory / f".{self.prefix}-{index:06d}.partial{self.CASE_SUFFIX}"
+                self.wrapper.save_case_data(str(temp_case))
+                publish = self._publisher.submit(self._publish, index, temp_case, final_case, True)
+                publish.add_done_callback(lambda done: _transfer(done, result))
+                return
+            
+            # 双缓冲：两个槽交替使用，写入某个槽前等待该槽上一次的发布完成
+            slot = index % 2
+            previous = self._slot_futures.get(slot)
+            if previous is not None:
+                previous.exception()
+            
+            slot_dir = self.scratch_dir / f"slot-{slot}"
+            slot_dir.mkdir(parents=True, exist_ok=True)
+            scratch_case = slot_dir / f"{self.prefix}{self.CASE_SUFFIX}"
+            self.wrapper.save_case_data(str(scratch_case))
+        except Exception as e:
+            logger.error(f"Checkpoint {index} failed: {e}")
+            result.set_exception(e)
+            return
+        
+        # 求解器写完即返回，发布（复制到慢速存储）在发布线程中进行
+        publish = self._publisher.submit(self._publish, index, scratch_case, final_case, False)
+        self._slot_futures[slot] = publish
+        publish.add_done_callback(lambda done: _transfer(done, result))
+    
+    def _publish(self, index: int, source_case: Path, final_case: Path, move: bool) -> str:
+        """发布检查点：复制/移动到目标目录后原子重命名，然后执行轮转"""
+        source_data = self._data_path(source_case)
+        final_data = self._data_path(final_case)
+        
+        if move:
+            # 数据文件先就位，案例文件最后重命名，二者齐全才视为完整检查点
+            os.replace(source_data, final_data)
+            os.replace(source_case, final_case)
+        else:
+            for source, final in ((source_data, final_data), (source_case, final_case)):
+                staging = final.with_name(f".{final.name}.partial")
+                shutil.copyfile(source, staging)
+                os.replace(staging, final)
+        
+        logger.success(f"Checkpoint {index} written: {final_case}")
+        self._apply_retention()
+        return str(final_case)
+    
+    def _apply_retention(self):
+        """轮转：保留最近 keep_last 个，以及序号为 keep_every 倍数的检查点"""
+        checkpoints = self.list_checkpoints()
+        recent = {entry["index"] for entry in checkpoints[-self.keep_last:]}
+        for entry in checkpoints:
+            index = entry["index"]
+            if index in recent or (self.keep_every and index % self.keep_every == 0):
+                continue
+            for key in ("case", "data"):
+                try:
+                    os.remove(entry[key])
+                except OSError as e:
+                    logger.warning(f"Could not remove old checkpoint file {entry[key]}: {e}")
+            logger.debug(f"Removed checkpoint {index}")
+    
+    def _data_path(self, case_path: Path) -> Path:
+        """案例文件对应的数据文件路径"""
+        name = case_path.name
+        return case_path.with_name(name[:-len(self.CASE_SUFFIX)] + self.DATA_SUFFIX)
+
+
+def _transfer(source: Future, target: Future):
+    """将 source 的结果或异常转交给 target"""
+    error = source.exception()
+    if error is not None:
+        logger.error(f"Checkpoint publish failed: {error}")
+        target.set_exception(error)
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,369 @@
+"""
+Command Tree - 按 Fluent 版本缓存的 TUI/设置命令树
+
+从 PyFluent 会话提取一次 TUI 菜单树和设置树，以压缩 JSON 保存在磁盘上
+(<cache_dir>/<版本>.json.gz)。之后在本地校验和补全 TUI 命令路径、设置键，不再把
+拼错的命令发送给求解器才发现错误；批处理 journal 可以在启动 Fluent 之前离线检查。
+
+树的结构是嵌套字典：菜单/分组为字典，命令/设置值为 0，具名对象容器（如
+boundary_conditions.velocity_inlet）的成员名与案例有关，以 "*" 表示。
+"""
+
+import difflib
+import gzip
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .exceptions import ValidationError
+
+
+# 任何 Fluent 求解器的 TUI 都有这些顶层菜单，提取结果缺少它们时视为无效（如 Mock 对象）
+REQUIRED_MENUS = ("file", "define", "solve")
+
+# 菜单中返回上一级的命令
+_QUIT_TOKENS = ("q", "quit")
+
+_MAX_DEPTH = 32
+
+
+class CommandTree:
+    """某个 Fluent 版本的 TUI/设置命令树"""
+    
+    def __init__(self, version: str, tui: Dict[str, Any], settings: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            version: Fluent 版本
+            tui: TUI 菜单树（菜单名为 Fluent 的连字符形式）
+            settings: 设置树（键为 PyFluent 的 Python 名称）
+        """
+        self.version = version
+        self.tui = tui
+        self.settings = settings or {}
+    
+    @classmethod
+    def extract(cls, solver: Any, version: str) -> "CommandTree":
+        """
+        从会话的 solver.tui 和 solver.settings 提取命令树
+        
+        Args:
+            solver: PyFluent 求解器对象
+            version: Fluent 版本
+        
+        Returns:
+            命令树
+        
+        Raises:
+            ValidationError: 求解器没有可识别的 TUI 菜单树时抛出
+        """
+        start = time.perf_counter()
+        tui = _walk_tui(getattr(solver, "tui", None), 0, set())
+        missing = [menu for menu in REQUIRED_MENUS if not isinstance(tui, dict) or menu not in tui]
+        if missing:
+            raise ValidationError(
+                "Solver does not expose a Fluent TUI menu tree",
+                field="solver",
+                details={"missing_menus": ", ".join(missing)}
+            )
+        
+        settings: Dict[str, Any] = {}
+        root = getattr(solver, "settings", None)
+        if root is not None:
+            try:
+                for name in _child_names(root):
+                    settings[name] = _walk_settings(getattr(root, name), 0)
+            except Exception as e:
+                logger.warning(f"Could not extract settings tree: {e}")
+                settings = {}
+        
+        tree = cls(version, tui, settings)
+        logger.info(
+            f"Extracted Fluent {version} command tree: {tree.size()} TUI commands, "
+            f"{_count_leaves(settings)} settings in {time.perf_counter() - start:.2f} s"
+        )
+        return tree
+    
+    @staticmethod
+    def path_for(cache_dir: str, version: str) -> Path:
+        """某个版本的索引文件路径"""
+        return Path(cache_dir) / f"{re.sub(r'[^A-Za-z0-9._-]', '_', version)}.json.gz"
+    
+    @classmethod
+    def load(cls, cache_dir: str, version: str) -> Optional["CommandTree"]:
+        """
+        读取某个版本的索引
+        
+        Args:
+            cache_dir: 索引目录
+            version: Fluent 版本
+        
+        Returns:
+            命令树，不存在或无法读取时返回 None
+        """
+        path = cls.path_for(cache_dir, version)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["version"], data["tui"], data.get("settings"))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable command tree {path}: {e}")
+            return None
+    
+    def save(self, cache_dir: str) -> str:
+        """
+        保存为压缩 JSON
+        
+        Args:
+            cache_dir: 索引目录
+        
+        Returns:
+            索引文件路径
+        """
+        path = self.path_for(cache_dir, self.version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": self.version, "created": time.time(), "tui": self.tui, "settings": self.settings}
+        temporary = path.with_suffix(".tmp")
+        with gzip.open(temporary, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        temporary.replace(path)
+        logger.info(f"Command tree saved: {path}")
+        return str(path)
+    
+    def size(self) -> int:
+        """TUI 命令数"""
+        return _count_leaves(self.tui)
+    
+    def validate(self, command: str) -> Dict[str, Any]:
+        """
+        校验 TUI 命令的菜单路径（命令之后的参数不检查）
+        
+        与 Fluent 一致，菜单项可以写成唯一前缀或按连字符分段的缩写（solve/it、d/b-c），
+        路径可以用 / 或空格分隔，q 返回上一级菜单。
+        
+        Args:
+            command: TUI 命令
+        
+        Returns:
+            {"valid", "path": 解析出的完整路径, "error", "suggestions"}
+        """
+        node: Any = self.tui
+        stack: List[Any] = []
+        path: List[str] = []
+        for token in _path_tokens(command):
+            if not isinstance(node, dict):
+                break
+            if token.lower() in _QUIT_TOKENS and stack:
+                node = stack.pop()
+                path.pop()
+                continue
+            matches = _match(node, token)
+            if not matches:
+                location = "/" + "/".join(path)
+                return {
+                    "valid": False,
+                    "path": location,
+                    "error": f"Unknown command '{token}' in menu {location}",
+                    "suggestions": difflib.get_close_matches(token.lower(), list(node), n=3)
+                }
+            stack.append(node)
+            path.append(matches[0])
+            node = node[matches[0]]
+        return {"valid": True, "path": "/" + "/".join(path), "error": None, "suggestions": []}
+    
+    def validate_settings(self, state: Dict[str, Any]) -> List[str]:
+        """
+        校验设置字典的键
+        
+        Args:
+            state: apply_settings 的期望状态
+        
+        Returns:
+            错误描述列表，空列表表示全部有效
+        """
+        errors: List[str] = []
+        if self.settings:
+            _check_settings(self.settings, state, "", errors)
+        return errors
+    
+    def complete(self, prefix: str) -> List[str]:
+        """
+        补全 TUI 命令路径
+        
+        Args:
+            prefix: 已输入的命令，如 "define/bou" 或 "solve/set/"
+        
+        Returns:
+            候选的完整路径（菜单以 / 结尾）
+        """
+        text = prefix.strip()
+        tokens = _path_tokens(text)
+        partial = "" if not tokens or text.endswith(("/", " ")) else tokens.pop()
+        
+        node: Any = self.tui
+        path: List[str] = []
+        for token in tokens:
+            matches = _match(node, token) if isinstance(node, dict) else []
+            if not matches:
+                return []
+            path.append(matches[0])
+            node = node[matches[0]]
+        if not isinstance(node, dict):
+            return []
+        
+        base = "/" + "/".join(path + [""]) if path else "/"
+        return [
+            base + name + ("/" if isinstance(child, dict) else "")
+            for name, child in node.items()
+            if not partial or _abbreviates(partial.lower(), name)
+        ]
+    
+    def validate_journal(self, journal_file: str) -> List[Dict[str, Any]]:
+        """
+        离线检查 journal 中的 TUI 命令（Scheme 表达式和注释跳过）
+        
+        Args:
+            journal_file: journal 文件路径
+        
+        Returns:
+            [{"line", "command", "error", "suggestions"}]，空列表表示全部有效
+        
+        Raises:
+            ValidationError: 文件不存在时抛出
+        """
+        path = Path(journal_file)
+        if not path.exists():
+            raise ValidationError(f"Journal file does not exist: {journal_file}", field="journal_file")
+        
+        problems = []
+        for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+            command = line.strip()
+            if not command or command.startswith(("(", ";")):
+                continue
+            result = self.validate(command)
+            if not result["valid"]:
+                problems.append({
+                    "line": number,
+                    "command": command,
+                    "error": result["error"],
+                    "suggestions": result["suggestions"]
+                })
+        return problems
+
+
+def tui_name(name: str) -> str:
+    """PyFluent 的 Python 名称转换为 TUI 菜单名（boundary_conditions -> boundary-conditions）"""
+    return name.rstrip("_").replace("_", "-")
+
+
+def _walk_tui(node: Any, depth: int, seen: set) -> Any:
+    """递归提取 TUI 菜单：有公开子项的对象为菜单，其余为命令"""
+    if node is None or depth > _MAX_DEPTH or id(node) in seen:
+        return 0
+    children = _public_members(node)
+    if not children:
+        return 0
+    seen = seen | {id(node)}
+    return {tui_name(name): _walk_tui(child, depth + 1, seen) for name, child in children.items()}
+
+
+def _public_members(node: Any) -> Dict[str, Any]:
+    """
+    菜单对象的子项：实例属性（子菜单、命令对象）和生成类上定义的命令方法
+    
+    不包含基类（TUIMenu）上的通用方法。
+    """
+    members: Dict[str, Any] = {}
+    try:
+        instance = vars(node)
+    except TypeError:
+        return members
+    for name, value in instance.items():
+        if not name.startswith("_"):
+            members[name] = value
+    if type(node).__module__ != "builtins" and not isinstance(node, type):
+        for name, value in vars(type(node)).items():
+            if not name.startswith("_") and callable(value) and not isinstance(value, type):
+                members.setdefault(name, getattr(node, name))
+    return members
+
+
+def _child_names(node: Any) -> List[str]:
+    """PyFluent 设置对象的子项名称（参数和子分组）"""
+    names = getattr(node, "child_names", None)
+    return list(names) if isinstance(names, (list, tuple)) else []
+
+
+def _walk_settings(node: Any, depth: int) -> Any:
+    """递归提取设置树：分组为字典，具名对象容器为 {"*": 成员结构}，参数为 0"""
+    if depth > _MAX_DEPTH:
+        return 0
+    if hasattr(node, "child_object_type"):
+        names = node.get_object_names() if hasattr(node, "get_object_names") else []
+        return {"*": _walk_settings(node[names[0]], depth + 1) if names else None}
+    names = _child_names(node)
+    if not names:
+        return 0
+    return {name: _walk_settings(getattr(node, name), depth + 1) for name in names}
+
+
+def _count_leaves(tree: Any) -> int:
+    """叶子数"""
+    if not isinstance(tree, dict):
+        return 1
+    return sum(_count_leaves(child) for child in tree.values())
+
+
+def _path_tokens(command: str) -> List[str]:
+    """命令开头的路径部分（遇到引号或括号即为参数）"""
+    tokens = []
+    for token in re.split(r"[\s/]+", command.strip()):
+        if not token:
+            continue
+        if token[0] in "\"'(":
+            break
+        tokens.append(token)
+    return tokens
+
+
+def _abbreviates(token: str, name: str) -> bool:
+    """token 是否为 name 的前缀或按连字符分段的缩写"""
+    if name.startswith(token):
+        return True
+    token_parts, name_parts = token.split("-"), name.split("-")
+    return len(token_parts) <= len(name_parts) and all(
+        part.startswith(abbreviation) for abbreviation, part in zip(token_parts, name_parts)
+    )
+
+
+def _match(menu: Dict[str, Any], token: str) -> List[str]:
+    """菜单中与 token 匹配的项（完全匹配优先，其次按菜单顺序的缩写匹配）"""
+    token = token.lower()
+    if token in menu:
+        return [token]
+    return [name for name in menu if _abbreviates(token, name)]
+
+
+def _check_settings(tree: Any, state: Dict[str, Any], path: str, errors: List[str]):
+    """递归检查设置键"""
+    for key, value in state.items():
+        key_path = f"{path}/{key}" if path else key
+        if "*" in tree:
+            child = tree["*"]
+        elif key in tree:
+            child = tree[key]
+        else:
+            suggestions = difflib.get_close_matches(key, list(tree), n=3)
+            hint = f" (did you mean {', '.join(suggestions)}?)" if suggestions else ""
+            errors.append(f"Unknown setting: {key_path}{hint}")
+            continue
+        if isinstance(value, dict):
+            if child == 0:
+                errors.append(f"Setting {key_path} is a value, not a group")
+            elif isinstance(child, dict):
+                _check_settings(child, value, key_path, errors)
@@ -0,0 +1,327 @@
+"""
+Convergence - 残差/监视器流式订阅与收敛判据
+
+迭代过程中按块从求解器拉取新增的残差和报告定义监视器数据，写入有界环形缓冲区，
+并由可插拔的收敛判据（相对下降、平台检测、监视量稳定）决定是否提前停止。
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .exceptions import ValidationError
+
+
+class MonitorHistory:
+    """残差与监视量的有界环形缓冲区"""
+    
+    def __init__(self, capacity: int = 1000):
+        """
+        初始化缓冲区
+        
+        Args:
+            capacity: 每个量保留的最大迭代数
+        """
+        if capacity <= 0:
+            raise ValidationError("capacity must be positive", field="capacity")
+        
+        self.capacity = capacity
+        self._iterations: Dict[str, Deque[int]] = {}
+        self._values: Dict[str, Deque[float]] = {}
+        # 每个量的首个值，相对下降判据的参考值（不随环形缓冲区滚动丢失）
+        self.initial: Dict[str, float] = {}
+        # 监视集名称 -> 其中的量名称（如 "residual" -> ["continuity", ...]）
+        self.groups: Dict[str, List[str]] = {}
+        self.last_iteration: Optional[int] = None
+    
+    def append(self, iteration: int, values: Dict[str, float]):
+        """
+        追加一个迭代的数据
+        
+        Args:
+            iteration: 迭代序号
+            values: {量名称: 值}
+        """
+        for name, value in values.items():
+            if name not in self._values:
+                self._iterations[name] = deque(maxlen=self.capacity)
+                self._values[name] = deque(maxlen=self.capacity)
+                self.initial[name] = float(value)
+            self._iterations[name].append(int(iteration))
+            self._values[name].append(float(value))
+        self.last_iteration = int(iteration)
+    
+    def extend(self, iterations: Sequence[int], series: Dict[str, Sequence[float]], group: Optional[str] = None):
+        """
+        批量追加多个迭代的数据
+        
+        Args:
+            iterations: 迭代序号
+            series: {量名称: 与 iterations 等长的值序列}
+            group: 数据所属的监视集名称
+        """
+        if group is not None:
+            members = self.groups.setdefault(group, [])
+            members.extend(name for name in series if name not in members)
+        for index, iteration in enumerate(iterations):
+            self.append(iteration, {
+                name: values[index] for name, values in series.items() if index < len(values)
+            })
+    
+    def series(self, name: str) -> np.ndarray:
+        """
+        获取某个量在缓冲区中的值
+        
+        Args:
+            name: 量名称
+        
+        Returns:
+            按迭代顺序排列的数组，未知名称返回空数组
+        """
+        return np.fromiter(self._values.get(name, ()), dtype=float)
+    
+    def iterations(self, name: str) -> np.ndarray:
+        """
+        获取某个量对应的迭代序号
+        
+        Args:
+            name: 量名称
+        
+        Returns:
+            迭代序号数组
+        """
+        return np.fromiter(self._iterations.get(name, ()), dtype=int)
+    
+    def latest(self) -> Dict[str, float]:
+        """
+        获取每个量的最新值
+        
+        Returns:
+            {量名称: 最新值}
+        """
+        return {name: values[-1] for name, values in self._values.items() if values}
+    
+    @property
+    def names(self) -> List[str]:
+        """已记录的量名称"""
+        return list(self._values)
+    
+    @property
+    def residual_names(self) -> List[str]:
+        """残差量名称（未按监视集记录时为全部量）"""
+        return list(self.groups.get("residual", self.names))
+    
+    def __len__(self) -> int:
+        return max((len(values) for values in self._values.values()), default=0)
+
+
+class ConvergenceCriterion(ABC):
+    """收敛判据基类"""
+    
+    @abstractmethod
+    def is_met(self, history: MonitorHistory) -> bool:
+        """
+        判断是否满足
+        
+        Args:
+            history: 监视数据缓冲区
+        
+        Returns:
+            是否满足判据
+        """
+    
+    @abstractmethod
+    def describe(self) -> str:
+        """判据的简短描述"""
+
+
+class RelativeDrop(ConvergenceCriterion):
+    """残差相对首个值下降到指定比例以下"""
+    
+    def __init__(self, factor: float = 1e-3, quantities: Optional[Sequence[str]] = None):
+        """
+        Args:
+            factor: 当前值/首个值 的阈值
+            quantities: 判据涉及的量，None 表示全部残差
+        """
+        if not 0 < factor < 1:
+            raise ValidationError("factor must be between 0 and 1", field="factor")
+        self.factor = factor
+        self.quantities = list(quantities) if quantities else None
+    
+    def is_met(self, history: MonitorHistory) -> bool:
+        names = self.quantities or history.residual_names
+        latest = history.latest()
+        if not names or any(name not in latest for name in names):
+            return False
+        return all(
+            abs(latest[name]) <= self.factor * abs(history.initial[name])
+            for name in names
+        )
+    
+    def describe(self) -> str:
+        return f"relative drop <= {self.factor:g}"
+
+
+class Plateau(ConvergenceCriterion):
+    """残差进入平台：窗口内 log10 残差的变化（下降或上升）小于阈值"""
+    
+    def __init__(self, window: int = 50, tolerance: float = 0.05, quantities: Optional[Sequence[str]] = None):
+        """
+        Args:
+            window: 检测窗口（迭代数）
+            tolerance: 窗口内 log10 值最大变化幅度（数量级）
+            quantities: 判据涉及的量，None 表示全部残差
+        """
+        if window < 2:
+            raise ValidationError("window must be at least 2", field="window")
+        self.window = window
+        self.tolerance = tolerance
+        self.quantities = list(quantities) if quantities else None
+    
+    def is_met(self, history: MonitorHistory) -> bool:
+        names = self.quantities or history.residual_names
+        if not names:
+            return False
+        for name in names:
+            values = history.series(name)[-self.window:]
+            if len(values) < self.window:
+                return False
+            logs = np.log10(np.maximum(np.abs(values), np.finfo(float).tiny))
+            # 窗口前半段与后半段的均值之差，降低单步振荡的影响；残差上升（发散）不算平台
+            half = self.window // 2
+            if abs(logs[:half].mean() - logs[half:].mean()) > self.tolerance:
+                return False
+        return True
+    
+    def describe(self) -> str:
+        return f"plateau over {self.window} iterations (< {self.tolerance:g} decades)"
+
+
+class Stability(ConvergenceCriterion):
+    """监视量稳定：窗口内 (最大值-最小值)/|均值| 小于阈值"""
+    
+    def __init__(self, quantity: str, window: int = 50, tolerance: float = 1e-3):
+        """
+        Args:
+            quantity: 监视量（报告定义）名称
+            window: 检测窗口（迭代数）
+            tolerance: 相对波动阈值
+        """
+        if window < 2:
+            raise ValidationError("window must be at least 2", field="window")
+        self.quantity = quantity
+        self.window = window
+        self.tolerance = tolerance
+    
+    def is_met(self, history: MonitorHistory) -> bool:
+        values = history.series(self.quantity)[-self.window:]
+        if len(values) < self.window:
+            return False
+        scale = max(abs(values.mean()), np.finfo(float).eps)
+        return (values.max() - values.min()) / scale <= self.tolerance
+    
+    def describe(self) -> str:
+        return f"{self.quantity} stable within {self.tolerance:g} over {self.window} iterations"
+
+
+class ConvergenceMonitor:
+    """组合多个判据"""
+    
+    def __init__(
+        self,
+        criteria: Sequence[ConvergenceCriterion],
+        mode: str = "all",
+        min_iterations: int = 0
+    ):
+        """
+        Args:
+            criteria: 收敛判据
+            mode: "all" 全部满足才停止，"any" 任一满足即停止
+            min_iterations: 达到该迭代数之前不判定收敛
+        """
+        if mode not in ("all", "any"):
+            raise ValidationError(f"Unknown convergence mode: {mode}", field="mode")
+        if not criteria:
+            raise ValidationError("At least one convergence criterion is required", field="criteria")
+        self.criteria = list(criteria)
+        self.mode = mode
+        self.min_iterations = min_iterations
+    
+    def check(self, history: MonitorHistory, iterations: int) -> Tuple[bool, List[str]]:
+        """
+        检查是否收敛
+        
+        Args:
+            history: 监视数据缓冲区
+            iterations: 本次运行已完成的迭代数
+        
+        Returns:
+            (是否收敛, 已满足的判据描述)
+        """
+        if iterations < self.min_iterations:
+            return False, []
+        satisfied = [criterion.describe() for criterion in self.criteria if criterion.is_met(history)]
+        if self.mode == "all":
+            return len(satisfied) == len(self.criteria), satisfied
+        return bool(satisfied), satisfied
+
+
+class MonitorStream:
+    """从求解器增量拉取监视集数据"""
+    
+    def __init__(self, solver: Any, monitor_sets: Optional[Sequence[str]] = None):
+        """
+        Args:
+            solver: PyFluent 求解器会话
+            monitor_sets: 监视集名称（"residual" 及报告图名称），None 表示全部
+        """
+        self.solver = solver
+        self.monitor_sets = list(monitor_sets) if monitor_sets else None
+        self._next_index: Dict[str, int] = {}
+    
+    @property
+    def monitors(self) -> Any:
+        """求解器的监视器管理接口（新旧 PyFluent 版本兼容）"""
+        monitors = getattr(self.solver, "monitors", None)
+        if monitors is None:
+            monitors = getattr(self.solver, "monitors_manager", None)
+        return monitors
+    
+    def available(self) -> bool:
+        """求解器是否提供监视器数据接口"""
+        return self.monitors is not None and hasattr(self.monitors, "get_monitor_set_data")
+    
+    def poll(self, history: MonitorHistory) -> int:
+        """
+        拉取上次之后新增的数据并写入缓冲区
+        
+        Args:
+            history: 目标缓冲区
+        
+        Returns:
+            新增的迭代数（各监视集中的最大值）
+        """
+        monitors = self.monitors
+        names = self.monitor_sets or list(monitors.get_monitor_set_names())
+        added = 0
+        for name in names:
+            start = self._next_index.get(name, 0)
+            try:
+                x_values, y_values = monitors.get_monitor_set_data(monitor_set_name=name, start_index=start)
+            except Exception as e:
+                logger.warning(f"Could not read monitor set {name}: {e}")
+                continue
+            
+            iterations = [int(x) for x in np.asarray(x_values).ravel()]
+            if not iterations:
+                continue
+            history.extend(
+                iterations, {key: np.asarray(values).ravel() for key, values in y_values.items()}, group=name
+            )
+            self._next_index[name] = start + len(iterations)
+            added = max(added, len(iterations))
+        return added
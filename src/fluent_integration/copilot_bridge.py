@@ -12,29 +12,44 @@ from typing import Dict, List, Optional, Any
 from loguru import logger
 from dotenv import load_dotenv
 
+from copilot_client.prompt_builder import PromptBuilder
+
+from .exceptions import GenerationAbortedError
+from .stream_guard import StreamGuard
+
 load_dotenv()
 
 
 class CodeGeneratorBridge:
     """AI 驱动的代码生成桥接（使用 OpenAI API）"""
     
-    def __init__(self, config_path: str = "config/copilot_config.json"):
+    def __init__(self, config_path: str = "config/copilot_config.json", prompt_builder: Optional[PromptBuilder] = None):
         """
         初始化代码生成桥接
         
         Args:
             config_path: 代码生成配置文件路径
+            prompt_builder: 构建提示词的 PromptBuilder（静态前缀和布局版本），其 compaction
+                为 True 时压缩上下文和待优化代码
             
         说明:
         - 需要 OPENAI_API_KEY 环境变量（用于 OpenAI API）
         - GITHUB_TOKEN 仅用于权限验证，不用于代码生成
         """
         self.config = self._load_config(config_path)
+        self.prompt_builder = prompt_builder or PromptBuilder()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.api_endpoint = self.config.get("api_endpoint")
         # 默认模型改为 gpt-4，不再误用 copilot-codex
         self.model = os.getenv("OPENAI_MODEL", self.config.get("model", "gpt-4"))
+        self.usage_stats = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "aborted": 0
+        }
         
         if not self.openai_api_key:
             logger.warning(
@@ -75,12 +90,16 @@ class CodeGeneratorBridge:
         """
         logger.info(f"Generating {language} code with prompt: {prompt[:50]}...")
         
+        # 压缩上下文（去注释、折叠空白、去重）
+        if context and self.prompt_builder.compaction:
+            context, _ = self.prompt_builder.compact_context(context, language, task=prompt)
+        
         # 构建完整提示
         full_prompt = self._build_prompt(prompt, language, context)
         
         # 调用 AI API (OpenAI)
         try:
-            code = self._call_code_generation_api(full_prompt, max_tokens)
+            code = self._call_code_generation_api(full_prompt, max_tokens, language)
             logger.success(f"Generated {len(code)} characters of code")
             return code
         except Exception as e:
@@ -93,28 +112,67 @@ class CodeGeneratorBridge:
         language: str,
         context: Optional[List[str]] = None
     ) -> str:
-        """构建完整的提示词"""
+        """
+        构建用户消息（布局见 PromptBuilder.build_request_prompt）
+        """
         lang_config = self.config.get("languages", {}).get(language, {})
         prompt_template = self.config.get("prompts", {}).get(
             "udf_generation" if language == "c" else "python_script",
             "{description}"
         )
+        return self.prompt_builder.build_request_prompt(
+            prompt_template.format(description=prompt),
+            language,
+            context=context,
+            syntax_hints=lang_config.get("syntax_hints")
+        )
+    
+    def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """构建 Chat 消息：静态系统前缀 + 用户消息"""
+        return self.prompt_builder.build_messages(prompt)
+    
+    def _record_usage(self, response: Any):
+        """
+        记录 API 用量和前缀缓存命中的 token 数
+        
+        兼容 OpenAI (usage.prompt_tokens_details.cached_tokens) 与
+        Anthropic 风格 (usage.cache_read_input_tokens) 的响应字段
+        """
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
         
-        full_prompt = prompt_template.format(description=prompt)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) if details is not None else None
+        if cached_tokens is None:
+            cached_tokens = getattr(usage, "cache_read_input_tokens", 0) or 0
         
-        # 添加语法提示
-        if "syntax_hints" in lang_config:
-            hints = ", ".join(lang_config["syntax_hints"])
-            full_prompt = f"Language: {language}. Use syntax like: {hints}\n\n{full_prompt}"
+        self.usage_stats["requests"] += 1
+        self.usage_stats["prompt_tokens"] += prompt_tokens
+        self.usage_stats["cached_tokens"] += cached_tokens
+        self.usage_stats["completion_tokens"] += completion_tokens
         
-        # 添加上下文
-        if context:
-            context_str = "\n\n".join(context)
-            full_prompt = f"Context:\n{context_str}\n\n{full_prompt}"
+        logger.info(
+            f"Prompt tokens: {prompt_tokens} (cached: {cached_tokens}), "
+            f"completion tokens: {completion_tokens}"
+        )
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        获取累计 API 用量统计
         
-        return full_prompt
+        Returns:
+            包含请求数、token 数、缓存 token 数和缓存命中率的字典
+        """
+        stats = dict(self.usage_stats)
+        prompt_tokens = stats["prompt_tokens"]
+        stats["cache_hit_ratio"] = stats["cached_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        stats["layout_version"] = self.prompt_builder.LAYOUT_VERSION
+        return stats
     
-    def _call_code_generation_api(self, prompt: str, max_tokens: int) -> str:
+    def _call_code_generation_api(self, prompt: str, max_tokens: int, language: Optional[str] = None) -> str:
         """
         调用 AI 代码生成 API（OpenAI）
         
@@ -123,6 +181,8 @@ class CodeGeneratorBridge:
         """
         if self.openai_api_key:
             # 使用 OpenAI API
+            if language and self.config.get("stream_guard", {}).get("enabled", False):
+                return self._call_with_stream_guard(prompt, max_tokens, language)
             return self._call_openai_api(prompt, max_tokens)
         else:
             # 返回模板代码
@@ -132,28 +192,115 @@ class CodeGeneratorBridge:
             )
             return self._generate_template_code(prompt)
     
-    def _call_openai_api(self, prompt: str, max_tokens: int) -> str:
-        """调用 OpenAI API"""
+    def _call_with_stream_guard(self, prompt: str, max_tokens: int, language: str) -> str:
+        """
+        以流式方式调用 API，输出明显异常时提前中止并立即重试
+        
+        Raises:
+            GenerationAbortedError: 所有重试均被中止时抛出
+        """
+        max_retries = self.config.get("stream_guard", {}).get("max_retries", 2)
+        last_error = None
+        
+        for attempt in range(max_retries + 1):
+            try:
+                return self._call_openai_api(prompt, max_tokens, guard=self._create_stream_guard(language))
+            except GenerationAbortedError as e:
+                last_error = e
+                logger.warning(f"Generation aborted (attempt {attempt + 1}/{max_retries + 1}): {e.reason}")
+        
+        raise last_error
+    
+    def _create_stream_guard(self, language: str) -> StreamGuard:
+        """根据配置创建流式校验器（语言特征来自 languages.*.syntax_hints）"""
+        guard_config = {
+            key: value
+            for key, value in self.config.get("stream_guard", {}).items()
+            if key not in ("enabled", "max_retries")
+        }
+        syntax_hints = {
+            name: lang_config.get("syntax_hints", [])
+            for name, lang_config in self.config.get("languages", {}).items()
+        }
+        return StreamGuard(language, syntax_hints=syntax_hints, **guard_config)
+    
+    def _call_openai_api(self, prompt: str, max_tokens: int, guard: Optional[StreamGuard] = None) -> str:
+        """
+        调用 OpenAI API
+        
+        Args:
+            prompt: 用户消息
+            max_tokens: 最大生成 token 数
+            guard: 流式校验器；提供时以流式方式请求并逐块校验
+        """
         import openai
         
         openai.api_key = os.getenv("OPENAI_API_KEY")
         
         try:
+            if guard is not None:
+                stream = openai.chat.completions.create(
+                    model=os.getenv("OPENAI_MODEL", "gpt-4"),
+                    messages=self._build_messages(prompt),
+                    max_tokens=max_tokens,
+                    temperature=self.config.get("temperature", 0.3),
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                return self._consume_stream(stream, guard)
+            
             response = openai.chat.completions.create(
                 model=os.getenv("OPENAI_MODEL", "gpt-4"),
-                messages=[
-                    {"role": "system", "content": "You are an expert in ANSYS Fluent CFD and code generation."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_messages(prompt),
                 max_tokens=max_tokens,
                 temperature=self.config.get("temperature", 0.3)
             )
             
+            self._record_usage(response)
             return response.choices[0].message.content.strip()
+        except GenerationAbortedError:
+            raise
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise
     
+    def _consume_stream(self, stream: Any, guard: StreamGuard) -> str:
+        """
+        逐块读取流式响应并校验，异常时关闭连接停止计费
+        
+        Raises:
+            GenerationAbortedError: 校验器判定输出异常时抛出
+        """
+        parts = []
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                self._record_usage(chunk)
+            if not chunk.choices:
+                continue
+            
+            delta = chunk.choices[0].delta.content or ""
+            parts.append(delta)
+            reason = guard.feed(delta)
+            if reason:
+                self._abort_stream(stream, guard)
+        
+        if guard.finish():
+            self._abort_stream(stream, guard)
+        
+        return "".join(parts).strip()
+    
+    def _abort_stream(self, stream: Any, guard: StreamGuard):
+        """关闭流式连接并抛出中止异常"""
+        close = getattr(stream, "close", None)
+        if callable(close):
+            close()
+        self.usage_stats["aborted"] += 1
+        raise GenerationAbortedError(
+            guard.abort_reason,
+            language=guard.language,
+            details={"generated_chars": len(guard.text)}
+        )
+    
     def _generate_template_code(self, prompt: str) -> str:
         """生成模板代码"""
         return f"/* Generated code for: {prompt} */\n// TODO: Implement functionality\n"
@@ -171,6 +318,9 @@ class CodeGeneratorBridge:
         """
         logger.info("Optimizing code...")
         
+        if self.prompt_builder.compaction:
+            code = self.prompt_builder.compact_code(code, language)
+        
         prompt_template = self.config.get("prompts", {}).get("optimization", "Optimize: {code}")
         prompt = prompt_template.format(code=code)
         
@@ -67,15 +67,32 @@ class FluentUDFError(FluentSessionError):
         super().__init__(message, error_code="FLUENT_UDF_ERROR", details=details)
 
 
+class FluentSolveError(FluentSessionError):
+    """求解迭代错误"""
+    
+    def __init__(self, message: str, iterations_completed: int = None, details: dict = None):
+        if details is None:
+            details = {}
+        if iterations_completed is not None:
+            details["iterations_completed"] = iterations_completed
+        super().__init__(message, error_code="FLUENT_SOLVE_ERROR", details=details)
+
+
 class CodeGenerationError(FluentIntegrationError):
     """代码生成错误"""
     
-    def __init__(self, message: str, language: str = None, details: dict = None):
+    def __init__(
+        self,
+        message: str,
+        language: str = None,
+        error_code: str = "CODE_GENERATION_ERROR",
+        details: dict = None
+    ):
         if details is None:
             details = {}
         if language:
             details["language"] = language
-        super().__init__(message, error_code="CODE_GENERATION_ERROR", details=details)
+        super().__init__(message, error_code=error_code, details=details)
 
 
 class UDFGenerationError(CodeGenerationError):
@@ -93,6 +110,22 @@ class UDFGenerationError(CodeGenerationError):
         super().__init__(message, error_code="UDF_GENERATION_ERROR", details=details)
 
 
+class GenerationAbortedError(CodeGenerationError):
+    """流式生成被提前中止（输出明显异常）"""
+    
+    def __init__(self, reason: str, language: str = None, details: dict = None):
+        if details is None:
+            details = {}
+        details["reason"] = reason
+        self.reason = reason
+        super().__init__(
+            f"Generation aborted: {reason}",
+            language=language,
+            error_code="GENERATION_ABORTED",
+            details=details
+        )
+
+
 class APIMissingError(CodeGenerationError):
     """API 密钥缺失错误"""
     
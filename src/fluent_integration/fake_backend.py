@@ -0,0 +1,539 @@
+"""
+Fake Backend - 进程内的模拟 PyFluent 后端
+
+实现 FluentWrapper 用到的 PyFluent 接口（launch_fluent、file.read_case、scheme_eval、
+execute_command、tui...compiled_functions、settings、field data、monitors），可配置每类调用的
+延迟和返回数据的规模。无需许可证即可测量 wrapper 自身的开销、批处理收益和缓存效果。
+
+    backend = FakeFluentBackend(latency={"rpc": 0.002})
+    wrapper = FluentWrapper(launcher=backend.launch_fluent)
+    wrapper.start_fluent()
+"""
+
+import copy
+import os
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from loguru import logger
+
+
+# 每类调用的模拟耗时（秒）；rpc 是每次远程调用的固定往返开销
+DEFAULT_LATENCY = {
+    "launch": 0.0,
+    "rpc": 0.0,
+    "command": 0.0,
+    "read_case": 0.0,
+    "write_case": 0.0,
+    "read_data": 0.0,
+    "initialize": 0.0,
+    "get_state": 0.0,
+    "setting": 0.0,
+    "iteration": 0.0,
+    "compile": 0.0,
+    "load_udf": 0.0,
+    "field_bytes_per_second": 0.0
+}
+
+# 读入案例后的设置树（settings.get_state() 的结构）
+DEFAULT_SETTINGS = {
+    "setup": {
+        "general": {"solver": {"type": "pressure-based", "time": "steady"}},
+        "models": {
+            "energy": {"enabled": False},
+            "viscous": {"model": "k-omega", "k_omega_model": "sst"}
+        },
+        "materials": {"fluid": {"air": {"density": {"option": "constant", "value": 1.225}}}},
+        "boundary_conditions": {
+            "velocity_inlet": {"inlet": {
+                "momentum": {"velocity": {"value": 1.0}},
+                "thermal": {"temperature": {"value": 300.0}}
+            }},
+            "pressure_outlet": {"outlet": {"momentum": {"gauge_pressure": {"value": 0.0}}}}
+        }
+    },
+    "solution": {
+        "methods": {"p_v_coupling": {"flow_scheme": "SIMPLE"}},
+        "controls": {"under_relaxation": {"pressure": 0.3, "mom": 0.7}}
+    }
+}
+
+# TUI 菜单树的子集（Python 名称，None 为命令），用于命令树提取和本地校验
+TUI_MENUS = {
+    "file": {name: None for name in (
+        "read_case", "read_case_data", "read_data", "read_journal", "read_profile",
+        "write_case", "write_case_data", "write_data"
+    )},
+    "define": {
+        "models": {"energy": None, "viscous": {"laminar": None, "kw_sst": None, "ke_standard": None}},
+        "boundary_conditions": {
+            "set": {"velocity_inlet": None, "pressure_outlet": None, "wall": None},
+            "velocity_inlet": None,
+            "pressure_outlet": None,
+            "wall": None,
+            "zone_type": None
+        },
+        "materials": {"change_create": None, "copy": None},
+        "user_defined": {
+            "compiled_functions": None,
+            "function_hooks": {"adjust": None, "initialization": None, "execute_at_end": None},
+            "execute_on_demand": None
+        }
+    },
+    "solve": {
+        "iterate": None,
+        "initialize": {"hyb_initialization": None, "initialize_flow": None, "compute_defaults": None},
+        "set": {
+            "flow": None,
+            "under_relaxation": {"pressure": None, "mom": None, "k": None, "omega": None, "temperature": None}
+        },
+        "monitors": {"residual": {"convergence_criteria": None, "print": None}},
+        "report_definitions": {"add": None, "edit": None}
+    },
+    "report": {"fluxes": {"mass_flow": None}, "surface_integrals": {"area_weighted_avg": None}},
+    "exit": None
+}
+
+# 成员名由案例决定的具名对象容器
+NAMED_SETTINGS = ("fluid", "velocity_inlet", "pressure_outlet")
+
+_BATCH_STEP = re.compile(r"\(set! \*fcm-batch-results\* \(cons ")
+_TUI_STEP = re.compile(r'\(ti-menu-load-string "((?:[^"\\]|\\.)*)"\)')
+_BATCH_TOKEN = re.compile(r'\(define \*fcm-batch-results\* \(list "([^"]*)"\)\)')
+
+
+class FakeFluentBackend:
+    """模拟后端：创建会话并统计远程调用"""
+    
+    def __init__(
+        self,
+        latency: Optional[Dict[str, float]] = None,
+        zones: int = 8,
+        cells_per_zone: int = 10000,
+        work_dir: str = ".",
+        fail_commands: Optional[Sequence[str]] = None,
+        parallel_fraction: float = 1.0,
+        communication: float = 0.0,
+        simulated_time: bool = False
+    ):
+        """
+        初始化后端
+        
+        Args:
+            latency: 覆盖 DEFAULT_LATENCY 中的延迟
+            zones: 表面 zone 数量
+            cells_per_zone: 每个 zone 返回的数据点数
+            work_dir: 编译 UDF 时创建库目录的工作目录
+            fail_commands: 包含这些子串的 TUI 命令执行失败
+            parallel_fraction: 每步迭代中可并行的比例（Amdahl 定律）
+            communication: 每增加一个进程，每步迭代增加的通信开销（相对单进程耗时）
+            simulated_time: 不实际等待，延迟累加到模拟时钟（clock()），计时结果与机器负载无关
+        """
+        self.latency = {**DEFAULT_LATENCY, **(latency or {})}
+        self.zones = [f"zone-{index}" for index in range(zones)]
+        self.cells_per_zone = cells_per_zone
+        self.work_dir = Path(work_dir)
+        self.fail_commands = list(fail_commands or [])
+        self.parallel_fraction = parallel_fraction
+        self.communication = communication
+        self.simulated_time = simulated_time
+        self.elapsed = 0.0
+        self.calls: Counter = Counter()
+        self.sessions: List["FakeSession"] = []
+        self._lock = threading.Lock()
+    
+    def launch_fluent(self, **kwargs) -> "FakeSession":
+        """
+        与 pyfluent.launch_fluent 签名兼容的启动函数
+        
+        Args:
+            **kwargs: 启动参数（记录在会话中）
+        
+        Returns:
+            模拟会话
+        """
+        self.charge("launch")
+        session = FakeSession(self, kwargs)
+        self.sessions.append(session)
+        return session
+    
+    def charge(self, operation: str, units: float = 1.0, rpc: bool = True):
+        """
+        记录一次调用并模拟其耗时
+        
+        Args:
+            operation: 调用类别（DEFAULT_LATENCY 的键）
+            units: 耗时倍数（如迭代步数）
+            rpc: 是否计入一次远程往返
+        """
+        with self._lock:
+            self.calls[operation] += 1
+            if rpc:
+                self.calls["rpc"] += 1
+        delay = self.latency.get(operation, 0.0) * units + (self.latency["rpc"] if rpc else 0.0)
+        if self.simulated_time:
+            with self._lock:
+                self.elapsed += delay
+        elif delay > 0:
+            time.sleep(delay)
+    
+    def clock(self) -> float:
+        """
+        计时函数：simulated_time 时返回累计的模拟耗时，否则为 time.perf_counter()
+        
+        Returns:
+            秒
+        """
+        if self.simulated_time:
+            with self._lock:
+                return self.elapsed
+        return time.perf_counter()
+    
+    def reset_counters(self):
+        """清零调用计数"""
+        with self._lock:
+            self.calls.clear()
+    
+    def iteration_scale(self, processor_count: int) -> float:
+        """processor_count 个进程时每步迭代耗时相对单进程的倍数"""
+        processor_count = max(int(processor_count), 1)
+        return (
+            (1 - self.parallel_fraction)
+            + self.parallel_fraction / processor_count
+            + self.communication * (processor_count - 1)
+        )
+    
+    def command_fails(self, command: str) -> bool:
+        """命令是否按配置失败"""
+        return any(pattern in command for pattern in self.fail_commands)
+
+
+class FakeSession:
+    """模拟的求解器会话（launch_fluent 的返回值）"""
+    
+    def __init__(self, backend: FakeFluentBackend, options: Dict[str, Any]):
+        self.backend = backend
+        self.options = options
+        self.solver = FakeSolver(backend, processor_count=options.get("processor_count", 1))
+        self.closed = False
+        # 启动线程的 CPU 亲和性（真实求解器进程会继承）
+        self.cpu_affinity = set(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    
+    def exit(self):
+        """结束会话"""
+        self.backend.charge("exit")
+        self.closed = True
+
+
+class FakeSolver:
+    """模拟 PyFluent 求解器接口"""
+    
+    def __init__(self, backend: FakeFluentBackend, processor_count: int = 1):
+        self.backend = backend
+        self.processor_count = processor_count
+        self.iteration = 0
+        self.case_file: Optional[str] = None
+        self.loaded_libraries: Set[str] = set()
+        self.scheme_variables: Dict[str, Any] = {}
+        # 读入案例后执行过的 TUI 命令，报告定义的值由其中的数值参数决定
+        self.applied_commands: List[str] = []
+        # 流场来源：None 未初始化，"hybrid"/"standard"，或读入的数据文件路径
+        self.initialized_from: Optional[str] = None
+        self.settings_state: Dict[str, Any] = copy.deepcopy(DEFAULT_SETTINGS)
+        self.settings = FakeSettingsNode(self, ())
+        
+        self.file = SimpleNamespace(
+            read_case=self._read_case,
+            read_case_data=self._read_case,
+            write_case=self._write_case,
+            write_case_data=self._write_case_data,
+            read_data=self._read_data,
+            write_data=self._write_data,
+            read_profile=lambda file_name: backend.charge("read_profile"),
+            read_journal=self._read_journal
+        )
+        self.solution = SimpleNamespace(
+            initialization=SimpleNamespace(
+                hybrid_initialize=lambda: self._initialize("hybrid"),
+                standard_initialize=lambda: self._initialize("standard")
+            ),
+            run_calculation=SimpleNamespace(iterate=self._iterate),
+            report_definitions=SimpleNamespace(compute=self._compute_reports)
+        )
+        self.tui = _tui_menu(TUI_MENUS, backend)
+        self.tui.define.user_defined.compiled_functions = SimpleNamespace(
+            compile=self._compile, load=self._load, unload=self._unload
+        )
+        self.fields = SimpleNamespace(field_data=FakeFieldData(self), field_info=FakeFieldInfo(backend))
+        self.monitors = FakeMonitors(self)
+    
+    def scheme_eval(self, expression: str) -> Any:
+        """执行 Scheme 表达式（识别 FluentWrapper 的批处理块）"""
+        backend = self.backend
+        steps = len(_BATCH_STEP.findall(expression))
+        if steps:
+            backend.charge("scheme_eval")
+            token = _BATCH_TOKEN.search(expression)
+            marker = [token.group(1)] if token else []
+            results = []
+            for match in _BATCH_STEP.finditer(expression):
+                tui = _TUI_STEP.match(expression, match.end())
+                command = tui.group(1) if tui else ""
+                backend.charge("command", rpc=False)
+                if command and backend.command_fails(command):
+                    # 与 Fluent 一致：出错即中止整个块，已完成的结果保留在变量中
+                    self.scheme_variables["*fcm-batch-results*"] = list(reversed(results)) + marker
+                    raise RuntimeError(f"Error executing: {command}")
+                results.append(True)
+                if command:
+                    self.applied_commands.append(command)
+            self.scheme_variables["*fcm-batch-results*"] = list(reversed(results)) + marker
+            return results
+        
+        backend.charge("scheme_eval")
+        match = re.fullmatch(r"\(reverse (\S+)\)", expression.strip())
+        if match:
+            return list(reversed(self.scheme_variables.get(match.group(1), [])))
+        backend.charge("command", rpc=False)
+        return None
+    
+    def execute_command(self, command: str) -> Any:
+        """执行 TUI 命令"""
+        self.backend.charge("execute_command")
+        self.backend.charge("command", rpc=False)
+        if self.backend.command_fails(command):
+            raise RuntimeError(f"Error executing: {command}")
+        self.applied_commands.append(command)
+        return True
+    
+    def _read_case(self, file_name: str):
+        self.backend.charge("read_case")
+        self.case_file = file_name
+        self.iteration = 0
+        self.applied_commands = []
+        self.initialized_from = None
+        self.settings_state = copy.deepcopy(DEFAULT_SETTINGS)
+    
+    def _write_case(self, file_name: str):
+        self.backend.charge("write_case")
+        Path(file_name).write_bytes(b"fake case")
+    
+    def _write_case_data(self, file_name: str):
+        self.backend.charge("write_case")
+        case = Path(file_name)
+        case.write_bytes(b"fake case")
+        data_name = case.name.replace(".cas", ".dat") if ".cas" in case.name else case.name + ".dat"
+        case.with_name(data_name).write_bytes(b"fake data")
+    
+    def _read_data(self, file_name: str):
+        self.backend.charge("read_data")
+        if not Path(file_name).exists():
+            raise RuntimeError(f"Data file not found: {file_name}")
+        self.initialized_from = file_name
+    
+    def _write_data(self, file_name: str):
+        self.backend.charge("write_case")
+        Path(file_name).write_bytes(b"fake data")
+    
+    def _initialize(self, method: str):
+        self.backend.charge("initialize")
+        self.initialized_from = method
+    
+    def _read_journal(self, file_name_list: List[str]):
+        self.backend.charge("read_journal")
+        for file_name in file_name_list:
+            for line in Path(file_name).read_text(encoding="utf-8").splitlines():
+                if line.strip() and not line.startswith("("):
+                    self.backend.charge("command", rpc=False)
+    
+    def _iterate(self, iter_count: int):
+        self.backend.charge("iteration", units=iter_count * self.backend.iteration_scale(self.processor_count))
+        self.iteration += iter_count
+    
+    def _compute_reports(self, report_defs: List[str]) -> List[Dict[str, List[float]]]:
+        self.backend.charge("report")
+        numbers = [
+            float(token) for command in self.applied_commands for token in command.split()
+            if re.fullmatch(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", token)
+        ]
+        value = sum(numbers) + 1e-3 * self.iteration
+        return [{name: [value + index, 0]} for index, name in enumerate(report_defs)]
+    
+    def _compile(self, lib_name: str, src_file_name_list: List[str]):
+        self.backend.charge("compile")
+        target = self.backend.work_dir / lib_name / "lnamd64" / "3ddp"
+        target.mkdir(parents=True, exist_ok=True)
+        (target / "libudf.so").write_bytes(b"\x7fELF" + "".join(src_file_name_list).encode("utf-8"))
+    
+    def _load(self, lib_name: str):
+        self.backend.charge("load_udf")
+        self.loaded_libraries.add(lib_name)
+    
+    def _unload(self, lib_name: str):
+        self.backend.charge("unload_udf")
+        self.loaded_libraries.discard(lib_name)
+
+
+def _tui_menu(menus: Dict[str, Any], backend: FakeFluentBackend) -> SimpleNamespace:
+    """按菜单字典创建 TUI 菜单对象，命令调用计为一次远程调用"""
+    return SimpleNamespace(**{
+        name: _tui_menu(child, backend) if isinstance(child, dict) else (lambda *args: backend.charge("command"))
+        for name, child in menus.items()
+    })
+
+
+class FakeSettingsNode:
+    """模拟 PyFluent 设置对象：属性访问子节点，get_state/set_state 各为一次远程调用"""
+    
+    def __init__(self, solver: FakeSolver, path: tuple):
+        self._solver = solver
+        self._path = path
+    
+    def _state(self) -> Dict[str, Any]:
+        state = self._solver.settings_state
+        for key in self._path:
+            state = state[key]
+        return state
+    
+    def __getattr__(self, name: str) -> "FakeSettingsNode":
+        state = self._state()
+        if name.startswith("_") or not isinstance(state, dict) or name not in state or self._named:
+            raise AttributeError(f"{'.'.join(self._path) or 'settings'} has no child {name}")
+        return FakeSettingsNode(self._solver, self._path + (name,))
+    
+    def __getitem__(self, name: str) -> "FakeSettingsNode":
+        if not self._named or name not in self._state():
+            raise KeyError(name)
+        return FakeSettingsNode(self._solver, self._path + (name,))
+    
+    @property
+    def _named(self) -> bool:
+        return bool(self._path) and self._path[-1] in NAMED_SETTINGS
+    
+    @property
+    def child_names(self) -> List[str]:
+        state = self._state()
+        if not isinstance(state, dict) or self._named:
+            raise AttributeError("child_names")
+        return list(state)
+    
+    @property
+    def child_object_type(self) -> type:
+        if not self._named:
+            raise AttributeError("child_object_type")
+        return FakeSettingsNode
+    
+    def get_object_names(self) -> List[str]:
+        return list(self._state())
+    
+    def get_state(self) -> Dict[str, Any]:
+        self._solver.backend.charge("get_state")
+        return copy.deepcopy(self._state())
+    
+    def set_state(self, state: Dict[str, Any]):
+        self._solver.backend.charge("set_state")
+        self._assign(self._state(), state, self._path)
+    
+    def _assign(self, target: Dict[str, Any], state: Dict[str, Any], path: tuple):
+        for key, value in state.items():
+            if key not in target:
+                raise RuntimeError(f"Unknown setting: {'/'.join(path + (key,))}")
+            if isinstance(value, dict) and isinstance(target[key], dict):
+                self._assign(target[key], value, path + (key,))
+            else:
+                self._solver.backend.charge("setting", rpc=False)
+                target[key] = copy.deepcopy(value)
+
+
+class FakeFieldInfo:
+    """模拟 field_info 接口"""
+    
+    def __init__(self, backend: FakeFluentBackend):
+        self.backend = backend
+    
+    def get_surfaces_info(self) -> Dict[str, Dict[str, Any]]:
+        self.backend.charge("field_info")
+        return {
+            name: {"surface_id": [index], "zone_type": "wall"}
+            for index, name in enumerate(self.backend.zones)
+        }
+
+
+class FakeFieldData:
+    """模拟支持事务的 field data 接口，返回数组的规模由后端配置决定"""
+    
+    def __init__(self, solver: FakeSolver):
+        self.solver = solver
+        self._arrays: Dict[Any, np.ndarray] = {}
+    
+    def new_transaction(self) -> "FakeTransaction":
+        return FakeTransaction(self)
+    
+    def array(self, variable: str, zone_index: int) -> np.ndarray:
+        """某个变量在某个 zone 上的数据（按迭代步变化）"""
+        key = (variable, zone_index, self.solver.iteration)
+        if key not in self._arrays:
+            if len(self._arrays) > 256:
+                self._arrays.clear()
+            seed = sum(map(ord, variable)) + zone_index + self.solver.iteration
+            self._arrays[key] = np.linspace(seed, seed + 1, self.solver.backend.cells_per_zone)
+        return self._arrays[key]
+
+
+class FakeTransaction:
+    """模拟 field data 事务"""
+    
+    def __init__(self, owner: FakeFieldData):
+        self.owner = owner
+        self.requests: List[Any] = []
+    
+    def add_scalar_fields_request(self, field_name: str, surfaces: Sequence[str], node_value: bool = True):
+        self.requests.append((field_name, list(surfaces)))
+    
+    def get_fields(self) -> Dict[Any, Dict[int, Dict[str, np.ndarray]]]:
+        backend = self.owner.solver.backend
+        response: Dict[int, Dict[str, np.ndarray]] = {}
+        payload = 0
+        for field_name, surfaces in self.requests:
+            for surface in surfaces:
+                surface_id = backend.zones.index(surface)
+                array = self.owner.array(field_name, surface_id)
+                response.setdefault(surface_id, {})[field_name] = array
+                payload += array.nbytes
+        
+        bandwidth = backend.latency["field_bytes_per_second"]
+        backend.charge("get_fields")
+        if bandwidth > 0:
+            time.sleep(payload / bandwidth)
+        with backend._lock:
+            backend.calls["field_bytes"] += payload
+        return {("scalar",): response}
+
+
+class FakeMonitors:
+    """模拟监视器接口：残差按迭代步指数下降"""
+    
+    def __init__(self, solver: FakeSolver):
+        self.solver = solver
+    
+    def get_monitor_set_names(self) -> List[str]:
+        self.solver.backend.charge("monitors")
+        return ["residual"]
+    
+    def get_monitor_set_data(self, monitor_set_name: str, start_index: int = 0):
+        self.solver.backend.charge("monitors")
+        iterations = np.arange(start_index + 1, self.solver.iteration + 1)
+        if monitor_set_name != "residual":
+            logger.warning(f"Unknown monitor set in fake backend: {monitor_set_name}")
+            return iterations, {}
+        return iterations, {
+            "continuity": 0.97 ** iterations,
+            "x-velocity": 0.1 * 0.96 ** iterations,
+            "energy": 1e-3 * 0.98 ** iterations
+        }
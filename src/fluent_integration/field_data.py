@@ -0,0 +1,241 @@
+"""
+Field Data Extractor - 基于 PyFluent field data 的求解数据提取
+
+按 zone 分块批量请求多个变量，结果以 NumPy 数组返回（dtype 相同时不复制）。
+PyFluent 的 field data 接口每次传输整个表面，单个 zone 无法再拆分，因此单次传输的
+数据量受 zone_chunk_size 和最大 zone 的大小限制。extract() 在内存中保留全部结果；
+需要限制峰值内存时用 iter_chunks() 逐块处理，或写入调用方缓冲区/内存映射文件。
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .exceptions import FluentSessionError, ValidationError
+
+
+FieldResult = Dict[str, Dict[str, np.ndarray]]
+
+
+class FieldDataExtractor:
+    """求解数据提取器（变量批量请求 + zone 分块）"""
+    
+    def __init__(self, solver: Any, zone_chunk_size: int = 16, dtype: Any = np.float64):
+        """
+        初始化提取器
+        
+        Args:
+            solver: PyFluent 求解器会话
+            zone_chunk_size: 每次请求的 zone 数（单次传输包含这些 zone 的全部数据）
+            dtype: 返回数组的数据类型
+        """
+        if zone_chunk_size <= 0:
+            raise ValidationError("zone_chunk_size must be positive", field="zone_chunk_size")
+        
+        self.solver = solver
+        self.zone_chunk_size = zone_chunk_size
+        self.dtype = np.dtype(dtype)
+    
+    @property
+    def field_data(self) -> Any:
+        """PyFluent field data 接口（兼容新旧版本的位置）"""
+        fields = getattr(self.solver, "fields", None)
+        field_data = getattr(fields, "field_data", None) or getattr(self.solver, "field_data", None)
+        if field_data is None:
+            raise FluentSessionError(
+                "Field data API is not available in this PyFluent session",
+                details={"fix": "pip install -U ansys-fluent-core"}
+            )
+        return field_data
+    
+    @property
+    def field_info(self) -> Any:
+        """PyFluent field info 接口"""
+        fields = getattr(self.solver, "fields", None)
+        return getattr(fields, "field_info", None) or getattr(self.solver, "field_info", None)
+    
+    def zones(self) -> List[str]:
+        """
+        获取可用的 zone（表面）名称
+        
+        Returns:
+            zone 名称列表
+        """
+        return list(self._surfaces_info().keys())
+    
+    def extract(
+        self,
+        variables: Sequence[str],
+        zones: Optional[Sequence[str]] = None,
+        node_value: bool = True,
+        out: Optional[FieldResult] = None,
+        memmap_dir: Optional[str] = None
+    ) -> FieldResult:
+        """
+        提取多个变量在各 zone 上的数据
+        
+        Args:
+            variables: 变量名列表（如 "pressure", "velocity-magnitude"）
+            zones: zone 名称列表，None 表示全部
+            node_value: True 返回节点值，False 返回单元值
+            out: 调用方提供的缓冲区 {变量: {zone: 数组}}，数据直接写入其中
+            memmap_dir: 写入该目录下的内存映射文件（每个变量/zone 一个 .npy）
+        
+        Returns:
+            {变量: {zone: 数组}}；不指定 out 和 memmap_dir 时全部数组都保留在内存中
+        """
+        result: FieldResult = {variable: {} for variable in variables}
+        
+        # 写入 out/memmap_dir 时结果是目标缓冲区的视图，传输数据在处理下一块前即可释放
+        for zone_chunk, chunk_data in self.iter_chunks(variables, zones, node_value):
+            for variable, per_zone in chunk_data.items():
+                for zone, array in per_zone.items():
+                    result[variable][zone] = self._store(variable, zone, array, out, memmap_dir)
+        
+        return result
+    
+    def iter_chunks(
+        self,
+        variables: Sequence[str],
+        zones: Optional[Sequence[str]] = None,
+        node_value: bool = True
+    ) -> Iterator[Tuple[List[str], FieldResult]]:
+        """
+        按 zone 分块流式提取数据，调用方处理完一块后不再持有即可释放，
+        峰值内存为一个 zone 块的传输数据
+        
+        Args:
+            variables: 变量名列表
+            zones: zone 名称列表，None 表示全部
+            node_value: True 返回节点值，False 返回单元值
+        
+        Yields:
+            (本块 zone 列表, {变量: {zone: 数组}})
+        """
+        if not variables:
+            raise ValidationError("At least one variable is required", field="variables")
+        
+        # 表面信息只读取一次，列出 zone 和解析各块事务响应的 surface_id 共用
+        field_data = self.field_data
+        surfaces_info = None
+        if zones is None or hasattr(field_data, "new_transaction"):
+            surfaces_info = self._surfaces_info()
+        
+        zones = list(zones) if zones is not None else list(surfaces_info)
+        for start in range(0, len(zones), self.zone_chunk_size):
+            zone_chunk = zones[start:start + self.zone_chunk_size]
+            yield zone_chunk, self._request(field_data, list(variables), zone_chunk, node_value, surfaces_info)
+    
+    def _request(
+        self,
+        field_data: Any,
+        variables: List[str],
+        zones: List[str],
+        node_value: bool,
+        surfaces_info: Optional[Dict[str, Any]]
+    ) -> FieldResult:
+        """一次请求多个变量（支持事务接口时合并为一次传输）"""
+        if hasattr(field_data, "new_transaction"):
+            transaction = field_data.new_transaction()
+            for variable in variables:
+                transaction.add_scalar_fields_request(
+                    field_name=variable,
+                    surfaces=zones,
+                    node_value=node_value
+                )
+            return self._parse_transaction(transaction.get_fields(), variables, _surface_ids(surfaces_info or {}, zones))
+        
+        return {
+            variable: self._parse_scalar_response(
+                field_data.get_scalar_field_data(field_name=variable, surfaces=zones, node_value=node_value),
+                zones
+            )
+            for variable in variables
+        }
+    
+    def _parse_transaction(self, response: Dict, variables: List[str], id_to_zone: Dict[Any, str]) -> FieldResult:
+        """解析事务响应 {请求类型: {surface_id: {变量: 数组}}}"""
+        result: FieldResult = {variable: {} for variable in variables}
+        
+        for per_surface in response.values():
+            for surface_id, fields in per_surface.items():
+                zone = id_to_zone.get(surface_id, str(surface_id))
+                for variable in variables:
+                    if variable in fields:
+                        result[variable][zone] = self._as_array(fields[variable])
+        return result
+    
+    def _parse_scalar_response(self, response: Any, zones: List[str]) -> Dict[str, np.ndarray]:
+        """解析单个变量的响应（新版本返回 {zone: 数组}，旧版本返回对象）"""
+        if isinstance(response, dict):
+            return {str(zone): self._as_array(values) for zone, values in response.items()}
+        if len(zones) == 1:
+            return {zones[0]: self._as_array(response)}
+        raise FluentSessionError(
+            "Unexpected field data response",
+            details={"type": type(response).__name__, "zones": len(zones)}
+        )
+    
+    def _as_array(self, values: Any) -> np.ndarray:
+        """转换为一维数组（dtype 一致时零拷贝）"""
+        values = getattr(values, "scalar_data", values)
+        if isinstance(values, (list, tuple)) and values and hasattr(values[0], "scalar_data"):
+            values = [item.scalar_data for item in values]
+        return np.asarray(values, dtype=self.dtype).reshape(-1)
+    
+    def _store(
+        self,
+        variable: str,
+        zone: str,
+        array: np.ndarray,
+        out: Optional[FieldResult],
+        memmap_dir: Optional[str]
+    ) -> np.ndarray:
+        """将数据写入目标缓冲区"""
+        if out is not None and zone in out.get(variable, {}):
+            target = out[variable][zone]
+            if target.shape[0] < array.shape[0]:
+                raise ValidationError(
+                    f"Output buffer too small for {variable} on {zone}",
+                    field="out",
+                    details={"required": array.shape[0], "available": target.shape[0]}
+                )
+            target = target[:array.shape[0]]
+            np.copyto(target, array, casting="same_kind")
+            return target
+        
+        if memmap_dir is not None:
+            path = Path(memmap_dir) / f"{_safe_name(variable)}__{_safe_name(zone)}.npy"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            target = np.lib.format.open_memmap(str(path), mode="w+", dtype=self.dtype, shape=array.shape)
+            target[:] = array
+            target.flush()
+            return target
+        
+        return array
+    
+    def _surfaces_info(self) -> Dict[str, Any]:
+        """获取表面信息 {名称: {"surface_id": [...], ...}}"""
+        field_info = self.field_info
+        if field_info is None or not hasattr(field_info, "get_surfaces_info"):
+            logger.warning("Field info API not available, cannot list zones")
+            return {}
+        return dict(field_info.get_surfaces_info())
+
+
+def _surface_ids(surfaces_info: Dict[str, Any], zones: List[str]) -> Dict[Any, str]:
+    """构造 surface_id -> zone 名称的映射"""
+    mapping = {}
+    for zone in zones:
+        ids = surfaces_info.get(zone, {}).get("surface_id", [])
+        for surface_id in ids if isinstance(ids, (list, tuple)) else [ids]:
+            mapping[surface_id] = zone
+    return mapping
+
+
+def _safe_name(name: str) -> str:
+    """将变量/zone 名称转换为安全的文件名"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
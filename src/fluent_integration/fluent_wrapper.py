@@ -3,36 +3,101 @@ Fluent Wrapper - ANSYS Fluent API 封装
 """
 
 import os
+import copy
 import json
-from typing import Dict, Optional, List, Any
+import hashlib
+import itertools
+import tempfile
+import threading
+from typing import Callable, Dict, Optional, List, Any, Sequence, Tuple, Union
 from pathlib import Path
 from loguru import logger
 from dotenv import load_dotenv
 
+from .command_tree import CommandTree
+from .convergence import ConvergenceCriterion, ConvergenceMonitor, MonitorHistory, MonitorStream
+from .field_data import FieldDataExtractor
+from .journal import JournalRecorder, replay_journal
+from .placement import format_cpulist, pinned
+from .solution_cache import SolutionDataCache
+from .udf_cache import UDFBuildCache
 from .exceptions import (
     FluentStartupError,
     FluentCaseError,
     FluentUDFError,
-    ConfigurationError
+    FluentSessionError,
+    FluentSolveError,
+    ConfigurationError,
+    ValidationError
 )
 
 load_dotenv()
 
+# 快照中不存在的设置（与任何期望值都不相同）
+_MISSING = object()
+
 
 class FluentWrapper:
     """ANSYS Fluent API 封装类"""
     
-    def __init__(self, config_path: str = "config/fluent_config.json"):
+    def __init__(
+        self,
+        config_path: str = "config/fluent_config.json",
+        launcher: Optional[Callable[..., Any]] = None
+    ):
         """
         初始化 Fluent Wrapper
         
         Args:
             config_path: Fluent 配置文件路径
+            launcher: 替代 pyfluent.launch_fluent 的启动函数（如 FakeFluentBackend.launch_fluent）
         """
         self.config = self._load_config(config_path)
         self.fluent_path = os.getenv("FLUENT_PATH", self.config.get("fluent_path"))
+        self.launcher = launcher
         self.session = None
         self.solver = None
+        self.launch_options: Dict[str, Any] = {}
+        
+        # 求解状态版本：求解器推进或设置变更时递增，用于求解数据缓存失效
+        self.state_version = 0
+        cache_config = self.config.get("solution_cache", {})
+        self.solution_cache = SolutionDataCache(
+            max_memory_mb=cache_config.get("max_memory_mb", 256) if cache_config.get("enabled", True) else 0
+        )
+        # 全部 zone 的名称列表 (状态版本, 名称)，与求解数据缓存一同失效
+        self._zone_names: Optional[Tuple[int, List[str]]] = None
+        
+        udf_cache_config = self.config.get("udf_cache", {})
+        self.udf_build_dir = udf_cache_config.get("build_dir", ".")
+        self.udf_cache = UDFBuildCache(
+            cache_dir=udf_cache_config.get("cache_dir", ".udf_cache"),
+            max_entries=udf_cache_config.get("max_entries", 20),
+            max_age_days=udf_cache_config.get("max_age_days", 30)
+        ) if udf_cache_config.get("enabled", True) else None
+        
+        # UDF 热重载状态：当前加载的库、源文件哈希、引用库名的绑定命令模板
+        self.udf_library: Optional[str] = None
+        self.udf_bindings: List[str] = []
+        self._udf_source_hashes: Dict[str, str] = {}
+        self._udf_reload_count = 0
+        
+        # 最近一次 iterate_until_converged 的残差/监视量缓冲区
+        self.monitor_history: Optional[MonitorHistory] = None
+        
+        # 操作记录器：start_recording 后记录成功的操作，用于生成批处理 journal
+        self.journal_recorder: Optional[JournalRecorder] = None
+        
+        # apply_settings 的设置快照 {顶层分支: 状态}，设置可能被其他途径修改时清空
+        self.settings_snapshot: Dict[str, Any] = {}
+        
+        # 当前 Fluent 版本的命令树：发送前在本地校验 TUI 命令和设置键
+        command_tree_config = self.config.get("command_tree", {})
+        self.validate_commands = command_tree_config.get("enabled", True)
+        self.command_tree_dir = command_tree_config.get("cache_dir", ".fluent_commands")
+        self.fluent_version = os.getenv("FLUENT_VERSION", "2024.1")
+        self.command_tree: Optional[CommandTree] = None
+        self._command_tree_loaded = False
         
         logger.info("FluentWrapper initialized")
     
@@ -45,12 +110,99 @@ class FluentWrapper:
             logger.warning(f"Config file {config_path} not found, using defaults")
             return {}
     
+    def mark_state_changed(self, reason: str = "", settings_changed: bool = True):
+        """
+        标记求解状态已变化（递增状态版本并使求解数据缓存失效）
+        
+        通过 wrapper.solver 直接修改求解器状态后应调用此方法。
+        
+        Args:
+            reason: 变化原因（用于日志）
+            settings_changed: 设置是否可能被修改（是则清空 apply_settings 的快照）
+        """
+        self.state_version += 1
+        self.solution_cache.invalidate(reason)
+        if settings_changed:
+            self.settings_snapshot.clear()
+    
+    def start_recording(self, recorder: Optional[JournalRecorder] = None) -> JournalRecorder:
+        """
+        开始记录操作（之后成功的案例读写、命令、UDF 和迭代调用都会被记录）
+        
+        Args:
+            recorder: 继续写入的记录器，None 表示新建
+        
+        Returns:
+            记录器，可通过 save() 输出优化后的 journal
+        """
+        self.journal_recorder = recorder or JournalRecorder()
+        logger.info("Journal recording started")
+        return self.journal_recorder
+    
+    def stop_recording(self) -> Optional[JournalRecorder]:
+        """
+        停止记录
+        
+        Returns:
+            记录器，未在记录时返回 None
+        """
+        recorder, self.journal_recorder = self.journal_recorder, None
+        if recorder is not None:
+            logger.info(f"Journal recording stopped ({len(recorder.entries)} operations)")
+        return recorder
+    
+    def _record(self, operation: str, **arguments):
+        """记录一次成功的操作"""
+        if self.journal_recorder is not None:
+            self.journal_recorder.record(operation, **arguments)
+    
+    def replay_journal(
+        self,
+        journal_file: str,
+        processor_count: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        以批处理模式单独启动 Fluent 回放 journal（不使用当前会话）
+        
+        Args:
+            journal_file: journal 文件路径
+            processor_count: 处理器数量，默认与当前/上次启动的会话相同
+            timeout: 超时（秒）
+        
+        Returns:
+            {"returncode", "elapsed", "transcript", "command"}
+        
+        Raises:
+            ValidationError: 已有本版本的命令树且 journal 中有无效命令时抛出（不启动 Fluent）
+        """
+        tree = self.command_tree or CommandTree.load(self.command_tree_dir, self.fluent_version)
+        if self.validate_commands and tree is not None:
+            problems = tree.validate_journal(journal_file)
+            if problems:
+                first = problems[0]
+                raise ValidationError(
+                    f"Journal has {len(problems)} invalid command(s); line {first['line']}: {first['error']}",
+                    field="journal_file",
+                    details={"problems": problems}
+                )
+        
+        return replay_journal(
+            journal_file,
+            dimension=self.launch_options.get("dimension", self.config.get("dimension", "3d")),
+            precision=self.launch_options.get("precision", self.config.get("precision", "dp")),
+            processor_count=processor_count or self.launch_options.get("processor_count", 1),
+            fluent_path=self.fluent_path,
+            timeout=timeout
+        )
+    
     def start_fluent(
         self, 
         dimension: str = "3d",
         precision: str = "dp",
         processor_count: int = 1,
-        show_gui: bool = False
+        show_gui: bool = False,
+        cpu_set: Optional[Sequence[int]] = None
     ) -> Any:
         """
         启动 Fluent 会话
@@ -60,6 +212,7 @@ class FluentWrapper:
             precision: 精度 (sp, dp)
             processor_count: 处理器数量
             show_gui: 是否显示 GUI
+            cpu_set: 求解器进程绑定的 CPU（如 CorePlacement 分配的核），None 表示由 Fluent 自行绑定
             
         Returns:
             Fluent 会话对象
@@ -67,18 +220,41 @@ class FluentWrapper:
         logger.info(f"Starting Fluent {dimension} {precision} with {processor_count} processors...")
         
         try:
-            import ansys.fluent.core as pyfluent
-            
-            self.session = pyfluent.launch_fluent(
-                precision=precision,
-                processor_count=processor_count,
-                dimension=dimension.replace("d", ""),
-                mode="solver",
-                show_gui=show_gui,
-                product_version=os.getenv("FLUENT_VERSION", "2024.1")
-            )
+            launch_fluent = self.launcher
+            if launch_fluent is None:
+                import ansys.fluent.core as pyfluent
+                launch_fluent = pyfluent.launch_fluent
+            
+            launch_arguments = {}
+            if cpu_set:
+                # 关闭 Fluent 自身的 0..N-1 绑定，求解器进程继承启动线程的 CPU 亲和性
+                launch_arguments["additional_arguments"] = "-affinity=off"
+                logger.info(f"Pinning solver processes to CPUs {format_cpulist(cpu_set)}")
+            
+            product_version = os.getenv("FLUENT_VERSION", "2024.1")
+            with pinned(cpu_set):
+                self.session = launch_fluent(
+                    precision=precision,
+                    processor_count=processor_count,
+                    dimension=dimension.replace("d", ""),
+                    mode="solver",
+                    show_gui=show_gui,
+                    product_version=product_version,
+                    **launch_arguments
+                )
             
             self.solver = self.session.solver
+            self.mark_state_changed("session started")
+            if product_version != self.fluent_version or self.command_tree is None:
+                self.command_tree, self._command_tree_loaded = None, False
+            self.fluent_version = product_version
+            self.launch_options = {
+                "dimension": dimension,
+                "precision": precision,
+                "processor_count": processor_count
+            }
+            if cpu_set:
+                self.launch_options["cpu_set"] = sorted(cpu_set)
             logger.success("Fluent started successfully")
             
             return self.session
@@ -114,6 +290,10 @@ class FluentWrapper:
                 logger.success("Fluent session stopped")
             except Exception as e:
                 logger.error(f"Error stopping Fluent: {e}")
+            finally:
+                self.session = None
+                self.solver = None
+                self.mark_state_changed("session stopped")
     
     def load_case(self, case_file: str) -> bool:
         """
@@ -142,6 +322,8 @@ class FluentWrapper:
         
         try:
             self.solver.file.read_case(file_name=case_file)
+            self.mark_state_changed("case loaded")
+            self._record("load_case", case_file=case_file)
             logger.success("Case file loaded successfully")
             return True
         except Exception as e:
@@ -176,6 +358,7 @@ class FluentWrapper:
             Path(case_file).parent.mkdir(parents=True, exist_ok=True)
             
             self.solver.file.write_case(file_name=case_file)
+            self._record("save_case", case_file=case_file)
             logger.success("Case file saved successfully")
             return True
         except Exception as e:
@@ -186,6 +369,366 @@ class FluentWrapper:
             logger.error(str(error))
             raise error
     
+    def save_case_data(self, case_file: str) -> bool:
+        """
+        同时保存案例和数据文件（扩展名为 .cas.h5 时使用压缩的 HDF5 格式）
+        
+        Args:
+            case_file: 案例文件路径，数据文件写到同名的 .dat 文件
+        
+        Returns:
+            是否成功保存
+        
+        Raises:
+            FluentCaseError: 保存失败时抛出
+        """
+        if not self.session:
+            raise FluentCaseError("Fluent session not started", case_file=case_file)
+        
+        logger.info(f"Saving case and data: {case_file}")
+        
+        try:
+            Path(case_file).parent.mkdir(parents=True, exist_ok=True)
+            
+            self.solver.file.write_case_data(file_name=case_file)
+            self._record("save_case_data", case_file=case_file)
+            logger.success("Case and data saved successfully")
+            return True
+        except Exception as e:
+            error = FluentCaseError(
+                f"Failed to save case and data: {str(e)}",
+                case_file=case_file
+            )
+            logger.error(str(error))
+            raise error
+    
+    def load_case_data(self, case_file: str) -> bool:
+        """
+        同时加载案例和数据文件
+        
+        Args:
+            case_file: 案例文件路径（同名的 .dat 文件一并读入）
+        
+        Returns:
+            是否成功加载
+        
+        Raises:
+            FluentCaseError: 加载失败时抛出
+        """
+        if not self.session:
+            raise FluentCaseError("Fluent session not started", case_file=case_file)
+        
+        if not Path(case_file).exists():
+            raise FluentCaseError(
+                f"Case file does not exist",
+                case_file=case_file,
+                details={"path": case_file}
+            )
+        
+        logger.info(f"Loading case and data: {case_file}")
+        
+        try:
+            self.solver.file.read_case_data(file_name=case_file)
+            self.mark_state_changed("case and data loaded")
+            self._record("load_case_data", case_file=case_file)
+            logger.success("Case and data loaded successfully")
+            return True
+        except Exception as e:
+            error = FluentCaseError(
+                f"Failed to load case and data: {str(e)}",
+                case_file=case_file,
+                details={"error": type(e).__name__}
+            )
+            logger.error(str(error))
+            raise error
+    
+    def load_data(self, data_file: str) -> bool:
+        """
+        读入数据文件作为当前网格的流场（案例设置保持不变，网格须与数据文件一致）
+        
+        Args:
+            data_file: 数据文件路径
+        
+        Returns:
+            是否成功加载
+        
+        Raises:
+            FluentCaseError: 加载失败时抛出
+        """
+        if not self.session:
+            raise FluentCaseError("Fluent session not started", case_file=data_file)
+        
+        if not Path(data_file).exists():
+            raise FluentCaseError(
+                f"Data file does not exist",
+                case_file=data_file,
+                details={"path": data_file}
+            )
+        
+        logger.info(f"Loading data file: {data_file}")
+        
+        try:
+            self.solver.file.read_data(file_name=data_file)
+            self.mark_state_changed("data loaded", settings_changed=False)
+            self._record("load_data", data_file=data_file)
+            logger.success("Data file loaded successfully")
+            return True
+        except Exception as e:
+            error = FluentCaseError(
+                f"Failed to load data file: {str(e)}",
+                case_file=data_file,
+                details={"error": type(e).__name__}
+            )
+            logger.error(str(error))
+            raise error
+    
+    def save_data(self, data_file: str) -> bool:
+        """
+        只保存数据文件（扩展名为 .dat.h5 时使用 HDF5 格式）
+        
+        Args:
+            data_file: 数据文件路径
+        
+        Returns:
+            是否成功保存
+        
+        Raises:
+            FluentCaseError: 保存失败时抛出
+        """
+        if not self.session:
+            raise FluentCaseError("Fluent session not started", case_file=data_file)
+        
+        logger.info(f"Saving data file: {data_file}")
+        
+        try:
+            Path(data_file).parent.mkdir(parents=True, exist_ok=True)
+            
+            self.solver.file.write_data(file_name=data_file)
+            self._record("save_data", data_file=data_file)
+            logger.success("Data file saved successfully")
+            return True
+        except Exception as e:
+            error = FluentCaseError(
+                f"Failed to save data file: {str(e)}",
+                case_file=data_file
+            )
+            logger.error(str(error))
+            raise error
+    
+    def initialize_flow_field(self, method: str = "hybrid") -> bool:
+        """
+        初始化流场
+        
+        Args:
+            method: "hybrid" 混合初始化，"standard" 按案例中的初始值标准初始化
+        
+        Returns:
+            是否成功初始化
+        
+        Raises:
+            ValidationError: 初始化方法未知时抛出
+            FluentSolveError: 会话未启动或初始化失败时抛出
+        """
+        if method not in ("hybrid", "standard"):
+            raise ValidationError(f"Unknown initialization method: {method}", field="method")
+        if not self.session:
+            raise FluentSolveError("Fluent session not started", iterations_completed=0)
+        
+        logger.info(f"Initializing flow field ({method})")
+        
+        try:
+            initialization = self.solver.solution.initialization
+            if method == "hybrid":
+                initialization.hybrid_initialize()
+            else:
+                initialization.standard_initialize()
+            self.mark_state_changed("flow field initialized", settings_changed=False)
+            self._record("initialize", method=method)
+            return True
+        except Exception as e:
+            error = FluentSolveError(
+                f"Flow field initialization failed: {str(e)}",
+                iterations_completed=0,
+                details={"method": method}
+            )
+            logger.error(str(error))
+            raise error
+    
+    def read_profile(self, profile_file: str) -> bool:
+        """
+        读取边界 Profile 文件 (.prof) 到当前会话
+        
+        Args:
+            profile_file: Profile 文件路径
+        
+        Returns:
+            是否成功读取
+        
+        Raises:
+            FluentCaseError: 读取失败时抛出
+        """
+        if not self.session:
+            raise FluentCaseError("Fluent session not started", case_file=profile_file)
+        
+        if not Path(profile_file).exists():
+            raise FluentCaseError(
+                f"Profile file does not exist",
+                case_file=profile_file,
+                details={"path": profile_file}
+            )
+        
+        logger.info(f"Reading profile file: {profile_file}")
+        
+        try:
+            self.solver.file.read_profile(file_name=profile_file)
+            self.mark_state_changed("profile loaded")
+            self._record("read_profile", profile_file=profile_file)
+            logger.success("Profile file loaded successfully")
+            return True
+        except Exception as e:
+            error = FluentCaseError(
+                f"Failed to read profile file: {str(e)}",
+                case_file=profile_file,
+                details={"error": type(e).__name__}
+            )
+            logger.error(str(error))
+            raise error
+    
+    def iterate(
+        self,
+        iterations: int,
+        chunk_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> int:
+        """
+        运行求解迭代
+        
+        指定 chunk_size 时按块调用求解器，每块结束后报告进度并检查取消标志，
+        取消在块边界生效，求解器状态保持一致。
+        
+        Args:
+            iterations: 迭代步数
+            chunk_size: 每次调用求解器的迭代步数，None 表示一次完成
+            progress_callback: 进度回调 (已完成步数, 总步数)
+            cancel_event: 取消标志，置位后在下一个块边界停止
+        
+        Returns:
+            实际完成的迭代步数
+        
+        Raises:
+            FluentSolveError: 会话未启动或迭代失败时抛出
+        """
+        if not self.session:
+            raise FluentSolveError("Fluent session not started", iterations_completed=0)
+        
+        chunk_size = max(1, min(chunk_size or iterations, iterations)) if iterations > 0 else 0
+        logger.info(f"Running {iterations} iterations (chunk size {chunk_size})")
+        
+        completed = 0
+        while completed < iterations:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.warning(f"Iteration cancelled after {completed}/{iterations} iterations")
+                break
+            
+            count = min(chunk_size, iterations - completed)
+            try:
+                self.solver.solution.run_calculation.iterate(iter_count=count)
+                self.mark_state_changed("iterated", settings_changed=False)
+                self._record("iterate", iterations=count)
+            except Exception as e:
+                self.mark_state_changed("iteration failed", settings_changed=False)
+                error = FluentSolveError(
+                    f"Iteration failed: {str(e)}",
+                    iterations_completed=completed,
+                    details={"error": type(e).__name__}
+                )
+                logger.error(str(error))
+                raise error
+            
+            completed += count
+            if progress_callback is not None:
+                progress_callback(completed, iterations)
+        
+        if completed == iterations:
+            logger.success(f"Completed {completed} iterations")
+        return completed
+    
+    def iterate_until_converged(
+        self,
+        max_iterations: int,
+        criteria: Sequence[ConvergenceCriterion],
+        mode: str = "all",
+        chunk_size: Optional[int] = None,
+        min_iterations: int = 0,
+        monitor_sets: Optional[Sequence[str]] = None,
+        history_size: Optional[int] = None,
+        on_update: Optional[Callable[[MonitorHistory, int], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        迭代直到满足收敛判据或达到最大迭代数
+        
+        每个块结束后拉取新增的残差和报告定义监视器数据写入 self.monitor_history
+        （有界环形缓冲区），然后检查判据，满足即停止。
+        
+        Args:
+            max_iterations: 最大迭代步数
+            criteria: 收敛判据（RelativeDrop、Plateau、Stability 或自定义）
+            mode: "all" 全部判据满足才停止，"any" 任一满足即停止
+            chunk_size: 每次调用求解器的迭代步数（判据检查粒度）
+            min_iterations: 至少运行的迭代步数
+            monitor_sets: 拉取的监视集名称，None 表示全部
+            history_size: 环形缓冲区容量（迭代数）
+            on_update: 每块结束后的回调 (缓冲区, 已完成步数)
+            cancel_event: 取消标志，置位后在下一个块边界停止
+        
+        Returns:
+            {"iterations", "converged", "satisfied": 已满足的判据描述}
+        
+        Raises:
+            FluentSolveError: 会话未启动或迭代失败时抛出
+        """
+        if not self.session:
+            raise FluentSolveError("Fluent session not started", iterations_completed=0)
+        
+        convergence_config = self.config.get("convergence", {})
+        chunk_size = chunk_size or convergence_config.get("chunk_size", 10)
+        monitor = ConvergenceMonitor(criteria, mode=mode, min_iterations=min_iterations)
+        self.monitor_history = MonitorHistory(history_size or convergence_config.get("history_size", 1000))
+        stream = MonitorStream(self.solver, monitor_sets)
+        if not stream.available():
+            logger.warning("Solver does not expose monitor data; running without early stop")
+        
+        completed = 0
+        converged, satisfied = False, []
+        while completed < max_iterations:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.warning(f"Iteration cancelled after {completed}/{max_iterations} iterations")
+                break
+            
+            count = min(chunk_size, max_iterations - completed)
+            try:
+                done = self.iterate(count)
+            except FluentSolveError as e:
+                # 报告本次运行的总步数，而不是失败块内的步数
+                e.details["iterations_completed"] = completed + e.details.get("iterations_completed", 0)
+                raise
+            completed += done
+            
+            if stream.available():
+                stream.poll(self.monitor_history)
+                converged, satisfied = monitor.check(self.monitor_history, completed)
+            if on_update is not None:
+                on_update(self.monitor_history, completed)
+            if converged:
+                logger.success(f"Converged after {completed} iterations ({'; '.join(satisfied)})")
+                break
+        
+        if not converged:
+            logger.info(f"Not converged after {completed}/{max_iterations} iterations")
+        return {"iterations": completed, "converged": converged, "satisfied": satisfied}
+    
     def execute_tui_command(self, command: str, mode: str = "tui") -> bool:
         """
         执行 TUI 命令（使用正确的 PyFluent API）
@@ -205,6 +748,13 @@ class FluentWrapper:
             logger.error("Fluent session not started")
             return False
         
+        if mode == "tui":
+            check = self.validate_command(command)
+            if not check["valid"]:
+                hint = f" (did you mean {', '.join(check['suggestions'])}?)" if check["suggestions"] else ""
+                logger.error(f"Invalid TUI command, not sent: {check['error']}{hint}")
+                return False
+        
         logger.info(f"Executing {mode} command: {command}")
         
         try:
@@ -213,6 +763,8 @@ class FluentWrapper:
                 # 例如: (define my-var 123)
                 # PyFluent API: solver.scheme_eval(command)
                 result = self.solver.scheme_eval(command)
+                self.mark_state_changed("scheme command")
+                self._record("scheme", command=command)
                 logger.success("Scheme command executed successfully")
                 return True
                 
@@ -222,6 +774,8 @@ class FluentWrapper:
                 # PyFluent API: solver.tui.<path> = value
                 # 或通过 execute_command
                 result = self.solver.execute_command(command)
+                self.mark_state_changed("tui command")
+                self._record("tui", command=command)
                 logger.success("TUI command executed successfully")
                 return True
                 
@@ -242,13 +796,390 @@ class FluentWrapper:
             logger.error(f"Failed to execute {mode} command: {e}")
             return False
     
-    def compile_udf(self, udf_file: str, lib_name: str = "libudf") -> bool:
+    def load_command_tree(self, refresh: bool = False) -> Optional[CommandTree]:
+        """
+        加载当前 Fluent 版本的命令树：先读磁盘索引，没有时从会话提取
+        
+        只有通过 PyFluent 启动的会话提取的树才写入磁盘（注入的启动函数，如模拟后端，
+        只保存在内存中，避免与真实版本的索引混淆）。
+        
+        Args:
+            refresh: 忽略已有索引，重新从会话提取
+        
+        Returns:
+            命令树，会话未启动或求解器没有可识别的菜单树时返回 None
+        """
+        if self._command_tree_loaded and not refresh:
+            return self.command_tree
+        
+        persistent = self.launcher is None
+        tree = None
+        if persistent and not refresh:
+            tree = CommandTree.load(self.command_tree_dir, self.fluent_version)
+        if tree is None and self.session:
+            try:
+                tree = CommandTree.extract(self.solver, self.fluent_version)
+            except ValidationError as e:
+                logger.warning(f"Command validation disabled: {e}")
+            except Exception as e:
+                logger.warning(f"Could not extract command tree: {e}")
+            else:
+                if persistent:
+                    try:
+                        tree.save(self.command_tree_dir)
+                    except OSError as e:
+                        logger.warning(f"Could not save command tree: {e}")
+        
+        self.command_tree = tree
+        self._command_tree_loaded = self.session is not None or tree is not None
+        return tree
+    
+    def validate_command(self, command: str) -> Dict[str, Any]:
+        """
+        在本地校验 TUI 命令路径（不发送到求解器）
+        
+        Args:
+            command: TUI 命令
+        
+        Returns:
+            {"valid", "path", "error", "suggestions"}；没有命令树时视为有效，path 为 None
+        """
+        tree = self.load_command_tree() if self.validate_commands else None
+        if tree is None:
+            return {"valid": True, "path": None, "error": None, "suggestions": []}
+        return tree.validate(command)
+    
+    def complete_command(self, prefix: str) -> List[str]:
+        """
+        补全 TUI 命令路径
+        
+        Args:
+            prefix: 已输入的命令，如 "define/bou"
+        
+        Returns:
+            候选的完整路径（菜单以 / 结尾），没有命令树时为空列表
+        """
+        tree = self.load_command_tree()
+        return tree.complete(prefix) if tree is not None else []
+    
+    def apply_settings(self, desired: Dict[str, Any], refresh: bool = False) -> Dict[str, Any]:
+        """
+        按期望状态应用求解器设置，只发送与快照不同的值
+        
+        desired 是 PyFluent 设置树的嵌套字典，只需包含关心的部分，如
+        {"setup": {"models": {"energy": {"enabled": True}}}}。首次用到某个顶层分支时
+        读取其状态作为快照；之后与快照比较得到最小差异，一次 set_state 调用发送全部
+        变更，并把变更合并回快照，不再重新读取。读入案例、执行 TUI/Scheme 命令等可能
+        修改设置的操作会清空快照。
+        
+        Args:
+            desired: 期望的设置状态
+            refresh: 忽略快照，重新读取用到的分支
+        
+        Returns:
+            {"changed": 变更的设置路径, "unchanged": 未变化的值个数, "remote_calls": 远程调用次数}
+        
+        Raises:
+            FluentSessionError: 会话未启动或读取/应用设置失败时抛出
+            ValidationError: desired 不是以顶层分支为键的嵌套字典，或含有命令树中不存在的设置时抛出
+        """
+        if not self.session:
+            raise FluentSessionError("Fluent session not started")
+        if not isinstance(desired, dict) or not all(isinstance(state, dict) for state in desired.values()):
+            raise ValidationError(
+                "Desired settings must be a nested dict keyed by settings branch",
+                field="desired",
+                details={"example": '{"setup": {"models": {"energy": {"enabled": true}}}}'}
+            )
+        
+        tree = self.load_command_tree() if self.validate_commands else None
+        errors = tree.validate_settings(desired) if tree is not None else []
+        if errors:
+            raise ValidationError(
+                f"Invalid settings, nothing sent: {'; '.join(errors)}",
+                field="desired",
+                details={"errors": errors}
+            )
+        
+        if refresh:
+            self.settings_snapshot.clear()
+        
+        # 较新的 PyFluent 在 solver.settings 上提供设置树的根，可以一次设置多个分支
+        root = getattr(self.solver, "settings", None)
+        if root is None:
+            root = self.solver
+        remote_calls = 0
+        for branch in desired:
+            if branch in self.settings_snapshot:
+                continue
+            try:
+                remote_calls += 1
+                self.settings_snapshot[branch] = getattr(root, branch).get_state()
+            except Exception as e:
+                error = FluentSessionError(
+                    f"Failed to read settings state: {str(e)}",
+                    details={"branch": branch, "error": type(e).__name__}
+                )
+                logger.error(str(error))
+                raise error
+        
+        diff, changed, unchanged = self._settings_diff(self.settings_snapshot, desired)
+        if not diff:
+            logger.info(f"Settings already in desired state ({unchanged} values, {remote_calls} remote call(s))")
+            return {"changed": [], "unchanged": unchanged, "remote_calls": remote_calls}
+        
+        logger.info(f"Applying {len(changed)} changed setting(s), {unchanged} unchanged")
+        try:
+            if hasattr(root, "set_state"):
+                remote_calls += 1
+                root.set_state(diff)
+            else:
+                for branch, state in diff.items():
+                    remote_calls += 1
+                    getattr(root, branch).set_state(state)
+        except Exception as e:
+            # 部分设置可能已生效，快照不再可信
+            self.mark_state_changed("settings apply failed")
+            error = FluentSessionError(
+                f"Failed to apply settings: {str(e)}",
+                details={"changed": ", ".join(changed), "error": type(e).__name__}
+            )
+            logger.error(str(error))
+            raise error
+        
+        self._merge_state(self.settings_snapshot, diff)
+        self.mark_state_changed("settings applied", settings_changed=False)
+        if self.journal_recorder is not None:
+            logger.warning("Settings applied through the settings API are not recorded in the TUI journal")
+        logger.success(f"Settings applied in {remote_calls} remote call(s)")
+        return {"changed": changed, "unchanged": unchanged, "remote_calls": remote_calls}
+    
+    @staticmethod
+    def _settings_diff(current: Any, desired: Dict[str, Any], path: str = "") -> tuple:
+        """desired 中与 current 不同的部分 -> (差异子树, 变更路径, 未变化的值个数)"""
+        diff: Dict[str, Any] = {}
+        changed: List[str] = []
+        unchanged = 0
+        for key, value in desired.items():
+            key_path = f"{path}/{key}" if path else key
+            old = current.get(key, _MISSING) if isinstance(current, dict) else _MISSING
+            if isinstance(value, dict) and isinstance(old, dict):
+                sub_diff, sub_changed, sub_unchanged = FluentWrapper._settings_diff(old, value, key_path)
+                if sub_diff:
+                    diff[key] = sub_diff
+                changed.extend(sub_changed)
+                unchanged += sub_unchanged
+            elif old is not _MISSING and (
+                list(old) == list(value)
+                if isinstance(old, (list, tuple)) and isinstance(value, (list, tuple))
+                else old == value
+            ):
+                unchanged += 1
+            else:
+                diff[key] = value
+                changed.append(key_path)
+        return diff, changed, unchanged
+    
+    @staticmethod
+    def _merge_state(state: Dict[str, Any], diff: Dict[str, Any]):
+        """已应用的差异合并回快照"""
+        for key, value in diff.items():
+            if isinstance(value, dict) and isinstance(state.get(key), dict):
+                FluentWrapper._merge_state(state[key], value)
+            else:
+                state[key] = copy.deepcopy(value)
+    
+    # 批量执行时在 Scheme 端记录每条命令结果的变量；变量以本批次的标记开头，
+    # 查询进度时据此确认记录属于当前批次而不是之前的批次
+    BATCH_RESULTS_VAR = "*fcm-batch-results*"
+    _batch_tokens = itertools.count(1)
+    
+    def execute_batch(
+        self,
+        commands: List[str],
+        mode: str = "tui",
+        stop_on_error: bool = False,
+        chunk_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量执行 TUI/Scheme 命令（一次远程调用执行多条命令）
+        
+        执行模式：
+        1. "tui" - 每条 TUI 命令包装为 (ti-menu-load-string "...")，合并为一个 (begin ...) 块
+        2. "scheme" - Scheme 表达式合并为一个 (begin ...) 块
+        3. "journal" - 写入临时 journal 文件，通过 file.read_journal 一次读入
+        
+        Scheme 端逐条记录结果；某条命令出错时查询已完成的条数定位出错命令，
+        之后的命令在新的批次中继续执行（stop_on_error=True 时标记为 skipped）。
+        无法确认批次进度时（查询失败，或批次未开始执行），该批次剩余的命令标记为
+        unknown 并停止，不重新发送，以免命令被执行两次。
+        有命令树时 TUI 命令先在本地校验，无效命令直接标记为 failed，不发送。
+        
+        Args:
+            commands: 命令列表
+            mode: 执行模式 ("tui", "scheme" 或 "journal")
+            stop_on_error: 出错后是否停止执行剩余命令
+            chunk_size: 每次远程调用的最大命令数，None 表示不限制
+        
+        Returns:
+            按索引排列的状态列表，每项包含 index, command, status ("ok"/"failed"/"unknown"/"skipped")，
+            failed 和 unknown 时包含 error
+        
+        Raises:
+            FluentSessionError: 会话未启动时抛出
+            ValidationError: 执行模式无效时抛出
+        """
+        if not self.session:
+            raise FluentSessionError("Fluent session not started")
+        
+        if mode not in ("tui", "scheme", "journal"):
+            raise ValidationError(
+                f"Unknown execution mode: {mode}",
+                field="mode",
+                details={"valid_modes": ["tui", "scheme", "journal"]}
+            )
+        
+        results: List[Dict[str, Any]] = [
+            {"index": index, "command": command, "status": "skipped"}
+            for index, command in enumerate(commands)
+        ]
+        batch = results
+        if mode != "scheme":
+            for result in results:
+                check = self.validate_command(result["command"])
+                if not check["valid"]:
+                    result["status"] = "failed"
+                    result["error"] = check["error"]
+                    logger.error(f"Batch command {result['index']} rejected before sending: {check['error']}")
+            rejected = [result["index"] for result in results if result["status"] == "failed"]
+            batch = [result for result in results if result["status"] != "failed"]
+            if stop_on_error and rejected:
+                batch = batch[:rejected[0]]
+        
+        chunk_size = chunk_size or max(len(batch), 1)
+        remote_calls = 0
+        
+        logger.info(f"Executing {len(batch)} {mode} commands in batch")
+        
+        start = 0
+        while start < len(batch):
+            chunk = [result["command"] for result in batch[start:start + chunk_size]]
+            token = f"fcm-batch-{next(self._batch_tokens)}"
+            try:
+                remote_calls += 1
+                values = self._run_batch_chunk(chunk, mode, token)
+                self._apply_batch_values(batch, start, values or [True] * len(chunk), mode)
+                start += len(chunk)
+            except Exception as e:
+                # 查询出错前已完成的命令结果，定位出错命令
+                remote_calls += 1
+                completed = self._batch_completed_values(token)
+                if completed is None:
+                    for entry in batch[start:start + len(chunk)]:
+                        entry["status"] = "unknown"
+                        entry["error"] = f"Batch progress could not be confirmed: {e}"
+                    logger.error(
+                        f"Batch commands {batch[start]['index']}-{batch[start + len(chunk) - 1]['index']} "
+                        f"in unknown state, stopping batch ({e})"
+                    )
+                    break
+                completed = completed[:len(chunk)]
+                self._apply_batch_values(batch, start, completed, mode)
+                start += len(completed)
+                if start < len(batch) and len(completed) < len(chunk):
+                    batch[start]["status"] = "failed"
+                    batch[start]["error"] = str(e)
+                    logger.error(f"Batch command {batch[start]['index']} failed: {batch[start]['command']} ({e})")
+                    start += 1
+            
+            if stop_on_error and any(r["status"] == "failed" for r in batch[:start]):
+                break
+        
+        if remote_calls:
+            self.mark_state_changed("batch commands")
+        for result in results:
+            if result["status"] == "ok":
+                self._record("scheme" if mode == "scheme" else "tui", command=result["command"])
+        ok = sum(1 for r in results if r["status"] == "ok")
+        logger.info(f"Batch finished: {ok}/{len(commands)} ok in {remote_calls} remote call(s)")
+        return results
+    
+    def _run_batch_chunk(self, commands: List[str], mode: str, token: str) -> Optional[List[Any]]:
+        """执行一批命令，返回 Scheme 端记录的逐条结果（变量以批次标记开头）"""
+        var = self.BATCH_RESULTS_VAR
+        if mode == "tui":
+            steps = [f'(ti-menu-load-string "{self._scheme_escape(command)}")' for command in commands]
+        else:
+            steps = [f"(begin {command} #t)" for command in commands]
+        
+        if mode == "journal":
+            lines = [f"(define {var} (list \"{token}\"))"]
+            for command in commands:
+                lines.append(command)
+                lines.append(f"(set! {var} (cons #t {var}))")
+            with tempfile.NamedTemporaryFile("w", suffix=".jou", delete=False, encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                journal_file = f.name
+            try:
+                self.solver.file.read_journal(file_name_list=[journal_file])
+            finally:
+                os.unlink(journal_file)
+            return None
+        
+        body = "\n".join(f"  (set! {var} (cons {step} {var}))" for step in steps)
+        block = f"(begin\n  (define {var} (list \"{token}\"))\n{body}\n  (cdr (reverse {var})))"
+        values = self.solver.scheme_eval(block)
+        return list(values) if isinstance(values, (list, tuple)) else None
+    
+    def _batch_completed_values(self, token: str) -> Optional[List[Any]]:
+        """
+        查询批次中已完成命令的结果
+        
+        Returns:
+            已完成命令的结果；查询失败或记录不属于该批次（批次未开始执行）时返回 None
+        """
+        try:
+            values = self.solver.scheme_eval(f"(reverse {self.BATCH_RESULTS_VAR})")
+        except Exception as e:
+            logger.warning(f"Could not query batch progress: {e}")
+            return None
+        if not isinstance(values, (list, tuple)) or not values or values[0] != token:
+            logger.warning(f"Batch progress for {token} not found")
+            return None
+        return list(values[1:])
+    
+    @staticmethod
+    def _apply_batch_values(results: List[Dict[str, Any]], start: int, values: List[Any], mode: str):
+        """根据 Scheme 端返回的结果更新状态（TUI 命令返回 #f 视为失败）"""
+        for offset, value in enumerate(values):
+            entry = results[start + offset]
+            if mode == "tui" and value is False:
+                entry["status"] = "failed"
+                entry["error"] = "TUI command returned #f"
+            else:
+                entry["status"] = "ok"
+    
+    @staticmethod
+    def _scheme_escape(text: str) -> str:
+        """转义 Scheme 字符串字面量"""
+        return text.replace("\\", "\\\\").replace('"', '\\"')
+    
+    def compile_udf(
+        self,
+        udf_file: Union[str, Sequence[str]],
+        lib_name: str = "libudf",
+        use_cache: bool = True
+    ) -> bool:
         """
         编译 UDF
         
+        启用 UDF 构建缓存时，源文件、编译器配置、Fluent 版本、精度和维度都未变化
+        则直接从缓存恢复已构建的库目录并跳过编译，随后 load_udf 即可加载。
+        
         Args:
-            udf_file: UDF 文件路径
+            udf_file: UDF 文件路径或路径列表
             lib_name: 库名称
+            use_cache: 是否使用 UDF 构建缓存
             
         Returns:
             是否成功编译
@@ -256,34 +1187,64 @@ class FluentWrapper:
         Raises:
             FluentUDFError: 编译失败时抛出
         """
+        udf_files = [udf_file] if isinstance(udf_file, str) else list(udf_file)
+        udf_label = ", ".join(udf_files)
+        
         if not self.session:
-            raise FluentUDFError("Fluent session not started", udf_file=udf_file, lib_name=lib_name)
+            raise FluentUDFError("Fluent session not started", udf_file=udf_label, lib_name=lib_name)
         
-        if not Path(udf_file).exists():
+        missing = [path for path in udf_files if not Path(path).exists()]
+        if missing:
             raise FluentUDFError(
                 f"UDF file does not exist",
-                udf_file=udf_file,
+                udf_file=udf_label,
                 lib_name=lib_name,
-                details={"path": udf_file}
+                details={"path": ", ".join(missing)}
+            )
+        
+        library_dir = Path(self.udf_build_dir) / lib_name
+        cache_key = None
+        if use_cache and self.udf_cache is not None:
+            cache_key = self.udf_cache.build_key(
+                udf_files,
+                compiler_config=self.config.get("udf_compiler", {}),
+                # 实际启动的求解器版本，不同版本构建的库不能互相复用
+                version=self.fluent_version,
+                precision=self.launch_options.get("precision", self.config.get("precision", "dp")),
+                dimension=self.launch_options.get("dimension", self.config.get("dimension", "3d"))
             )
+            if self.udf_cache.restore(cache_key, str(library_dir)):
+                logger.success(f"UDF library {lib_name} restored from build cache")
+                self._record("compile_udf", udf_files=udf_files, lib_name=lib_name)
+                return True
         
-        logger.info(f"Compiling UDF: {udf_file}")
+        logger.info(f"Compiling UDF: {udf_label}")
         
         try:
             self.solver.tui.define.user_defined.compiled_functions.compile(
                 lib_name=lib_name,
-                src_file_name_list=[udf_file]
+                src_file_name_list=udf_files
             )
             logger.success("UDF compiled successfully")
-            return True
+            self._record("compile_udf", udf_files=udf_files, lib_name=lib_name)
         except Exception as e:
             error = FluentUDFError(
                 f"Failed to compile UDF: {str(e)}",
-                udf_file=udf_file,
+                udf_file=udf_label,
                 lib_name=lib_name
             )
             logger.error(str(error))
             raise error
+        
+        if cache_key is not None:
+            if library_dir.is_dir():
+                try:
+                    self.udf_cache.store(cache_key, str(library_dir), metadata={"sources": udf_files})
+                except OSError as e:
+                    logger.warning(f"Could not store UDF build in cache: {e}")
+            else:
+                logger.warning(f"Compiled library directory not found, build not cached: {library_dir}")
+        return True
     
     def load_udf(self, lib_name: str = "libudf") -> bool:
         """
@@ -303,12 +1264,142 @@ class FluentWrapper:
         
         try:
             self.solver.tui.define.user_defined.compiled_functions.load(lib_name)
+            self.udf_library = lib_name
+            self.mark_state_changed("udf loaded")
+            self._record("load_udf", lib_name=lib_name)
             logger.success("UDF library loaded successfully")
             return True
         except Exception as e:
             logger.error(f"Failed to load UDF library: {e}")
             return False
     
+    def register_udf_binding(self, command_template: str) -> bool:
+        """
+        登记引用 UDF 库的 TUI 命令（热重载后用新库名重新执行）
+        
+        模板中的 {lib} 会被替换为当前库名，例如:
+        'define/boundary-conditions/set/velocity-inlet inlet () vmag yes yes udf "inlet_velocity::{lib}" q'
+        
+        Args:
+            command_template: 含 {lib} 占位符的 TUI 命令
+        
+        Returns:
+            当前已加载库时立即执行的结果；未加载库时返回 True
+        """
+        if "{lib}" not in command_template:
+            raise ValidationError(
+                "UDF binding template must contain {lib}",
+                field="command_template",
+                details={"template": command_template}
+            )
+        
+        self.udf_bindings.append(command_template)
+        if self.udf_library and self.session:
+            return self.execute_tui_command(command_template.replace("{lib}", self.udf_library))
+        return True
+    
+    def bind_udf_hook(self, hook: str, function_name: str) -> bool:
+        """
+        挂接 UDF 函数钩子（adjust, initialization, execute-at-end 等）并登记用于热重载
+        
+        Args:
+            hook: 函数钩子名称
+            function_name: UDF 函数名
+        
+        Returns:
+            是否成功
+        """
+        return self.register_udf_binding(
+            f'define/user-defined/function-hooks/{hook} "{function_name}::{{lib}}" ""'
+        )
+    
+    def hot_reload_udf(
+        self,
+        udf_files: Union[str, Sequence[str]],
+        base_name: str = "libudf",
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        会话内热重载 UDF（不重启 Fluent，不丢失内存中的案例和数据）
+        
+        源文件有变化时编译到新的带版本号的库名（如 libudf_v3）并加载，
+        用新库名重新执行已登记的绑定命令，然后卸载旧库。
+        
+        Args:
+            udf_files: UDF 文件路径或路径列表
+            base_name: 库名前缀
+            force: 源文件未变化时也重新加载
+        
+        Returns:
+            {"reloaded", "library", "previous", "changed", "rebound", "failed_bindings"}
+        
+        Raises:
+            FluentUDFError: 编译或加载失败时抛出（旧库保持加载）
+        """
+        udf_files = [udf_files] if isinstance(udf_files, str) else list(udf_files)
+        if not self.session:
+            raise FluentUDFError("Fluent session not started", udf_file=", ".join(udf_files))
+        
+        hashes = {}
+        for path in udf_files:
+            if not Path(path).exists():
+                raise FluentUDFError("UDF file does not exist", udf_file=path, details={"path": path})
+            hashes[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        
+        changed = [path for path in udf_files if self._udf_source_hashes.get(path) != hashes[path]]
+        previous = self.udf_library
+        if previous and not changed and not force:
+            logger.info(f"UDF sources unchanged, keeping {previous}")
+            return {
+                "reloaded": False,
+                "library": previous,
+                "previous": previous,
+                "changed": [],
+                "rebound": 0,
+                "failed_bindings": []
+            }
+        
+        self._udf_reload_count += 1
+        library = f"{base_name}_v{self._udf_reload_count}"
+        logger.info(f"Hot reloading UDF into {library} (changed: {', '.join(changed) or 'none'})")
+        
+        self.compile_udf(udf_files, lib_name=library)
+        if not self.load_udf(library):
+            error = FluentUDFError(
+                "Failed to load reloaded UDF library",
+                udf_file=", ".join(udf_files),
+                lib_name=library,
+                details={"previous": previous}
+            )
+            logger.error(str(error))
+            raise error
+        
+        failed_bindings = []
+        if self.udf_bindings:
+            commands = [template.replace("{lib}", library) for template in self.udf_bindings]
+            results = self.execute_batch(commands, mode="tui")
+            failed_bindings = [r["command"] for r in results if r["status"] != "ok"]
+            for command in failed_bindings:
+                logger.warning(f"Failed to rebind UDF: {command}")
+        
+        if previous and previous != library:
+            try:
+                self.solver.tui.define.user_defined.compiled_functions.unload(previous)
+                logger.info(f"Unloaded previous UDF library {previous}")
+            except Exception as e:
+                logger.warning(f"Failed to unload previous UDF library {previous}: {e}")
+        
+        self._udf_source_hashes.update(hashes)
+        logger.success(f"UDF hot reloaded: {library}")
+        return {
+            "reloaded": True,
+            "library": library,
+            "previous": previous,
+            "changed": changed,
+            "rebound": len(self.udf_bindings) - len(failed_bindings),
+            "failed_bindings": failed_bindings
+        }
+    
     def save_python_script(self, script_content: str, script_file: str) -> Optional[str]:
         """
         保存 Python 脚本到文件（安全做法，避免 exec()）
@@ -384,28 +1475,126 @@ class FluentWrapper:
             logger.error(f"Failed to run Python script: {e}")
             return False
     
-    def get_solution_data(self, variable: str) -> Optional[Dict]:
+    def compute_reports(self, report_names: Sequence[str]) -> Dict[str, float]:
         """
-        获取求解数据
+        一次调用计算多个报告定义
         
         Args:
-            variable: 变量名称
+            report_names: 报告定义名称
+        
+        Returns:
+            {报告名称: 数值}
+        
+        Raises:
+            FluentSessionError: 会话未启动或计算失败时抛出
+        """
+        if not self.session:
+            raise FluentSessionError("Fluent session not started")
+        if not report_names:
+            return {}
+        
+        try:
+            response = self.solver.solution.report_definitions.compute(report_defs=list(report_names))
+        except Exception as e:
+            error = FluentSessionError(
+                f"Failed to compute report definitions: {str(e)}",
+                details={"reports": ", ".join(report_names), "error": type(e).__name__}
+            )
+            logger.error(str(error))
+            raise error
+        
+        # 响应为 [{名称: [值, ...]}, ...] 或 {名称: [值, ...]}
+        values: Dict[str, float] = {}
+        for item in response if isinstance(response, (list, tuple)) else [response]:
+            for name, value in dict(item).items():
+                values[name] = float(value[0] if isinstance(value, (list, tuple)) else value)
+        return values
+    
+    def get_solution_data(
+        self,
+        variable: Union[str, Sequence[str]],
+        zones: Optional[Sequence[str]] = None,
+        node_value: bool = True,
+        out: Optional[Dict[str, Dict[str, Any]]] = None,
+        memmap_dir: Optional[str] = None,
+        zone_chunk_size: int = 16,
+        use_cache: bool = True
+    ) -> Optional[Dict]:
+        """
+        获取求解数据（NumPy 数组，按 zone 分块批量请求）
+        
+        求解状态未变化时重复读取直接命中缓存，只请求缺失的变量/zone。
+        缓存返回的数组是只读的；写入 out 或 memmap_dir 时不使用缓存。
+        
+        Args:
+            variable: 变量名称或变量名称列表
+            zones: zone 名称列表，None 表示全部
+            node_value: True 返回节点值，False 返回单元值
+            out: 调用方提供的缓冲区 {变量: {zone: 数组}}
+            memmap_dir: 将数据写入该目录下的内存映射 .npy 文件
+            zone_chunk_size: 每次请求的 zone 数
+            use_cache: 是否使用求解数据缓存
             
         Returns:
-            数据字典
+            单个变量时返回 {zone: 数组}，多个变量时返回 {变量: {zone: 数组}}；失败返回 None
         """
         if not self.session:
             logger.error("Fluent session not started")
             return None
         
-        logger.info(f"Getting solution data for: {variable}")
+        variables = [variable] if isinstance(variable, str) else list(variable)
+        logger.info(f"Getting solution data for: {', '.join(variables)}")
         
         try:
-            # 获取数据的示例实现
-            data = {}
-            # 具体实现取决于 Fluent API
+            extractor = FieldDataExtractor(self.solver, zone_chunk_size=zone_chunk_size)
+            use_cache = use_cache and self.solution_cache.enabled and out is None and memmap_dir is None
+            
+            if not use_cache:
+                data = extractor.extract(variables, zones=zones, node_value=node_value, out=out, memmap_dir=memmap_dir)
+            else:
+                data = self._get_cached_solution_data(extractor, variables, zones, node_value)
+            
             logger.success("Solution data retrieved")
-            return data
+            return data[variable] if isinstance(variable, str) else data
         except Exception as e:
             logger.error(f"Failed to get solution data: {e}")
             return None
+    
+    def _get_cached_solution_data(
+        self,
+        extractor: FieldDataExtractor,
+        variables: List[str],
+        zones: Optional[Sequence[str]],
+        node_value: bool
+    ) -> Dict[str, Dict[str, Any]]:
+        """从缓存读取求解数据，只向求解器请求缺失部分"""
+        version = self.state_version
+        if zones is None:
+            # zone 列表也需要一次远程调用，同一状态下缓存，命中时不产生任何往返
+            if self._zone_names is None or self._zone_names[0] != version:
+                self._zone_names = (version, extractor.zones())
+            zones = self._zone_names[1]
+        zones = list(zones)
+        data: Dict[str, Dict[str, Any]] = {name: {} for name in variables}
+        missing_variables = []
+        missing_zones = []
+        
+        for name in variables:
+            for zone in zones:
+                array = self.solution_cache.get((name, zone, node_value, version))
+                if array is None:
+                    if name not in missing_variables:
+                        missing_variables.append(name)
+                    if zone not in missing_zones:
+                        missing_zones.append(zone)
+                else:
+                    data[name][zone] = array
+        
+        if missing_variables:
+            fetched = extractor.extract(missing_variables, zones=missing_zones, node_value=node_value)
+            for name, per_zone in fetched.items():
+                for zone, array in per_zone.items():
+                    cached = self.solution_cache.put((name, zone, node_value, version), array)
+                    data[name].setdefault(zone, cached)
+        
+        return data
@@ -0,0 +1,321 @@
+"""
+Journal - 记录 FluentWrapper 操作并生成可批量回放的 Fluent journal
+
+交互式调用（读写案例、TUI/Scheme 命令、UDF 编译/加载、迭代）被记录为 journal 命令，
+输出前去掉冗余命令、合并连续的同一设置；回放时一次以批处理模式启动 Fluent
+(``fluent 3ddp -g -tN -i run.jou``)，不再有逐条调用的 gRPC 往返。
+"""
+
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from .exceptions import FluentSolveError, FluentStartupError, ValidationError
+
+
+# 命令类别：read 会替换全部设置，barrier 之间的设置才允许合并
+READ = "read"
+WRITE = "write"
+ITERATE = "iterate"
+ACTION = "action"
+SETTING = "setting"
+SCHEME = "scheme"
+UDF = "udf"
+PROFILE = "profile"
+
+# 可安全去重的命令类别（Scheme 表达式和动作类命令可能有副作用，不去重）
+_IDEMPOTENT = (READ, WRITE, SETTING, UDF, PROFILE)
+_ITERATE_COMMAND = re.compile(r"^/solve/(?:it|iterate)\s+(\d+)\s*$")
+_READ_COMMAND = re.compile(r"^/file/read-(?:case|case-data)\s")
+_SETTING_MENUS = ("/define/", "/solve/set/", "/solve/monitors/", "/solve/report-definitions/")
+# 末尾一个参数即设置值的菜单，其中连续的同一设置才合并；其余设置命令（如 zone-type、
+# copy-bc）的数值参数可能是 zone ID，只去掉完全重复的命令
+_SINGLE_VALUE_SETTERS = (
+    "/solve/set/",
+    "/define/models/",
+    "/define/operating-conditions/",
+    "/solve/monitors/residual/"
+)
+_VALUE_TOKEN = re.compile(r'^(?:yes|no|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|"[^"]*")$')
+
+
+class JournalRecorder:
+    """记录 FluentWrapper 操作"""
+    
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+    
+    def record(self, operation: str, **arguments):
+        """
+        记录一次成功的操作
+        
+        Args:
+            operation: 操作名称（load_case, load_case_data, save_case, save_case_data,
+                load_data, save_data, initialize, read_profile, tui, scheme, compile_udf,
+                load_udf, iterate）
+            **arguments: 操作参数
+        """
+        self.entries.append(_to_entry(operation, arguments))
+    
+    def clear(self):
+        """清空记录"""
+        self.entries.clear()
+    
+    def commands(self, optimize: bool = True) -> List[str]:
+        """
+        生成 journal 命令
+        
+        Args:
+            optimize: 是否去掉冗余命令并合并连续设置
+        
+        Returns:
+            journal 命令行列表
+        """
+        entries = optimize_entries(self.entries) if optimize else self.entries
+        return [entry["command"] for entry in entries]
+    
+    def to_journal(self, optimize: bool = True, exit_when_done: bool = True) -> str:
+        """
+        生成 journal 文本
+        
+        Args:
+            optimize: 是否优化
+            exit_when_done: 末尾是否追加退出命令（批处理回放需要）
+        
+        Returns:
+            journal 文件内容
+        """
+        lines = [f"; Recorded by fluent_integration ({len(self.entries)} operations)"]
+        lines.extend(self.commands(optimize=optimize))
+        if exit_when_done:
+            lines.append("/exit yes")
+        return "\n".join(lines) + "\n"
+    
+    def save(self, journal_file: str, optimize: bool = True, exit_when_done: bool = True) -> str:
+        """
+        保存 journal 文件
+        
+        Args:
+            journal_file: 输出路径
+            optimize: 是否优化
+            exit_when_done: 末尾是否追加退出命令
+        
+        Returns:
+            journal 文件路径
+        """
+        path = Path(journal_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_journal(optimize, exit_when_done), encoding="utf-8")
+        logger.info(f"Journal saved: {path}")
+        return str(path)
+
+
+def optimize_entries(entries: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    优化记录的命令
+    
+    1. 连续的迭代合并为一条
+    2. 连续的同一设置（单值设置菜单中，除末尾设置值外完全相同）只保留最后一条；连续完全重复的
+       读写、设置、UDF 和 Profile 命令只保留一条（Scheme 表达式和动作类命令保持原样）
+    3. 紧接着读入案例之前的 TUI 设置被新案例覆盖，直接去掉；连续读入只保留最后一次
+    
+    Args:
+        entries: 记录的命令
+    
+    Returns:
+        优化后的命令
+    """
+    optimized: List[Dict[str, Any]] = []
+    for entry in entries:
+        previous = optimized[-1] if optimized else None
+        
+        if entry["kind"] == ITERATE and previous is not None and previous["kind"] == ITERATE:
+            merged = previous["count"] + entry["count"]
+            optimized[-1] = {"kind": ITERATE, "count": merged, "command": f"/solve/iterate {merged}"}
+            continue
+        
+        if previous is not None and previous["command"] == entry["command"] and entry["kind"] in _IDEMPOTENT:
+            continue
+        
+        if (entry["kind"] == SETTING and entry["key"] is not None and previous is not None
+                and previous["kind"] == SETTING and previous["key"] == entry["key"]):
+            optimized[-1] = entry
+            continue
+        
+        if entry["kind"] == READ:
+            while optimized and optimized[-1]["kind"] in (SETTING, READ):
+                optimized.pop()
+        
+        optimized.append(dict(entry))
+    
+    removed = len(entries) - len(optimized)
+    if removed:
+        logger.debug(f"Journal optimization removed {removed} redundant command(s)")
+    return optimized
+
+
+def replay_journal(
+    journal_file: str,
+    dimension: str = "3d",
+    precision: str = "dp",
+    processor_count: int = 1,
+    fluent_path: Optional[str] = None,
+    timeout: Optional[float] = None,
+    transcript_file: Optional[str] = None,
+    extra_args: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    以批处理模式启动 Fluent 回放 journal（无 GUI、无 gRPC 会话）
+    
+    Args:
+        journal_file: journal 文件路径
+        dimension: 维度 (2d/3d)
+        precision: 精度 (sp/dp)
+        processor_count: 处理器数量
+        fluent_path: Fluent 可执行文件，默认取 FLUENT_PATH 环境变量或 PATH 中的 fluent
+        timeout: 超时（秒）
+        transcript_file: 控制台输出保存路径，默认与 journal 同名的 .trn
+        extra_args: 附加的启动参数
+    
+    Returns:
+        {"returncode", "elapsed", "transcript", "command"}
+    
+    Raises:
+        ValidationError: journal 文件不存在或参数无效时抛出
+        FluentStartupError: 无法启动 Fluent 时抛出
+        FluentSolveError: 回放失败或超时时抛出
+    """
+    journal = Path(journal_file)
+    if not journal.exists():
+        raise ValidationError(f"Journal file does not exist: {journal_file}", field="journal_file")
+    if dimension not in ("2d", "3d") or precision not in ("sp", "dp"):
+        raise ValidationError(
+            f"Invalid solver version: {dimension} {precision}",
+            field="dimension",
+            details={"dimension": dimension, "precision": precision}
+        )
+    
+    version = dimension + ("dp" if precision == "dp" else "")
+    executable = fluent_path or os.getenv("FLUENT_PATH") or "fluent"
+    command = [executable, version, "-g", f"-t{processor_count}", "-i", str(journal.resolve())]
+    if os.name == "nt":
+        # Windows 上的 fluent 启动器默认立即返回
+        command.append("-wait")
+    command.extend(extra_args or [])
+    
+    transcript = Path(transcript_file) if transcript_file else journal.with_suffix(".trn")
+    logger.info(f"Replaying journal in batch mode: {' '.join(command)}")
+    
+    start = time.perf_counter()
+    try:
+        with open(transcript, "w", encoding="utf-8") as output:
+            completed = subprocess.run(
+                command,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                timeout=timeout
+            )
+    except FileNotFoundError as e:
+        error = FluentStartupError(
+            f"Fluent executable not found: {executable}",
+            details={"fix": "Set FLUENT_PATH or add fluent to PATH", "original_error": str(e)}
+        )
+        logger.error(str(error))
+        raise error
+    except subprocess.TimeoutExpired:
+        error = FluentSolveError(
+            f"Journal replay timed out after {timeout}s",
+            details={"journal": str(journal), "transcript": str(transcript)}
+        )
+        logger.error(str(error))
+        raise error
+    elapsed = time.perf_counter() - start
+    
+    if completed.returncode != 0:
+        error = FluentSolveError(
+            f"Journal replay failed with exit code {completed.returncode}",
+            details={"journal": str(journal), "transcript": str(transcript)}
+        )
+        logger.error(str(error))
+        raise error
+    
+    logger.success(f"Journal replayed in {elapsed:.1f}s")
+    return {
+        "returncode": completed.returncode,
+        "elapsed": elapsed,
+        "transcript": str(transcript),
+        "command": command
+    }
+
+
+def _to_entry(operation: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """操作转换为 journal 命令"""
+    if operation in ("load_case", "load_case_data"):
+        menu = "read-case" if operation == "load_case" else "read-case-data"
+        return {"kind": READ, "command": f'/file/{menu} {_quote(_path(arguments["case_file"]))}'}
+    if operation in ("save_case", "save_case_data"):
+        menu = "write-case" if operation == "save_case" else "write-case-data"
+        return {"kind": WRITE, "command": f'/file/{menu} {_quote(_path(arguments["case_file"]))}'}
+    if operation == "load_data":
+        # 只替换流场，不影响设置，不作为 read 类命令
+        return {"kind": ACTION, "command": f'/file/read-data {_quote(_path(arguments["data_file"]))}'}
+    if operation == "save_data":
+        return {"kind": WRITE, "command": f'/file/write-data {_quote(_path(arguments["data_file"]))}'}
+    if operation == "initialize":
+        menu = "hyb-initialization" if arguments["method"] == "hybrid" else "initialize-flow"
+        return {"kind": ACTION, "command": f"/solve/initialize/{menu}"}
+    if operation == "read_profile":
+        return {"kind": PROFILE, "command": f'/file/read-profile {_quote(_path(arguments["profile_file"]))}'}
+    if operation == "tui":
+        command = arguments["command"].strip()
+        command = command if command.startswith("/") else "/" + command
+        match = _ITERATE_COMMAND.match(command)
+        if match:
+            return {"kind": ITERATE, "count": int(match.group(1)), "command": f"/solve/iterate {match.group(1)}"}
+        if _READ_COMMAND.match(command):
+            return {"kind": READ, "command": command}
+        if command.startswith(_SETTING_MENUS):
+            return {"kind": SETTING, "command": command, "key": _setting_key(command)}
+        return {"kind": ACTION, "command": command}
+    if operation == "scheme":
+        return {"kind": SCHEME, "command": arguments["command"].strip()}
+    if operation == "compile_udf":
+        sources = " ".join(_quote(_path(source)) for source in arguments["udf_files"])
+        return {
+            "kind": UDF,
+            "command": f'/define/user-defined/compiled-functions compile {_quote(arguments["lib_name"])} yes {sources} "" ""'
+        }
+    if operation == "load_udf":
+        return {"kind": UDF, "command": f'/define/user-defined/compiled-functions load {_quote(arguments["lib_name"])}'}
+    if operation == "iterate":
+        count = int(arguments["iterations"])
+        return {"kind": ITERATE, "count": count, "command": f"/solve/iterate {count}"}
+    raise ValidationError(f"Unknown journal operation: {operation}", field="operation")
+
+
+def _setting_key(command: str) -> Optional[str]:
+    """
+    设置的标识：单值设置菜单中去掉末尾设置值（数值、yes/no 或字符串）后的命令
+    
+    其余参数（zone ID、方程名等）保留在标识中；不是单值设置的命令返回 None，不参与合并。
+    """
+    tokens = command.split()
+    if not command.startswith(_SINGLE_VALUE_SETTERS) or len(tokens) < 2 or not _VALUE_TOKEN.match(tokens[-1]):
+        return None
+    return " ".join(tokens[:-1])
+
+
+def _path(value: str) -> str:
+    """文件参数转换为绝对路径，回放时与工作目录无关"""
+    return Path(value).resolve().as_posix()
+
+
+def _quote(value: str) -> str:
+    """journal 中的字符串参数"""
+    return '"' + str(value).replace('"', '\\"') + '"'
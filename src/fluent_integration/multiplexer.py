@@ -0,0 +1,372 @@
+"""
+Session Multiplexer - 多个线程共享一个 Fluent 会话
+
+PyFluent 会话不是线程安全的。SessionMultiplexer 独占 FluentWrapper，所有调用经由
+优先级队列交给一个分发线程串行执行：修改状态的调用逐个执行，队首连续的只读查询
+（报告定义、场数据、命令校验）作为一批执行，多个调用方的 compute_reports 合并为一次
+远程调用，完全相同的查询只执行一次。按调用方统计排队深度和延迟。
+
+    mux = SessionMultiplexer(wrapper)
+    dashboard = mux.client("dashboard")
+    controller = mux.client("controller", priority=10)
+    dashboard.compute_reports(["drag"])          # 在任意线程中调用
+"""
+
+import heapq
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+from .fluent_wrapper import FluentWrapper
+
+
+# 不修改求解器状态、可以成批执行的 FluentWrapper 方法
+READ_ONLY_METHODS = ("compute_reports", "get_solution_data", "validate_command", "complete_command")
+
+Call = Union[str, Callable[..., Any]]
+
+
+class _Request:
+    """排队中的调用"""
+    
+    __slots__ = ("caller", "priority", "method", "func", "args", "kwargs", "read_only", "future", "submitted_at")
+    
+    def __init__(self, caller: str, priority: int, method: Optional[str], func: Callable[..., Any],
+                 args: tuple, kwargs: Dict[str, Any], read_only: bool):
+        self.caller = caller
+        self.priority = priority
+        self.method = method
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.read_only = read_only
+        self.future: Future = Future()
+        self.submitted_at = time.perf_counter()
+    
+    def key(self) -> Optional[str]:
+        """相同查询的标识（只对 wrapper 方法调用去重）"""
+        if self.method is None:
+            return None
+        try:
+            return json.dumps([self.method, self.args, self.kwargs], sort_keys=True, default=repr)
+        except TypeError:
+            return None
+
+
+class SessionMultiplexer:
+    """在多个调用方之间复用一个 FluentWrapper 会话"""
+    
+    def __init__(
+        self,
+        wrapper: FluentWrapper,
+        max_read_batch: Optional[int] = None,
+        latency_window: Optional[int] = None,
+        config_path: str = "config/fluent_config.json"
+    ):
+        """
+        初始化并启动分发线程
+        
+        Args:
+            wrapper: 共享的 FluentWrapper（之后只应通过多路复用器调用）
+            max_read_batch: 一批最多合并的只读查询数
+            latency_window: 每个调用方保留的最近延迟样本数（用于分位数）
+            config_path: Fluent 配置文件路径（读取 multiplexer 段）
+        """
+        mux_config = self._load_config(config_path).get("multiplexer", {})
+        
+        self.wrapper = wrapper
+        self.max_read_batch = max_read_batch or mux_config.get("max_read_batch", 32)
+        self.latency_window = latency_window or mux_config.get("latency_window", 1000)
+        
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closing = False
+        
+        # 按调用方的统计
+        self._depth: Dict[str, int] = defaultdict(int)
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"requests": 0, "errors": 0})
+        self._latency: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.latency_window))
+        self._wait: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.latency_window))
+        self._totals = {"batches": 0, "batched_reads": 0, "merged_report_calls": 0, "deduplicated": 0}
+        self._max_depth = 0
+        
+        self._thread = threading.Thread(target=self._dispatch, name="fluent-multiplexer", daemon=True)
+        self._thread.start()
+        logger.info("SessionMultiplexer started")
+    
+    def _load_config(self, config_path: str) -> Dict:
+        """加载配置文件"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Config file {config_path} not found, using defaults")
+            return {}
+    
+    def submit(
+        self,
+        call: Call,
+        *args,
+        caller: str = "default",
+        priority: int = 0,
+        read_only: Optional[bool] = None,
+        **kwargs
+    ) -> Future:
+        """
+        提交一次调用
+        
+        Args:
+            call: FluentWrapper 方法名，或以 wrapper 为第一个参数的函数
+            *args: 位置参数
+            caller: 调用方名称（统计维度）
+            priority: 优先级，越大越先执行
+            read_only: 是否只读，默认方法名在 READ_ONLY_METHODS 中为只读，函数为修改
+            **kwargs: 关键字参数
+        
+        Returns:
+            调用结果的 Future
+        
+        Raises:
+            RuntimeError: 多路复用器已关闭时抛出
+            AttributeError: FluentWrapper 没有该方法时抛出
+        """
+        if isinstance(call, str):
+            method, func = call, getattr(self.wrapper, call)
+            read_only = call in READ_ONLY_METHODS if read_only is None else read_only
+        else:
+            method, func = None, (lambda *a, **k: call(self.wrapper, *a, **k))
+            read_only = bool(read_only)
+        request = _Request(caller, priority, method, func, args, kwargs, read_only)
+        
+        # 在分发线程内（如自定义函数中）再次调用时直接执行，避免等待自己
+        if threading.current_thread() is self._thread:
+            request.future.set_running_or_notify_cancel()
+            self._execute(request)
+            return request.future
+        
+        with self._condition:
+            if self._closing:
+                raise RuntimeError("SessionMultiplexer is closed")
+            heapq.heappush(self._queue, (-priority, next(self._sequence), request))
+            self._depth[caller] += 1
+            self._max_depth = max(self._max_depth, len(self._queue))
+            self._condition.notify()
+        return request.future
+    
+    def call(self, call: Call, *args, caller: str = "default", priority: int = 0, **kwargs) -> Any:
+        """
+        提交一次调用并等待结果
+        
+        Args:
+            call: FluentWrapper 方法名或函数
+            *args: 位置参数
+            caller: 调用方名称
+            priority: 优先级
+            **kwargs: 关键字参数
+        
+        Returns:
+            调用结果
+        """
+        return self.submit(call, *args, caller=caller, priority=priority, **kwargs).result()
+    
+    def client(self, caller: str, priority: int = 0) -> "MultiplexedClient":
+        """
+        调用方句柄：像 FluentWrapper 一样调用方法，实际经由多路复用器执行
+        
+        Args:
+            caller: 调用方名称
+            priority: 该调用方的默认优先级
+        
+        Returns:
+            客户端
+        """
+        return MultiplexedClient(self, caller, priority)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        排队深度和延迟统计
+        
+        Returns:
+            {"queue_depth", "max_queue_depth", "batches", "batched_reads", "merged_report_calls",
+             "deduplicated", "callers": {调用方: {"queued", "requests", "errors", "mean_latency",
+             "p95_latency", "max_latency", "mean_wait"}}}
+        """
+        with self._condition:
+            callers = {}
+            for caller in set(self._depth) | set(self._counts):
+                latency = np.array(self._latency[caller]) if self._latency[caller] else np.zeros(1)
+                wait = np.array(self._wait[caller]) if self._wait[caller] else np.zeros(1)
+                callers[caller] = {
+                    "queued": self._depth[caller],
+                    **self._counts[caller],
+                    "mean_latency": float(latency.mean()),
+                    "p95_latency": float(np.percentile(latency, 95)),
+                    "max_latency": float(latency.max()),
+                    "mean_wait": float(wait.mean())
+                }
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_depth,
+                **self._totals,
+                "callers": callers
+            }
+    
+    def close(self, wait: bool = True):
+        """
+        停止接受调用并结束分发线程
+        
+        Args:
+            wait: True 执行完已排队的调用，False 取消它们
+        """
+        with self._condition:
+            self._closing = True
+            if not wait:
+                while self._queue:
+                    _, _, request = heapq.heappop(self._queue)
+                    self._depth[request.caller] -= 1
+                    request.future.cancel()
+            self._condition.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        logger.info("SessionMultiplexer closed")
+    
+    def __enter__(self) -> "SessionMultiplexer":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _dispatch(self):
+        """分发线程：取出队首调用；队首为只读查询时连同其后连续的只读查询一起执行"""
+        while True:
+            with self._condition:
+                while not self._queue and not self._closing:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                batch = [heapq.heappop(self._queue)[2]]
+                if batch[0].read_only:
+                    while self._queue and self._queue[0][2].read_only and len(batch) < self.max_read_batch:
+                        batch.append(heapq.heappop(self._queue)[2])
+                for request in batch:
+                    self._depth[request.caller] -= 1
+            
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            started = time.perf_counter()
+            try:
+                if len(batch) > 1:
+                    self._execute_reads(batch)
+                elif batch:
+                    self._execute(batch[0])
+            except Exception as e:
+                # 分发线程必须继续运行：只让这一批中尚未完成的调用失败
+                logger.error(f"Multiplexer batch failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        self._finish(request, started, error=e)
+    
+    def _execute(self, request: _Request):
+        """执行单个调用"""
+        started = time.perf_counter()
+        try:
+            result = request.func(*request.args, **request.kwargs)
+        except Exception as e:
+            self._finish(request, started, error=e)
+        else:
+            self._finish(request, started, result=result)
+    
+    def _execute_reads(self, batch: List[_Request]):
+        """成批执行只读查询：合并 compute_reports，相同查询只执行一次"""
+        started = time.perf_counter()
+        
+        reports = [request for request in batch if self._mergeable_report(request)]
+        if len(reports) > 1:
+            names = list(dict.fromkeys(name for request in reports for name in request.args[0]))
+            try:
+                values = self.wrapper.compute_reports(names)
+                split = [(request, {name: values[name] for name in request.args[0]}) for request in reports]
+            except Exception as e:
+                # 合并的请求失败（如某个报告名无效或结果缺少报告）时逐个执行，只让出错的调用方失败
+                logger.debug(f"Merged compute_reports failed, running individually: {e}")
+            else:
+                for request, result in split:
+                    self._finish(request, started, result=result)
+                batch = [request for request in batch if request not in reports]
+                with self._condition:
+                    self._totals["merged_report_calls"] += 1
+        
+        shared: Dict[str, _Request] = {}
+        for request in batch:
+            key = request.key()
+            if key is not None and key in shared:
+                source = shared[key].future
+                if source.exception() is not None:
+                    self._finish(request, started, error=source.exception())
+                else:
+                    self._finish(request, started, result=source.result())
+                with self._condition:
+                    self._totals["deduplicated"] += 1
+                continue
+            self._execute(request)
+            if key is not None:
+                shared[key] = request
+        
+        with self._condition:
+            self._totals["batches"] += 1
+            self._totals["batched_reads"] += len(batch) + (len(reports) if len(reports) > 1 else 0)
+    
+    @staticmethod
+    def _mergeable_report(request: _Request) -> bool:
+        """是否为可合并的 compute_reports 调用（唯一参数为报告名列表）"""
+        if request.method != "compute_reports" or request.kwargs or len(request.args) != 1:
+            return False
+        names = request.args[0]
+        return isinstance(names, (list, tuple)) and all(isinstance(name, str) for name in names)
+    
+    def _finish(self, request: _Request, started: float, result: Any = None, error: Optional[Exception] = None):
+        """设置结果并记录延迟"""
+        finished = time.perf_counter()
+        with self._condition:
+            counts = self._counts[request.caller]
+            counts["requests"] += 1
+            if error is not None:
+                counts["errors"] += 1
+            self._latency[request.caller].append(finished - request.submitted_at)
+            self._wait[request.caller].append(max(started - request.submitted_at, 0.0))
+        if error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
+
+
+class MultiplexedClient:
+    """某个调用方的句柄：方法调用经由多路复用器同步执行"""
+    
+    def __init__(self, multiplexer: SessionMultiplexer, caller: str, priority: int = 0):
+        self.multiplexer = multiplexer
+        self.caller = caller
+        self.priority = priority
+    
+    def submit(self, call: Call, *args, priority: Optional[int] = None, **kwargs) -> Future:
+        """异步提交（参见 SessionMultiplexer.submit）"""
+        return self.multiplexer.submit(
+            call, *args, caller=self.caller, priority=self.priority if priority is None else priority, **kwargs
+        )
+    
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_") or not callable(getattr(self.multiplexer.wrapper, name, None)):
+            raise AttributeError(f"FluentWrapper has no method {name}")
+        
+        def method(*args, **kwargs):
+            return self.submit(name, *args, **kwargs).result()
+        
+        method.__name__ = name
+        return method
@@ -0,0 +1,274 @@
+"""
+Placement - 并发求解会话的 CPU 亲和性和 NUMA 放置
+
+Fluent 默认把计算进程绑定到 0..N-1 号核，同一节点上的多个会话因此挤在同一批核和
+同一个内存控制器上。CorePlacement 从 /sys 读取 NUMA 节点和超线程拓扑，为每个会话
+分配互不重叠的物理核（优先放在单个 NUMA 节点内）；启动时关闭 Fluent 自身的绑定
+(-affinity=off)，并在启动线程上设置 CPU 亲和性，求解器进程继承该核集合。进程只在
+本节点的核上运行时，内核默认的本地分配策略使其内存也分配在本节点。
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+from loguru import logger
+
+from .exceptions import ValidationError
+
+
+class NodeTopology:
+    """节点拓扑：NUMA 节点 -> 物理核 -> 硬件线程"""
+    
+    def __init__(self, nodes: Dict[int, List[List[int]]]):
+        """
+        Args:
+            nodes: {NUMA 节点号: [物理核的硬件线程列表, ...]}
+        """
+        self.nodes = {node: [sorted(core) for core in cores] for node, cores in nodes.items() if cores}
+    
+    @classmethod
+    def discover(cls, sysfs_root: str = "/sys", allowed_cpus: Optional[Set[int]] = None) -> "NodeTopology":
+        """
+        从 sysfs 读取拓扑；没有 NUMA 信息时视为单节点，没有 sysfs 时按 os.cpu_count() 估计
+        
+        Args:
+            sysfs_root: sysfs 挂载点（测试时可指向伪造的目录树）
+            allowed_cpus: 只使用这些 CPU，默认为当前进程允许运行的 CPU
+        
+        Returns:
+            拓扑
+        """
+        root = Path(sysfs_root)
+        if allowed_cpus is None and sysfs_root == "/sys" and hasattr(os, "sched_getaffinity"):
+            allowed_cpus = set(os.sched_getaffinity(0))
+        
+        node_cpus: Dict[int, List[int]] = {}
+        for path in sorted((root / "devices" / "system" / "node").glob("node[0-9]*")):
+            cpulist = _read(path / "cpulist")
+            if cpulist:
+                node_cpus[int(path.name[4:])] = parse_cpulist(cpulist)
+        if not node_cpus:
+            online = _read(root / "devices" / "system" / "cpu" / "online")
+            node_cpus[0] = parse_cpulist(online) if online else list(range(os.cpu_count() or 1))
+        
+        nodes: Dict[int, List[List[int]]] = {}
+        for node, cpus in node_cpus.items():
+            cores: Dict[tuple, List[int]] = {}
+            for cpu in cpus:
+                if allowed_cpus is not None and cpu not in allowed_cpus:
+                    continue
+                siblings = _read(root / "devices" / "system" / "cpu" / f"cpu{cpu}" / "topology" / "thread_siblings_list")
+                key = tuple(parse_cpulist(siblings)) if siblings else (cpu,)
+                cores.setdefault(key, []).append(cpu)
+            nodes[node] = sorted(cores.values())
+        
+        topology = cls(nodes)
+        logger.debug(f"Discovered topology: {topology.describe()}")
+        return topology
+    
+    @property
+    def core_count(self) -> int:
+        """物理核总数"""
+        return sum(len(cores) for cores in self.nodes.values())
+    
+    def describe(self) -> str:
+        """拓扑摘要"""
+        return ", ".join(
+            f"node{node}: {len(cores)} cores/{sum(len(core) for core in cores)} threads"
+            for node, cores in sorted(self.nodes.items())
+        )
+
+
+class Placement:
+    """分配给一个会话的核集合"""
+    
+    def __init__(self, cpus: List[int], units: Dict[int, List[tuple]]):
+        self.cpus = cpus
+        self.nodes = sorted(units)
+        # 每个 NUMA 节点上占用的分配单元，归还时放回原节点
+        self._units = units
+    
+    def to_dict(self) -> Dict[str, List[int]]:
+        """放置结果（用于报告）"""
+        return {"cpus": self.cpus, "numa_nodes": self.nodes}
+    
+    def __repr__(self) -> str:
+        return f"Placement(cpus={format_cpulist(self.cpus)}, numa_nodes={self.nodes})"
+
+
+class CorePlacement:
+    """为并发会话分配互不重叠的物理核"""
+    
+    def __init__(self, topology: Optional[NodeTopology] = None, use_smt: bool = False):
+        """
+        Args:
+            topology: 节点拓扑，默认从 /sys 读取
+            use_smt: 是否把同一物理核的每个硬件线程当作一个核分配；CFD 求解受内存带宽限制，
+                默认每个物理核只放一个进程，其余硬件线程不分配给其他会话
+        """
+        self.topology = topology or NodeTopology.discover()
+        self.use_smt = use_smt
+        # 每个 NUMA 节点上的空闲分配单元（物理核，或 use_smt 时的单个硬件线程）
+        self._free: Dict[int, List[tuple]] = {
+            node: sorted([tuple(core) for core in cores] if not use_smt else [(cpu,) for core in cores for cpu in core])
+            for node, cores in self.topology.nodes.items()
+        }
+        self._placements: List[Placement] = []
+        self._lock = threading.Lock()
+    
+    def allocate(self, cores: int) -> Optional[Placement]:
+        """
+        分配 cores 个核：能放进单个 NUMA 节点时选空闲核最少且足够的节点（保留大块给大任务），
+        否则按空闲核从多到少跨节点分配
+        
+        Args:
+            cores: 需要的核数（求解器进程数）
+        
+        Returns:
+            放置结果，空闲核不足时返回 None（会话不绑定核，与其他会话共享）
+        
+        Raises:
+            ValidationError: cores 不为正时抛出
+        """
+        if cores <= 0:
+            raise ValidationError("cores must be positive", field="cores")
+        
+        with self._lock:
+            available = sum(len(units) for units in self._free.values())
+            if cores > available:
+                logger.warning(
+                    f"Only {available} free cores for a {cores}-core session; launching without CPU pinning"
+                )
+                return None
+            
+            fitting = [node for node, units in self._free.items() if len(units) >= cores]
+            if fitting:
+                node = min(fitting, key=lambda candidate: (len(self._free[candidate]), candidate))
+                taken = {node: self._free[node][:cores]}
+            else:
+                taken, remaining = {}, cores
+                for node in sorted(self._free, key=lambda candidate: (-len(self._free[candidate]), candidate)):
+                    if remaining == 0:
+                        break
+                    count = min(remaining, len(self._free[node]))
+                    if count:
+                        taken[node] = self._free[node][:count]
+                        remaining -= count
+            
+            for node, node_units in taken.items():
+                self._free[node] = self._free[node][len(node_units):]
+            
+            # 不使用超线程时每个物理核只放一个进程（第一个硬件线程）
+            cpus = sorted(unit[0] for node_units in taken.values() for unit in node_units)
+            placement = Placement(cpus, taken)
+            self._placements.append(placement)
+        
+        logger.info(f"Placed {cores}-core session on {placement}")
+        return placement
+    
+    def release(self, placement: Optional[Placement]):
+        """
+        归还放置的核
+        
+        Args:
+            placement: allocate() 返回的放置，None 时忽略
+        """
+        if placement is None:
+            return
+        with self._lock:
+            if placement not in self._placements:
+                return
+            self._placements.remove(placement)
+            for node, units in placement._units.items():
+                self._free[node] = sorted(self._free[node] + units)
+    
+    def placements(self) -> List[Dict[str, List[int]]]:
+        """当前已分配的放置"""
+        with self._lock:
+            return [placement.to_dict() for placement in self._placements]
+    
+    def free_cores(self) -> Dict[int, int]:
+        """各 NUMA 节点的空闲核数"""
+        with self._lock:
+            return {node: len(units) for node, units in self._free.items()}
+
+
+@contextmanager
+def pinned(cpus: Optional[Sequence[int]]) -> Iterator[None]:
+    """
+    在当前线程上临时设置 CPU 亲和性，期间启动的子进程继承该核集合
+    
+    Args:
+        cpus: CPU 编号，None 时不做任何设置
+    """
+    if not cpus:
+        yield
+        return
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU affinity is not supported on this platform; launching without pinning")
+        yield
+        return
+    
+    # Linux 上 pid 0 表示调用线程，只影响本线程和它之后创建的子进程
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, set(cpus))
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """
+    解析 sysfs 的 CPU 列表格式，如 "0-3,8-11"
+    
+    Args:
+        text: CPU 列表
+    
+    Returns:
+        CPU 编号列表
+    """
+    cpus: List[int] = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)(?:-(\d+))?", part.strip())
+        if match is None:
+            raise ValidationError(f"Invalid CPU list: {text}", field="cpulist")
+        start, end = int(match.group(1)), int(match.group(2) or match.group(1))
+        cpus.extend(range(start, end + 1))
+    return cpus
+
+
+def format_cpulist(cpus: Sequence[int]) -> str:
+    """
+    CPU 编号列表格式化为 "0-3,8-11"
+    
+    Args:
+        cpus: CPU 编号
+    
+    Returns:
+        CPU 列表字符串
+    """
+    ranges: List[str] = []
+    ordered = sorted(cpus)
+    index = 0
+    while index < len(ordered):
+        end = index
+        while end + 1 < len(ordered) and ordered[end + 1] == ordered[end] + 1:
+            end += 1
+        ranges.append(str(ordered[index]) if end == index else f"{ordered[index]}-{ordered[end]}")
+        index = end + 1
+    return ",".join(ranges)
+
+
+def _read(path: Path) -> Optional[str]:
+    """读取 sysfs 文件，不存在时返回 None"""
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
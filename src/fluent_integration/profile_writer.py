@@ -0,0 +1,269 @@
+"""
+Profile Writer - 直接从表格数据写出 Fluent 边界 Profile 文件 (.prof)
+
+对于纯表格驱动的边界条件（入口速度、温度分布等），无需生成并编译
+DEFINE_PROFILE UDF，直接写出 profile 文件并在会话中读取即可。
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+import numpy as np
+from loguru import logger
+
+from .exceptions import FluentIntegrationError, ValidationError
+
+
+class ProfileWriter:
+    """Fluent Profile 文件写出器（向量化格式化 + 分块流式写入）"""
+    
+    # profile 类型 -> 必需的坐标字段
+    PROFILE_TYPES = {
+        "point": ("x", "y"),
+        "line": ("x", "y"),
+        "radial": ("r",),
+        "axial": ("z",)
+    }
+    
+    SUPPORTED_TABLE_FORMATS = (".csv", ".parquet", ".pq")
+    
+    def __init__(self, precision: int = 8, chunk_size: int = 65536):
+        """
+        初始化 Profile Writer
+        
+        Args:
+            precision: 科学计数法有效位数
+            chunk_size: 每次格式化并写出的数值个数（限制峰值内存）
+        """
+        if chunk_size <= 0:
+            raise ValidationError("chunk_size must be positive", field="chunk_size")
+        
+        self.precision = precision
+        self.chunk_size = chunk_size
+        self._value_fmt = f"%.{precision}e\n"
+    
+    def write(
+        self,
+        file_path: str,
+        profile_name: str,
+        fields: Mapping[str, Any],
+        profile_type: str = "point"
+    ) -> str:
+        """
+        写出 profile 文件
+        
+        Args:
+            file_path: 输出 .prof 文件路径
+            profile_name: profile 名称（在 Fluent 中引用的名称）
+            fields: 字段名 -> 一维数组（坐标字段与数据字段）
+            profile_type: profile 类型 (point, line, radial, axial)
+        
+        Returns:
+            写出的文件路径
+        
+        Raises:
+            ValidationError: 输入数据不合法时抛出
+        """
+        columns = self._as_columns(fields)
+        n_points = self._validate(profile_name, columns, profile_type)
+        
+        logger.info(
+            f"Writing profile '{profile_name}' ({profile_type}, {n_points} points, "
+            f"{len(columns)} fields) to: {file_path}"
+        )
+        
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(file_path, 'w', encoding='utf-8', newline="\n") as f:
+            f.write(f"(({profile_name} {profile_type} {n_points})\n")
+            for name, values in columns.items():
+                self._write_field(f, name, values)
+            f.write(")\n")
+        
+        logger.success(f"Profile written to {file_path}")
+        return file_path
+    
+    def write_from_table(
+        self,
+        file_path: str,
+        table_path: str,
+        profile_name: str,
+        columns: Optional[List[str]] = None,
+        rename: Optional[Dict[str, str]] = None,
+        profile_type: str = "point"
+    ) -> str:
+        """
+        从 CSV/Parquet 表格写出 profile 文件
+        
+        Args:
+            file_path: 输出 .prof 文件路径
+            table_path: 输入表格路径 (.csv, .parquet)
+            profile_name: profile 名称
+            columns: 要写出的列（默认全部列）
+            rename: 列名 -> profile 字段名 的映射
+            profile_type: profile 类型
+        
+        Returns:
+            写出的文件路径
+        """
+        fields = self.load_table(table_path, columns=columns)
+        if rename:
+            fields = {rename.get(name, name): values for name, values in fields.items()}
+        return self.write(file_path, profile_name, fields, profile_type=profile_type)
+    
+    def load_table(self, table_path: str, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        读取 CSV/Parquet 表格为列字典
+        
+        Args:
+            table_path: 表格路径
+            columns: 要读取的列（默认全部列）
+        
+        Returns:
+            列名 -> 一维 float64 数组
+        
+        Raises:
+            ValidationError: 文件不存在、格式不支持或列缺失时抛出
+            FluentIntegrationError: 缺少 Parquet 依赖时抛出
+        """
+        path = Path(table_path)
+        if not path.exists():
+            raise ValidationError(
+                "Table file does not exist",
+                field="table_path",
+                details={"path": table_path}
+            )
+        
+        suffix = path.suffix.lower()
+        if suffix == ".csv":
+            table = self._load_csv(path)
+        elif suffix in (".parquet", ".pq"):
+            table = self._load_parquet(path, columns)
+        else:
+            raise ValidationError(
+                f"Unsupported table format: {suffix}",
+                field="table_path",
+                details={"supported": list(self.SUPPORTED_TABLE_FORMATS)}
+            )
+        
+        if columns:
+            missing = [name for name in columns if name not in table]
+            if missing:
+                raise ValidationError(
+                    f"Columns not found in table: {missing}",
+                    field="columns",
+                    details={"available": list(table.keys())}
+                )
+            table = {name: table[name] for name in columns}
+        
+        return table
+    
+    def _load_csv(self, path: Path) -> Dict[str, np.ndarray]:
+        """读取 CSV（首行为列名，原样保留 x-velocity 这类 Fluent 字段名）"""
+        with open(path, "r", encoding="utf-8") as f:
+            header = f.readline()
+        names = [name.strip().strip('"') for name in header.strip().split(",")]
+        
+        data = np.genfromtxt(path, delimiter=",", skip_header=1, dtype=np.float64, encoding="utf-8")
+        # 单行或单列时 genfromtxt 返回一维数组
+        if not data.size:
+            data = np.empty((0, len(names)))
+        data = data.reshape(-1, 1) if len(names) == 1 else np.atleast_2d(data)
+        if data.shape[1] != len(names):
+            raise ValidationError(
+                f"CSV rows do not match header in {path}",
+                field="table_path",
+                details={"columns": names}
+            )
+        return {name: np.ascontiguousarray(data[:, index]) for index, name in enumerate(names)}
+    
+    def _load_parquet(self, path: Path, columns: Optional[List[str]]) -> Dict[str, np.ndarray]:
+        """读取 Parquet（按列读取，不整体物化表格）"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise FluentIntegrationError(
+                "pyarrow package not installed, cannot read Parquet tables",
+                error_code="DEPENDENCY_MISSING",
+                details={"fix": "pip install pyarrow", "original_error": str(e)}
+            )
+        
+        parquet_file = pq.ParquetFile(path)
+        names = columns or parquet_file.schema_arrow.names
+        return {
+            name: parquet_file.read(columns=[name]).column(0).to_numpy().astype(np.float64, copy=False)
+            for name in names
+            if name in parquet_file.schema_arrow.names
+        }
+    
+    def _as_columns(self, fields: Any) -> Dict[str, np.ndarray]:
+        """将映射 / 结构化数组 / DataFrame 统一为 列名 -> 一维数组"""
+        if isinstance(fields, np.ndarray) and fields.dtype.names:
+            names = fields.dtype.names
+        elif hasattr(fields, "keys"):
+            names = list(fields.keys())
+        else:
+            raise ValidationError(
+                "Profile fields must be a mapping or structured array",
+                field="fields",
+                details={"type": type(fields).__name__}
+            )
+        
+        return {
+            str(name): np.asarray(fields[name], dtype=np.float64).ravel()
+            for name in names
+        }
+    
+    def _validate(self, profile_name: str, columns: Dict[str, np.ndarray], profile_type: str) -> int:
+        """校验 profile 名称、坐标字段、长度和数值有效性，返回点数"""
+        if profile_type not in self.PROFILE_TYPES:
+            raise ValidationError(
+                f"Unknown profile type: {profile_type}",
+                field="profile_type",
+                details={"available_types": list(self.PROFILE_TYPES.keys())}
+            )
+        
+        if not profile_name or any(ch.isspace() or ch in "()" for ch in profile_name):
+            raise ValidationError(
+                "Profile name must be non-empty and contain no whitespace or parentheses",
+                field="profile_name",
+                details={"profile_name": profile_name}
+            )
+        
+        missing = [name for name in self.PROFILE_TYPES[profile_type] if name not in columns]
+        if missing:
+            raise ValidationError(
+                f"Missing coordinate fields for {profile_type} profile: {missing}",
+                field="fields",
+                details={"provided": list(columns.keys())}
+            )
+        
+        if len(columns) == len(self.PROFILE_TYPES[profile_type]):
+            raise ValidationError("Profile has no data fields", field="fields")
+        
+        lengths = {name: values.size for name, values in columns.items()}
+        if len(set(lengths.values())) != 1:
+            raise ValidationError("Profile fields have different lengths", field="fields", details=lengths)
+        
+        n_points = next(iter(lengths.values()))
+        if n_points == 0:
+            raise ValidationError("Profile has no points", field="fields")
+        
+        for name, values in columns.items():
+            if not np.isfinite(values).all():
+                raise ValidationError(f"Field '{name}' contains NaN or Inf", field=name)
+        
+        return n_points
+    
+    def _write_field(self, f, name: str, values: np.ndarray):
+        """以分块方式写出单个字段"""
+        f.write(f"({name}\n")
+        for chunk in self._iter_chunks(values):
+            # 整块一次性格式化，避免逐值 Python 循环
+            f.write((self._value_fmt * chunk.size) % tuple(chunk.tolist()))
+        f.write(")\n")
+    
+    def _iter_chunks(self, values: np.ndarray) -> Iterator[np.ndarray]:
+        """按 chunk_size 切分数组（视图，不复制）"""
+        for start in range(0, values.size, self.chunk_size):
+            yield values[start:start + self.chunk_size]
@@ -0,0 +1,598 @@
+"""
+Job Scheduler - 按许可证和 CPU 核数调度求解任务
+
+Fluent 每个求解会话占用一个求解器许可证 (cfd_base)，超出包含核数的每个核再占用一个
+HPC 许可证 (anshpc)。调度器维护本机核数和许可证令牌池，按优先级把任务装入空闲资源；
+排在队首的任务资源不足时为其预留最早可用时刻，较小的任务只要不推迟该时刻即可提前
+运行 (EASY backfill)，避免许可证在等待中空闲。
+
+    scheduler = JobScheduler(total_cores=32, license_server=LocalLicenseServer({"cfd_base": 2, "anshpc": 32}))
+    job = scheduler.submit_fluent(lambda wrapper: wrapper.iterate(500), cores=16, estimated_runtime=3600)
+    job.result()
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .exceptions import ValidationError
+from .fluent_wrapper import FluentWrapper
+
+
+class LocalLicenseServer:
+    """
+    本地许可证服务器替身：按特性计数的令牌池
+    
+    与真实许可证服务器相同，检出是全有或全无的；调度器只依赖 checkout/checkin/
+    available/total 四个方法，可替换为查询 FlexLM 的实现。
+    """
+    
+    def __init__(self, tokens: Dict[str, int]):
+        """
+        初始化令牌池
+        
+        Args:
+            tokens: {特性名: 令牌数}，如 {"cfd_base": 2, "anshpc": 16}
+        """
+        self._total = dict(tokens)
+        self._in_use = {feature: 0 for feature in tokens}
+        self._lock = threading.Lock()
+    
+    def checkout(self, licenses: Dict[str, int]) -> bool:
+        """
+        检出许可证（任一特性不足时全部不检出）
+        
+        Args:
+            licenses: {特性名: 数量}
+        
+        Returns:
+            是否检出成功
+        """
+        with self._lock:
+            if any(count > self._total.get(feature, 0) - self._in_use.get(feature, 0)
+                   for feature, count in licenses.items() if count):
+                return False
+            for feature, count in licenses.items():
+                if count:
+                    self._in_use[feature] += count
+            return True
+    
+    def checkin(self, licenses: Dict[str, int]):
+        """
+        归还许可证
+        
+        Args:
+            licenses: {特性名: 数量}
+        """
+        with self._lock:
+            for feature, count in licenses.items():
+                if count:
+                    self._in_use[feature] = max(self._in_use[feature] - count, 0)
+    
+    def available(self) -> Dict[str, int]:
+        """各特性的空闲令牌数"""
+        with self._lock:
+            return {feature: total - self._in_use[feature] for feature, total in self._total.items()}
+    
+    def total(self) -> Dict[str, int]:
+        """各特性的令牌总数"""
+        return dict(self._total)
+
+
+class ScheduledJob:
+    """调度队列中的任务"""
+    
+    def __init__(
+        self,
+        job_id: int,
+        name: str,
+        func: Callable[["ScheduledJob"], Any],
+        cores: int,
+        licenses: Dict[str, int],
+        priority: int,
+        estimated_runtime: Optional[float]
+    ):
+        self.job_id = job_id
+        self.name = name
+        self.func = func
+        self.cores = cores
+        self.licenses = licenses
+        self.priority = priority
+        self.estimated_runtime = estimated_runtime
+        self.status = "queued"
+        self.backfilled = False
+        self.error: Optional[str] = None
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Future = Future()
+    
+    @property
+    def expected_end(self) -> float:
+        """预计结束时刻（未开始或没有运行时间估计时为无穷大）"""
+        if self.started_at is None or self.estimated_runtime is None:
+            return float("inf")
+        return self.started_at + self.estimated_runtime
+    
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """
+        等待任务结束并返回结果
+        
+        Args:
+            timeout: 超时（秒）
+        
+        Returns:
+            任务函数的返回值（任务失败时重新抛出其异常）
+        """
+        return self.future.result(timeout)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态（用于状态快照）"""
+        now = time.monotonic()
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "status": self.status,
+            "priority": self.priority,
+            "cores": self.cores,
+            "licenses": self.licenses,
+            "estimated_runtime": self.estimated_runtime,
+            "backfilled": self.backfilled,
+            "waited": (self.started_at or now) - self.submitted_at,
+            "running_for": (self.finished_at or now) - self.started_at if self.started_at else None,
+            "error": self.error
+        }
+
+
+class JobScheduler:
+    """按许可证和核数调度的优先级任务队列"""
+    
+    def __init__(
+        self,
+        total_cores: Optional[int] = None,
+        license_server: Optional[LocalLicenseServer] = None,
+        backfill: Optional[bool] = None,
+        state_file: Optional[str] = None,
+        config_path: str = "config/fluent_config.json"
+    ):
+        """
+        初始化调度器
+        
+        Args:
+            total_cores: 可分配的 CPU 核数，默认取配置，未配置时为本机核数
+            license_server: 许可证服务器，默认按配置的令牌数创建 LocalLicenseServer
+            backfill: 是否允许较小的任务在不推迟队首任务的前提下提前运行
+            state_file: 队列和利用率快照的 JSON 路径（供 manage.py queue-status 读取），None 表示不写
+            config_path: Fluent 配置文件路径（读取 scheduler 段）
+        """
+        scheduler_config = self._load_config(config_path).get("scheduler", {})
+        
+        self.total_cores = total_cores or scheduler_config.get("total_cores") or os.cpu_count() or 1
+        self.license_server = license_server or LocalLicenseServer(
+            scheduler_config.get("licenses", {"cfd_base": 1, "anshpc": 0})
+        )
+        self.backfill = scheduler_config.get("backfill", True) if backfill is None else backfill
+        self.state_file = state_file if state_file is not None else scheduler_config.get("state_file")
+        self.base_feature = scheduler_config.get("base_feature", "cfd_base")
+        self.hpc_feature = scheduler_config.get("hpc_feature", "anshpc")
+        self.cores_included = scheduler_config.get("hpc_cores_included", 4)
+        
+        self._jobs: Dict[int, ScheduledJob] = {}
+        self._queue: List[ScheduledJob] = []
+        self._running: List[ScheduledJob] = []
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._closed = False
+        
+        # 时间加权的资源占用积分，用于计算利用率
+        self._started = time.monotonic()
+        self._last_account = self._started
+        self._core_seconds = 0.0
+        self._license_seconds = {feature: 0.0 for feature in self.license_server.total()}
+        self._counts = {"submitted": 0, "done": 0, "failed": 0, "cancelled": 0, "backfilled": 0}
+        
+        logger.info(
+            f"JobScheduler initialized ({self.total_cores} cores, licenses {self.license_server.total()}, "
+            f"backfill={'on' if self.backfill else 'off'})"
+        )
+    
+    def _load_config(self, config_path: str) -> Dict:
+        """加载配置文件"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Config file {config_path} not found, using defaults")
+            return {}
+    
+    def licenses_for(self, cores: int) -> Dict[str, int]:
+        """
+        Fluent 会话所需的许可证：一个求解器许可证，超出包含核数的每个核一个 HPC 许可证
+        
+        Args:
+            cores: 求解器进程数
+        
+        Returns:
+            {特性名: 数量}
+        """
+        return {self.base_feature: 1, self.hpc_feature: max(cores - self.cores_included, 0)}
+    
+    def submit(
+        self,
+        func: Callable[[ScheduledJob], Any],
+        cores: int = 1,
+        priority: int = 0,
+        name: Optional[str] = None,
+        estimated_runtime: Optional[float] = None,
+        licenses: Optional[Dict[str, int]] = None
+    ) -> ScheduledJob:
+        """
+        提交任务
+        
+        Args:
+            func: 任务函数，参数为任务本身（含分配的 cores），在独立线程中运行
+            cores: 占用的 CPU 核数
+            priority: 优先级，数值大的先调度，相同优先级按提交顺序
+            name: 任务名称
+            estimated_runtime: 预计运行时间（秒），用于 backfill；None 表示未知
+            licenses: 占用的许可证，默认按 licenses_for(cores) 计算
+        
+        Returns:
+            任务对象，result() 等待结果
+        
+        Raises:
+            ValidationError: 资源需求超过总量（永远无法运行）或调度器已关闭时抛出
+        """
+        licenses = {feature: count for feature, count in (licenses or self.licenses_for(cores)).items() if count}
+        if cores <= 0:
+            raise ValidationError("cores must be positive", field="cores")
+        if cores > self.total_cores:
+            raise ValidationError(
+                f"Job needs {cores} cores but only {self.total_cores} are available",
+                field="cores"
+            )
+        total = self.license_server.total()
+        short = {feature: count for feature, count in licenses.items() if count > total.get(feature, 0)}
+        if short:
+            raise ValidationError(
+                "Job needs more licenses than the pool holds",
+                field="licenses",
+                details={"required": licenses, "total": total}
+            )
+        
+        with self._condition:
+            if self._closed:
+                raise ValidationError("Scheduler is shut down", field="scheduler")
+            job_id = next(self._ids)
+            job = ScheduledJob(
+                job_id, name or f"job-{job_id}", func, cores, licenses, priority, estimated_runtime
+            )
+            self._jobs[job_id] = job
+            self._queue.append(job)
+            self._counts["submitted"] += 1
+            logger.info(f"Queued {job.name} ({cores} cores, licenses {licenses}, priority {priority})")
+            self._schedule()
+        return job
+    
+    def submit_fluent(
+        self,
+        task: Callable[[FluentWrapper], Any],
+        cores: int = 1,
+        wrapper_factory: Optional[Callable[[], FluentWrapper]] = None,
+        launch_options: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> ScheduledJob:
+        """
+        提交 Fluent 任务：分配资源后以 processor_count=cores 启动会话，运行 task(wrapper) 后结束会话
+        
+        Args:
+            task: 任务函数，参数为已启动的 FluentWrapper
+            cores: 求解器进程数
+            wrapper_factory: 创建 FluentWrapper 的工厂函数
+            launch_options: 其余 start_fluent 参数（dimension, precision, show_gui）
+            **kwargs: 传给 submit 的参数（priority, name, estimated_runtime, licenses）
+        
+        Returns:
+            任务对象
+        """
+        factory = wrapper_factory or FluentWrapper
+        
+        def run(job: ScheduledJob) -> Any:
+            wrapper = factory()
+            wrapper.start_fluent(processor_count=job.cores, **(launch_options or {}))
+            try:
+                return task(wrapper)
+            finally:
+                wrapper.stop_fluent()
+        
+        return self.submit(run, cores=cores, **kwargs)
+    
+    def cancel(self, job_id: int) -> bool:
+        """
+        取消排队中的任务（运行中的任务不能取消）
+        
+        Args:
+            job_id: 任务 ID
+        
+        Returns:
+            是否已取消
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            self._queue.remove(job)
+            self._finish(job, "cancelled")
+            job.future.cancel()
+            self._schedule()
+        return True
+    
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待队列清空且所有任务结束
+        
+        Args:
+            timeout: 超时（秒）
+        
+        Returns:
+            是否在超时前全部结束
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._running, timeout)
+    
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        关闭调度器，不再接受新任务
+        
+        Args:
+            wait: 是否等待任务结束
+            cancel_pending: 是否取消仍在排队的任务
+        """
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                for job in list(self._queue):
+                    self._queue.remove(job)
+                    self._finish(job, "cancelled")
+                    job.future.cancel()
+        if wait:
+            self.wait_all()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True, cancel_pending=exc_type is not None)
+    
+    def jobs(self) -> List[Dict[str, Any]]:
+        """全部任务的状态"""
+        with self._condition:
+            return [job.to_dict() for job in self._jobs.values()]
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        队列和利用率统计
+        
+        Returns:
+            {"queued", "running", "done", "failed", "cancelled", "backfilled", "cores", "licenses",
+             "core_utilization", "license_utilization", "idle_license_seconds", "mean_wait", "uptime"}
+        """
+        with self._condition:
+            return self._stats_locked()
+    
+    def _stats_locked(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._account(now)
+        uptime = max(now - self._started, 1e-9)
+        totals = self.license_server.total()
+        held = self._held_licenses()
+        started = [job for job in self._jobs.values() if job.started_at is not None]
+        return {
+            "queued": len(self._queue),
+            "running": len(self._running),
+            "done": self._counts["done"],
+            "failed": self._counts["failed"],
+            "cancelled": self._counts["cancelled"],
+            "backfilled": self._counts["backfilled"],
+            "cores": {"total": self.total_cores, "in_use": sum(job.cores for job in self._running)},
+            "licenses": {
+                feature: {"total": total, "in_use": held.get(feature, 0)} for feature, total in totals.items()
+            },
+            "core_utilization": self._core_seconds / (self.total_cores * uptime),
+            "license_utilization": {
+                feature: self._license_seconds[feature] / (total * uptime)
+                for feature, total in totals.items() if total
+            },
+            "idle_license_seconds": {
+                feature: total * uptime - self._license_seconds[feature] for feature, total in totals.items()
+            },
+            "mean_wait": (
+                sum(job.started_at - job.submitted_at for job in started) / len(started) if started else 0.0
+            ),
+            "uptime": uptime
+        }
+    
+    def _held_licenses(self) -> Dict[str, int]:
+        """本调度器运行中的任务持有的许可证"""
+        held: Dict[str, int] = {}
+        for job in self._running:
+            for feature, count in job.licenses.items():
+                held[feature] = held.get(feature, 0) + count
+        return held
+    
+    def _account(self, now: float):
+        """累计自上次统计以来的资源占用"""
+        elapsed = now - self._last_account
+        if elapsed > 0:
+            self._core_seconds += sum(job.cores for job in self._running) * elapsed
+            for feature, count in self._held_licenses().items():
+                self._license_seconds[feature] = self._license_seconds.get(feature, 0.0) + count * elapsed
+        self._last_account = now
+    
+    def _schedule(self):
+        """按优先级启动能装入空闲资源的任务（调用方持有锁）"""
+        now = time.monotonic()
+        self._account(now)
+        self._queue.sort(key=lambda job: (-job.priority, job.job_id))
+        
+        reservation: Optional[Tuple[float, Dict[str, int]]] = None
+        for job in list(self._queue):
+            if reservation is None:
+                if self._fits_now(job) and self._start(job, now):
+                    continue
+                if not self.backfill:
+                    break
+                # 队首任务资源不足：预留其最早可启动时刻，之后的任务只能 backfill
+                reservation = self._reservation(job)
+                continue
+            
+            shadow_time, extra = reservation
+            if not self._fits_now(job):
+                continue
+            # 预留时刻未知（运行中任务没有运行时间估计）时只能使用队首任务启动后仍空闲的资源
+            ends_before = (
+                job.estimated_runtime is not None
+                and shadow_time != float("inf")
+                and now + job.estimated_runtime <= shadow_time
+            )
+            uses_extra = job.cores <= extra["cores"] and all(
+                count <= extra.get(feature, 0) for feature, count in job.licenses.items()
+            )
+            if (ends_before or uses_extra) and self._start(job, now, backfilled=True):
+                if not ends_before:
+                    extra["cores"] -= job.cores
+                    for feature, count in job.licenses.items():
+                        extra[feature] -= count
+        
+        self._write_state()
+    
+    def _fits_now(self, job: ScheduledJob) -> bool:
+        """空闲的核数和许可证是否足够"""
+        free_cores = self.total_cores - sum(running.cores for running in self._running)
+        available = self.license_server.available()
+        return job.cores <= free_cores and all(
+            count <= available.get(feature, 0) for feature, count in job.licenses.items()
+        )
+    
+    def _reservation(self, head: ScheduledJob) -> Tuple[float, Dict[str, int]]:
+        """
+        队首任务的预留：按运行中任务的预计结束顺序释放资源，直到足够启动队首任务
+        
+        Returns:
+            (预留时刻, 该时刻队首任务启动后仍空闲的资源 {"cores", 特性名...})；
+            预留时刻未知时为 inf，空闲资源按全部运行中任务结束后计算
+        """
+        free = {"cores": self.total_cores - sum(job.cores for job in self._running)}
+        free.update(self.license_server.available())
+        need = {"cores": head.cores, **head.licenses}
+        
+        def enough() -> bool:
+            return all(count <= free.get(key, 0) for key, count in need.items())
+        
+        shadow_time = time.monotonic()
+        for job in sorted(self._running, key=lambda running: running.expected_end):
+            if enough():
+                break
+            shadow_time = job.expected_end
+            free["cores"] += job.cores
+            for feature, count in job.licenses.items():
+                free[feature] = free.get(feature, 0) + count
+        
+        if not enough():
+            # 其他许可证用户占用的令牌何时释放未知
+            shadow_time = float("inf")
+        return shadow_time, {key: max(free[key] - need.get(key, 0), 0) for key in free}
+    
+    def _start(self, job: ScheduledJob, now: float, backfilled: bool = False) -> bool:
+        """检出许可证并在独立线程中启动任务"""
+        if not self.license_server.checkout(job.licenses):
+            return False
+        self._queue.remove(job)
+        self._running.append(job)
+        job.status = "running"
+        job.started_at = now
+        job.backfilled = backfilled
+        if backfilled:
+            self._counts["backfilled"] += 1
+        logger.info(
+            f"Starting {job.name} on {job.cores} cores"
+            + (" (backfill)" if backfilled else "")
+            + f" after {now - job.submitted_at:.1f}s in queue"
+        )
+        threading.Thread(target=self._run, args=(job,), name=f"scheduler-{job.name}", daemon=True).start()
+        return True
+    
+    def _run(self, job: ScheduledJob):
+        """运行任务并在结束后释放资源"""
+        try:
+            result = job.func(job)
+        except Exception as e:
+            logger.error(f"Job {job.name} failed: {e}")
+            with self._condition:
+                self._release(job, "failed", error=f"{type(e).__name__}: {e}")
+            job.future.set_exception(e)
+            return
+        with self._condition:
+            self._release(job, "done")
+        job.future.set_result(result)
+    
+    def _release(self, job: ScheduledJob, status: str, error: Optional[str] = None):
+        """任务结束：归还资源并调度等待中的任务（调用方持有锁）"""
+        self._account(time.monotonic())
+        self._running.remove(job)
+        self.license_server.checkin(job.licenses)
+        job.error = error
+        self._finish(job, status)
+        self._schedule()
+    
+    def _finish(self, job: ScheduledJob, status: str):
+        """记录任务的最终状态（调用方持有锁）"""
+        job.status = status
+        job.finished_at = time.monotonic()
+        self._counts[status] += 1
+        self._condition.notify_all()
+    
+    def _write_state(self):
+        """写入状态快照（原子替换，读取方不会看到写了一半的文件）"""
+        if not self.state_file:
+            return
+        snapshot = {
+            "updated_at": time.time(),
+            "stats": self._stats_locked(),
+            "jobs": [job.to_dict() for job in self._jobs.values()]
+        }
+        path = Path(self.state_file)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_name(path.name + ".tmp")
+            temp.write_text(json.dumps(snapshot, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"Failed to write scheduler state {path}: {e}")
+
+
+def read_state(state_file: str) -> Dict[str, Any]:
+    """
+    读取调度器状态快照
+    
+    Args:
+        state_file: JobScheduler 写出的状态文件
+    
+    Returns:
+        {"updated_at", "stats", "jobs"}
+    
+    Raises:
+        ValidationError: 文件不存在或格式错误时抛出
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValidationError(f"Cannot read scheduler state: {e}", field="state_file")
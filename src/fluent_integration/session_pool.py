@@ -0,0 +1,423 @@
+"""
+Fluent Session Pool - 预热的 Fluent 求解器会话池
+
+每次 launch_fluent 需要 30-90 秒。会话池预先启动 N 个求解器会话，
+短任务通过租借 (lease) 获得已就绪的会话，用完归还后继续复用。启用 CPU 绑定时
+每个会话分配互不重叠的物理核（优先单个 NUMA 节点）。
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from loguru import logger
+
+from .exceptions import FluentSessionError
+from .fluent_wrapper import FluentWrapper
+from .placement import CorePlacement, Placement
+
+
+class PooledSession:
+    """池中的单个会话"""
+    
+    def __init__(self, wrapper: FluentWrapper, options: Dict[str, Any]):
+        self.wrapper = wrapper
+        self.options = options
+        self.uses = 0
+        self.leased = False
+        self.baseline_memory_mb: Optional[float] = None
+        self.placement: Optional[Placement] = None
+        self.created_at = time.time()
+    
+    def matches(self, requirements: Dict[str, Any]) -> bool:
+        """判断会话是否满足启动参数要求"""
+        return all(self.options.get(key) == value for key, value in requirements.items())
+
+
+class FluentSessionPool:
+    """预热的 Fluent 会话池，提供租借/归还 API"""
+    
+    DEFAULT_OPTIONS = {
+        "dimension": "3d",
+        "precision": "dp",
+        "processor_count": 1
+    }
+    
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        session_options: Optional[List[Dict[str, Any]]] = None,
+        config_path: str = "config/fluent_config.json",
+        max_uses: Optional[int] = None,
+        max_memory_growth_mb: Optional[float] = None,
+        wrapper_factory: Optional[Callable[[], FluentWrapper]] = None,
+        memory_probe: Optional[Callable[[FluentWrapper], Optional[float]]] = None,
+        placement: Optional[CorePlacement] = None
+    ):
+        """
+        初始化会话池（不会立即启动会话，调用 warm() 预热）
+        
+        Args:
+            size: 会话数上限
+            session_options: 每个预热会话的启动参数（dimension, precision, processor_count），
+                数量不足 size 时其余会话使用默认参数
+            config_path: Fluent 配置文件路径（读取 session_pool 段）
+            max_uses: 会话被租借多少次后回收重启
+            max_memory_growth_mb: 会话内存相对启动时增长超过该值（MB）后回收重启
+            wrapper_factory: 创建 FluentWrapper 的工厂函数
+            memory_probe: 返回会话求解器进程内存（MB）的函数，None 表示使用默认探测
+            placement: 为每个会话分配互不重叠的核，None 时按配置 pin_cpus 决定是否从 /sys 读取拓扑
+        """
+        pool_config = self._load_config(config_path).get("session_pool", {})
+        
+        self.size = size or pool_config.get("size", 2)
+        self.max_uses = max_uses or pool_config.get("max_uses", 50)
+        self.max_memory_growth_mb = max_memory_growth_mb or pool_config.get("max_memory_growth_mb")
+        self.session_options = session_options or pool_config.get("sessions", [])
+        self.wrapper_factory = wrapper_factory or (lambda: FluentWrapper(config_path))
+        self.memory_probe = memory_probe or default_memory_probe
+        if placement is None and pool_config.get("pin_cpus", False):
+            placement = CorePlacement(use_smt=pool_config.get("use_smt", False))
+        self.placement = placement
+        
+        self._sessions: List[PooledSession] = []
+        self._launching = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {"leases": 0, "launches": 0, "recycled": 0, "unhealthy": 0, "wait_time": 0.0}
+        
+        logger.info(f"FluentSessionPool initialized (size={self.size}, max_uses={self.max_uses})")
+    
+    def _load_config(self, config_path: str) -> Dict:
+        """加载配置文件"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Config file {config_path} not found, using defaults")
+            return {}
+    
+    def warm(self, wait: bool = True) -> int:
+        """
+        预热会话池，启动会话直到达到 size
+        
+        Args:
+            wait: 是否等待全部会话启动完成
+        
+        Returns:
+            本次启动的会话数
+        """
+        with self._condition:
+            missing = self.size - len(self._sessions) - self._launching
+            existing = len(self._sessions) + self._launching
+            self._launching += max(missing, 0)
+        
+        threads = []
+        for index in range(existing, existing + max(missing, 0)):
+            options = self._options_for_slot(index)
+            thread = threading.Thread(target=self._launch_into_pool, args=(options,), daemon=True)
+            thread.start()
+            threads.append(thread)
+        
+        if wait:
+            for thread in threads:
+                thread.join()
+        
+        logger.info(f"Warming {len(threads)} Fluent session(s)")
+        return len(threads)
+    
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None, **requirements) -> Iterator[FluentWrapper]:
+        """
+        租借一个已就绪的会话（上下文管理器，退出时自动归还）
+        
+        Args:
+            timeout: 等待可用会话的超时时间（秒），None 表示一直等待
+            **requirements: 会话要求，如 dimension="2d", processor_count=4
+        
+        Yields:
+            已启动的 FluentWrapper
+        
+        Raises:
+            FluentSessionError: 超时或会话池已关闭时抛出
+        """
+        pooled = self.acquire(timeout=timeout, **requirements)
+        try:
+            yield pooled.wrapper
+        finally:
+            self.release(pooled)
+    
+    def acquire(self, timeout: Optional[float] = None, **requirements) -> PooledSession:
+        """
+        获取会话（需配对调用 release）
+        
+        Args:
+            timeout: 等待超时时间（秒）
+            **requirements: 会话要求
+        
+        Returns:
+            池中的会话
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        started = time.monotonic()
+        
+        while True:
+            launch_options = None
+            with self._condition:
+                if self._closed:
+                    raise FluentSessionError("Session pool is closed")
+                
+                pooled = self._find_idle(requirements)
+                if pooled is None and len(self._sessions) + self._launching < self.size:
+                    # 没有匹配的空闲会话但池未满：按需启动一个
+                    self._launching += 1
+                    launch_options = {**self.DEFAULT_OPTIONS, **requirements}
+                elif pooled is None:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        error = FluentSessionError(
+                            "Timed out waiting for a Fluent session",
+                            details={"timeout": timeout, "requirements": requirements}
+                        )
+                        logger.error(str(error))
+                        raise error
+                    if not self._evict_idle_mismatch(requirements):
+                        self._condition.wait(remaining)
+                    continue
+                else:
+                    pooled.leased = True
+            
+            if launch_options is not None:
+                self._launch_into_pool(launch_options)
+                continue
+            
+            if not self.health_check(pooled):
+                with self._condition:
+                    self._stats["unhealthy"] += 1
+                logger.warning("Pooled Fluent session failed health check, recycling")
+                self._recycle(pooled, relaunch=True)
+                continue
+            
+            with self._condition:
+                self._stats["leases"] += 1
+                self._stats["wait_time"] += time.monotonic() - started
+            return pooled
+    
+    def release(self, pooled: PooledSession):
+        """
+        归还会话；达到使用次数上限或内存增长过多时回收重启
+        
+        Args:
+            pooled: acquire() 返回的会话
+        """
+        pooled.uses += 1
+        reason = None
+        
+        if pooled.uses >= self.max_uses:
+            reason = f"reached {pooled.uses} uses"
+        elif self.max_memory_growth_mb and pooled.baseline_memory_mb is not None:
+            memory = self.memory_probe(pooled.wrapper)
+            if memory is not None and memory - pooled.baseline_memory_mb > self.max_memory_growth_mb:
+                reason = f"memory grew {memory - pooled.baseline_memory_mb:.0f} MB"
+        
+        if reason:
+            logger.info(f"Recycling pooled Fluent session: {reason}")
+            with self._condition:
+                self._stats["recycled"] += 1
+            threading.Thread(target=self._recycle, args=(pooled, True), daemon=True).start()
+            return
+        
+        with self._condition:
+            pooled.leased = False
+            self._condition.notify_all()
+    
+    def health_check(self, pooled: PooledSession) -> bool:
+        """
+        检查会话是否仍可用
+        
+        Args:
+            pooled: 池中的会话
+        
+        Returns:
+            会话是否健康
+        """
+        session = pooled.wrapper.session
+        if session is None:
+            return False
+        
+        health = getattr(session, "health_check", None)
+        if health is None:
+            return True
+        
+        try:
+            is_serving = getattr(health, "is_serving", None)
+            if callable(is_serving):
+                return bool(is_serving())
+            if is_serving is not None:
+                return bool(is_serving)
+            return health.check_health() == "SERVING"
+        except Exception as e:
+            logger.warning(f"Health check failed: {e}")
+            return False
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取会话池统计
+        
+        Returns:
+            会话数、空闲数、租借次数、回收次数等
+        """
+        with self._condition:
+            return {
+                **self._stats,
+                "size": self.size,
+                "sessions": len(self._sessions),
+                "idle": sum(1 for pooled in self._sessions if not pooled.leased),
+                "launching": self._launching,
+                "placements": [
+                    {**pooled.options, **pooled.placement.to_dict()}
+                    for pooled in self._sessions if pooled.placement is not None
+                ]
+            }
+    
+    def close(self):
+        """关闭会话池并停止所有会话"""
+        with self._condition:
+            self._closed = True
+            sessions = list(self._sessions)
+            self._sessions.clear()
+            self._condition.notify_all()
+        
+        for pooled in sessions:
+            self._stop_session(pooled)
+        logger.info(f"FluentSessionPool closed ({len(sessions)} sessions stopped)")
+    
+    def __enter__(self) -> "FluentSessionPool":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _options_for_slot(self, index: int) -> Dict[str, Any]:
+        """获取第 index 个预热会话的启动参数"""
+        options = self.session_options[index] if index < len(self.session_options) else {}
+        return {**self.DEFAULT_OPTIONS, **options}
+    
+    def _find_idle(self, requirements: Dict[str, Any]) -> Optional[PooledSession]:
+        """查找满足要求的空闲会话（优先使用次数少的）"""
+        candidates = [
+            pooled for pooled in self._sessions
+            if not pooled.leased and pooled.matches(requirements)
+        ]
+        return min(candidates, key=lambda pooled: pooled.uses) if candidates else None
+    
+    def _evict_idle_mismatch(self, requirements: Dict[str, Any]) -> bool:
+        """池已满且没有匹配会话时，停止一个不匹配的空闲会话腾出位置"""
+        for pooled in self._sessions:
+            if not pooled.leased and not pooled.matches(requirements):
+                pooled.leased = True
+                self._sessions.remove(pooled)
+                threading.Thread(target=self._stop_session, args=(pooled,), daemon=True).start()
+                logger.info(f"Evicted idle session {pooled.options} for {requirements}")
+                return True
+        return False
+    
+    def _launch_into_pool(self, options: Dict[str, Any]):
+        """启动一个会话并加入池（调用前已计入 _launching）"""
+        placement = self.placement.allocate(options["processor_count"]) if self.placement else None
+        try:
+            wrapper = self.wrapper_factory()
+            pinning = {"cpu_set": placement.cpus} if placement else {}
+            wrapper.start_fluent(
+                dimension=options["dimension"],
+                precision=options["precision"],
+                processor_count=options["processor_count"],
+                show_gui=False,
+                **pinning
+            )
+            pooled = PooledSession(wrapper, options)
+            pooled.placement = placement
+            pooled.baseline_memory_mb = self.memory_probe(wrapper)
+        except Exception as e:
+            if self.placement:
+                self.placement.release(placement)
+            logger.error(f"Failed to launch pooled Fluent session: {e}")
+            with self._condition:
+                self._launching -= 1
+                self._condition.notify_all()
+            raise
+        
+        with self._condition:
+            self._launching -= 1
+            closed = self._closed
+            if not closed:
+                self._sessions.append(pooled)
+                self._stats["launches"] += 1
+            self._condition.notify_all()
+        
+        if closed:
+            # 启动期间池已关闭：在锁外停止会话，不阻塞其他线程
+            self._stop_session(pooled)
+    
+    def _stop_session(self, pooled: PooledSession):
+        """停止会话并归还其占用的核"""
+        pooled.wrapper.stop_fluent()
+        if self.placement:
+            self.placement.release(pooled.placement)
+            pooled.placement = None
+    
+    def _recycle(self, pooled: PooledSession, relaunch: bool = True):
+        """停止会话，并可选地以相同参数重新启动"""
+        with self._condition:
+            if pooled in self._sessions:
+                self._sessions.remove(pooled)
+            if relaunch and not self._closed:
+                self._launching += 1
+            else:
+                relaunch = False
+        
+        self._stop_session(pooled)
+        if relaunch:
+            try:
+                self._launch_into_pool(pooled.options)
+            except Exception:
+                # 启动失败已记录日志，等待下次 acquire 按需启动
+                pass
+
+
+def default_memory_probe(wrapper: FluentWrapper) -> Optional[float]:
+    """
+    探测求解器进程的常驻内存（MB）
+    
+    需要 psutil 并且能从 PyFluent 连接中获取 Fluent 进程 PID，否则返回 None。
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+    
+    session = wrapper.session
+    pid = None
+    for path in (
+        ("fluent_connection", "connection_properties", "fluent_host_pid"),
+        ("_fluent_connection", "connection_properties", "fluent_host_pid")
+    ):
+        value = session
+        for attr in path:
+            value = getattr(value, attr, None)
+            if value is None:
+                break
+        if isinstance(value, int):
+            pid = value
+            break
+    
+    if pid is None:
+        return None
+    
+    try:
+        process = psutil.Process(pid)
+        processes = [process] + process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except psutil.Error:
+        return None
@@ -0,0 +1,130 @@
+"""
+Solution Data Cache - 按求解状态版本缓存求解数据
+
+缓存键为 (变量, zone, 节点/单元值, 状态版本)。FluentWrapper 在求解器推进
+或设置变更时递增状态版本，旧版本的数据自动失效；总内存超过上限时按 LRU 淘汰。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .exceptions import ValidationError
+
+
+CacheKey = Tuple[str, str, bool, int]
+
+
+class SolutionDataCache:
+    """求解数据 LRU 缓存（带内存上限）"""
+    
+    def __init__(self, max_memory_mb: float = 256.0):
+        """
+        初始化缓存
+        
+        Args:
+            max_memory_mb: 缓存数组总大小上限（MB），0 表示禁用缓存
+        """
+        if max_memory_mb < 0:
+            raise ValidationError("max_memory_mb must not be negative", field="max_memory_mb")
+        
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.max_bytes > 0
+    
+    def get(self, key: CacheKey) -> Optional[np.ndarray]:
+        """
+        查询缓存
+        
+        Args:
+            key: (变量, zone, 节点值, 状态版本)
+        
+        Returns:
+            缓存的数组（只读），未命中返回 None
+        """
+        with self._lock:
+            array = self._entries.get(key)
+            if array is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return array
+    
+    def put(self, key: CacheKey, array: np.ndarray) -> np.ndarray:
+        """
+        写入缓存（缓存只读视图，避免调用方修改缓存内容）
+        
+        Args:
+            key: (变量, zone, 节点值, 状态版本)
+            array: 数据数组
+        
+        Returns:
+            缓存中的只读视图；未缓存时返回原数组
+        """
+        if not self.enabled or array.nbytes > self.max_bytes:
+            return array
+        
+        array = array.view()
+        array.flags.writeable = False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = array
+            self._bytes += array.nbytes
+            
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+        return array
+    
+    def invalidate(self, reason: str = ""):
+        """
+        清空缓存（求解状态变化时调用）
+        
+        Args:
+            reason: 失效原因（用于日志）
+        """
+        with self._lock:
+            if not self._entries:
+                return
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self._invalidations += 1
+        logger.debug(f"Solution cache invalidated ({count} entries): {reason}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+        
+        Returns:
+            命中/未命中次数、命中率、条目数、内存占用等
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
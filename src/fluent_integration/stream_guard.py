@@ -0,0 +1,266 @@
+"""
+Stream Guard - 流式生成的增量校验器
+
+在 token 流上运行轻量检查，一旦输出明显异常（语言不符、大段散文、
+重复循环、括号深度失控）立即给出中止原因，避免为无效输出支付完整的
+max_tokens 费用。
+"""
+
+import re
+from typing import Dict, List, Optional
+
+
+class StreamGuard:
+    """流式输出增量校验器"""
+    
+    # 各语言的块结构括号
+    BRACKETS = {
+        "c": ("{", "}"),
+        "scheme": ("(", ")")
+    }
+    
+    # 注释/预处理行前缀（不参与散文判断）
+    _COMMENT_PREFIXES = ("//", "/*", "*", "#", ";")
+    _CODE_CHARS_RE = re.compile(r"[;{}()\[\]=<>#:]")
+    _STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"')
+    # 字符字面量：C 的 '}'、'\''，Scheme 的 #\)
+    _C_CHAR_RE = re.compile(r"'(?:\\.|[^'\\])'")
+    _SCHEME_CHAR_RE = re.compile(r"#\\.")
+    
+    def __init__(
+        self,
+        language: str,
+        syntax_hints: Optional[Dict[str, List[str]]] = None,
+        sniff_after: int = 200,
+        max_line_repeats: int = 8,
+        max_block_repeats: int = 3,
+        max_depth: int = 16,
+        prose_ratio: float = 0.6,
+        min_prose_lines: int = 6
+    ):
+        """
+        初始化校验器
+        
+        Args:
+            language: 期望的语言 (c, python, scheme)
+            syntax_hints: 语言 -> 语法特征列表（来自 copilot_config.json 的 syntax_hints）
+            sniff_after: 输出累计多少字符后开始语言嗅探
+            max_line_repeats: 同一非平凡行允许出现的最大次数
+            max_block_repeats: 连续重复的行块达到该次数即中止
+            max_depth: 允许的最大括号嵌套深度（括号是否配对在流结束时判断）
+            prose_ratio: 散文行占比阈值
+            min_prose_lines: 散文判断所需的最少行数
+        """
+        self.language = language
+        self.syntax_hints = syntax_hints or {}
+        self.sniff_after = sniff_after
+        self.max_line_repeats = max_line_repeats
+        self.max_block_repeats = max_block_repeats
+        self.max_depth = max_depth
+        self.prose_ratio = prose_ratio
+        self.min_prose_lines = min_prose_lines
+        
+        self.text = ""
+        self.abort_reason: Optional[str] = None
+        self._pending = ""
+        self._lines: List[str] = []
+        self._line_counts: Dict[str, int] = {}
+        self._depth = 0
+        self._min_depth = 0
+        self._in_block_comment = False
+        self._in_depth_comment = False
+        self._in_docstring = False
+        self._prose_lines = 0
+        self._code_lines = 0
+        self._language_checked = False
+    
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        输入一段流式输出
+        
+        Args:
+            chunk: 新到达的文本
+        
+        Returns:
+            中止原因；输出正常时返回 None
+        """
+        if self.abort_reason or not chunk:
+            return self.abort_reason
+        
+        self.text += chunk
+        self._pending += chunk
+        
+        # 只检查完整的行，未完成的行留到下次
+        *complete, self._pending = self._pending.split("\n")
+        for line in complete:
+            reason = self._check_line(line)
+            if reason:
+                self.abort_reason = reason
+                return reason
+        
+        if not self._language_checked and len(self.text) >= self.sniff_after:
+            self._language_checked = True
+            self.abort_reason = self._check_language()
+        
+        return self.abort_reason
+    
+    def finish(self) -> Optional[str]:
+        """
+        流结束时检查剩余内容
+        
+        Returns:
+            中止原因；输出正常时返回 None
+        """
+        if not self.abort_reason and self._pending:
+            self.abort_reason = self._check_line(self._pending)
+            self._pending = ""
+        if not self.abort_reason:
+            self.abort_reason = self._check_balance()
+        return self.abort_reason
+    
+    def _check_line(self, line: str) -> Optional[str]:
+        """对一行完整输出执行全部检查"""
+        stripped = line.strip()
+        if not stripped or stripped.startswith("```"):
+            return None
+        
+        self._lines.append(stripped)
+        return (
+            self._check_repetition(stripped)
+            or self._check_prose(stripped)
+            or self._check_depth(stripped)
+        )
+    
+    def _check_repetition(self, stripped: str) -> Optional[str]:
+        """检查重复行和重复行块"""
+        if len(stripped) >= 8 and stripped not in ("{", "}", "});", "end_f_loop", "end_c_loop"):
+            count = self._line_counts.get(stripped, 0) + 1
+            self._line_counts[stripped] = count
+            if count > self.max_line_repeats:
+                return f"line repeated {count} times: {stripped[:60]}"
+        
+        lines = self._lines
+        for size in range(1, 9):
+            span = size * self.max_block_repeats
+            if len(lines) < span:
+                break
+            block = lines[-size:]
+            if sum(len(line) for line in block) < 20:
+                continue
+            if all(lines[-(k + 1) * size:len(lines) - k * size] == block for k in range(1, self.max_block_repeats)):
+                return f"block of {size} line(s) repeated {self.max_block_repeats} times"
+        return None
+    
+    def _check_prose(self, stripped: str) -> Optional[str]:
+        """检查输出是否为大段自然语言而非代码"""
+        if self.language == "python" and (self._in_docstring or '"""' in stripped or "'''" in stripped):
+            # 文档字符串中的自然语言是合法的
+            if (stripped.count('"""') + stripped.count("'''")) % 2 == 1:
+                self._in_docstring = not self._in_docstring
+            return None
+        
+        if stripped.startswith(self._COMMENT_PREFIXES) or self._in_block_comment:
+            self._update_block_comment(stripped)
+            return None
+        
+        words = stripped.split()
+        is_prose = (
+            len(words) >= 6
+            and not self._CODE_CHARS_RE.search(stripped)
+        ) or (len(words) >= 4 and stripped.endswith((".", "!", "?")) and not stripped.endswith((";", "...")))
+        
+        if is_prose:
+            self._prose_lines += 1
+        else:
+            self._code_lines += 1
+        
+        total = self._prose_lines + self._code_lines
+        if total >= self.min_prose_lines and self._prose_lines / total > self.prose_ratio:
+            return f"output looks like prose ({self._prose_lines}/{total} lines)"
+        return None
+    
+    def _check_depth(self, stripped: str) -> Optional[str]:
+        """检查括号嵌套深度是否合理（不计注释、字符串和字符字面量中的括号）"""
+        brackets = self.BRACKETS.get(self.language)
+        if not brackets:
+            return None
+        
+        if self.language == "c":
+            code = self._STRING_RE.sub('""', self._C_CHAR_RE.sub("''", stripped))
+            code = self._strip_c_comments(code)
+        else:
+            code = self._STRING_RE.sub('""', self._SCHEME_CHAR_RE.sub("", stripped))
+            code = code.split(";", 1)[0]
+        
+        opening, closing = brackets
+        for char in code:
+            if char == opening:
+                self._depth += 1
+                if self._depth > self.max_depth:
+                    return f"nesting depth exceeds {self.max_depth}"
+            elif char == closing:
+                self._depth -= 1
+                self._min_depth = min(self._min_depth, self._depth)
+        return None
+    
+    def _check_balance(self) -> Optional[str]:
+        """流结束时检查括号是否配对"""
+        brackets = self.BRACKETS.get(self.language)
+        if not brackets:
+            return None
+        
+        opening, closing = brackets
+        if self._min_depth < 0:
+            return f"unbalanced '{closing}'"
+        if self._depth > 0:
+            return f"unbalanced '{opening}'"
+        return None
+    
+    def _strip_c_comments(self, code: str) -> str:
+        """去掉一行中的 C 注释（块注释可跨行）"""
+        kept = ""
+        while code:
+            if self._in_depth_comment:
+                end = code.find("*/")
+                if end < 0:
+                    return kept
+                code = code[end + 2:]
+                self._in_depth_comment = False
+                continue
+            
+            block = code.find("/*")
+            line = code.find("//")
+            if line >= 0 and (block < 0 or line < block):
+                return kept + code[:line]
+            if block < 0:
+                return kept + code
+            kept += code[:block]
+            code = code[block + 2:]
+            self._in_depth_comment = True
+        return kept
+    
+    def _check_language(self) -> Optional[str]:
+        """语言嗅探：期望语言的特征缺失且出现了其他语言的特征"""
+        expected = self.syntax_hints.get(self.language)
+        if not expected:
+            return None
+        if any(hint in self.text for hint in expected):
+            return None
+        
+        for other, hints in self.syntax_hints.items():
+            if other == self.language:
+                continue
+            if any(self._hint_present(hint) for hint in hints):
+                return f"expected {self.language} but output looks like {other}"
+        return None
+    
+    def _hint_present(self, hint: str) -> bool:
+        """判断语法特征是否出现在行首（避免匹配注释或字符串中的单词）"""
+        return any(line.startswith(hint) for line in self._lines)
+    
+    def _update_block_comment(self, stripped: str):
+        """跟踪 C 块注释状态"""
+        if "/*" in stripped and "*/" not in stripped.split("/*", 1)[1]:
+            self._in_block_comment = True
+        elif "*/" in stripped:
+            self._in_block_comment = False
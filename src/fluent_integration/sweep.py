@@ -0,0 +1,685 @@
+"""
+Parametric Sweep - 多求解器会话并行的参数扫描
+
+参数表中的每个设计点在工作进程中求解：每个工作进程持有一个 Fluent 会话
+（会话数即许可证数，吞吐量随之线性扩展），读入基准案例后以批处理命令一次应用
+设置（期望状态形式的设置只发送与上一个点不同的值），迭代后计算报告定义。进度逐点写入 SQLite，中断后重新运行只计算未完成的点；
+结果以列式表格返回，可导出为 CSV 或 Parquet。启用热启动时，已收敛点的数据文件
+登记到 WarmStartRegistry，新的点从参数最接近的已收敛点初始化。
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import util as multiprocessing_util
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from loguru import logger
+
+from .convergence import ConvergenceCriterion
+from .exceptions import FluentIntegrationError, FluentSolveError, ValidationError
+from .fluent_wrapper import FluentWrapper
+from .warm_start import WarmStartRegistry, initialize_from_nearest
+
+
+ParameterTable = Union[Sequence[Dict[str, Any]], Dict[str, Sequence[Any]]]
+
+# 期望状态模板中整个取值为 "{参数名}" 时代入参数的原始值（保留数值类型）
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweep (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS points (
+    point_id INTEGER PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    outputs TEXT,
+    error TEXT,
+    elapsed REAL,
+    finished_at REAL,
+    iterations INTEGER,
+    warm_start TEXT
+);
+"""
+
+# 工作进程（或线程）持有的会话
+_worker = threading.local()
+
+
+class SweepStore:
+    """扫描进度和结果的 SQLite 存储"""
+    
+    def __init__(self, db_path: str):
+        """
+        打开存储
+        
+        Args:
+            db_path: SQLite 数据库路径
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+    
+    def initialize(self, signature: str, points: List[Dict[str, Any]], reset: bool = False) -> int:
+        """
+        写入设计点；数据库中已有同一扫描时保留其进度
+        
+        Args:
+            signature: 扫描定义的哈希
+            points: 设计点参数
+            reset: 是否丢弃已有进度
+        
+        Returns:
+            已完成的设计点数
+        
+        Raises:
+            ValidationError: 数据库属于另一个扫描且未指定 reset 时抛出
+        """
+        row = self._conn.execute("SELECT value FROM sweep WHERE key = 'signature'").fetchone()
+        if row is not None and row[0] != signature and not reset:
+            raise ValidationError(
+                "Sweep database belongs to a different sweep definition",
+                field="db_path",
+                details={"db_path": self.db_path, "fix": "use another db_path or reset=True"}
+            )
+        
+        with self._conn:
+            if reset or row is None or row[0] != signature:
+                self._conn.execute("DELETE FROM points")
+                self._conn.execute("INSERT OR REPLACE INTO sweep VALUES ('signature', ?)", (signature,))
+                self._conn.executemany(
+                    "INSERT INTO points (point_id, params) VALUES (?, ?)",
+                    [(index, json.dumps(params, sort_keys=True)) for index, params in enumerate(points)]
+                )
+            # 上次中断时正在运行的点重新排队
+            self._conn.execute("UPDATE points SET status = 'pending' WHERE status = 'running'")
+        
+        return self.count("done")
+    
+    def pending(self, max_attempts: int) -> List[Dict[str, Any]]:
+        """
+        待计算的设计点（未计算，或失败次数未达上限）
+        
+        Args:
+            max_attempts: 每个点的最大尝试次数
+        
+        Returns:
+            [{"point_id", "params"}]
+        """
+        rows = self._conn.execute(
+            "SELECT point_id, params FROM points "
+            "WHERE status = 'pending' OR (status = 'failed' AND attempts < ?) ORDER BY point_id",
+            (max_attempts,)
+        ).fetchall()
+        return [{"point_id": point_id, "params": json.loads(params)} for point_id, params in rows]
+    
+    def mark_running(self, point_id: int):
+        """标记设计点开始计算"""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE points SET status = 'running', attempts = attempts + 1 WHERE point_id = ?", (point_id,)
+            )
+    
+    def record(
+        self,
+        point_id: int,
+        outputs: Optional[Dict[str, float]],
+        elapsed: float,
+        error: Optional[str] = None,
+        iterations: Optional[int] = None,
+        warm_start: Optional[str] = None
+    ):
+        """
+        记录设计点结果（每个点单独提交，即为检查点）
+        
+        Args:
+            point_id: 设计点序号
+            outputs: 输出量，失败时为 None
+            elapsed: 计算耗时（秒）
+            error: 错误信息
+            iterations: 实际迭代步数
+            warm_start: 作为初值的数据文件，None 表示常规初始化
+        """
+        with self._conn:
+            self._conn.execute(
+                "UPDATE points SET status = ?, outputs = ?, error = ?, elapsed = ?, finished_at = ?, "
+                "iterations = ?, warm_start = ? WHERE point_id = ?",
+                (
+                    "failed" if error else "done",
+                    json.dumps(outputs) if outputs is not None else None,
+                    error,
+                    elapsed,
+                    time.time(),
+                    iterations,
+                    warm_start,
+                    point_id
+                )
+            )
+    
+    def count(self, status: Optional[str] = None) -> int:
+        """按状态统计设计点数"""
+        if status is None:
+            return self._conn.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM points WHERE status = ?", (status,)).fetchone()[0]
+    
+    def table(self) -> Dict[str, np.ndarray]:
+        """
+        列式结果表
+        
+        Returns:
+            {列名: 数组}，包含 point_id、status、error、elapsed、attempts、iterations、warm_start、
+            各参数列和各输出列
+        """
+        rows = self._conn.execute(
+            "SELECT point_id, params, status, outputs, error, elapsed, attempts, iterations, warm_start "
+            "FROM points ORDER BY point_id"
+        ).fetchall()
+        params = [json.loads(row[1]) for row in rows]
+        outputs = [json.loads(row[3]) if row[3] else {} for row in rows]
+        
+        columns: Dict[str, List[Any]] = {
+            "point_id": [row[0] for row in rows],
+            "status": [row[2] for row in rows],
+            "error": [row[4] for row in rows],
+            "elapsed": [row[5] for row in rows],
+            "attempts": [row[6] for row in rows],
+            "iterations": [row[7] for row in rows],
+            "warm_start": [row[8] for row in rows]
+        }
+        for name in _ordered_keys(params):
+            columns[name] = [item.get(name) for item in params]
+        for name in _ordered_keys(outputs):
+            columns[name] = [item.get(name) for item in outputs]
+        return {name: _column_array(values) for name, values in columns.items()}
+    
+    def close(self):
+        """关闭数据库"""
+        self._conn.close()
+
+
+class SweepEngine:
+    """并行参数扫描引擎"""
+    
+    def __init__(
+        self,
+        parameters: ParameterTable,
+        settings: Sequence[Union[str, Dict[str, Any]]],
+        outputs: Sequence[str] = (),
+        case_file: Optional[str] = None,
+        iterations: int = 100,
+        criteria: Optional[Sequence[ConvergenceCriterion]] = None,
+        initialize: Optional[str] = "hybrid",
+        warm_start: Optional[bool] = None,
+        warm_start_dir: Optional[str] = None,
+        warm_start_max_distance: Optional[float] = None,
+        workers: Optional[int] = None,
+        executor: Optional[str] = None,
+        db_path: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        launch_options: Optional[Dict[str, Any]] = None,
+        config_path: str = "config/fluent_config.json",
+        wrapper_factory: Optional[Callable[[], FluentWrapper]] = None,
+        postprocess: Optional[Callable[[FluentWrapper, Dict[str, Any]], Dict[str, float]]] = None
+    ):
+        """
+        初始化扫描
+        
+        Args:
+            parameters: 参数表（设计点字典列表，或 {参数名: 取值列表} 的列式表）
+            settings: 应用参数的 TUI 命令模板，如 "define/.../velocity-inlet inlet () vmag no {velocity} q"，
+                或 FluentWrapper.apply_settings 的期望状态模板，如
+                {"setup": {"boundary_conditions": {"velocity_inlet": {"inlet": {"momentum": {"velocity": {"value": "{velocity}"}}}}}}}
+            outputs: 每个点求解后计算的报告定义名称
+            case_file: 每个点求解前读入的基准案例，None 表示不重新读入
+            iterations: 迭代步数（指定 criteria 时为最大步数）
+            criteria: 收敛判据，满足即停止迭代
+            initialize: 每个点求解前的初始化方法 ("hybrid"/"standard")，None 表示沿用案例中的流场
+            warm_start: 是否从最近的已收敛点初始化（需要 case_file，同一网格），无邻居时退回 initialize
+            warm_start_dir: 已收敛数据文件及其注册表的目录
+            warm_start_max_distance: 参数距离（按各参数在扫描中的取值范围归一化）超过该值时不热启动
+            workers: 并行的求解器会话数（受许可证数限制）
+            executor: "process" 每个会话一个工作进程，"thread" 在本进程中用线程驱动
+            db_path: 进度数据库路径
+            max_attempts: 每个点的最大尝试次数
+            launch_options: start_fluent 参数
+            config_path: Fluent 配置文件路径（读取 sweep 段）
+            wrapper_factory: 创建 FluentWrapper 的工厂函数（process 模式下须可 pickle）
+            postprocess: 自定义后处理 (wrapper, 参数) -> 输出量，结果与报告定义合并
+        """
+        sweep_config = self._load_config(config_path).get("sweep", {})
+        
+        self.points = self.normalize_parameters(parameters)
+        self.workers = workers or sweep_config.get("workers", 2)
+        self.executor = executor or sweep_config.get("executor", "process")
+        self.max_attempts = max_attempts or sweep_config.get("max_attempts", 2)
+        self.db_path = db_path or sweep_config.get("db_path", "sweeps/sweep.sqlite")
+        self.warm_start = sweep_config.get("warm_start", False) if warm_start is None else warm_start
+        
+        if initialize not in (None, "hybrid", "standard"):
+            raise ValidationError(f"Unknown initialization method: {initialize}", field="initialize")
+        if self.warm_start and (not case_file or initialize is None):
+            raise ValidationError(
+                "Warm start requires case_file and an initialize fallback",
+                field="warm_start",
+                details={"fix": "pass case_file and initialize='hybrid' or 'standard'"}
+            )
+        
+        if self.executor not in ("process", "thread"):
+            raise ValidationError(f"Unknown sweep executor: {self.executor}", field="executor")
+        if self.workers <= 0:
+            raise ValidationError("workers must be positive", field="workers")
+        for template in settings:
+            for point in self.points[:1]:
+                try:
+                    if isinstance(template, dict):
+                        render_state(template, point)
+                    else:
+                        template.format(**point)
+                except KeyError as e:
+                    raise ValidationError(
+                        f"Setting template references unknown parameter {e}",
+                        field="settings",
+                        details={"template": template}
+                    )
+        
+        # 传给工作进程的扫描定义（须可 pickle）
+        self.spec = {
+            "settings": list(settings),
+            "outputs": list(outputs),
+            "case_file": case_file,
+            "iterations": iterations,
+            "criteria": list(criteria) if criteria else None,
+            "initialize": initialize,
+            "warm_start_dir": (warm_start_dir or sweep_config.get("warm_start_dir", "sweeps/solutions"))
+            if self.warm_start else None,
+            "warm_start_max_distance": warm_start_max_distance,
+            "warm_start_scales": _parameter_scales(self.points) if self.warm_start else None,
+            "mesh_key": WarmStartRegistry.mesh_key(case_file) if self.warm_start else None,
+            "executor": self.executor,
+            "launch_options": launch_options or {},
+            "config_path": config_path,
+            "wrapper_factory": wrapper_factory,
+            "postprocess": postprocess
+        }
+        self._stop = threading.Event()
+    
+    def _load_config(self, config_path: str) -> Dict:
+        """加载配置文件"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Config file {config_path} not found, using defaults")
+            return {}
+    
+    @staticmethod
+    def normalize_parameters(parameters: ParameterTable) -> List[Dict[str, Any]]:
+        """
+        参数表统一为设计点字典列表
+        
+        Args:
+            parameters: 设计点字典列表或列式表
+        
+        Returns:
+            设计点字典列表
+        
+        Raises:
+            ValidationError: 列长度不一致或参数表为空时抛出
+        """
+        if isinstance(parameters, dict):
+            lengths = {len(values) for values in parameters.values()}
+            if len(lengths) > 1:
+                raise ValidationError("Parameter columns have different lengths", field="parameters")
+            names = list(parameters)
+            points = [dict(zip(names, row)) for row in zip(*parameters.values())]
+        else:
+            points = [dict(point) for point in parameters]
+        
+        if not points:
+            raise ValidationError("Parameter table is empty", field="parameters")
+        return [{name: _plain(value) for name, value in point.items()} for point in points]
+    
+    @staticmethod
+    def grid(**axes: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        全因子参数表
+        
+        Args:
+            **axes: 参数名=取值列表
+        
+        Returns:
+            设计点字典列表
+        """
+        names = list(axes)
+        return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+    
+    def signature(self) -> str:
+        """扫描定义的哈希（参数表、设置、输出和求解设置相同才可续算）"""
+        definition = {
+            "points": self.points,
+            "settings": self.spec["settings"],
+            "outputs": self.spec["outputs"],
+            "case_file": self.spec["case_file"],
+            "iterations": self.spec["iterations"],
+            "initialize": self.spec["initialize"]
+        }
+        return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    
+    def run(
+        self,
+        reset: bool = False,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        运行扫描（已完成的点直接跳过）
+        
+        Args:
+            reset: 是否丢弃数据库中已有的进度
+            progress_callback: 进度回调 (已完成点数, 总点数)
+        
+        Returns:
+            列式结果表
+        """
+        store = SweepStore(self.db_path)
+        try:
+            done = store.initialize(self.signature(), self.points, reset=reset)
+            pending = store.pending(self.max_attempts)
+            total = len(self.points)
+            logger.info(
+                f"Sweep: {total} points, {done} already done, {len(pending)} to run on "
+                f"{self.workers} {self.executor} worker(s)"
+            )
+            if pending:
+                self._run_pending(store, pending, done, total, progress_callback)
+            return store.table()
+        finally:
+            store.close()
+    
+    def stop(self):
+        """请求停止：正在计算的点完成后不再提交新的点"""
+        self._stop.set()
+    
+    def _run_pending(
+        self,
+        store: SweepStore,
+        pending: List[Dict[str, Any]],
+        done: int,
+        total: int,
+        progress_callback: Optional[Callable[[int, int], None]]
+    ):
+        """分发待计算的点，按完成顺序记录结果"""
+        self._stop.clear()
+        if self.executor == "process":
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.spec,)
+            )
+        else:
+            pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="sweep-worker",
+                initializer=_init_worker,
+                initargs=(self.spec,)
+            )
+        
+        queue = list(pending)
+        running: Dict[Future, Dict[str, Any]] = {}
+        try:
+            while queue or running:
+                # 在途任务数不超过会话数，停止请求能尽快生效
+                while queue and len(running) < self.workers and not self._stop.is_set():
+                    point = queue.pop(0)
+                    store.mark_running(point["point_id"])
+                    running[pool.submit(_evaluate_point, point["point_id"], point["params"])] = point
+                if not running:
+                    break
+                
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    point = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        # 工作进程异常退出等
+                        outcome = {"outputs": None, "elapsed": 0.0, "error": f"{type(e).__name__}: {e}"}
+                    store.record(
+                        point["point_id"],
+                        outcome["outputs"],
+                        outcome["elapsed"],
+                        outcome["error"],
+                        iterations=outcome.get("iterations"),
+                        warm_start=outcome.get("warm_start")
+                    )
+                    if outcome["error"]:
+                        logger.warning(f"Sweep point {point['point_id']} failed: {outcome['error']}")
+                    else:
+                        done += 1
+                    if progress_callback is not None:
+                        progress_callback(done, total)
+        finally:
+            pool.shutdown(wait=True)
+            # 线程模式的会话在本进程中，由引擎结束；进程模式的会话随工作进程退出结束
+            for wrapper in self.spec.pop("_wrappers", []):
+                wrapper.stop_fluent()
+        
+        if self._stop.is_set():
+            logger.warning(f"Sweep stopped with {len(queue)} point(s) not started")
+        logger.info(f"Sweep finished: {store.count('done')}/{total} points done, {store.count('failed')} failed")
+
+
+def _init_worker(spec: Dict[str, Any]):
+    """工作进程/线程初始化：会话在第一个点时启动"""
+    _worker.spec = spec
+    _worker.wrapper = None
+    _worker.registry = None
+
+
+def _worker_wrapper() -> FluentWrapper:
+    """当前工作进程/线程的会话（首次调用时启动）"""
+    if _worker.wrapper is None or not _worker.wrapper.session:
+        spec = _worker.spec
+        factory = spec["wrapper_factory"] or (lambda: FluentWrapper(spec["config_path"]))
+        wrapper = factory()
+        wrapper.start_fluent(**spec["launch_options"])
+        _worker.wrapper = wrapper
+        if spec["executor"] == "process":
+            # 工作进程退出时结束会话
+            multiprocessing_util.Finalize(None, wrapper.stop_fluent, exitpriority=10)
+        else:
+            spec.setdefault("_wrappers", []).append(wrapper)
+    return _worker.wrapper
+
+
+def _worker_registry() -> Optional[WarmStartRegistry]:
+    """当前工作进程/线程的热启动注册表（未启用热启动时为 None）"""
+    spec = _worker.spec
+    if spec["warm_start_dir"] and _worker.registry is None:
+        _worker.registry = WarmStartRegistry(
+            spec["warm_start_dir"], max_distance=spec["warm_start_max_distance"], scales=spec["warm_start_scales"]
+        )
+    return _worker.registry
+
+
+def _evaluate_point(point_id: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前工作进程的会话中求解一个设计点"""
+    start = time.perf_counter()
+    spec = _worker.spec
+    neighbor = None
+    try:
+        wrapper = _worker_wrapper()
+        if spec["case_file"]:
+            wrapper.load_case(spec["case_file"])
+        
+        commands = [template.format(**params) for template in spec["settings"] if isinstance(template, str)]
+        states = [render_state(template, params) for template in spec["settings"] if isinstance(template, dict)]
+        for state in states:
+            # 会话的设置快照在点之间保留（未重新读入案例时），只发送与上一个点不同的值
+            wrapper.apply_settings(state)
+        if commands:
+            results = wrapper.execute_batch(commands, stop_on_error=True)
+            failed = [result for result in results if result["status"] != "ok"]
+            if failed:
+                raise FluentIntegrationError(
+                    f"Setting command failed: {failed[0]['command']}",
+                    error_code="SWEEP_SETTING_FAILED",
+                    details={"error": failed[0].get("error", failed[0]["status"])}
+                )
+        
+        registry = _worker_registry()
+        if registry is not None:
+            neighbor = initialize_from_nearest(wrapper, registry, spec["mesh_key"], params, spec["initialize"])
+        elif spec["initialize"]:
+            wrapper.initialize_flow_field(spec["initialize"])
+        
+        completed, converged = 0, True
+        if spec["criteria"]:
+            result = wrapper.iterate_until_converged(spec["iterations"], spec["criteria"])
+            completed, converged = result["iterations"], result["converged"]
+        elif spec["iterations"]:
+            completed = wrapper.iterate(spec["iterations"])
+            if completed < spec["iterations"]:
+                raise FluentSolveError("Iteration stopped early", iterations_completed=completed)
+        
+        # 只登记已收敛的解，未收敛的点不作为其他点的初值
+        if registry is not None and converged:
+            data_file = registry.data_path(spec["mesh_key"], params)
+            wrapper.save_data(data_file)
+            registry.register(spec["mesh_key"], params, data_file, iterations=completed)
+        
+        outputs = wrapper.compute_reports(spec["outputs"])
+        if spec["postprocess"] is not None:
+            outputs.update(spec["postprocess"](wrapper, params))
+        return {
+            "outputs": outputs,
+            "elapsed": time.perf_counter() - start,
+            "error": None,
+            "iterations": completed,
+            "warm_start": neighbor["data_file"] if neighbor else None
+        }
+    except Exception as e:
+        logger.error(f"Sweep point {point_id} failed: {e}")
+        return {
+            "outputs": None,
+            "elapsed": time.perf_counter() - start,
+            "error": str(e),
+            "warm_start": neighbor["data_file"] if neighbor else None
+        }
+
+
+def render_state(template: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    代入参数得到期望状态：取值为 "{参数名}" 时代入原始值，其他字符串按 str.format 代入
+    
+    Args:
+        template: 期望状态模板
+        params: 设计点参数
+    
+    Returns:
+        期望状态
+    
+    Raises:
+        KeyError: 模板引用了未知参数时抛出
+    """
+    state: Dict[str, Any] = {}
+    for key, value in template.items():
+        if isinstance(value, dict):
+            state[key] = render_state(value, params)
+        elif isinstance(value, str):
+            match = _PLACEHOLDER.fullmatch(value)
+            state[key] = params[match.group(1)] if match else value.format(**params)
+        else:
+            state[key] = value
+    return state
+
+
+def export_table(table: Dict[str, np.ndarray], path: str) -> str:
+    """
+    导出列式结果表
+    
+    Args:
+        table: SweepEngine.run 返回的结果表
+        path: 输出路径（.csv 或 .parquet）
+    
+    Returns:
+        输出路径
+    
+    Raises:
+        ValidationError: 不支持的格式
+        FluentIntegrationError: 导出 Parquet 需要的 pyarrow 未安装
+    """
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    
+    if output.suffix == ".csv":
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(table))
+            writer.writerows(zip(*(column.tolist() for column in table.values())))
+    elif output.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            error = FluentIntegrationError(
+                "pyarrow is required to export Parquet files",
+                error_code="DEPENDENCY_MISSING",
+                details={"fix": "pip install pyarrow"}
+            )
+            logger.error(str(error))
+            raise error
+        pq.write_table(pa.table({name: column.tolist() for name, column in table.items()}), str(output))
+    else:
+        raise ValidationError(f"Unsupported export format: {output.suffix}", field="path")
+    
+    logger.info(f"Sweep results exported: {output}")
+    return str(output)
+
+
+def _ordered_keys(items: List[Dict[str, Any]]) -> List[str]:
+    """按首次出现顺序收集字典的键"""
+    keys: Dict[str, None] = {}
+    for item in items:
+        for key in item:
+            keys.setdefault(key)
+    return list(keys)
+
+
+def _parameter_scales(points: List[Dict[str, Any]]) -> Dict[str, float]:
+    """数值参数在整个扫描中的取值范围（热启动距离的归一化尺度）"""
+    scales: Dict[str, float] = {}
+    for name in _ordered_keys(points):
+        values = [
+            value for value in (point.get(name) for point in points)
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        if values:
+            scales[name] = float(max(values) - min(values)) or 1.0
+    return scales
+
+
+def _column_array(values: List[Any]) -> np.ndarray:
+    """数值列转换为 float 数组（缺失值为 NaN），其他列为 object 数组"""
+    if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)) for value in values):
+        if any(value is not None for value in values):
+            return np.array([np.nan if value is None else value for value in values], dtype=float)
+    return np.array(values, dtype=object)
+
+
+def _plain(value: Any) -> Any:
+    """NumPy 标量转换为 Python 值，便于 JSON 序列化"""
+    return value.item() if isinstance(value, np.generic) else value
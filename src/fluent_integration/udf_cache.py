@@ -0,0 +1,223 @@
+"""
+UDF Build Cache - 按源码哈希寻址的已编译 UDF 库缓存
+
+缓存键由 UDF 源文件内容、udf_compiler 编译器配置、Fluent 版本、精度和维度
+共同决定。键相同时直接恢复已构建的库目录，跳过编译；旧的构建按数量和
+最近使用时间回收。
+"""
+
+import hashlib
+import json
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from .exceptions import ValidationError
+
+
+class UDFBuildCache:
+    """已编译 UDF 库的内容寻址存储"""
+    
+    MANIFEST = "manifest.json"
+    # 缓存键格式版本：键的组成变化时递增，使旧构建失效
+    KEY_VERSION = "1"
+    
+    def __init__(
+        self,
+        cache_dir: str = ".udf_cache",
+        max_entries: int = 20,
+        max_age_days: Optional[float] = 30
+    ):
+        """
+        初始化缓存
+        
+        Args:
+            cache_dir: 缓存目录
+            max_entries: 保留的最大构建数
+            max_age_days: 超过该天数未使用的构建被回收，None 表示不按时间回收
+        """
+        if max_entries <= 0:
+            raise ValidationError("max_entries must be positive", field="max_entries")
+        
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._hits = 0
+        self._misses = 0
+    
+    def build_key(
+        self,
+        sources: Sequence[str],
+        compiler_config: Optional[Dict[str, Any]] = None,
+        version: str = "",
+        precision: str = "dp",
+        dimension: str = "3d"
+    ) -> str:
+        """
+        计算构建键
+        
+        Args:
+            sources: UDF 源文件（含需要参与哈希的头文件）路径
+            compiler_config: fluent_config.json 中的 udf_compiler 配置
+            version: Fluent 版本
+            precision: 精度 (sp/dp)
+            dimension: 维度 (2d/3d)
+        
+        Returns:
+            十六进制 SHA-256 键
+        """
+        digest = hashlib.sha256()
+        header = {
+            "key_version": self.KEY_VERSION,
+            "compiler": compiler_config or {},
+            "version": version,
+            "precision": precision,
+            "dimension": dimension
+        }
+        digest.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+        
+        # 按文件名排序，源文件列表顺序不影响键
+        for source in sorted(sources, key=lambda path: Path(path).name):
+            path = Path(source)
+            digest.update(path.name.encode("utf-8") + b"\0")
+            digest.update(path.read_bytes())
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def lookup(self, key: str) -> Optional[Path]:
+        """
+        查找构建
+        
+        Args:
+            key: 构建键
+        
+        Returns:
+            缓存中的库目录，不存在返回 None
+        """
+        entry = self.cache_dir / key
+        library = entry / "library"
+        if not (entry / self.MANIFEST).exists() or not library.is_dir():
+            self._misses += 1
+            return None
+        
+        self._hits += 1
+        self._touch(entry)
+        return library
+    
+    def restore(self, key: str, destination: str) -> bool:
+        """
+        将缓存的库目录恢复到 Fluent 工作目录
+        
+        Args:
+            key: 构建键
+            destination: 目标库目录（如 ./libudf）
+        
+        Returns:
+            是否命中并恢复
+        """
+        library = self.lookup(key)
+        if library is None:
+            return False
+        
+        destination = Path(destination)
+        staging = destination.with_name(f".{destination.name}.{uuid.uuid4().hex[:8]}")
+        shutil.copytree(library, staging)
+        if destination.exists():
+            shutil.rmtree(destination)
+        staging.rename(destination)
+        logger.info(f"Restored cached UDF build {key[:12]} to {destination}")
+        return True
+    
+    def store(self, key: str, library_dir: str, metadata: Optional[Dict[str, Any]] = None) -> Path:
+        """
+        保存构建（先复制到临时目录再原子重命名，避免并发写入产生残缺条目）
+        
+        Args:
+            key: 构建键
+            library_dir: 编译产生的库目录
+            metadata: 写入 manifest 的附加信息
+        
+        Returns:
+            缓存条目目录
+        """
+        entry = self.cache_dir / key
+        if (entry / self.MANIFEST).exists():
+            self._touch(entry)
+            return entry
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = self.cache_dir / f".tmp-{key[:12]}-{uuid.uuid4().hex[:8]}"
+        shutil.copytree(library_dir, staging / "library")
+        now = time.time()
+        manifest = {"key": key, "created": now, "last_used": now, **(metadata or {})}
+        (staging / self.MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        
+        try:
+            staging.rename(entry)
+        except OSError:
+            # 另一个进程已保存了相同的构建
+            shutil.rmtree(staging, ignore_errors=True)
+        
+        logger.info(f"Stored UDF build {key[:12]} in cache")
+        self.gc()
+        return entry
+    
+    def gc(self) -> List[str]:
+        """
+        回收旧构建：超过 max_age_days 未使用的，以及超出 max_entries 的最久未使用构建
+        
+        Returns:
+            被删除的构建键
+        """
+        if not self.cache_dir.exists():
+            return []
+        
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            manifest = entry / self.MANIFEST
+            if entry.name.startswith(".tmp-") or not manifest.exists():
+                continue
+            try:
+                last_used = json.loads(manifest.read_text(encoding="utf-8")).get("last_used", 0)
+            except (OSError, ValueError):
+                last_used = 0
+            entries.append((last_used, entry))
+        
+        entries.sort(key=lambda item: item[0], reverse=True)
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days is not None else None
+        
+        removed = []
+        for index, (last_used, entry) in enumerate(entries):
+            if index >= self.max_entries or (cutoff is not None and last_used < cutoff):
+                shutil.rmtree(entry, ignore_errors=True)
+                removed.append(entry.name)
+        
+        if removed:
+            logger.info(f"Garbage-collected {len(removed)} UDF build(s)")
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+        
+        Returns:
+            命中次数、未命中次数、条目数
+        """
+        entries = 0
+        if self.cache_dir.exists():
+            entries = sum(1 for entry in self.cache_dir.iterdir() if (entry / self.MANIFEST).exists())
+        return {"hits": self._hits, "misses": self._misses, "entries": entries}
+    
+    def _touch(self, entry: Path):
+        """更新条目的最近使用时间"""
+        manifest = entry / self.MANIFEST
+        try:
+            data = json.loads(manifest.read_text(encoding="utf-8"))
+            data["last_used"] = time.time()
+            manifest.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not update UDF cache manifest {manifest}: {e}")
@@ -3,12 +3,13 @@ UDF Generator - 使用 AI (OpenAI) 生成 ANSYS Fluent UDF
 """
 
 import os
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List
 from pathlib import Path
 from loguru import logger
 
 from .copilot_bridge import CodeGeneratorBridge
 from .exceptions import UDFGenerationError, ValidationError
+from .profile_writer import ProfileWriter
 
 
 class UDFGenerator:
@@ -198,6 +199,35 @@ Generate only the UDF function body, not the header includes.
             logger.error(f"Failed to save UDF: {e}")
             return False
     
+    def write_profile(
+        self,
+        file_path: str,
+        profile_name: str,
+        data: Any,
+        profile_type: str = "point",
+        columns: Optional[List[str]] = None
+    ) -> str:
+        """
+        直接写出 Fluent Profile 文件，替代表格驱动的 DEFINE_PROFILE UDF
+        
+        Args:
+            file_path: 输出 .prof 文件路径
+            profile_name: profile 名称
+            data: 字段映射 / 结构化数组，或 CSV/Parquet 表格路径
+            profile_type: profile 类型 (point, line, radial, axial)
+            columns: 从表格读取的列（仅 data 为路径时有效）
+        
+        Returns:
+            写出的文件路径
+        """
+        writer = ProfileWriter()
+        if isinstance(data, (str, Path)):
+            return writer.write_from_table(
+                file_path, str(data), profile_name,
+                columns=columns, profile_type=profile_type
+            )
+        return writer.write(file_path, profile_name, data, profile_type=profile_type)
+    
     def generate_common_udfs(self, output_dir: str = "udfs") -> Dict[str, str]:
         """
         生成常用 UDF 示例
@@ -0,0 +1,213 @@
+"""
+Warm Start - 从最近的已收敛设计点初始化流场
+
+已收敛设计点的数据文件按 (网格, 参数向量) 登记在 SQLite 注册表中。新的设计点
+读入同一网格上参数最接近的数据文件作为初值，没有可用的邻居时退回标准初始化。
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .exceptions import ValidationError
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mesh_key TEXT NOT NULL,
+    params TEXT NOT NULL,
+    data_file TEXT NOT NULL UNIQUE,
+    iterations INTEGER,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_mesh ON solutions (mesh_key);
+"""
+
+
+class WarmStartRegistry:
+    """已收敛数据文件的注册表（多个工作进程可共享）"""
+    
+    DB_NAME = "registry.sqlite"
+    
+    def __init__(
+        self,
+        directory: str = "sweeps/solutions",
+        max_distance: Optional[float] = None,
+        scales: Optional[Dict[str, float]] = None
+    ):
+        """
+        打开注册表
+        
+        Args:
+            directory: 数据文件和注册表数据库所在目录
+            max_distance: 归一化参数距离超过该值时不使用邻居，None 表示不限制
+            scales: 数值参数的归一化尺度 {参数名: 尺度}（如扫描中该参数的取值范围），
+                未给出的参数按已登记点的取值范围归一化
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+        self.scales = dict(scales or {})
+        self._conn = sqlite3.connect(str(self.directory / self.DB_NAME), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+    
+    @staticmethod
+    def mesh_key(case_file: str) -> str:
+        """
+        网格标识：同一案例文件（路径、大小、修改时间均相同）视为同一网格
+        
+        Args:
+            case_file: 基准案例文件
+        
+        Returns:
+            十六进制哈希
+        
+        Raises:
+            ValidationError: 案例文件不存在时抛出
+        """
+        path = Path(case_file).resolve()
+        if not path.exists():
+            raise ValidationError(f"Case file does not exist: {case_file}", field="case_file")
+        stat = path.stat()
+        return hashlib.sha256(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+    
+    def data_path(self, mesh_key: str, params: Dict[str, Any]) -> str:
+        """
+        新数据文件的存放路径
+        
+        Args:
+            mesh_key: 网格标识
+            params: 参数向量
+        
+        Returns:
+            数据文件路径（.dat.h5）
+        """
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+        return str(self.directory / mesh_key / f"{digest}.dat.h5")
+    
+    def register(self, mesh_key: str, params: Dict[str, Any], data_file: str, iterations: Optional[int] = None):
+        """
+        登记一个已收敛的数据文件
+        
+        Args:
+            mesh_key: 网格标识
+            params: 参数向量
+            data_file: 数据文件路径
+            iterations: 收敛所用的迭代步数
+        """
+        if not Path(data_file).exists():
+            raise ValidationError(f"Data file does not exist: {data_file}", field="data_file")
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO solutions (mesh_key, params, data_file, iterations, created) VALUES (?, ?, ?, ?, ?)",
+                (mesh_key, json.dumps(params, sort_keys=True), str(data_file), iterations, time.time())
+            )
+        logger.debug(f"Registered warm-start data {data_file}")
+    
+    def entries(self, mesh_key: str) -> List[Dict[str, Any]]:
+        """
+        某个网格上登记的数据文件（已删除的文件除外）
+        
+        Args:
+            mesh_key: 网格标识
+        
+        Returns:
+            [{"params", "data_file", "iterations"}]
+        """
+        rows = self._conn.execute(
+            "SELECT params, data_file, iterations FROM solutions WHERE mesh_key = ? ORDER BY id", (mesh_key,)
+        ).fetchall()
+        return [
+            {"params": json.loads(params), "data_file": data_file, "iterations": iterations}
+            for params, data_file, iterations in rows
+            if Path(data_file).exists()
+        ]
+    
+    def nearest(self, mesh_key: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        查找参数最接近的已收敛数据
+        
+        数值参数按固定尺度（scales，缺省为已登记点的取值范围，不含新设计点）归一化后
+        计算欧氏距离，距离不随新设计点的位置伸缩；非数值参数必须相同。
+        
+        Args:
+            mesh_key: 网格标识
+            params: 新设计点的参数向量
+        
+        Returns:
+            {"params", "data_file", "iterations", "distance"}，没有可用邻居时返回 None
+        """
+        candidates = [
+            entry for entry in self.entries(mesh_key)
+            if set(entry["params"]) == set(params)
+            and all(entry["params"][name] == value for name, value in params.items() if not _is_number(value))
+        ]
+        if not candidates:
+            return None
+        
+        names = [name for name, value in params.items() if _is_number(value)]
+        if not names:
+            best = candidates[-1]
+            return {**best, "distance": 0.0}
+        
+        points = np.array([[float(entry["params"][name]) for name in names] for entry in candidates])
+        target = np.array([float(params[name]) for name in names])
+        span = np.ptp(points, axis=0)
+        scale = np.array([abs(float(self.scales.get(name) or span[index])) for index, name in enumerate(names)])
+        scale[scale == 0] = 1.0
+        distances = np.sqrt((((points - target) / scale) ** 2).sum(axis=1))
+        
+        index = int(distances.argmin())
+        if self.max_distance is not None and distances[index] > self.max_distance:
+            return None
+        return {**candidates[index], "distance": float(distances[index])}
+    
+    def close(self):
+        """关闭注册表"""
+        self._conn.close()
+
+
+def initialize_from_nearest(
+    wrapper: Any,
+    registry: WarmStartRegistry,
+    mesh_key: str,
+    params: Dict[str, Any],
+    method: str = "hybrid"
+) -> Optional[Dict[str, Any]]:
+    """
+    用最近邻设计点的数据初始化流场，失败或没有邻居时退回标准初始化
+    
+    Args:
+        wrapper: 已读入同一网格案例的 FluentWrapper
+        registry: 注册表
+        mesh_key: 网格标识
+        params: 当前设计点的参数向量
+        method: 退回时使用的初始化方法 ("hybrid"/"standard")
+    
+    Returns:
+        使用的邻居 {"params", "data_file", "distance", ...}，退回标准初始化时返回 None
+    """
+    neighbor = registry.nearest(mesh_key, params)
+    if neighbor is not None:
+        try:
+            wrapper.load_data(neighbor["data_file"])
+            logger.info(f"Warm start from {neighbor['data_file']} (distance {neighbor['distance']:.3g})")
+            return neighbor
+        except Exception as e:
+            logger.warning(f"Warm start failed, falling back to {method} initialization: {e}")
+    
+    wrapper.initialize_flow_field(method)
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    """是否为数值参数"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
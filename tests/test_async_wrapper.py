@@ -0,0 +1,131 @@
+"""
+单元测试 - 异步 Fluent 封装与分块迭代
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from src.fluent_integration.async_wrapper import AsyncFluentWrapper
+from src.fluent_integration.exceptions import FluentSolveError
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+def make_wrapper(delay=0.0):
+    """创建带模拟求解器的 FluentWrapper"""
+    wrapper = FluentWrapper(config_path="nonexistent.json")
+    wrapper.session = Mock()
+    wrapper.solver = Mock()
+    calls = []
+    
+    def iterate(iter_count):
+        time.sleep(delay)
+        calls.append(iter_count)
+    
+    wrapper.solver.solution.run_calculation.iterate.side_effect = iterate
+    wrapper.iterate_calls = calls
+    return wrapper
+
+
+class TestFluentWrapperIterate:
+    """测试同步分块迭代"""
+    
+    def test_chunked_iterate_reports_progress(self):
+        """测试分块调用求解器并报告进度"""
+        wrapper = make_wrapper()
+        progress = []
+        
+        completed = wrapper.iterate(25, chunk_size=10, progress_callback=lambda done, total: progress.append(done))
+        
+        assert completed == 25
+        assert wrapper.iterate_calls == [10, 10, 5]
+        assert progress == [10, 20, 25]
+    
+    def test_cancel_stops_at_chunk_boundary(self):
+        """测试取消在块边界生效"""
+        wrapper = make_wrapper()
+        cancel_event = threading.Event()
+        
+        def progress(done, total):
+            if done >= 20:
+                cancel_event.set()
+        
+        completed = wrapper.iterate(100, chunk_size=10, progress_callback=progress, cancel_event=cancel_event)
+        
+        assert completed == 20
+    
+    def test_iterate_failure(self):
+        """测试迭代失败时报告已完成步数"""
+        wrapper = make_wrapper()
+        wrapper.solver.solution.run_calculation.iterate.side_effect = [None, RuntimeError("diverged")]
+        
+        with pytest.raises(FluentSolveError) as exc_info:
+            wrapper.iterate(20, chunk_size=10)
+        
+        assert exc_info.value.details["iterations_completed"] == 10
+    
+    def test_iterate_requires_session(self):
+        """测试会话未启动"""
+        with pytest.raises(FluentSolveError):
+            FluentWrapper(config_path="nonexistent.json").iterate(10)
+
+
+class TestAsyncFluentWrapper:
+    """测试异步封装"""
+    
+    def test_iterate_with_async_progress(self):
+        """测试异步迭代与协程进度回调"""
+        progress = []
+        
+        async def on_progress(done, total):
+            progress.append((done, total))
+        
+        async def main():
+            async with AsyncFluentWrapper(wrapper=make_wrapper()) as fluent:
+                completed = await fluent.iterate(30, chunk_size=10, progress_callback=on_progress)
+                await asyncio.sleep(0)
+                return completed
+        
+        assert asyncio.run(main()) == 30
+        assert progress == [(10, 30), (20, 30), (30, 30)]
+    
+    def test_sessions_run_concurrently(self):
+        """测试多个会话并发运行而不阻塞事件循环"""
+        async def main():
+            sessions = [AsyncFluentWrapper(wrapper=make_wrapper(delay=0.05)) for _ in range(4)]
+            started = time.monotonic()
+            results = await asyncio.gather(*(s.iterate(4, chunk_size=1) for s in sessions))
+            elapsed = time.monotonic() - started
+            for s in sessions:
+                await s.close()
+            return results, elapsed
+        
+        results, elapsed = asyncio.run(main())
+        
+        assert results == [4, 4, 4, 4]
+        assert elapsed < 4 * 4 * 0.05
+    
+    def test_cancel_waits_for_chunk(self):
+        """测试取消任务后求解器在块边界停止"""
+        wrapper = make_wrapper(delay=0.02)
+        
+        async def main():
+            fluent = AsyncFluentWrapper(wrapper=wrapper)
+            task = asyncio.ensure_future(fluent.iterate(1000, chunk_size=1))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            calls_at_cancel = len(wrapper.iterate_calls)
+            await asyncio.sleep(0.1)
+            return calls_at_cancel
+        
+        calls_at_cancel = asyncio.run(main())
+        
+        assert 0 < calls_at_cancel < 1000
+        assert len(wrapper.iterate_calls) == calls_at_cancel
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,143 @@
+"""
+单元测试 - 处理器数调优
+"""
+
+import pytest
+from src.fluent_integration.autotune import ProcessorAutotuner, fit_scaling, predict, recommend
+from src.fluent_integration.case_index import CaseIndex
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+MODEL = {"serial": 0.1, "parallel": 0.9, "communication": 0.05}
+
+
+@pytest.fixture
+def case_file(tmp_path):
+    """案例文件"""
+    path = tmp_path / "pipe.cas.h5"
+    path.write_bytes(b"case")
+    return str(path)
+
+
+def make_backend():
+    """按 Amdahl 定律扩展、使用模拟时钟的后端（测量结果确定，与机器负载无关）"""
+    return FakeFluentBackend(
+        latency={"iteration": 0.01},
+        parallel_fraction=0.9,
+        communication=0.05,
+        simulated_time=True
+    )
+
+
+def make_tuner(case_file, backend, **kwargs):
+    """使用按 Amdahl 定律扩展的模拟后端"""
+    options = {
+        "clock": backend.clock,
+        "core_counts": [1, 2, 4, 8],
+        "iterations": 5,
+        "warmup": 1,
+        "config_path": "nonexistent.json",
+        "wrapper_factory": lambda: FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+    }
+    options.update(kwargs)
+    return ProcessorAutotuner(case_file, **options)
+
+
+class TestScalingModel:
+    """测试扩展曲线拟合和推荐"""
+    
+    def test_fit_recovers_coefficients(self):
+        """测试拟合无噪声数据得到原系数"""
+        cores = [1, 2, 4, 8, 16]
+        
+        model = fit_scaling(cores, [predict(MODEL, count) for count in cores])
+        
+        for term, value in MODEL.items():
+            assert model[term] == pytest.approx(value, abs=1e-9)
+    
+    def test_fit_keeps_coefficients_non_negative(self):
+        """测试超线性的噪声数据不会得到负的串行项"""
+        model = fit_scaling([1, 2, 4], [1.0, 0.45, 0.2])
+        
+        assert all(value >= 0 for value in model.values())
+    
+    def test_throughput_objective(self):
+        """测试推荐效率不低于阈值的最大进程数"""
+        assert recommend(MODEL, 8, min_efficiency=0.7)["processor_count"] == 2
+        assert recommend(MODEL, 8, min_efficiency=0.5)["processor_count"] == 4
+    
+    def test_walltime_objective(self):
+        """测试推荐满足墙钟时间目标的最小进程数，无法满足时取最快"""
+        result = recommend(MODEL, 8, objective="walltime", wall_time=60, target_iterations=100)
+        assert result["processor_count"] == 3
+        assert result["meets_target"]
+        
+        result = recommend(MODEL, 8, objective="walltime", wall_time=10, target_iterations=100)
+        assert result["processor_count"] == 4
+        assert not result["meets_target"]
+        
+        with pytest.raises(ValidationError):
+            recommend(MODEL, 8, objective="walltime")
+
+
+class TestProcessorAutotuner:
+    """测试在模拟后端上测量"""
+    
+    def test_measures_each_core_count(self, case_file):
+        """测试每个进程数启动一个会话并计时"""
+        backend = make_backend()
+        
+        result = make_tuner(case_file, backend).tune()
+        
+        assert [session.options["processor_count"] for session in backend.sessions] == [1, 2, 4, 8]
+        assert all(session.closed for session in backend.sessions)
+        assert result["model"]["serial"] == pytest.approx(0.001, abs=1e-9)
+        assert result["model"]["parallel"] == pytest.approx(0.009, abs=1e-9)
+        assert result["model"]["communication"] == pytest.approx(0.0005, abs=1e-9)
+        assert result["recommendation"]["processor_count"] == 2
+        assert not result["cached"]
+    
+    def test_cached_in_case_index(self, case_file, tmp_path):
+        """测试结果缓存在案例索引中，案例文件变化后重新测量"""
+        backend = make_backend()
+        with CaseIndex(db_path=str(tmp_path / "index.sqlite")) as index:
+            first = make_tuner(case_file, backend).tune(index=index)
+            launches = len(backend.sessions)
+            
+            cached = make_tuner(case_file, backend).tune(index=index, min_efficiency=0.4)
+            assert cached["cached"]
+            assert len(backend.sessions) == launches
+            assert cached["model"] == first["model"]
+            assert cached["recommendation"]["processor_count"] > first["recommendation"]["processor_count"]
+            assert index.get_tuning(case_file)["recommendation"] == cached["recommendation"]
+            
+            with open(case_file, "ab") as f:
+                f.write(b"changed")
+            assert index.get_tuning(case_file) is None
+    
+    def test_failed_core_count_skipped(self, case_file):
+        """测试某个进程数启动失败时用其余测量拟合"""
+        backend = FakeFluentBackend()
+        calls = []
+        
+        def launch(**options):
+            calls.append(options["processor_count"])
+            if options["processor_count"] == 4:
+                raise RuntimeError("no license")
+            return backend.launch_fluent(**options)
+        
+        def factory():
+            return FluentWrapper(config_path="nonexistent.json", launcher=launch)
+        
+        result = make_tuner(case_file, backend, wrapper_factory=factory).tune()
+        
+        errors = [item["cores"] for item in result["measurements"] if item["error"]]
+        assert errors == [4]
+        assert calls == [1, 2, 4, 8]
+        assert 1 <= result["recommendation"]["processor_count"] <= 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,34 @@
+"""
+冒烟测试 - 基准测试脚本在模拟后端上完整运行
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "benchmark_wrapper.py"
+
+
+def test_benchmark_script_runs():
+    """测试全部基准项以最小规模运行成功"""
+    completed = subprocess.run(
+        [
+            sys.executable, str(SCRIPT), "--json", "--repeat", "1", "--commands", "5", "--points", "3",
+            "--rpc-latency-ms", "0", "--zones", "2", "--cells", "100", "--compile-s", "0"
+        ],
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    
+    assert completed.returncode == 0, completed.stderr
+    results = json.loads(completed.stdout)
+    assert {result["name"] for result in results} >= {"批处理", "期望状态设置"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+单元测试 - 离线案例索引
+"""
+
+import gzip
+import os
+import pytest
+from src.fluent_integration.case_index import CaseIndex, read_case_metadata
+from src.fluent_integration.exceptions import ValidationError
+
+
+LEGACY_CASE = b"""(0 "Generated by test")
+(1 "ANSYS(R) TurboGrid Fluent 24.1.0 build-id: 10171")
+(2 3)
+(37 (
+(energy/enabled? #t)
+(viscous/model ke-realizable)
+(rp-unsteady? #f)
+))
+(10 (0 1 1f4 0 3))
+(12 (0 1 c8 0))
+(13 (0 1 258 0))
+(3010 (5 1 1f4 1 3)(
+\x00\x01\x02\x03binary-node-data\xff\xfe
+))
+(39 (2 fluid fluid-domain)())
+(39 (5 velocity-inlet inlet)())
+(39 (6 pressure-outlet outlet)())
+"""
+
+
+@pytest.fixture
+def cases_dir(tmp_path):
+    """创建包含传统格式案例的目录"""
+    directory = tmp_path / "cases"
+    directory.mkdir()
+    (directory / "pipe.cas").write_bytes(LEGACY_CASE)
+    with gzip.open(directory / "duct.cas.gz", "wb") as f:
+        f.write(LEGACY_CASE.replace(b"c8", b"2710").replace(b"inlet)", b"inlet-main)"))
+    return directory
+
+
+class TestReadCaseMetadata:
+    """测试文件头解析"""
+    
+    def test_legacy_header(self, cases_dir):
+        """测试传统格式的版本、规模、zone 和模型"""
+        metadata = read_case_metadata(str(cases_dir / "pipe.cas"))
+        
+        assert "24.1.0" in metadata["fluent_version"]
+        assert metadata["dimension"] == 3
+        assert metadata["precision"] == "dp"
+        assert (metadata["node_count"], metadata["cell_count"], metadata["face_count"]) == (500, 200, 600)
+        assert [zone["name"] for zone in metadata["zones"]] == ["fluid-domain", "inlet", "outlet"]
+        assert metadata["models"] == {"energy": True, "viscous": "ke-realizable"}
+    
+    def test_gzip_header(self, cases_dir):
+        """测试压缩格式"""
+        metadata = read_case_metadata(str(cases_dir / "duct.cas.gz"))
+        
+        assert metadata["cell_count"] == 10000
+        assert metadata["zones"][1]["name"] == "inlet-main"
+    
+    def test_unsupported_format(self, tmp_path):
+        """测试不支持的格式"""
+        with pytest.raises(ValidationError):
+            read_case_metadata(str(tmp_path / "mesh.msh"))
+
+
+class TestCaseIndex:
+    """测试 SQLite 索引"""
+    
+    def test_incremental_update(self, tmp_path, cases_dir):
+        """测试按 mtime/大小增量更新"""
+        with CaseIndex(db_path=str(tmp_path / "index.sqlite")) as index:
+            assert index.update([str(cases_dir)]) == {"added": 2, "updated": 0, "removed": 0, "unchanged": 0}
+            assert index.update([str(cases_dir)]) == {"added": 0, "updated": 0, "removed": 0, "unchanged": 2}
+            
+            case = cases_dir / "pipe.cas"
+            case.write_bytes(LEGACY_CASE.replace(b"(2 3)", b"(2 2)"))
+            os.utime(case, (1, 1))
+            (cases_dir / "duct.cas.gz").unlink()
+            
+            assert index.update([str(cases_dir)]) == {"added": 0, "updated": 1, "removed": 1, "unchanged": 0}
+            assert index.get(str(case))["dimension"] == 2
+    
+    def test_query_filters(self, tmp_path, cases_dir):
+        """测试按规模、zone 和模型查询"""
+        with CaseIndex(db_path=str(tmp_path / "index.sqlite")) as index:
+            index.update([str(cases_dir)])
+            
+            assert [case["name"] for case in index.query(min_cells=1000)] == ["duct.cas.gz"]
+            assert [case["name"] for case in index.query(zone="inlet")] == ["pipe.cas"]
+            assert len(index.query(model="viscous", version="24.1", dimension=3)) == 2
+            assert index.query(model="multiphase") == []
+    
+    def test_unreadable_file_recorded(self, tmp_path):
+        """测试损坏的文件记录错误而不中断索引"""
+        directory = tmp_path / "cases"
+        directory.mkdir()
+        (directory / "broken.cas.gz").write_bytes(b"not gzip")
+        
+        with CaseIndex(db_path=str(tmp_path / "index.sqlite")) as index:
+            assert index.update([str(directory)])["added"] == 1
+            assert index.query()[0]["error"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
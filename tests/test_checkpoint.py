@@ -0,0 +1,130 @@
+"""
+单元测试 - 后台检查点
+"""
+
+import shutil
+import threading
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+from src.fluent_integration import checkpoint
+from src.fluent_integration.checkpoint import CheckpointManager
+from src.fluent_integration.exceptions import FluentCaseError
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+def make_wrapper(gate=None):
+    """创建模拟 FluentWrapper：write_case_data 写出案例和数据文件"""
+    wrapper = FluentWrapper(config_path="nonexistent.json")
+    wrapper.session = Mock()
+    wrapper.solver = Mock()
+    wrapper.written = []
+    wrapper.writer_threads = []
+    
+    def write_case_data(file_name):
+        wrapper.writer_threads.append(threading.current_thread())
+        if gate is not None:
+            gate.wait(5)
+        case = Path(file_name)
+        case.write_bytes(b"case")
+        case.with_name(case.name.replace(".cas.h5", ".dat.h5")).write_bytes(b"data")
+        wrapper.written.append(file_name)
+    
+    wrapper.solver.file.write_case_data.side_effect = write_case_data
+    return wrapper
+
+
+class TestCheckpointManager:
+    """测试检查点管理器"""
+    
+    def test_solver_write_in_calling_thread(self, tmp_path):
+        """测试求解器在调用线程中写出，返回时检查点已写出"""
+        wrapper = make_wrapper()
+        
+        with CheckpointManager(wrapper, directory=str(tmp_path)) as manager:
+            future = manager.checkpoint()
+            assert len(wrapper.written) == 1
+            assert wrapper.writer_threads == [threading.current_thread()]
+            assert future.result(5).endswith("checkpoint-000001.cas.h5")
+    
+    def test_checkpoint_returns_before_publish(self, tmp_path, monkeypatch):
+        """测试复制到目标目录在后台进行，调用方不等待"""
+        gate = threading.Event()
+        copyfile = shutil.copyfile
+        
+        def gated_copyfile(source, target):
+            gate.wait(5)
+            return copyfile(source, target)
+        
+        monkeypatch.setattr(checkpoint.shutil, "copyfile", gated_copyfile)
+        manager = CheckpointManager(make_wrapper(), directory=str(tmp_path / "out"), scratch_dir=str(tmp_path / "scratch"))
+        
+        future = manager.checkpoint()
+        assert not future.done()
+        assert manager.list_checkpoints() == []
+        
+        gate.set()
+        assert future.result(5).endswith("checkpoint-000001.cas.h5")
+        manager.close()
+    
+    def test_retention_keeps_last_and_every_kth(self, tmp_path):
+        """测试轮转保留最近 N 个和每第 K 个"""
+        with CheckpointManager(make_wrapper(), directory=str(tmp_path), keep_last=2, keep_every=3) as manager:
+            for _ in range(7):
+                manager.checkpoint()
+            manager.wait()
+            
+            assert [entry["index"] for entry in manager.list_checkpoints()] == [3, 6, 7]
+        assert not list(tmp_path.glob(".*"))
+    
+    def test_double_buffered_publish(self, tmp_path):
+        """测试双缓冲模式经 scratch 槽发布"""
+        wrapper = make_wrapper()
+        with CheckpointManager(wrapper, directory=str(tmp_path / "out"), scratch_dir=str(tmp_path / "scratch")) as manager:
+            for _ in range(3):
+                manager.checkpoint()
+            manager.wait()
+            
+            assert len(manager.list_checkpoints()) == 3
+        assert {Path(name).parent.name for name in wrapper.written} == {"slot-0", "slot-1"}
+    
+    def test_restore_latest(self, tmp_path):
+        """测试从最新检查点恢复"""
+        wrapper = make_wrapper()
+        manager = CheckpointManager(wrapper, directory=str(tmp_path))
+        manager.checkpoint()
+        manager.checkpoint()
+        
+        restored = manager.restore_latest()
+        
+        assert restored.endswith("checkpoint-000002.cas.h5")
+        wrapper.solver.file.read_case_data.assert_called_once_with(file_name=restored)
+        manager.close()
+    
+    def test_resume_numbering(self, tmp_path):
+        """测试重启后序号接续"""
+        with CheckpointManager(make_wrapper(), directory=str(tmp_path)) as manager:
+            manager.checkpoint(wait=True)
+        with CheckpointManager(make_wrapper(), directory=str(tmp_path)) as manager:
+            assert manager.checkpoint(wait=True).result().endswith("000002.cas.h5")
+    
+    def test_iterate_with_interval(self, tmp_path):
+        """测试按间隔迭代并写检查点"""
+        with CheckpointManager(make_wrapper(), directory=str(tmp_path), keep_last=10) as manager:
+            completed = manager.iterate(25, interval=10)
+            manager.wait()
+            
+            assert completed == 25
+            assert len(manager.list_checkpoints()) == 3
+    
+    def test_failed_write_reported(self, tmp_path):
+        """测试写出失败通过 Future 报告"""
+        wrapper = make_wrapper()
+        wrapper.solver.file.write_case_data.side_effect = OSError("disk full")
+        with CheckpointManager(wrapper, directory=str(tmp_path)) as manager:
+            with pytest.raises(FluentCaseError):
+                manager.checkpoint().result(5)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
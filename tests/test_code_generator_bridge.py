@@ -6,6 +6,7 @@ import pytest
 import os
 from unittest.mock import Mock, patch, MagicMock
 from src.fluent_integration.copilot_bridge import CodeGeneratorBridge
+from copilot_client.prompt_builder import PromptBuilder
 
 
 class TestCodeGeneratorBridge:
@@ -70,6 +71,51 @@ class TestCodeGeneratorBridge:
         assert len(code) > 0
 
 
+class TestCodeGeneratorBridgePromptCaching:
+    """测试前缀稳定的提示词布局与缓存统计"""
+    
+    @pytest.fixture
+    def bridge(self):
+        """创建代码生成桥接实例"""
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            return CodeGeneratorBridge()
+    
+    def test_variable_parts_at_end(self, bridge):
+        """测试可变部分位于提示词末尾"""
+        first = bridge._build_prompt("inlet velocity", language="c", context=["/* A */"])
+        second = bridge._build_prompt("wall heat flux", language="c", context=["/* B */"])
+        
+        # 两个请求共享语言提示前缀，差异从上下文开始
+        prefix = first.split("Context:")[0]
+        assert second.startswith(prefix)
+        assert first.index("Context:") < first.index("inlet velocity")
+    
+    def test_system_prefix_is_static(self, bridge):
+        """测试系统消息在请求之间保持一致"""
+        first = bridge._build_messages("prompt one")
+        second = bridge._build_messages("prompt two")
+        
+        assert first[0] == second[0]
+        assert first[0]["role"] == "system"
+        assert first[0]["content"] == PromptBuilder.SYSTEM_PROMPT
+        assert first[1]["content"] == "prompt one"
+    
+    def test_record_cached_tokens(self, bridge):
+        """测试记录前缀缓存命中的 token 数"""
+        response = MagicMock()
+        response.usage.prompt_tokens = 1200
+        response.usage.completion_tokens = 300
+        response.usage.prompt_tokens_details.cached_tokens = 1024
+        
+        bridge._record_usage(response)
+        stats = bridge.get_usage_stats()
+        
+        assert stats["requests"] == 1
+        assert stats["cached_tokens"] == 1024
+        assert stats["cache_hit_ratio"] == pytest.approx(1024 / 1200)
+        assert stats["layout_version"] == PromptBuilder.LAYOUT_VERSION
+
+
 class TestCodeGeneratorBridgeConfig:
     """测试代码生成桥接配置"""
     
@@ -0,0 +1,159 @@
+"""
+单元测试 - 按版本缓存的命令树
+"""
+
+import pytest
+from unittest.mock import Mock
+from src.fluent_integration.command_tree import CommandTree, tui_name
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+@pytest.fixture
+def backend():
+    """零延迟后端"""
+    return FakeFluentBackend()
+
+
+@pytest.fixture
+def tree(backend):
+    """从模拟会话提取的命令树"""
+    return CommandTree.extract(backend.launch_fluent().solver, "2024.1")
+
+
+@pytest.fixture
+def wrapper(backend):
+    """连接到模拟后端的 FluentWrapper"""
+    wrapper = FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+    wrapper.start_fluent()
+    return wrapper
+
+
+class TestCommandTree:
+    """测试提取、校验和补全"""
+    
+    def test_extract_uses_tui_names(self, tree):
+        """测试菜单名转换为 TUI 的连字符形式，具名对象容器为通配"""
+        assert tui_name("boundary_conditions") == "boundary-conditions"
+        assert "velocity-inlet" in tree.tui["define"]["boundary-conditions"]["set"]
+        assert tree.tui["solve"]["iterate"] == 0
+        assert set(tree.settings["setup"]["boundary_conditions"]["velocity_inlet"]) == {"*"}
+    
+    def test_validate_accepts_abbreviations(self, tree):
+        """测试唯一前缀、分段缩写、空格分隔和 q 返回上一级"""
+        assert tree.validate("solve/it 10")["path"] == "/solve/iterate"
+        assert tree.validate("/d/b-c/set/v-i inlet () vmag no 3 q")["path"] == "/define/boundary-conditions/set/velocity-inlet"
+        assert tree.validate("define models energy yes")["valid"]
+        assert tree.validate("solve set q q define models energy yes")["path"] == "/define/models/energy"
+    
+    def test_validate_rejects_unknown(self, tree):
+        """测试未知菜单项给出位置和建议"""
+        result = tree.validate("define/modles/energy yes")
+        
+        assert not result["valid"]
+        assert result["path"] == "/define"
+        assert result["suggestions"] == ["models"]
+    
+    def test_complete(self, tree):
+        """测试补全菜单和命令"""
+        assert tree.complete("define/bou") == ["/define/boundary-conditions/"]
+        assert tree.complete("solve/set/") == ["/solve/set/flow", "/solve/set/under-relaxation/"]
+        assert tree.complete("define/nothing/") == []
+    
+    def test_validate_settings(self, tree):
+        """测试设置键校验，具名对象的成员名不限"""
+        assert tree.validate_settings({"setup": {"boundary_conditions": {"velocity_inlet": {"any-name": {"momentum": {}}}}}}) == []
+        
+        errors = tree.validate_settings({"setup": {"models": {"energy": {"enabld": True}}}})
+        
+        assert errors == ["Unknown setting: setup/models/energy/enabld (did you mean enabled?)"]
+    
+    def test_save_and_load(self, tree, tmp_path):
+        """测试压缩索引按版本保存和读取"""
+        path = tree.save(str(tmp_path))
+        
+        loaded = CommandTree.load(str(tmp_path), "2024.1")
+        
+        assert path.endswith("2024.1.json.gz")
+        assert loaded.tui == tree.tui and loaded.settings == tree.settings
+        assert CommandTree.load(str(tmp_path), "2025.1") is None
+    
+    def test_extract_rejects_non_fluent_solver(self):
+        """测试没有 TUI 菜单树的对象（如 Mock）不生成命令树"""
+        with pytest.raises(ValidationError):
+            CommandTree.extract(Mock(), "2024.1")
+    
+    def test_validate_journal(self, tree, tmp_path):
+        """测试离线检查 journal，跳过 Scheme 和注释"""
+        journal = tmp_path / "run.jou"
+        journal.write_text(
+            "; setup\n(define x 1)\n/file/read-case \"a.cas.h5\"\n/solve/iterat 10\n/solve/iterrate 10\n/exit yes\n",
+            encoding="utf-8"
+        )
+        
+        problems = tree.validate_journal(str(journal))
+        
+        assert [problem["line"] for problem in problems] == [5]
+        assert problems[0]["suggestions"] == ["iterate"]
+
+
+class TestWrapperValidation:
+    """测试 wrapper 在发送前校验"""
+    
+    def test_invalid_command_not_sent(self, backend, wrapper):
+        """测试无效 TUI 命令在本地拒绝，没有远程调用"""
+        wrapper.load_command_tree()
+        backend.reset_counters()
+        
+        assert not wrapper.execute_tui_command("define/modles/energy yes")
+        assert backend.calls["rpc"] == 0
+        assert wrapper.execute_tui_command("define/models/energy yes")
+    
+    def test_batch_sends_only_valid_commands(self, backend, wrapper):
+        """测试批处理中无效命令标记为失败，其余命令一次发送"""
+        wrapper.load_command_tree()
+        backend.reset_counters()
+        
+        results = wrapper.execute_batch(["define/models/energy yes", "solve/sett/flow yes", "solve/set/flow yes"])
+        
+        assert [result["status"] for result in results] == ["ok", "failed", "ok"]
+        assert "sett" in results[1]["error"]
+        assert backend.calls["rpc"] == 1
+        assert backend.calls["command"] == 2
+    
+    def test_batch_stop_on_error_before_invalid(self, wrapper):
+        """测试 stop_on_error 时无效命令之后的命令不执行"""
+        results = wrapper.execute_batch(["define/models/energy yes", "bogus", "solve/set/flow yes"], stop_on_error=True)
+        
+        assert [result["status"] for result in results] == ["ok", "failed", "skipped"]
+    
+    def test_invalid_settings_not_sent(self, backend, wrapper):
+        """测试无效设置键在读取快照之前拒绝"""
+        wrapper.load_command_tree()
+        backend.reset_counters()
+        
+        with pytest.raises(ValidationError):
+            wrapper.apply_settings({"setup": {"models": {"energy": {"enabld": True}}}})
+        assert backend.calls["rpc"] == 0
+    
+    def test_replay_prevalidates_journal(self, wrapper, tmp_path):
+        """测试回放前离线检查 journal，有无效命令时不启动 Fluent"""
+        journal = tmp_path / "run.jou"
+        journal.write_text("/solve/iterrate 10\n", encoding="utf-8")
+        wrapper.load_command_tree()
+        
+        with pytest.raises(ValidationError):
+            wrapper.replay_journal(str(journal))
+    
+    def test_fake_backend_tree_not_persisted(self, wrapper, tmp_path):
+        """测试注入启动函数的会话只在内存中保存命令树"""
+        wrapper.command_tree_dir = str(tmp_path / "commands")
+        
+        assert wrapper.load_command_tree(refresh=True) is not None
+        assert wrapper.complete_command("solve/ini") == ["/solve/initialize/"]
+        assert not (tmp_path / "commands").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,95 @@
+"""
+单元测试 - 上下文压缩
+"""
+
+import pytest
+from src.copilot_client.compaction import (
+    compact_code,
+    compact_snippets,
+    elide_unreferenced_functions,
+    strip_comments
+)
+from src.copilot_client.prompt_builder import PromptBuilder
+
+
+C_CODE = """#include "udf.h"
+
+/* ========== banner ========== */
+// helper
+real helper(real x)
+{
+    return x * 2.0;   /* double it */
+}
+
+DEFINE_PROFILE(inlet_velocity, t, i)
+{
+    face_t f;
+    begin_f_loop(f, t)
+    {
+        F_PROFILE(f, t, i) = helper(1.0);
+    }
+    end_f_loop(f, t)
+}
+"""
+
+
+class TestCompaction:
+    """测试代码压缩"""
+    
+    def test_strip_c_comments_keeps_strings(self):
+        """测试去除 C 注释但保留字符串中的注释符号"""
+        code = 'printf("/* not a comment */"); // trailing\n/* block */ x = 1;'
+        stripped = strip_comments(code, "c")
+        
+        assert '"/* not a comment */"' in stripped
+        assert "trailing" not in stripped
+        assert "block" not in stripped
+    
+    def test_strip_python_and_scheme_comments(self):
+        """测试去除 Python 与 Scheme 注释"""
+        assert strip_comments("x = '#'  # note\n", "python") == "x = '#'  \n"
+        assert strip_comments('(define x "a;b") ; note', "scheme") == '(define x "a;b") '
+    
+    def test_compact_code_collapses_whitespace(self):
+        """测试折叠空白"""
+        compacted = compact_code(C_CODE, "c")
+        
+        assert "banner" not in compacted
+        assert "\n\n" not in compacted
+        assert "    " not in compacted
+        assert "return x * 2.0;" in compacted
+    
+    def test_python_indentation_preserved(self):
+        """测试 Python 缩进保留"""
+        compacted = compact_code("def f():\n\n    # comment\n    return 1\n", "python")
+        
+        assert compacted == "def f():\n    return 1"
+    
+    def test_elide_unreferenced_functions(self):
+        """测试省略未引用的函数体"""
+        compacted = compact_code(C_CODE, "c")
+        elided = elide_unreferenced_functions(compacted, "c", "Tune inlet_velocity magnitude")
+        
+        assert "return x * 2.0;" not in elided
+        assert "real helper(real x)\n{ /* body elided */ }" in elided
+        assert "F_PROFILE(f, t, i) = helper(1.0);" in elided
+    
+    def test_compact_snippets_dedupes_and_reports_tokens(self):
+        """测试片段去重和 token 统计"""
+        snippets, stats = compact_snippets([C_CODE, C_CODE + "\n\n"], "c")
+        
+        assert len(snippets) == 1
+        assert stats["snippets_before"] == 2
+        assert stats["tokens_after"] < stats["tokens_before"]
+    
+    def test_prompt_builder_compacts_context(self):
+        """测试 PromptBuilder 压缩额外上下文"""
+        builder = PromptBuilder(compaction=True)
+        prompt = builder.build_udf_prompt("Inlet profile", "profile", "inlet", [C_CODE])
+        
+        assert "banner" not in prompt
+        assert builder.last_compaction_stats["tokens_after"] < builder.last_compaction_stats["tokens_before"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
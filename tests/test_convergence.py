@@ -0,0 +1,156 @@
+"""
+单元测试 - 收敛监视与提前停止
+"""
+
+import pytest
+from unittest.mock import Mock
+from src.fluent_integration.convergence import ConvergenceCriterion, MonitorHistory, Plateau, RelativeDrop, Stability
+from src.fluent_integration.exceptions import FluentSolveError, ValidationError
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+class FakeMonitors:
+    """模拟 PyFluent 监视器接口：每次迭代残差减半，质量流量趋于稳定"""
+    
+    def __init__(self):
+        self.iteration = 0
+    
+    def advance(self, iter_count):
+        self.iteration += iter_count
+    
+    def get_monitor_set_names(self):
+        return ["residual", "mass-flow-plot"]
+    
+    def get_monitor_set_data(self, monitor_set_name, start_index=0):
+        x = list(range(start_index + 1, self.iteration + 1))
+        if monitor_set_name == "residual":
+            return x, {"continuity": [0.5 ** i for i in x], "x-velocity": [0.1 * 0.5 ** i for i in x]}
+        return x, {"outlet-mass-flow": [1.0 + 1.0 / i ** 2 for i in x]}
+
+
+def make_wrapper():
+    """创建带模拟监视器的 FluentWrapper"""
+    wrapper = FluentWrapper(config_path="nonexistent.json")
+    wrapper.session = Mock()
+    wrapper.solver = Mock()
+    monitors = FakeMonitors()
+    wrapper.solver.monitors = monitors
+    wrapper.solver.solution.run_calculation.iterate.side_effect = monitors.advance
+    return wrapper
+
+
+class TestMonitorHistory:
+    """测试环形缓冲区"""
+    
+    def test_bounded_and_keeps_initial(self):
+        """测试容量有界且保留首个值"""
+        history = MonitorHistory(capacity=3)
+        history.extend(range(1, 6), {"continuity": [1.0, 0.5, 0.25, 0.125, 0.0625]})
+        
+        assert history.series("continuity").tolist() == [0.25, 0.125, 0.0625]
+        assert history.iterations("continuity").tolist() == [3, 4, 5]
+        assert history.initial["continuity"] == 1.0
+        assert len(history) == 3
+    
+    def test_invalid_capacity(self):
+        """测试非法容量"""
+        with pytest.raises(ValidationError):
+            MonitorHistory(capacity=0)
+
+
+class TestCriteria:
+    """测试收敛判据"""
+    
+    def test_relative_drop(self):
+        """测试相对下降"""
+        history = MonitorHistory()
+        history.extend([1, 2], {"continuity": [1.0, 1e-3], "energy": [1.0, 0.1]})
+        
+        assert RelativeDrop(1e-2, quantities=["continuity"]).is_met(history)
+        assert not RelativeDrop(1e-2).is_met(history)
+    
+    def test_plateau(self):
+        """测试平台检测"""
+        history = MonitorHistory()
+        history.extend(range(10), {"continuity": [1e-3] * 10})
+        assert Plateau(window=10).is_met(history)
+        
+        history.extend(range(10, 20), {"continuity": [10.0 ** -i for i in range(10)]})
+        assert not Plateau(window=10).is_met(history)
+        
+        history.extend(range(20, 30), {"continuity": [10.0 ** i for i in range(10)]})
+        assert not Plateau(window=10).is_met(history)
+    
+    def test_stability(self):
+        """测试监视量稳定"""
+        history = MonitorHistory()
+        history.extend(range(5), {"drag": [2.0, 2.0001, 1.9999, 2.0, 2.0]})
+        
+        assert Stability("drag", window=5, tolerance=1e-3).is_met(history)
+        assert not Stability("drag", window=6).is_met(history)
+        assert not Stability("lift", window=5).is_met(history)
+    
+    def test_criterion_must_implement_interface(self):
+        """测试自定义判据必须实现 is_met 和 describe"""
+        class Incomplete(ConvergenceCriterion):
+            def is_met(self, history):
+                return True
+        
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestIterateUntilConverged:
+    """测试按判据提前停止"""
+    
+    def test_stops_when_converged(self):
+        """测试满足判据后停止"""
+        wrapper = make_wrapper()
+        updates = []
+        
+        result = wrapper.iterate_until_converged(
+            1000,
+            criteria=[RelativeDrop(1e-3), Stability("outlet-mass-flow", window=5, tolerance=1e-3)],
+            chunk_size=5,
+            on_update=lambda history, done: updates.append(done)
+        )
+        
+        assert result["converged"]
+        assert result["iterations"] == 25
+        assert updates == [5, 10, 15, 20, 25]
+        assert wrapper.monitor_history.last_iteration == 25
+        assert wrapper.monitor_history.groups["residual"] == ["continuity", "x-velocity"]
+    
+    def test_any_mode_and_min_iterations(self):
+        """测试任一判据模式和最少迭代数"""
+        wrapper = make_wrapper()
+        
+        result = wrapper.iterate_until_converged(
+            1000, criteria=[RelativeDrop(0.5), Stability("missing")], mode="any", chunk_size=5, min_iterations=15
+        )
+        
+        assert result == {"iterations": 15, "converged": True, "satisfied": ["relative drop <= 0.5"]}
+    
+    def test_runs_to_max_without_monitor_data(self):
+        """测试求解器不提供监视数据时运行到最大迭代数"""
+        wrapper = make_wrapper()
+        wrapper.solver.monitors = None
+        wrapper.solver.monitors_manager = None
+        
+        result = wrapper.iterate_until_converged(30, criteria=[RelativeDrop()], chunk_size=10)
+        
+        assert result == {"iterations": 30, "converged": False, "satisfied": []}
+    
+    def test_failure_reports_total_iterations(self):
+        """测试失败时报告本次运行的总步数"""
+        wrapper = make_wrapper()
+        wrapper.solver.solution.run_calculation.iterate.side_effect = [None, RuntimeError("diverged")]
+        
+        with pytest.raises(FluentSolveError) as exc_info:
+            wrapper.iterate_until_converged(100, criteria=[RelativeDrop()], chunk_size=10)
+        
+        assert exc_info.value.details["iterations_completed"] == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,168 @@
+"""
+单元测试 - 模拟 Fluent 后端
+"""
+
+import pytest
+from src.fluent_integration.convergence import RelativeDrop
+from src.fluent_integration.exceptions import FluentSessionError, ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.udf_cache import UDFBuildCache
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """零延迟的小规模后端"""
+    return FakeFluentBackend(zones=3, cells_per_zone=100, work_dir=str(tmp_path))
+
+
+@pytest.fixture
+def wrapper(backend, tmp_path):
+    """连接到模拟后端的 FluentWrapper"""
+    wrapper = FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+    wrapper.udf_build_dir = str(tmp_path)
+    wrapper.udf_cache = UDFBuildCache(cache_dir=str(tmp_path / "cache"))
+    wrapper.start_fluent(processor_count=4)
+    return wrapper
+
+
+class TestFakeBackend:
+    """测试 wrapper 在模拟后端上的完整流程"""
+    
+    def test_launch_through_injected_launcher(self, backend, wrapper):
+        """测试通过注入的启动函数创建会话"""
+        assert backend.sessions[0].options["processor_count"] == 4
+        
+        wrapper.stop_fluent()
+        
+        assert backend.sessions[0].closed
+    
+    def test_batch_uses_single_remote_call(self, backend, wrapper):
+        """测试批处理只产生一次远程调用"""
+        backend.reset_counters()
+        
+        results = wrapper.execute_batch([f"define/models/energy yes" for _ in range(10)])
+        
+        assert all(result["status"] == "ok" for result in results)
+        assert backend.calls["rpc"] == 1
+        assert backend.calls["command"] == 10
+    
+    def test_batch_failure_located(self, tmp_path):
+        """测试注入的失败命令被定位"""
+        backend = FakeFluentBackend(fail_commands=["bogus"], work_dir=str(tmp_path))
+        wrapper = FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+        wrapper.start_fluent()
+        
+        results = wrapper.execute_batch(["define/models/energy yes", "define/bogus", "solve/set/flow yes"])
+        
+        assert [result["status"] for result in results] == ["ok", "failed", "ok"]
+    
+    def test_field_data_and_cache(self, backend, wrapper):
+        """测试场数据规模和缓存命中不再传输"""
+        data = wrapper.get_solution_data("pressure")
+        transferred = backend.calls["field_bytes"]
+        wrapper.get_solution_data("pressure")
+        
+        assert set(data) == {"zone-0", "zone-1", "zone-2"}
+        assert data["zone-0"].shape == (100,)
+        assert transferred == 3 * 100 * 8
+        assert backend.calls["field_bytes"] == transferred
+    
+    def test_udf_compile_cached(self, backend, wrapper, tmp_path):
+        """测试编译产物被构建缓存复用"""
+        source = tmp_path / "adjust.c"
+        source.write_text("DEFINE_ADJUST(a, d) {}\n")
+        
+        wrapper.compile_udf(str(source))
+        wrapper.compile_udf(str(source))
+        
+        assert backend.calls["compile"] == 1
+    
+    def test_monitors_drive_early_stop(self, wrapper):
+        """测试模拟残差可驱动收敛判据"""
+        result = wrapper.iterate_until_converged(1000, criteria=[RelativeDrop(0.1)], chunk_size=10)
+        
+        assert result["converged"]
+        assert result["iterations"] < 1000
+    
+    def test_latency_injection(self, tmp_path):
+        """测试注入的延迟按调用类别计入"""
+        import time
+        backend = FakeFluentBackend(latency={"rpc": 0.01, "iteration": 0.001}, work_dir=str(tmp_path))
+        session = backend.launch_fluent()
+        
+        start = time.perf_counter()
+        session.solver.solution.run_calculation.iterate(iter_count=10)
+        
+        assert time.perf_counter() - start >= 0.02
+        assert session.solver.iteration == 10
+
+
+
+class TestApplySettings:
+    """测试期望状态设置"""
+    
+    DESIRED = {
+        "setup": {
+            "models": {"energy": {"enabled": True}},
+            "boundary_conditions": {"velocity_inlet": {"inlet": {"momentum": {"velocity": {"value": 1.0}}}}}
+        },
+        "solution": {"controls": {"under_relaxation": {"pressure": 0.3}}}
+    }
+    
+    def test_only_changed_values_sent_in_one_call(self, backend, wrapper):
+        """测试只发送变化的值，且在一次调用中发送"""
+        backend.reset_counters()
+        
+        result = wrapper.apply_settings(self.DESIRED)
+        
+        assert result["changed"] == ["setup/models/energy/enabled"]
+        assert result["unchanged"] == 2
+        assert backend.calls["setting"] == 1
+        assert backend.calls["set_state"] == 1
+        assert wrapper.solver.settings_state["setup"]["models"]["energy"]["enabled"] is True
+    
+    def test_snapshot_reused_and_updated(self, backend, wrapper):
+        """测试快照在应用后增量更新，重复应用不再有远程调用"""
+        wrapper.apply_settings(self.DESIRED)
+        backend.reset_counters()
+        
+        assert wrapper.apply_settings(self.DESIRED) == {"changed": [], "unchanged": 3, "remote_calls": 0}
+        
+        desired = {"setup": {"boundary_conditions": {"velocity_inlet": {"inlet": {"momentum": {"velocity": {"value": 2.5}}}}}}}
+        result = wrapper.apply_settings(desired)
+        
+        assert result["remote_calls"] == 1
+        assert backend.calls["get_state"] == 0
+        assert wrapper.settings_snapshot["setup"]["boundary_conditions"]["velocity_inlet"]["inlet"]["momentum"]["velocity"]["value"] == 2.5
+    
+    def test_snapshot_cleared_by_case_read_and_commands(self, backend, wrapper, tmp_path):
+        """测试读入案例或执行命令后重新读取设置状态，迭代不影响快照"""
+        case_file = tmp_path / "base.cas.h5"
+        case_file.write_bytes(b"case")
+        wrapper.apply_settings(self.DESIRED)
+        
+        wrapper.iterate(5)
+        assert wrapper.settings_snapshot
+        
+        wrapper.load_case(str(case_file))
+        assert not wrapper.settings_snapshot
+        
+        result = wrapper.apply_settings(self.DESIRED)
+        assert result["changed"] == ["setup/models/energy/enabled"]
+        assert result["remote_calls"] == 3
+    
+    def test_failed_apply_clears_snapshot(self, wrapper):
+        """测试应用失败时抛出异常且快照不再使用"""
+        wrapper.apply_settings(self.DESIRED)
+        wrapper.validate_commands = False
+        
+        with pytest.raises(FluentSessionError):
+            wrapper.apply_settings({"setup": {"models": {"no_such_model": {"enabled": True}}}})
+        assert not wrapper.settings_snapshot
+        with pytest.raises(ValidationError):
+            wrapper.apply_settings({"setup": True})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,147 @@
+"""
+单元测试 - 求解数据提取
+"""
+
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.field_data import FieldDataExtractor
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+ZONES = {f"wall-{i}": np.arange(i * 10, i * 10 + 5, dtype=np.float64) for i in range(5)}
+SURFACE_INFO = {name: {"surface_id": [i], "zone_type": "wall"} for i, name in enumerate(ZONES)}
+
+
+class FakeTransaction:
+    """模拟 field data 事务"""
+    
+    def __init__(self, owner):
+        self.owner = owner
+        self.requests = []
+    
+    def add_scalar_fields_request(self, field_name, surfaces, node_value=True):
+        self.requests.append((field_name, list(surfaces)))
+    
+    def get_fields(self):
+        self.owner.transfers += 1
+        response = {}
+        for field_name, surfaces in self.requests:
+            for surface in surfaces:
+                surface_id = SURFACE_INFO[surface]["surface_id"][0]
+                fields = response.setdefault(("scalar",), {}).setdefault(surface_id, {})
+                fields[field_name] = ZONES[surface] * 2 if field_name == "temperature" else ZONES[surface]
+        return response
+
+
+class FakeFieldData:
+    """模拟支持事务的 field data 接口"""
+    
+    def __init__(self):
+        self.transfers = 0
+    
+    def new_transaction(self):
+        return FakeTransaction(self)
+
+
+def make_solver(field_data):
+    """构造带 fields 接口的模拟求解器"""
+    field_info = Mock()
+    field_info.get_surfaces_info.return_value = SURFACE_INFO
+    return SimpleNamespace(fields=SimpleNamespace(field_data=field_data, field_info=field_info))
+
+
+class TestFieldDataExtractor:
+    """测试数据提取器"""
+    
+    def test_batches_variables_per_zone_chunk(self):
+        """测试多个变量合并请求，并按 zone 分块"""
+        field_data = FakeFieldData()
+        extractor = FieldDataExtractor(make_solver(field_data), zone_chunk_size=2)
+        
+        result = extractor.extract(["pressure", "temperature"])
+        
+        assert field_data.transfers == 3
+        assert set(result["pressure"]) == set(ZONES)
+        np.testing.assert_array_equal(result["temperature"]["wall-3"], ZONES["wall-3"] * 2)
+    
+    def test_surfaces_info_read_once(self):
+        """测试列出 zone 和解析各块响应共用一次表面信息请求"""
+        solver = make_solver(FakeFieldData())
+        extractor = FieldDataExtractor(solver, zone_chunk_size=2)
+        
+        extractor.extract(["pressure"])
+        
+        assert solver.fields.field_info.get_surfaces_info.call_count == 1
+    
+    def test_iter_chunks_streams_zone_chunks(self):
+        """测试逐块返回数据，每块只含本块的 zone"""
+        extractor = FieldDataExtractor(make_solver(FakeFieldData()), zone_chunk_size=2)
+        
+        chunks = [(zone_chunk, set(data["pressure"])) for zone_chunk, data in extractor.iter_chunks(["pressure"])]
+        
+        assert [set(zone_chunk) for zone_chunk, _ in chunks] == [zones for _, zones in chunks]
+        assert [len(zone_chunk) for zone_chunk, _ in chunks] == [2, 2, 1]
+    
+    def test_zero_copy_for_matching_dtype(self):
+        """测试 dtype 一致时不复制"""
+        extractor = FieldDataExtractor(make_solver(FakeFieldData()))
+        
+        result = extractor.extract(["pressure"], zones=["wall-1"])
+        
+        assert np.shares_memory(result["pressure"]["wall-1"], ZONES["wall-1"])
+    
+    def test_scalar_api_fallback(self):
+        """测试不支持事务时逐变量请求"""
+        field_data = Mock(spec=["get_scalar_field_data"])
+        field_data.get_scalar_field_data.side_effect = lambda field_name, surfaces, node_value: {
+            zone: ZONES[zone].tolist() for zone in surfaces
+        }
+        extractor = FieldDataExtractor(make_solver(field_data), dtype=np.float32)
+        
+        result = extractor.extract(["pressure"], zones=["wall-0", "wall-4"])
+        
+        assert result["pressure"]["wall-4"].dtype == np.float32
+        np.testing.assert_array_equal(result["pressure"]["wall-4"], ZONES["wall-4"])
+    
+    def test_writes_into_caller_buffer(self):
+        """测试写入调用方缓冲区"""
+        extractor = FieldDataExtractor(make_solver(FakeFieldData()))
+        buffer = np.zeros(8)
+        
+        result = extractor.extract(["pressure"], zones=["wall-2"], out={"pressure": {"wall-2": buffer}})
+        
+        np.testing.assert_array_equal(buffer[:5], ZONES["wall-2"])
+        assert np.shares_memory(result["pressure"]["wall-2"], buffer)
+    
+    def test_buffer_too_small(self):
+        """测试缓冲区不足"""
+        extractor = FieldDataExtractor(make_solver(FakeFieldData()))
+        
+        with pytest.raises(ValidationError):
+            extractor.extract(["pressure"], zones=["wall-2"], out={"pressure": {"wall-2": np.zeros(2)}})
+    
+    def test_memmap_output(self, tmp_path):
+        """测试写入内存映射文件"""
+        extractor = FieldDataExtractor(make_solver(FakeFieldData()))
+        
+        result = extractor.extract(["pressure"], zones=["wall-1"], memmap_dir=str(tmp_path))
+        
+        assert isinstance(result["pressure"]["wall-1"], np.memmap)
+        np.testing.assert_array_equal(np.load(tmp_path / "pressure__wall-1.npy"), ZONES["wall-1"])
+    
+    def test_wrapper_get_solution_data(self):
+        """测试 FluentWrapper.get_solution_data 单变量返回 {zone: 数组}"""
+        wrapper = FluentWrapper(config_path="nonexistent.json")
+        wrapper.session = Mock()
+        wrapper.solver = make_solver(FakeFieldData())
+        
+        data = wrapper.get_solution_data("pressure", zones=["wall-0"])
+        
+        np.testing.assert_array_equal(data["wall-0"], ZONES["wall-0"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
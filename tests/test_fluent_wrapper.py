@@ -0,0 +1,195 @@
+"""
+单元测试 - FluentWrapper（使用模拟求解器）
+"""
+
+import re
+import pytest
+from unittest.mock import Mock
+from src.fluent_integration.exceptions import FluentSessionError, ValidationError
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+
+
+class FakeSchemeSolver:
+    """模拟 Scheme 解释器：逐条执行批量块中的命令，含 BAD 的命令抛出异常，fail_calls 中的第几次调用在执行前失败"""
+    
+    STEP_RE = re.compile(r"^  \(set! \*fcm-batch-results\* \(cons (.*) \*fcm-batch-results\*\)\)$")
+    TOKEN_RE = re.compile(r'\(define \*fcm-batch-results\* \(list "([^"]*)"\)\)')
+    
+    def __init__(self):
+        self.results = []
+        self.calls = 0
+        self.fail_calls = set()
+        self.executed = []
+        self.file = Mock()
+    
+    def scheme_eval(self, code):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise ConnectionError("transport failed")
+        if code.startswith("(reverse"):
+            return list(reversed(self.results))
+        
+        self.results = [self.TOKEN_RE.search(code).group(1)]
+        for line in code.split("\n"):
+            match = self.STEP_RE.match(line)
+            if not match:
+                continue
+            step = match.group(1)
+            if "BAD" in step:
+                raise RuntimeError(f"error in {step}")
+            self.executed.append(step)
+            self.results.insert(0, "NOOP" not in step)
+        return list(reversed(self.results))[1:]
+
+
+@pytest.fixture
+def wrapper():
+    """创建带模拟求解器的 FluentWrapper"""
+    wrapper = FluentWrapper(config_path="nonexistent.json")
+    wrapper.session = Mock()
+    wrapper.solver = FakeSchemeSolver()
+    return wrapper
+
+
+class TestExecuteBatch:
+    """测试批量命令执行"""
+    
+    def test_single_remote_call(self, wrapper):
+        """测试多条命令合并为一次远程调用"""
+        commands = [f"define/models/energy yes {i}" for i in range(100)]
+        
+        results = wrapper.execute_batch(commands)
+        
+        assert wrapper.solver.calls == 1
+        assert [r["status"] for r in results] == ["ok"] * 100
+        assert [r["index"] for r in results] == list(range(100))
+    
+    def test_tui_commands_escaped(self, wrapper):
+        """测试 TUI 命令被转义并包装"""
+        wrapper.execute_batch(['file/read-case "a b.cas"'])
+        
+        assert wrapper.solver.executed == ['(ti-menu-load-string "file/read-case \\"a b.cas\\"")']
+    
+    def test_failure_located_and_batch_continues(self, wrapper):
+        """测试定位出错命令并继续执行剩余命令"""
+        commands = ["ok 0", "ok 1", "BAD 2", "ok 3", "NOOP 4"]
+        
+        results = wrapper.execute_batch(commands)
+        
+        assert [r["status"] for r in results] == ["ok", "ok", "failed", "ok", "failed"]
+        assert "BAD" in results[2]["error"]
+    
+    def test_stop_on_error(self, wrapper):
+        """测试出错后停止"""
+        results = wrapper.execute_batch(["(a)", "(BAD)", "(c)"], mode="scheme", stop_on_error=True)
+        
+        assert [r["status"] for r in results] == ["ok", "failed", "skipped"]
+    
+    def test_chunk_size(self, wrapper):
+        """测试按块分批"""
+        wrapper.execute_batch([f"(cmd {i})" for i in range(10)], mode="scheme", chunk_size=4)
+        
+        assert wrapper.solver.calls == 3
+    
+    def test_chunk_not_sent_is_not_reported_ok(self, wrapper):
+        """测试批次调用在执行前失败时不沿用上一批次的结果"""
+        wrapper.solver.fail_calls = {2}
+        
+        results = wrapper.execute_batch([f"(cmd {i})" for i in range(4)], mode="scheme", chunk_size=2)
+        
+        assert [r["status"] for r in results] == ["ok", "ok", "unknown", "unknown"]
+        assert wrapper.solver.executed == ["(begin (cmd 0) #t)", "(begin (cmd 1) #t)"]
+    
+    def test_unknown_progress_not_resent(self, wrapper):
+        """测试无法查询进度时停止，不重新发送可能已执行的命令"""
+        wrapper.solver.fail_calls = {2}
+        
+        results = wrapper.execute_batch(["(a)", "(BAD)", "(c)", "(d)"], mode="scheme", chunk_size=3)
+        
+        assert [r["status"] for r in results] == ["unknown", "unknown", "unknown", "skipped"]
+        assert wrapper.solver.executed == ["(begin (a) #t)"]
+        assert wrapper.solver.calls == 2
+    
+    def test_journal_mode(self, wrapper):
+        """测试 journal 模式写出临时文件并一次读入"""
+        contents = {}
+        
+        def read_journal(file_name_list):
+            with open(file_name_list[0], encoding="utf-8") as f:
+                contents["text"] = f.read()
+        
+        wrapper.solver.file.read_journal.side_effect = read_journal
+        results = wrapper.execute_batch(["solve/initialize/initialize-flow", "solve/iterate 10"], mode="journal")
+        
+        assert [r["status"] for r in results] == ["ok", "ok"]
+        assert "solve/iterate 10\n" in contents["text"]
+    
+    def test_invalid_mode(self, wrapper):
+        """测试无效模式"""
+        with pytest.raises(ValidationError):
+            wrapper.execute_batch(["x"], mode="gui")
+    
+    def test_requires_session(self):
+        """测试会话未启动"""
+        with pytest.raises(FluentSessionError):
+            FluentWrapper(config_path="nonexistent.json").execute_batch(["x"])
+
+
+
+class TestHotReloadUDF:
+    """测试 UDF 热重载"""
+    
+    @pytest.fixture
+    def udf_wrapper(self, tmp_path):
+        """创建带模拟求解器的 FluentWrapper（禁用构建缓存）"""
+        wrapper = FluentWrapper(config_path="nonexistent.json")
+        wrapper.session = Mock()
+        wrapper.solver = Mock()
+        wrapper.udf_cache = None
+        source = tmp_path / "adjust.c"
+        source.write_text("DEFINE_ADJUST(adjust, d) {}\n")
+        wrapper.source = source
+        return wrapper
+    
+    def test_reload_uses_versioned_library(self, udf_wrapper):
+        """测试每次重载使用新的版本化库名并卸载旧库"""
+        functions = udf_wrapper.solver.tui.define.user_defined.compiled_functions
+        
+        first = udf_wrapper.hot_reload_udf(str(udf_wrapper.source))
+        udf_wrapper.source.write_text("DEFINE_ADJUST(adjust, d) { /* tuned */ }\n")
+        second = udf_wrapper.hot_reload_udf(str(udf_wrapper.source))
+        
+        assert first["library"] == "libudf_v1"
+        assert second["library"] == "libudf_v2"
+        assert second["changed"] == [str(udf_wrapper.source)]
+        functions.unload.assert_called_once_with("libudf_v1")
+        functions.load.assert_called_with("libudf_v2")
+        udf_wrapper.solver.file.read_case.assert_not_called()
+    
+    def test_unchanged_sources_skip_reload(self, udf_wrapper):
+        """测试源文件未变化时不重新编译"""
+        udf_wrapper.hot_reload_udf(str(udf_wrapper.source))
+        result = udf_wrapper.hot_reload_udf(str(udf_wrapper.source))
+        
+        assert not result["reloaded"]
+        assert udf_wrapper.solver.tui.define.user_defined.compiled_functions.compile.call_count == 1
+    
+    def test_hooks_rebound_to_new_library(self, udf_wrapper):
+        """测试钩子重新绑定到新库"""
+        udf_wrapper.hot_reload_udf(str(udf_wrapper.source))
+        udf_wrapper.bind_udf_hook("adjust", "adjust")
+        udf_wrapper.source.write_text("DEFINE_ADJUST(adjust, d) { }\n")
+        
+        result = udf_wrapper.hot_reload_udf(str(udf_wrapper.source))
+        
+        block = udf_wrapper.solver.scheme_eval.call_args[0][0]
+        assert '\\"adjust::libudf_v2\\"' in block
+        assert result["rebound"] == 1
+    
+    def test_binding_template_requires_placeholder(self, udf_wrapper):
+        """测试绑定模板必须包含 {lib}"""
+        with pytest.raises(ValidationError):
+            udf_wrapper.register_udf_binding("define/user-defined/function-hooks/adjust adjust")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
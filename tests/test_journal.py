@@ -0,0 +1,185 @@
+"""
+单元测试 - Journal 记录与批处理回放
+"""
+
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+from src.fluent_integration.exceptions import FluentSolveError, FluentStartupError, ValidationError
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.journal import JournalRecorder, optimize_entries, replay_journal
+
+
+def make_wrapper():
+    """创建模拟 FluentWrapper"""
+    wrapper = FluentWrapper(config_path="nonexistent.json")
+    wrapper.session = Mock()
+    wrapper.solver = Mock()
+    wrapper.udf_cache = None
+    return wrapper
+
+
+class TestJournalOptimization:
+    """测试 journal 优化"""
+    
+    def test_consecutive_settings_merged(self):
+        """测试连续的同一设置只保留最后一条"""
+        recorder = JournalRecorder()
+        recorder.record("tui", command="solve/set/under-relaxation/pressure 0.3")
+        recorder.record("tui", command="solve/set/under-relaxation/pressure 0.2")
+        recorder.record("tui", command="define/models/energy yes")
+        recorder.record("tui", command="define/models/energy yes")
+        
+        assert recorder.commands() == [
+            "/solve/set/under-relaxation/pressure 0.2",
+            "/define/models/energy yes"
+        ]
+    
+    def test_zone_arguments_not_merged(self):
+        """测试只有 zone ID 等参数不同的命令都保留"""
+        recorder = JournalRecorder()
+        recorder.record("tui", command="define/boundary-conditions/zone-type 5 wall")
+        recorder.record("tui", command="define/boundary-conditions/zone-type 6 wall")
+        recorder.record("tui", command="define/boundary-conditions/copy-bc 3 4 ()")
+        recorder.record("tui", command="define/boundary-conditions/copy-bc 3 5 ()")
+        recorder.record("tui", command="solve/set/under-relaxation pressure 0.3")
+        recorder.record("tui", command="solve/set/under-relaxation mom 0.5")
+        
+        assert recorder.commands() == [
+            "/define/boundary-conditions/zone-type 5 wall",
+            "/define/boundary-conditions/zone-type 6 wall",
+            "/define/boundary-conditions/copy-bc 3 4 ()",
+            "/define/boundary-conditions/copy-bc 3 5 ()",
+            "/solve/set/under-relaxation pressure 0.3",
+            "/solve/set/under-relaxation mom 0.5"
+        ]
+    
+    def test_iterations_merged(self):
+        """测试连续迭代合并，TUI 迭代命令同样识别"""
+        recorder = JournalRecorder()
+        recorder.record("iterate", iterations=10)
+        recorder.record("iterate", iterations=10)
+        recorder.record("tui", command="/solve/iterate 5")
+        
+        assert recorder.commands() == ["/solve/iterate 25"]
+    
+    def test_settings_before_read_dropped(self):
+        """测试读入案例前的设置和读入被覆盖"""
+        recorder = JournalRecorder()
+        recorder.record("load_case", case_file="a.cas.h5")
+        recorder.record("tui", command="define/models/energy yes")
+        recorder.record("load_case", case_file="b.cas.h5")
+        recorder.record("iterate", iterations=100)
+        
+        commands = recorder.commands()
+        
+        assert len(commands) == 2
+        assert commands[0].startswith("/file/read-case ") and commands[0].endswith('b.cas.h5"')
+    
+    def test_side_effects_kept(self):
+        """测试 Scheme 和动作类命令不去重"""
+        recorder = JournalRecorder()
+        for _ in range(2):
+            recorder.record("scheme", command="(set! n (+ n 1))")
+            recorder.record("tui", command="solve/initialize/initialize-flow")
+        
+        assert len(recorder.commands()) == 4
+        assert len(optimize_entries(recorder.entries)) == 4
+    
+    def test_journal_text(self, tmp_path):
+        """测试保存的 journal 以退出命令结尾"""
+        recorder = JournalRecorder()
+        recorder.record("iterate", iterations=10)
+        
+        path = recorder.save(str(tmp_path / "run.jou"))
+        
+        assert Path(path).read_text().splitlines()[-2:] == ["/solve/iterate 10", "/exit yes"]
+        assert recorder.to_journal(optimize=False, exit_when_done=False).count("/exit") == 0
+    
+    def test_unknown_operation(self):
+        """测试未知操作"""
+        with pytest.raises(ValidationError):
+            JournalRecorder().record("mesh", command="x")
+
+
+class TestWrapperRecording:
+    """测试 FluentWrapper 记录操作"""
+    
+    def test_records_successful_calls(self, tmp_path):
+        """测试记录成功调用，停止后不再记录"""
+        case = tmp_path / "pipe.cas.h5"
+        case.write_bytes(b"case")
+        wrapper = make_wrapper()
+        
+        recorder = wrapper.start_recording()
+        wrapper.load_case(str(case))
+        wrapper.execute_tui_command("define/models/energy yes")
+        wrapper.execute_tui_command("(display 1)", mode="scheme")
+        wrapper.iterate(20, chunk_size=10)
+        wrapper.load_udf("libudf")
+        wrapper.save_case_data(str(tmp_path / "out.cas.h5"))
+        assert wrapper.stop_recording() is recorder
+        wrapper.iterate(5)
+        
+        assert [entry["kind"] for entry in recorder.entries] == [
+            "read", "setting", "scheme", "iterate", "iterate", "udf", "write"
+        ]
+        assert "/solve/iterate 20" in recorder.commands()
+    
+    def test_failed_calls_not_recorded(self):
+        """测试失败的调用不被记录"""
+        wrapper = make_wrapper()
+        wrapper.solver.execute_command.side_effect = RuntimeError("bad command")
+        
+        recorder = wrapper.start_recording()
+        assert not wrapper.execute_tui_command("define/bogus")
+        
+        assert recorder.entries == []
+
+
+class TestReplayJournal:
+    """测试批处理回放"""
+    
+    @pytest.fixture
+    def journal(self, tmp_path):
+        """创建 journal 文件"""
+        path = tmp_path / "run.jou"
+        path.write_text("/exit yes\n")
+        return path
+    
+    def fake_fluent(self, tmp_path, exit_code):
+        """创建模拟的 fluent 可执行文件，打印参数后以指定代码退出"""
+        script = tmp_path / "fluent"
+        script.write_text(f"#!{sys.executable}\nimport sys\nprint(' '.join(sys.argv[1:]))\nsys.exit({exit_code})\n")
+        script.chmod(0o755)
+        return str(script)
+    
+    @pytest.mark.skipif(sys.platform == "win32", reason="uses a shebang script")
+    def test_batch_launch(self, tmp_path, journal):
+        """测试以批处理参数启动并保存控制台输出"""
+        result = replay_journal(str(journal), processor_count=4, fluent_path=self.fake_fluent(tmp_path, 0))
+        
+        transcript = Path(result["transcript"]).read_text()
+        assert transcript.startswith("3ddp -g -t4 -i ")
+        assert result["returncode"] == 0
+    
+    @pytest.mark.skipif(sys.platform == "win32", reason="uses a shebang script")
+    def test_failure_raises(self, tmp_path, journal):
+        """测试非零退出码"""
+        with pytest.raises(FluentSolveError):
+            replay_journal(str(journal), fluent_path=self.fake_fluent(tmp_path, 2))
+    
+    def test_missing_executable(self, tmp_path, journal):
+        """测试找不到 Fluent"""
+        with pytest.raises(FluentStartupError):
+            replay_journal(str(journal), fluent_path=str(tmp_path / "missing-fluent"))
+    
+    def test_missing_journal(self, tmp_path):
+        """测试 journal 不存在"""
+        with pytest.raises(ValidationError):
+            replay_journal(str(tmp_path / "none.jou"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,238 @@
+"""
+单元测试 - 多个调用方共享一个 Fluent 会话
+"""
+
+import threading
+import pytest
+from src.fluent_integration.exceptions import FluentSessionError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.multiplexer import SessionMultiplexer
+
+
+def make_multiplexer(backend=None, **kwargs):
+    """已启动模拟会话的多路复用器"""
+    backend = backend or FakeFluentBackend()
+    wrapper = FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+    wrapper.start_fluent()
+    return SessionMultiplexer(wrapper, config_path="nonexistent.json", **kwargs), backend
+
+
+def hold(mux):
+    """让分发线程阻塞在一个调用上，返回放行事件"""
+    started, release = threading.Event(), threading.Event()
+    
+    def blocker(wrapper):
+        started.set()
+        release.wait(5)
+    
+    mux.submit(blocker, caller="blocker")
+    assert started.wait(5)
+    return release
+
+
+class TestSessionMultiplexer:
+    """测试会话多路复用器"""
+    
+    def test_priority_order(self):
+        """测试排队的调用按优先级执行，同优先级先到先执行"""
+        mux, _ = make_multiplexer()
+        order = []
+        release = hold(mux)
+        
+        futures = [
+            mux.submit(lambda wrapper, name=name: order.append(name), caller=name, priority=priority)
+            for name, priority in (("low", 0), ("high", 5), ("low2", 0), ("urgent", 9))
+        ]
+        release.set()
+        for future in futures:
+            future.result(5)
+        mux.close()
+        
+        assert order == ["urgent", "high", "low", "low2"]
+    
+    def test_calls_never_overlap(self):
+        """测试多个线程的调用在会话上串行执行"""
+        mux, _ = make_multiplexer()
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+        
+        def work(wrapper):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            threading.Event().wait(0.002)
+            with lock:
+                state["active"] -= 1
+        
+        def caller(name):
+            for _ in range(10):
+                mux.call(work, caller=name)
+        
+        threads = [threading.Thread(target=caller, args=(f"thread-{index}",)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        mux.close()
+        
+        assert state["peak"] == 1
+        assert sum(item["requests"] for item in mux.metrics()["callers"].values()) == 40
+    
+    def test_report_queries_merged(self):
+        """测试排队的 compute_reports 合并为一次远程调用，结果按调用方拆分"""
+        mux, backend = make_multiplexer()
+        release = hold(mux)
+        backend.reset_counters()
+        
+        drag = mux.client("dashboard").submit("compute_reports", ["drag"])
+        both = mux.client("controller").submit("compute_reports", ["lift", "drag"])
+        release.set()
+        
+        assert set(drag.result(5)) == {"drag"}
+        assert set(both.result(5)) == {"lift", "drag"}
+        assert drag.result()["drag"] == both.result()["drag"]
+        assert backend.calls["report"] == 1
+        assert mux.metrics()["merged_report_calls"] == 1
+        mux.close()
+    
+    def test_writes_split_read_batches(self):
+        """测试修改状态的调用不与其前后的只读查询合并"""
+        mux, backend = make_multiplexer()
+        release = hold(mux)
+        backend.reset_counters()
+        
+        first = mux.submit("compute_reports", ["drag"])
+        write = mux.submit("iterate", 2)
+        second = mux.submit("compute_reports", ["drag"])
+        release.set()
+        
+        assert write.result(5) == 2
+        first.result(5)
+        second.result(5)
+        assert backend.calls["report"] == 2
+        mux.close()
+    
+    def test_client_proxies_wrapper_methods(self):
+        """测试客户端像 FluentWrapper 一样调用并按调用方统计"""
+        mux, _ = make_multiplexer()
+        controller = mux.client("controller", priority=10)
+        
+        assert controller.iterate(3) == 3
+        assert controller.validate_command("solve/iterate 10")["valid"]
+        with pytest.raises(AttributeError):
+            controller.no_such_method()
+        
+        metrics = mux.metrics()
+        assert metrics["callers"]["controller"]["requests"] == 2
+        assert metrics["callers"]["controller"]["max_latency"] > 0
+        mux.close()
+    
+    def test_errors_reach_only_their_caller(self):
+        """测试合并的查询失败时逐个执行，只有出错的调用方收到异常"""
+        mux, _ = make_multiplexer()
+        definitions = mux.wrapper.session.solver.solution.report_definitions
+        compute = definitions.compute
+        
+        def strict_compute(report_defs):
+            if "missing" in report_defs:
+                raise KeyError("missing")
+            return compute(report_defs=report_defs)
+        
+        definitions.compute = lambda report_defs: strict_compute(report_defs)
+        release = hold(mux)
+        good = mux.client("good").submit("compute_reports", ["drag"])
+        bad = mux.client("bad").submit("compute_reports", ["missing"])
+        release.set()
+        
+        assert set(good.result(5)) == {"drag"}
+        with pytest.raises(FluentSessionError):
+            bad.result(5)
+        
+        metrics = mux.metrics()
+        assert metrics["callers"]["good"]["errors"] == 0
+        assert metrics["callers"]["bad"]["errors"] == 1
+        assert metrics["merged_report_calls"] == 0
+        mux.close()
+    
+    def test_invalid_report_arguments_not_merged(self):
+        """测试参数不是报告名列表的 compute_reports 不参与合并，分发线程继续运行"""
+        mux, _ = make_multiplexer()
+        release = hold(mux)
+        empty = mux.submit("compute_reports", None)
+        drag = mux.submit("compute_reports", ["drag"])
+        bad = mux.submit("compute_reports", 5)
+        release.set()
+        
+        assert empty.result(5) == {}
+        assert set(drag.result(5)) == {"drag"}
+        with pytest.raises(TypeError):
+            bad.result(5)
+        assert mux.call("iterate", 1) == 1
+        mux.close()
+    
+    def test_incomplete_merged_result_falls_back(self):
+        """测试合并结果缺少某个报告时逐个执行"""
+        mux, _ = make_multiplexer()
+        compute = mux.wrapper.compute_reports
+        mux.wrapper.compute_reports = lambda names: {
+            name: value for name, value in compute(names).items() if len(names) == 1 or name != "lift"
+        }
+        release = hold(mux)
+        drag = mux.submit("compute_reports", ["drag"])
+        lift = mux.submit("compute_reports", ["lift"])
+        release.set()
+        
+        assert set(drag.result(5)) == {"drag"}
+        assert set(lift.result(5)) == {"lift"}
+        assert mux.metrics()["merged_report_calls"] == 0
+        mux.close()
+    
+    def test_dispatcher_survives_batch_errors(self):
+        """测试批处理本身出错时只让该批调用失败，之后的调用照常执行"""
+        mux, _ = make_multiplexer()
+        release = hold(mux)
+        first = mux.submit("validate_command", "solve/iterate 10")
+        second = mux.submit("complete_command", "solve/it")
+        mux._execute_reads = lambda batch: 1 / 0
+        release.set()
+        
+        with pytest.raises(ZeroDivisionError):
+            first.result(5)
+        with pytest.raises(ZeroDivisionError):
+            second.result(5)
+        assert mux.call("iterate", 2) == 2
+        mux.close()
+    
+    def test_reentrant_call_runs_inline(self):
+        """测试分发线程内的调用直接执行而不是死锁"""
+        mux, _ = make_multiplexer()
+        
+        def nested(wrapper):
+            return mux.call("iterate", 4, caller="nested") + 1
+        
+        assert mux.call(nested, caller="outer") == 5
+        mux.close()
+    
+    def test_queue_depth_and_close(self):
+        """测试排队深度统计；close(wait=False) 取消排队中的调用并拒绝新的调用"""
+        mux, _ = make_multiplexer()
+        release = hold(mux)
+        queued = [mux.submit("iterate", 1, caller="worker") for _ in range(3)]
+        
+        metrics = mux.metrics()
+        assert metrics["queue_depth"] == 3
+        assert metrics["callers"]["worker"]["queued"] == 3
+        
+        closer = threading.Thread(target=mux.close, kwargs={"wait": False})
+        closer.start()
+        release.set()
+        closer.join(5)
+        
+        assert all(future.cancelled() for future in queued)
+        with pytest.raises(RuntimeError):
+            mux.submit("iterate", 1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
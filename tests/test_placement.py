@@ -0,0 +1,163 @@
+"""
+单元测试 - CPU 亲和性和 NUMA 放置
+"""
+
+import contextlib
+import os
+import pytest
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.placement import (
+    CorePlacement,
+    NodeTopology,
+    format_cpulist,
+    parse_cpulist
+)
+from src.fluent_integration.session_pool import FluentSessionPool
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    """两个 NUMA 节点、每节点 4 个物理核、每核 2 个超线程的伪 sysfs"""
+    for node, cpus in ((0, "0-3,8-11"), (1, "4-7,12-15")):
+        path = tmp_path / "devices" / "system" / "node" / f"node{node}"
+        path.mkdir(parents=True)
+        (path / "cpulist").write_text(cpus + "\n")
+    for cpu in range(16):
+        path = tmp_path / "devices" / "system" / "cpu" / f"cpu{cpu}" / "topology"
+        path.mkdir(parents=True)
+        (path / "thread_siblings_list").write_text(f"{cpu % 8},{cpu % 8 + 8}\n")
+    return str(tmp_path)
+
+
+class TestTopology:
+    """测试拓扑发现"""
+    
+    def test_cpulist_roundtrip(self):
+        """测试 sysfs CPU 列表格式"""
+        assert parse_cpulist("0-3,8,10-11") == [0, 1, 2, 3, 8, 10, 11]
+        assert format_cpulist([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
+        with pytest.raises(ValidationError):
+            parse_cpulist("0-x")
+    
+    def test_discover_numa_and_siblings(self, sysfs):
+        """测试按 NUMA 节点和超线程分组"""
+        topology = NodeTopology.discover(sysfs)
+        
+        assert topology.nodes[0] == [[0, 8], [1, 9], [2, 10], [3, 11]]
+        assert topology.nodes[1][0] == [4, 12]
+        assert topology.core_count == 8
+    
+    def test_discover_respects_allowed_cpus(self, sysfs):
+        """测试只使用允许运行的 CPU"""
+        topology = NodeTopology.discover(sysfs, allowed_cpus={0, 1, 8, 9})
+        
+        assert topology.nodes == {0: [[0, 8], [1, 9]]}
+    
+    def test_discover_without_numa(self, tmp_path):
+        """测试没有 NUMA 信息时视为单节点"""
+        path = tmp_path / "devices" / "system" / "cpu"
+        path.mkdir(parents=True)
+        (path / "online").write_text("0-3\n")
+        
+        topology = NodeTopology.discover(str(tmp_path))
+        
+        assert topology.nodes == {0: [[0], [1], [2], [3]]}
+
+
+class TestCorePlacement:
+    """测试核分配"""
+    
+    def test_disjoint_sessions_within_numa_node(self, sysfs):
+        """测试会话之间不重叠，能放进单个节点时不跨节点"""
+        placement = CorePlacement(NodeTopology.discover(sysfs))
+        
+        first = placement.allocate(4)
+        second = placement.allocate(2)
+        third = placement.allocate(2)
+        
+        assert first.cpus == [0, 1, 2, 3] and first.nodes == [0]
+        assert second.nodes == [1] and third.nodes == [1]
+        assert not set(second.cpus) & set(third.cpus)
+        assert placement.free_cores() == {0: 0, 1: 0}
+    
+    def test_best_fit_keeps_whole_node_free(self, sysfs):
+        """测试小会话放进空闲核最少的节点，为大会话保留整个节点"""
+        placement = CorePlacement(NodeTopology.discover(sysfs))
+        placement.allocate(1)
+        
+        placement.allocate(2)
+        large = placement.allocate(4)
+        
+        assert large.nodes == [1]
+    
+    def test_spans_nodes_and_releases(self, sysfs):
+        """测试超过单节点的会话跨节点分配，归还后核可复用"""
+        placement = CorePlacement(NodeTopology.discover(sysfs))
+        
+        wide = placement.allocate(6)
+        assert wide.nodes == [0, 1] and len(wide.cpus) == 6
+        assert placement.allocate(4) is None
+        
+        placement.release(wide)
+        assert placement.free_cores() == {0: 4, 1: 4}
+        assert placement.placements() == []
+    
+    def test_smt_threads(self, sysfs):
+        """测试使用超线程时每个硬件线程单独分配"""
+        placement = CorePlacement(NodeTopology.discover(sysfs), use_smt=True)
+        
+        assert placement.allocate(8).cpus == [0, 1, 2, 3, 8, 9, 10, 11]
+
+
+class TestPinnedLaunch:
+    """测试启动时的 CPU 绑定"""
+    
+    @pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="CPU affinity not supported")
+    def test_solver_inherits_cpu_set(self):
+        """测试求解器进程继承绑定的核，启动后恢复线程的亲和性"""
+        before = os.sched_getaffinity(0)
+        cpu = min(before)
+        backend = FakeFluentBackend()
+        wrapper = FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+        
+        wrapper.start_fluent(processor_count=1, cpu_set=[cpu])
+        
+        session = backend.sessions[0]
+        assert session.cpu_affinity == {cpu}
+        assert session.options["additional_arguments"] == "-affinity=off"
+        assert wrapper.launch_options["cpu_set"] == [cpu]
+        assert os.sched_getaffinity(0) == before
+    
+    def test_pool_assigns_and_reports_placements(self, sysfs, monkeypatch):
+        """测试会话池为每个会话分配核并在停止后归还"""
+        backend = FakeFluentBackend()
+        placement = CorePlacement(NodeTopology.discover(sysfs))
+        pool = FluentSessionPool(
+            size=2,
+            session_options=[{"processor_count": 4}, {"processor_count": 4}],
+            config_path="nonexistent.json",
+            wrapper_factory=lambda: FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent),
+            memory_probe=lambda wrapper: None,
+            placement=placement
+        )
+        # 伪拓扑中的 CPU 编号在本机上不一定存在，只记录分配结果而不实际绑定
+        pool_cpus = []
+        monkeypatch.setattr(
+            "src.fluent_integration.fluent_wrapper.pinned",
+            lambda cpus: pool_cpus.append(cpus) or contextlib.nullcontext()
+        )
+        
+        pool.warm()
+        
+        placements = pool.stats()["placements"]
+        assert sorted(item["numa_nodes"][0] for item in placements) == [0, 1]
+        assert not set(pool_cpus[0]) & set(pool_cpus[1])
+        
+        pool.close()
+        assert placement.free_cores() == {0: 4, 1: 4}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
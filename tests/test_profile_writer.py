@@ -0,0 +1,97 @@
+"""
+单元测试 - Profile 文件写出器
+"""
+
+import pytest
+import numpy as np
+from src.fluent_integration.profile_writer import ProfileWriter
+from src.fluent_integration.exceptions import ValidationError
+
+
+class TestProfileWriter:
+    """测试 Profile 写出器"""
+    
+    @pytest.fixture
+    def writer(self):
+        """创建小分块的写出器，覆盖多块写入路径"""
+        return ProfileWriter(precision=4, chunk_size=3)
+    
+    def test_write_point_profile(self, writer, tmp_path):
+        """测试写出 point 类型 profile"""
+        output = tmp_path / "inlet.prof"
+        writer.write(
+            str(output),
+            "inlet",
+            {"x": np.arange(5.0), "y": np.zeros(5), "u": np.linspace(0, 1, 5)}
+        )
+        
+        lines = output.read_text().splitlines()
+        assert lines[0] == "((inlet point 5)"
+        assert lines[1] == "(x"
+        assert lines[2] == "0.0000e+00"
+        assert lines[7] == ")"
+        assert "(u" in lines
+        assert lines[-1] == ")"
+        # 3 个字段 x 5 个值 + 每个字段 2 行括号 + 首尾各 1 行
+        assert len(lines) == 3 * 5 + 3 * 2 + 2
+    
+    def test_missing_coordinate_field(self, writer, tmp_path):
+        """测试缺少坐标字段"""
+        with pytest.raises(ValidationError) as exc_info:
+            writer.write(str(tmp_path / "bad.prof"), "bad", {"x": [0.0], "u": [1.0]})
+        
+        assert "y" in str(exc_info.value)
+    
+    def test_mismatched_lengths(self, writer, tmp_path):
+        """测试字段长度不一致"""
+        with pytest.raises(ValidationError):
+            writer.write(
+                str(tmp_path / "bad.prof"), "bad",
+                {"r": [0.0, 0.5], "t": [300.0]},
+                profile_type="radial"
+            )
+    
+    def test_non_finite_values_rejected(self, writer, tmp_path):
+        """测试 NaN 值被拒绝"""
+        with pytest.raises(ValidationError):
+            writer.write(
+                str(tmp_path / "bad.prof"), "bad",
+                {"z": [0.0, 1.0], "t": [300.0, np.nan]},
+                profile_type="axial"
+            )
+    
+    def test_write_from_csv(self, writer, tmp_path):
+        """测试从 CSV 表格写出"""
+        table = tmp_path / "table.csv"
+        table.write_text("x,y,temp\n0,0,300\n1,0,310\n")
+        output = tmp_path / "wall.prof"
+        
+        writer.write_from_table(str(output), str(table), "wall", rename={"temp": "temperature"})
+        
+        content = output.read_text()
+        assert content.startswith("((wall point 2)")
+        assert "(temperature\n3.0000e+02\n3.1000e+02\n)" in content
+    
+    def test_csv_keeps_fluent_field_names(self, writer, tmp_path):
+        """测试 CSV 列名中的连字符原样保留"""
+        table = tmp_path / "table.csv"
+        table.write_text("x,y,x-velocity,y-velocity\n0,0,1.5,0\n1,0,2.5,0\n")
+        output = tmp_path / "inlet.prof"
+        
+        writer.write_from_table(str(output), str(table), "inlet", columns=["x", "y", "x-velocity"])
+        
+        content = output.read_text()
+        assert "(x-velocity\n1.5000e+00\n2.5000e+00\n)" in content
+        assert "y-velocity" not in content
+    
+    def test_unsupported_table_format(self, writer, tmp_path):
+        """测试不支持的表格格式"""
+        table = tmp_path / "table.xlsx"
+        table.write_text("")
+        
+        with pytest.raises(ValidationError):
+            writer.load_table(str(table))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
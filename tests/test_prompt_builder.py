@@ -0,0 +1,166 @@
+"""
+单元测试 - 提示词构建器与示例 UDF 检索索引
+"""
+
+import pytest
+from src.copilot_client.prompt_builder import PromptBuilder, estimate_tokens
+from src.copilot_client.udf_index import UDFSnippetIndex
+
+
+PROFILE_UDF = """#include "udf.h"
+
+/* Parabolic inlet velocity profile */
+DEFINE_PROFILE(parabolic_velocity, thread, position)
+{
+    face_t f;
+    begin_f_loop(f, thread)
+    {
+        F_PROFILE(f, thread, position) = 1.0;
+    }
+    end_f_loop(f, thread)
+}
+
+DEFINE_PROPERTY(temperature_viscosity, c, t)
+{
+    return 1.0e-3 * C_T(c, t) / 300.0;
+}
+"""
+
+SOURCE_UDF = """#include "udf.h"
+
+DEFINE_SOURCE(momentum_source, c, t, dS, eqn)
+{
+    dS[eqn] = 0.0;
+    return -0.5 * C_U(c, t);
+}
+"""
+
+
+class TestUDFSnippetIndex:
+    """测试 UDF 片段索引"""
+    
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        """创建示例语料目录"""
+        corpus = tmp_path / "udfs"
+        corpus.mkdir()
+        (corpus / "profile.c").write_text(PROFILE_UDF)
+        (corpus / "source.c").write_text(SOURCE_UDF)
+        return corpus
+    
+    def test_split_by_define_macro(self, corpus, tmp_path):
+        """测试按 DEFINE_ 宏切分片段"""
+        index = UDFSnippetIndex.from_directories([str(corpus)])
+        
+        macros = sorted(snippet["macro"] for snippet in index.snippets.values())
+        assert macros == ["DEFINE_PROFILE", "DEFINE_PROPERTY", "DEFINE_SOURCE"]
+        
+        profile = next(s for s in index.snippets.values() if s["macro"] == "DEFINE_PROFILE")
+        assert profile["text"].startswith("/* Parabolic inlet velocity profile */")
+        assert profile["text"].endswith("}")
+        assert "DEFINE_PROPERTY" not in profile["text"]
+    
+    def test_search_ranks_by_macro_and_keywords(self, corpus):
+        """测试 BM25 检索按宏类型和关键词排序"""
+        index = UDFSnippetIndex.from_directories([str(corpus)])
+        
+        results = index.search("velocity profile at inlet", macro="DEFINE_PROFILE", top_k=2)
+        assert results[0]["name"] == "parabolic_velocity"
+        
+        results = index.search("momentum source term", macro="DEFINE_SOURCE", top_k=1)
+        assert results[0]["name"] == "momentum_source"
+    
+    def test_incremental_update(self, corpus, tmp_path):
+        """测试增量更新和持久化"""
+        index_path = tmp_path / "index.json"
+        index = UDFSnippetIndex.from_directories([str(corpus)], index_path=str(index_path))
+        assert index_path.exists()
+        
+        reloaded = UDFSnippetIndex(str(index_path))
+        stats = reloaded.update([str(corpus)])
+        assert stats == {"added": 0, "updated": 0, "removed": 0, "unchanged": 2}
+        
+        (corpus / "source.c").unlink()
+        stats = reloaded.update([str(corpus)])
+        assert stats["removed"] == 1
+        assert "DEFINE_SOURCE" not in {s["macro"] for s in reloaded.snippets.values()}
+
+
+class TestPromptBuilderRetrieval:
+    """测试提示词构建中的示例检索"""
+    
+    @pytest.fixture
+    def index(self):
+        """创建内存索引"""
+        index = UDFSnippetIndex()
+        index.add_text("profile.c", PROFILE_UDF)
+        index.add_text("source.c", SOURCE_UDF)
+        return index
+    
+    def test_prompt_includes_examples(self, index):
+        """测试提示词包含检索到的示例"""
+        builder = PromptBuilder(snippet_index=index, example_top_k=1)
+        prompt = builder.build_udf_prompt("Inlet velocity profile", "profile", "inlet_velocity")
+        
+        assert "Reference Examples" in prompt
+        assert "DEFINE_PROFILE(parabolic_velocity" in prompt
+        assert "DEFINE_SOURCE" not in prompt
+    
+    def test_examples_respect_token_budget(self, index):
+        """测试示例片段不超过 token 预算"""
+        builder = PromptBuilder(snippet_index=index, example_top_k=3, example_token_budget=60)
+        examples = builder.retrieve_examples("velocity source viscosity", "profile")
+        
+        assert sum(estimate_tokens(example["text"]) for example in examples) <= 60
+    
+    def test_zero_top_k_returns_no_examples(self, index):
+        """测试 top_k=0 表示不检索示例，而不是退回默认数量"""
+        builder = PromptBuilder(snippet_index=index, example_top_k=3)
+        
+        assert builder.retrieve_examples("velocity profile", "profile", top_k=0) == []
+        assert builder.retrieve_examples("velocity profile", "profile")
+    
+    def test_prompt_without_index(self):
+        """测试未配置索引时不引用示例"""
+        prompt = PromptBuilder().build_udf_prompt("Inlet velocity", "profile", "inlet_velocity")
+        
+        assert "Reference Examples" not in prompt
+        assert "inlet_velocity" in prompt
+
+
+class TestPromptBuilderLayout:
+    """测试前缀稳定的提示词布局"""
+    
+    def test_udf_prompt_starts_with_static_prefix(self):
+        """测试 UDF 提示词以静态前缀开头，任务描述在末尾"""
+        builder = PromptBuilder()
+        first = builder.build_udf_prompt("Inlet velocity", "profile", "inlet_velocity")
+        second = builder.build_udf_prompt("Wall heat flux", "heat_flux", "wall_flux", ["/* ctx */"])
+        
+        prefix = builder.static_prefix("udf")
+        assert first.startswith(prefix)
+        assert second.startswith(prefix)
+        assert first.rstrip().endswith("Description: Inlet velocity")
+    
+    def test_request_prompt_layout(self):
+        """测试 Chat 用户消息按语言提示、上下文、任务的顺序排列"""
+        builder = PromptBuilder()
+        first = builder.build_request_prompt("inlet velocity", "c", context=["/* A */"], syntax_hints=["DEFINE_PROFILE"])
+        second = builder.build_request_prompt("wall heat flux", "c", context=["/* B */"], syntax_hints=["DEFINE_PROFILE"])
+        
+        assert first.startswith("Language: c. Use syntax like: DEFINE_PROFILE")
+        assert second.startswith(first.split("Context:")[0])
+        assert first.endswith("Task:\ninlet velocity")
+        assert builder.build_messages(first)[0]["content"] == PromptBuilder.SYSTEM_PROMPT
+    
+    def test_code_placed_after_instructions(self):
+        """测试待优化代码位于指令之后"""
+        builder = PromptBuilder()
+        prompt = builder.build_optimization_prompt("int x = 0;", "c")
+        
+        assert prompt.startswith(builder.static_prefix("optimization"))
+        assert prompt.index("Optimization goals") < prompt.index("int x = 0;")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
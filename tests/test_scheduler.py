@@ -0,0 +1,225 @@
+"""
+单元测试 - 许可证和核数感知的任务调度
+"""
+
+import json
+import threading
+import pytest
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.scheduler import JobScheduler, LocalLicenseServer, read_state
+
+
+def make_scheduler(cores=8, tokens=None, **kwargs):
+    """使用本地许可证服务器替身的调度器"""
+    server = LocalLicenseServer(tokens or {"cfd_base": 4, "anshpc": 8})
+    return JobScheduler(total_cores=cores, license_server=server, config_path="nonexistent.json", **kwargs)
+
+
+def blocking_job(started, release):
+    """记录启动顺序并等待放行的任务"""
+    def run(job):
+        started.append(job.name)
+        release[job.name].wait(5)
+        return job.name
+    return run
+
+
+class TestLocalLicenseServer:
+    """测试许可证令牌池"""
+    
+    def test_checkout_all_or_nothing(self):
+        """测试任一特性不足时全部不检出"""
+        server = LocalLicenseServer({"cfd_base": 1, "anshpc": 2})
+        
+        assert not server.checkout({"cfd_base": 1, "anshpc": 3})
+        assert server.available() == {"cfd_base": 1, "anshpc": 2}
+        assert server.checkout({"cfd_base": 1, "anshpc": 2})
+        assert not server.checkout({"cfd_base": 1})
+        
+        server.checkin({"cfd_base": 1, "anshpc": 2})
+        assert server.available() == server.total()
+
+
+class TestJobScheduler:
+    """测试调度器"""
+    
+    def test_hpc_licenses_beyond_included_cores(self):
+        """测试超出包含核数的每个核占用一个 HPC 许可证"""
+        scheduler = make_scheduler()
+        
+        assert scheduler.licenses_for(4) == {"cfd_base": 1, "anshpc": 0}
+        assert scheduler.licenses_for(8) == {"cfd_base": 1, "anshpc": 4}
+    
+    def test_priority_order(self):
+        """测试资源释放后优先级高的任务先启动"""
+        scheduler = make_scheduler(tokens={"cfd_base": 1, "anshpc": 0})
+        started = []
+        release = {name: threading.Event() for name in ("first", "low", "high")}
+        
+        scheduler.submit(blocking_job(started, release), name="first")
+        scheduler.submit(blocking_job(started, release), name="low", priority=0)
+        scheduler.submit(blocking_job(started, release), name="high", priority=5)
+        for event in release.values():
+            event.set()
+        
+        assert scheduler.wait_all(5)
+        assert started == ["first", "high", "low"]
+    
+    def test_capacity_never_exceeded(self):
+        """测试同时运行的任务不超过核数和许可证"""
+        scheduler = make_scheduler(cores=8, tokens={"cfd_base": 3, "anshpc": 0})
+        lock = threading.Lock()
+        usage = {"cores": 0, "sessions": 0, "peak_cores": 0, "peak_sessions": 0}
+        
+        def run(job):
+            with lock:
+                usage["cores"] += job.cores
+                usage["sessions"] += 1
+                usage["peak_cores"] = max(usage["peak_cores"], usage["cores"])
+                usage["peak_sessions"] = max(usage["peak_sessions"], usage["sessions"])
+            threading.Event().wait(0.02)
+            with lock:
+                usage["cores"] -= job.cores
+                usage["sessions"] -= 1
+        
+        for cores in (4, 2, 2, 1, 4, 1, 3):
+            scheduler.submit(run, cores=cores)
+        
+        assert scheduler.wait_all(5)
+        assert usage["peak_cores"] <= 8
+        assert usage["peak_sessions"] <= 3
+        assert scheduler.stats()["done"] == 7
+    
+    def test_backfill_short_job_before_reservation(self):
+        """测试短任务在不推迟队首任务的前提下提前运行，长任务不能"""
+        scheduler = make_scheduler(cores=8)
+        started = []
+        release = {name: threading.Event() for name in ("running", "wide", "short", "long")}
+        
+        scheduler.submit(blocking_job(started, release), cores=4, name="running", estimated_runtime=60)
+        wide = scheduler.submit(blocking_job(started, release), cores=8, name="wide", priority=1)
+        short = scheduler.submit(blocking_job(started, release), cores=2, name="short", estimated_runtime=10)
+        long = scheduler.submit(blocking_job(started, release), cores=2, name="long", estimated_runtime=600)
+        
+        assert short.status == "running" and short.backfilled
+        assert wide.status == "queued"
+        assert long.status == "queued"
+        
+        for event in release.values():
+            event.set()
+        assert scheduler.wait_all(5)
+        assert started.index("wide") < started.index("long")
+        assert scheduler.stats()["backfilled"] == 1
+    
+    def test_no_backfill_into_unknown_reservation(self):
+        """测试运行中任务没有运行时间估计时，只有不占用队首任务所需资源的任务可以 backfill"""
+        scheduler = make_scheduler(cores=10)
+        started = []
+        release = {name: threading.Event() for name in ("running", "wide", "small", "medium")}
+        
+        scheduler.submit(blocking_job(started, release), cores=6, name="running")
+        wide = scheduler.submit(blocking_job(started, release), cores=8, name="wide", priority=1)
+        medium = scheduler.submit(blocking_job(started, release), cores=3, name="medium", estimated_runtime=3600)
+        small = scheduler.submit(blocking_job(started, release), cores=2, name="small", estimated_runtime=3600)
+        
+        assert medium.status == "queued"
+        assert small.status == "running" and small.backfilled
+        assert wide.status == "queued"
+        
+        for event in release.values():
+            event.set()
+        assert scheduler.wait_all(5)
+        assert started.index("wide") < started.index("medium")
+    
+    def test_strict_order_without_backfill(self):
+        """测试关闭 backfill 时小任务等待队首任务"""
+        scheduler = make_scheduler(cores=8, backfill=False)
+        started = []
+        release = {name: threading.Event() for name in ("running", "wide", "short")}
+        
+        scheduler.submit(blocking_job(started, release), cores=6, name="running", estimated_runtime=60)
+        scheduler.submit(blocking_job(started, release), cores=8, name="wide", priority=1)
+        short = scheduler.submit(blocking_job(started, release), cores=2, name="short", estimated_runtime=10)
+        
+        assert short.status == "queued"
+        for event in release.values():
+            event.set()
+        assert scheduler.wait_all(5)
+        assert started == ["running", "wide", "short"]
+    
+    def test_oversized_job_rejected(self):
+        """测试永远无法满足的资源需求在提交时拒绝"""
+        scheduler = make_scheduler(cores=8, tokens={"cfd_base": 1, "anshpc": 2})
+        
+        with pytest.raises(ValidationError):
+            scheduler.submit(lambda job: None, cores=16)
+        with pytest.raises(ValidationError):
+            scheduler.submit(lambda job: None, cores=8)
+    
+    def test_failed_job_releases_resources(self):
+        """测试失败的任务归还许可证并记录错误"""
+        scheduler = make_scheduler(tokens={"cfd_base": 1, "anshpc": 0})
+        
+        def fail(job):
+            raise RuntimeError("solver crashed")
+        
+        failed = scheduler.submit(fail)
+        ok = scheduler.submit(lambda job: "ok")
+        
+        assert scheduler.wait_all(5)
+        assert failed.status == "failed" and "solver crashed" in failed.error
+        with pytest.raises(RuntimeError):
+            failed.result()
+        assert ok.result() == "ok"
+        assert scheduler.license_server.available() == {"cfd_base": 1, "anshpc": 0}
+    
+    def test_cancel_queued(self):
+        """测试取消排队中的任务"""
+        scheduler = make_scheduler(tokens={"cfd_base": 1, "anshpc": 0})
+        release = threading.Event()
+        scheduler.submit(lambda job: release.wait(5))
+        queued = scheduler.submit(lambda job: None)
+        
+        assert scheduler.cancel(queued.job_id)
+        release.set()
+        
+        assert scheduler.wait_all(5)
+        assert queued.status == "cancelled"
+        assert scheduler.stats()["cancelled"] == 1
+    
+    def test_state_file_and_utilization(self, tmp_path):
+        """测试状态快照和利用率统计"""
+        state_file = tmp_path / "state.json"
+        scheduler = make_scheduler(cores=8, state_file=str(state_file))
+        
+        scheduler.submit(lambda job: threading.Event().wait(0.05), cores=8, name="full")
+        assert scheduler.wait_all(5)
+        
+        snapshot = read_state(str(state_file))
+        stats = scheduler.stats()
+        assert snapshot["jobs"][0]["name"] == "full"
+        assert snapshot["jobs"][0]["status"] == "done"
+        assert 0 < stats["core_utilization"] <= 1
+        assert stats["idle_license_seconds"]["anshpc"] > 0
+        json.dumps(stats)
+    
+    def test_submit_fluent_uses_allocated_cores(self):
+        """测试 Fluent 任务以分配的核数启动会话并在结束后关闭"""
+        backend = FakeFluentBackend()
+        scheduler = make_scheduler()
+        
+        job = scheduler.submit_fluent(
+            lambda wrapper: wrapper.iterate(5),
+            cores=6,
+            wrapper_factory=lambda: FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+        )
+        
+        assert job.result(5) == 5
+        assert backend.sessions[0].options["processor_count"] == 6
+        assert backend.sessions[0].closed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,206 @@
+"""
+单元测试 - Fluent 会话池
+"""
+
+import threading
+import pytest
+from types import SimpleNamespace
+from src.fluent_integration.exceptions import FluentSessionError
+from src.fluent_integration.session_pool import FluentSessionPool
+
+
+class FakeWrapper:
+    """模拟 FluentWrapper，记录启动/停止"""
+    
+    launched = []
+    
+    def __init__(self):
+        self.session = None
+        self.solver = None
+        self.serving = True
+        self.stopped = False
+    
+    def start_fluent(self, dimension="3d", precision="dp", processor_count=1, show_gui=False):
+        self.session = SimpleNamespace(health_check=SimpleNamespace(is_serving=lambda: self.serving))
+        self.solver = object()
+        FakeWrapper.launched.append((dimension, precision, processor_count))
+        return self.session
+    
+    def stop_fluent(self):
+        self.stopped = True
+        self.session = None
+
+
+class TestFluentSessionPool:
+    """测试会话池"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_launches(self):
+        FakeWrapper.launched = []
+    
+    def make_pool(self, **kwargs):
+        """创建使用模拟会话的会话池"""
+        kwargs.setdefault("size", 2)
+        kwargs.setdefault("max_uses", 10)
+        return FluentSessionPool(
+            config_path="nonexistent.json",
+            wrapper_factory=FakeWrapper,
+            memory_probe=lambda wrapper: None,
+            **kwargs
+        )
+    
+    def test_warm_uses_per_session_options(self):
+        """测试按每个会话的参数预热"""
+        pool = self.make_pool(session_options=[{"dimension": "2d", "processor_count": 4}])
+        
+        assert pool.warm() == 2
+        assert sorted(FakeWrapper.launched) == [("2d", "dp", 4), ("3d", "dp", 1)]
+        assert pool.stats()["idle"] == 2
+    
+    def test_lease_reuses_session(self):
+        """测试租借归还后复用同一会话"""
+        pool = self.make_pool(size=1)
+        pool.warm()
+        
+        with pool.lease() as first:
+            pass
+        with pool.lease() as second:
+            assert pool.stats()["idle"] == 0
+        
+        assert first is second
+        assert len(FakeWrapper.launched) == 1
+        assert pool.stats()["leases"] == 2
+    
+    def test_lease_matches_requirements(self):
+        """测试按要求选择会话"""
+        pool = self.make_pool(session_options=[{"dimension": "2d"}, {"dimension": "3d", "processor_count": 8}])
+        pool.warm()
+        
+        with pool.lease(processor_count=8) as fluent:
+            leased = fluent
+        
+        pooled = next(p for p in pool._sessions if p.wrapper is leased)
+        assert pooled.options["processor_count"] == 8
+    
+    def test_unhealthy_session_replaced(self):
+        """测试健康检查失败的会话被替换"""
+        pool = self.make_pool(size=1)
+        pool.warm()
+        pool._sessions[0].wrapper.serving = False
+        
+        with pool.lease() as fluent:
+            assert fluent.serving
+        
+        assert pool.stats()["unhealthy"] == 1
+        assert len(FakeWrapper.launched) == 2
+    
+    def test_recycle_after_max_uses(self):
+        """测试达到使用次数后回收重启"""
+        pool = self.make_pool(size=1, max_uses=2)
+        pool.warm()
+        
+        for _ in range(2):
+            with pool.lease(timeout=5) as fluent:
+                original = fluent
+        with pool.lease(timeout=5) as fluent:
+            assert fluent is not original
+        
+        assert original.stopped
+        assert pool.stats()["recycled"] == 1
+    
+    def test_recycle_on_memory_growth(self):
+        """测试内存增长过多后回收"""
+        memory = {"value": 1000.0}
+        pool = FluentSessionPool(
+            size=1,
+            config_path="nonexistent.json",
+            max_memory_growth_mb=500,
+            wrapper_factory=FakeWrapper,
+            memory_probe=lambda wrapper: memory["value"]
+        )
+        pool.warm()
+        
+        with pool.lease() as fluent:
+            memory["value"] = 2000.0
+        memory["value"] = 1000.0
+        with pool.lease(timeout=5) as replacement:
+            assert replacement is not fluent
+    
+    def test_lease_timeout(self):
+        """测试所有会话被占用时超时"""
+        pool = self.make_pool(size=1)
+        pool.warm()
+        
+        with pool.lease():
+            with pytest.raises(FluentSessionError):
+                with pool.lease(timeout=0.05):
+                    pass
+    
+    def test_waiter_gets_released_session(self):
+        """测试等待者获得归还的会话"""
+        pool = self.make_pool(size=1)
+        pool.warm()
+        result = {}
+        
+        pooled = pool.acquire()
+        
+        def waiter():
+            with pool.lease(timeout=5) as fluent:
+                result["wrapper"] = fluent
+        
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        pool.release(pooled)
+        thread.join(5)
+        
+        assert result["wrapper"] is pooled.wrapper
+    
+    def test_close_stops_sessions(self):
+        """测试关闭会话池"""
+        pool = self.make_pool()
+        pool.warm()
+        wrappers = [p.wrapper for p in pool._sessions]
+        
+        pool.close()
+        
+        assert all(wrapper.stopped for wrapper in wrappers)
+        with pytest.raises(FluentSessionError):
+            pool.acquire()
+
+    
+    def test_session_launched_after_close_stopped_outside_lock(self):
+        """测试启动期间会话池被关闭时，新会话在锁外停止"""
+        pool = None
+        lock_free = []
+        
+        def try_lock():
+            if pool._condition.acquire(blocking=False):
+                pool._condition.release()
+                lock_free.append(True)
+            else:
+                lock_free.append(False)
+        
+        class ClosingWrapper(FakeWrapper):
+            def start_fluent(self, **kwargs):
+                session = super().start_fluent(**kwargs)
+                pool.close()
+                return session
+            
+            def stop_fluent(self):
+                probe = threading.Thread(target=try_lock)
+                probe.start()
+                probe.join(5)
+                super().stop_fluent()
+        
+        pool = FluentSessionPool(
+            config_path="nonexistent.json", wrapper_factory=ClosingWrapper, memory_probe=lambda wrapper: None
+        )
+        
+        with pytest.raises(FluentSessionError):
+            pool.acquire()
+        assert lock_free == [True]
+        assert pool.stats()["sessions"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
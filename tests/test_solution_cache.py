@@ -0,0 +1,114 @@
+"""
+单元测试 - 求解数据缓存
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.solution_cache import SolutionDataCache
+from tests.test_field_data import FakeFieldData, make_solver
+
+
+class TestSolutionDataCache:
+    """测试 LRU 缓存"""
+    
+    def test_hit_and_miss_stats(self):
+        """测试命中率统计"""
+        cache = SolutionDataCache(max_memory_mb=1)
+        key = ("pressure", "inlet", True, 0)
+        
+        assert cache.get(key) is None
+        cache.put(key, np.ones(10))
+        
+        assert cache.get(key) is not None
+        assert cache.stats()["hit_rate"] == 0.5
+    
+    def test_lru_eviction_by_memory(self):
+        """测试超出内存上限时淘汰最久未使用的条目"""
+        cache = SolutionDataCache(max_memory_mb=8 * 1000 * 2.5 / (1024 * 1024))
+        for name in ("a", "b"):
+            cache.put((name, "z", True, 0), np.zeros(1000))
+        cache.get(("a", "z", True, 0))
+        cache.put(("c", "z", True, 0), np.zeros(1000))
+        
+        assert cache.get(("b", "z", True, 0)) is None
+        assert cache.get(("a", "z", True, 0)) is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_cached_arrays_read_only(self):
+        """测试缓存数组为只读"""
+        cache = SolutionDataCache()
+        array = np.zeros(3)
+        cache.put(("p", "z", True, 0), array)
+        
+        with pytest.raises(ValueError):
+            cache.get(("p", "z", True, 0))[0] = 1.0
+        assert array.flags.writeable
+
+
+class TestFluentWrapperSolutionCache:
+    """测试 FluentWrapper 的缓存集成"""
+    
+    @pytest.fixture
+    def wrapper(self):
+        """创建带模拟 field data 的 FluentWrapper"""
+        wrapper = FluentWrapper(config_path="nonexistent.json")
+        wrapper.session = Mock()
+        wrapper.field_data = FakeFieldData()
+        solver = make_solver(wrapper.field_data)
+        solver.solution = Mock()
+        wrapper.solver = solver
+        return wrapper
+    
+    def test_repeated_read_is_free(self, wrapper):
+        """测试状态未变化时重复读取不产生传输"""
+        wrapper.get_solution_data(["pressure", "temperature"], zones=["wall-0", "wall-1"])
+        wrapper.get_solution_data("pressure", zones=["wall-1"])
+        
+        assert wrapper.field_data.transfers == 1
+        assert wrapper.solution_cache.stats()["hits"] == 1
+    
+    def test_zone_list_cached_per_state(self, wrapper):
+        """测试读取全部 zone 时 zone 列表按状态缓存，命中时没有远程调用"""
+        surfaces_info = wrapper.solver.fields.field_info.get_surfaces_info
+        wrapper.get_solution_data("pressure")
+        calls = surfaces_info.call_count
+        
+        wrapper.get_solution_data("pressure")
+        assert surfaces_info.call_count == calls
+        assert wrapper.field_data.transfers == 1
+        
+        wrapper.mark_state_changed("test")
+        wrapper.get_solution_data("pressure")
+        assert surfaces_info.call_count > calls
+    
+    def test_only_missing_zones_requested(self, wrapper):
+        """测试只请求缺失的 zone"""
+        wrapper.get_solution_data("pressure", zones=["wall-0"])
+        data = wrapper.get_solution_data("pressure", zones=["wall-0", "wall-2"])
+        
+        assert set(data) == {"wall-0", "wall-2"}
+        assert wrapper.field_data.transfers == 2
+    
+    def test_iterate_invalidates(self, wrapper):
+        """测试迭代后缓存失效"""
+        wrapper.get_solution_data("pressure", zones=["wall-0"])
+        wrapper.iterate(5)
+        wrapper.get_solution_data("pressure", zones=["wall-0"])
+        
+        assert wrapper.field_data.transfers == 2
+        assert wrapper.state_version == 1
+    
+    def test_bypass_with_output_buffer(self, wrapper):
+        """测试写入缓冲区时不使用缓存"""
+        buffer = np.zeros(5)
+        wrapper.get_solution_data("pressure", zones=["wall-0"])
+        wrapper.get_solution_data("pressure", zones=["wall-0"], out={"pressure": {"wall-0": buffer}})
+        
+        assert wrapper.field_data.transfers == 2
+        assert buffer.flags.writeable
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,183 @@
+"""
+单元测试 - 流式生成校验器
+"""
+
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from src.fluent_integration.copilot_bridge import CodeGeneratorBridge
+from src.fluent_integration.exceptions import GenerationAbortedError
+from src.fluent_integration.stream_guard import StreamGuard
+
+
+SYNTAX_HINTS = {
+    "c": ["#include", "DEFINE_"],
+    "python": ["import", "def ", "class "],
+    "scheme": ["(define", "(lambda"]
+}
+
+GOOD_UDF = """DEFINE_PROFILE(inlet_velocity, t, i)
+{
+    face_t f;
+    real x[ND_ND];
+    begin_f_loop(f, t)
+    {
+        F_CENTROID(x, f, t);
+        F_PROFILE(f, t, i) = 1.0 - x[1] * x[1];
+    }
+    end_f_loop(f, t)
+}
+"""
+
+
+def feed_in_chunks(guard, text, size=7):
+    """按固定大小分块输入，模拟 token 流"""
+    for start in range(0, len(text), size):
+        reason = guard.feed(text[start:start + size])
+        if reason:
+            return reason
+    return guard.finish()
+
+
+def make_chunk(content=None, usage=None):
+    """构造流式响应块"""
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class TestStreamGuard:
+    """测试流式校验器"""
+    
+    def test_valid_c_code_passes(self):
+        """测试正常 C 代码不被中止"""
+        guard = StreamGuard("c", SYNTAX_HINTS, sniff_after=50)
+        
+        assert feed_in_chunks(guard, GOOD_UDF) is None
+    
+    def test_language_mismatch(self):
+        """测试期望 C 却输出 Python"""
+        guard = StreamGuard("c", SYNTAX_HINTS, sniff_after=50)
+        python_code = "import numpy as np\n\nvalues = np.zeros(10)\nresult = values.sum()\nprint(result)\n"
+        
+        reason = feed_in_chunks(guard, python_code * 2)
+        
+        assert reason is not None
+        assert "python" in reason
+    
+    def test_repeated_block(self):
+        """测试重复输出的行块"""
+        guard = StreamGuard("c", SYNTAX_HINTS)
+        loop = "F_PROFILE(f, t, i) = 0.0;\nF_PROFILE(f, t, i) += 1.0;\n"
+        
+        reason = feed_in_chunks(guard, "DEFINE_PROFILE(p, t, i)\n{\n" + loop * 5)
+        
+        assert reason is not None
+        assert "repeated" in reason
+    
+    def test_prose_detected(self):
+        """测试自然语言段落被识别"""
+        guard = StreamGuard("c", SYNTAX_HINTS)
+        prose = "This function computes the velocity at the inlet boundary.\n" \
+                "It uses a parabolic distribution based on the radius.\n" \
+                "First we loop over all faces of the thread.\n" \
+                "Then the centroid of each face is computed.\n" \
+                "Finally the profile value is assigned to each face.\n" \
+                "Note that this works for both serial and parallel runs.\n"
+        
+        reason = feed_in_chunks(guard, prose)
+        
+        assert reason is not None
+        assert "prose" in reason
+    
+    def test_unbalanced_braces(self):
+        """测试多余的右花括号"""
+        guard = StreamGuard("c", SYNTAX_HINTS)
+        
+        assert guard.feed("DEFINE_ADJUST(a, d)\n{\n}\n}\n") is None
+        assert guard.finish() == "unbalanced '}'"
+    
+    def test_unclosed_brace_reported_at_end(self):
+        """测试流结束时仍未闭合的花括号"""
+        guard = StreamGuard("c", SYNTAX_HINTS)
+        
+        reason = feed_in_chunks(guard, "DEFINE_ADJUST(a, d)\n{\n    real x = 0.0;\n")
+        
+        assert reason == "unbalanced '{'"
+    
+    def test_brackets_in_comments_and_literals_ignored(self):
+        """测试注释、字符串和字符字面量中的括号不计入深度"""
+        guard = StreamGuard("c", SYNTAX_HINTS)
+        code = (
+            "/* Closes the block: }\n"
+            " * } and } again\n"
+            " */\n"
+            "DEFINE_ON_DEMAND(show)\n"
+            "{\n"
+            "    char close = '}'; /* } */\n"
+            "    Message(\"}\\n\"); // }\n"
+            "}\n"
+        )
+        
+        assert feed_in_chunks(guard, code) is None
+    
+    def test_scheme_character_literals_ignored(self):
+        """测试 Scheme 字符字面量 #\\) 不计入深度"""
+        guard = StreamGuard("scheme", SYNTAX_HINTS)
+        
+        assert feed_in_chunks(guard, "(define (close? c)\n  (char=? c #\\)))\n") is None
+
+
+class TestCodeGeneratorBridgeStreamGuard:
+    """测试代码生成桥接的流式中止与重试"""
+    
+    @pytest.fixture
+    def bridge(self):
+        """创建代码生成桥接实例"""
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            bridge = CodeGeneratorBridge()
+        bridge.config["stream_guard"] = {"enabled": True, "max_retries": 1}
+        return bridge
+    
+    def test_consume_stream_records_usage(self, bridge):
+        """测试正常流式输出被完整拼接并记录用量"""
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, prompt_tokens_details=None)
+        chunks = [make_chunk(GOOD_UDF[:40]), make_chunk(GOOD_UDF[40:]), make_chunk(usage=usage)]
+        
+        code = bridge._consume_stream(iter(chunks), bridge._create_stream_guard("c"))
+        
+        assert code == GOOD_UDF.strip()
+        assert bridge.usage_stats["prompt_tokens"] == 100
+    
+    def test_abort_closes_stream(self, bridge):
+        """测试异常输出时关闭流并抛出中止异常"""
+        stream = Mock()
+        stream.__iter__ = Mock(return_value=iter([make_chunk("DEFINE_ADJUST(a, d)\n{\n}\n}\n")]))
+        
+        with pytest.raises(GenerationAbortedError):
+            bridge._consume_stream(stream, bridge._create_stream_guard("c"))
+        
+        stream.close.assert_called_once()
+        assert bridge.usage_stats["aborted"] == 1
+    
+    def test_retry_after_abort(self, bridge):
+        """测试中止后立即重试"""
+        bridge._call_openai_api = Mock(side_effect=[GenerationAbortedError("repetition", "c"), GOOD_UDF])
+        
+        code = bridge.generate_code("Inlet velocity", language="c")
+        
+        assert code == GOOD_UDF
+        assert bridge._call_openai_api.call_count == 2
+    
+    def test_retries_exhausted(self, bridge):
+        """测试重试耗尽后抛出异常"""
+        bridge._call_openai_api = Mock(side_effect=GenerationAbortedError("prose", "c"))
+        
+        with pytest.raises(GenerationAbortedError):
+            bridge.generate_code("Inlet velocity", language="c")
+        
+        assert bridge._call_openai_api.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
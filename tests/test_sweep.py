@@ -0,0 +1,174 @@
+"""
+单元测试 - 并行参数扫描
+"""
+
+import csv
+import numpy as np
+import pytest
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.sweep import SweepEngine, export_table
+
+
+SETTINGS = [
+    "define/boundary-conditions/set/velocity-inlet inlet () vmag no {velocity} q",
+    "solve/set/under-relaxation/pressure {relax}"
+]
+
+
+def make_fake_wrapper():
+    """模块级工厂函数（process 模式需要可 pickle）"""
+    return FluentWrapper(config_path="nonexistent.json", launcher=FakeFluentBackend().launch_fluent)
+
+
+def make_failing_wrapper():
+    """velocity 为 3 的设计点设置失败"""
+    backend = FakeFluentBackend(fail_commands=["vmag no 3 "])
+    return FluentWrapper(config_path="nonexistent.json", launcher=backend.launch_fluent)
+
+
+@pytest.fixture
+def case_file(tmp_path):
+    """基准案例文件"""
+    path = tmp_path / "base.cas.h5"
+    path.write_bytes(b"case")
+    return str(path)
+
+
+def make_engine(tmp_path, case_file, **kwargs):
+    """创建 2x2 参数表的扫描"""
+    options = {
+        "parameters": SweepEngine.grid(velocity=[1, 2], relax=[0.3, 0.5]),
+        "settings": SETTINGS,
+        "outputs": ["drag"],
+        "case_file": case_file,
+        "iterations": 10,
+        "workers": 2,
+        "executor": "thread",
+        "db_path": str(tmp_path / "sweep.sqlite"),
+        "config_path": "nonexistent.json",
+        "wrapper_factory": make_fake_wrapper
+    }
+    options.update(kwargs)
+    return SweepEngine(**options)
+
+
+class TestSweepEngine:
+    """测试扫描引擎"""
+    
+    def test_columnar_results(self, tmp_path, case_file):
+        """测试结果为列式表，输出由参数决定"""
+        table = make_engine(tmp_path, case_file).run()
+        
+        assert table["point_id"].tolist() == [0, 1, 2, 3]
+        assert table["status"].tolist() == ["done"] * 4
+        assert table["velocity"].dtype == float
+        # 模拟后端的报告值 = 命令中数值参数之和 + 1e-3 * 迭代步数
+        np.testing.assert_allclose(table["drag"], table["velocity"] + table["relax"] + 0.01)
+    
+    def test_columnar_parameter_input(self):
+        """测试列式参数表输入"""
+        points = SweepEngine.normalize_parameters({"velocity": np.array([1.0, 2.0]), "relax": [0.3, 0.5]})
+        
+        assert points == [{"velocity": 1.0, "relax": 0.3}, {"velocity": 2.0, "relax": 0.5}]
+        with pytest.raises(ValidationError):
+            SweepEngine.normalize_parameters({"velocity": [1, 2], "relax": [0.3]})
+    
+    def test_resume_after_stop(self, tmp_path, case_file):
+        """测试中断后只计算未完成的点"""
+        evaluated = []
+        
+        def record(wrapper, params):
+            evaluated.append(params["velocity"])
+            return {}
+        
+        engine = make_engine(tmp_path, case_file, workers=1, postprocess=record)
+        engine.run(progress_callback=lambda done, total: engine.stop() if done == 2 else None)
+        assert len(evaluated) == 2
+        
+        table = make_engine(tmp_path, case_file, workers=1, postprocess=record).run()
+        
+        assert len(evaluated) == 4
+        assert table["status"].tolist() == ["done"] * 4
+    
+    def test_failed_points_retried_up_to_limit(self, tmp_path, case_file):
+        """测试失败的点记录错误，续算时在尝试次数内重试"""
+        engine = make_engine(
+            tmp_path,
+            case_file,
+            parameters=[{"velocity": 2, "relax": 0.3}, {"velocity": 3, "relax": 0.3}],
+            wrapper_factory=make_failing_wrapper,
+            max_attempts=2
+        )
+        
+        table = engine.run()
+        assert table["status"].tolist() == ["done", "failed"]
+        assert "vmag no 3" in table["error"][1]
+        
+        engine.run()
+        table = engine.run()
+        
+        assert table["attempts"].tolist() == [1, 2]
+    
+    def test_different_sweep_rejected(self, tmp_path, case_file):
+        """测试数据库属于另一个扫描时拒绝续算"""
+        make_engine(tmp_path, case_file).run()
+        
+        with pytest.raises(ValidationError):
+            make_engine(tmp_path, case_file, iterations=20).run()
+        assert make_engine(tmp_path, case_file, iterations=20).run(reset=True)["status"].tolist() == ["done"] * 4
+    
+    def test_process_workers(self, tmp_path, case_file):
+        """测试每个会话一个工作进程"""
+        table = make_engine(tmp_path, case_file, executor="process").run()
+        
+        assert table["status"].tolist() == ["done"] * 4
+    
+    def test_unknown_template_parameter(self, tmp_path, case_file):
+        """测试设置模板引用不存在的参数"""
+        with pytest.raises(ValidationError):
+            make_engine(tmp_path, case_file, settings=["define/models/energy {energy}"])
+    
+    def test_desired_state_settings(self, tmp_path):
+        """测试期望状态设置代入参数原始值，点之间只发送变化的值"""
+        applied = []
+        
+        def record(wrapper, params):
+            inlet = wrapper.solver.settings_state["setup"]["boundary_conditions"]["velocity_inlet"]["inlet"]
+            applied.append((inlet["momentum"]["velocity"]["value"], wrapper.solver.backend.calls["setting"]))
+            return {}
+        
+        engine = make_engine(
+            tmp_path,
+            None,
+            parameters=SweepEngine.grid(velocity=[2.0, 3.0]),
+            settings=[{
+                "setup": {
+                    "models": {"energy": {"enabled": True}},
+                    "boundary_conditions": {"velocity_inlet": {"inlet": {"momentum": {"velocity": {"value": "{velocity}"}}}}}
+                }
+            }],
+            workers=1,
+            postprocess=record
+        )
+        
+        table = engine.run()
+        
+        assert table["status"].tolist() == ["done"] * 2
+        assert applied == [(2.0, 2), (3.0, 3)]
+    
+    def test_export_csv(self, tmp_path, case_file):
+        """测试导出 CSV"""
+        table = make_engine(tmp_path, case_file).run()
+        
+        path = export_table(table, str(tmp_path / "results.csv"))
+        
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 4
+        assert float(rows[3]["velocity"]) == 2.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
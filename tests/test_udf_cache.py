@@ -0,0 +1,116 @@
+"""
+单元测试 - UDF 构建缓存
+"""
+
+import json
+import time
+import pytest
+from unittest.mock import Mock
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.udf_cache import UDFBuildCache
+
+
+@pytest.fixture
+def udf_source(tmp_path):
+    """创建 UDF 源文件"""
+    source = tmp_path / "inlet.c"
+    source.write_text('#include "udf.h"\nDEFINE_ADJUST(adjust, d) {}\n')
+    return source
+
+
+def fake_build(library_dir):
+    """模拟编译产生的库目录"""
+    target = library_dir / "lnamd64" / "3ddp"
+    target.mkdir(parents=True, exist_ok=True)
+    (target / "libudf.so").write_bytes(b"\x7fELF")
+
+
+class TestUDFBuildCache:
+    """测试构建缓存"""
+    
+    def test_key_depends_on_inputs(self, tmp_path, udf_source):
+        """测试键随源码、编译器配置和精度变化"""
+        cache = UDFBuildCache(cache_dir=str(tmp_path / "cache"))
+        base = cache.build_key([str(udf_source)], {"compiler": "gcc"}, "2024R1", "dp", "3d")
+        
+        assert base == cache.build_key([str(udf_source)], {"compiler": "gcc"}, "2024R1", "dp", "3d")
+        assert base != cache.build_key([str(udf_source)], {"compiler": "msvc"}, "2024R1", "dp", "3d")
+        assert base != cache.build_key([str(udf_source)], {"compiler": "gcc"}, "2024R1", "sp", "3d")
+        
+        udf_source.write_text(udf_source.read_text() + "/* edit */\n")
+        assert base != cache.build_key([str(udf_source)], {"compiler": "gcc"}, "2024R1", "dp", "3d")
+    
+    def test_store_and_restore(self, tmp_path):
+        """测试保存并恢复库目录"""
+        cache = UDFBuildCache(cache_dir=str(tmp_path / "cache"))
+        build = tmp_path / "build" / "libudf"
+        fake_build(build)
+        
+        cache.store("k" * 64, str(build))
+        restored = tmp_path / "work" / "libudf"
+        restored.parent.mkdir()
+        
+        assert cache.restore("k" * 64, str(restored))
+        assert (restored / "lnamd64" / "3ddp" / "libudf.so").read_bytes() == b"\x7fELF"
+        assert not cache.restore("x" * 64, str(restored))
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    
+    def test_gc_by_count_and_age(self, tmp_path):
+        """测试按数量和时间回收"""
+        cache = UDFBuildCache(cache_dir=str(tmp_path / "cache"), max_entries=2, max_age_days=1)
+        build = tmp_path / "libudf"
+        fake_build(build)
+        for key in ("a", "b", "c"):
+            cache.store(key * 64, str(build))
+            time.sleep(0.01)
+        
+        assert not (tmp_path / "cache" / ("a" * 64)).exists()
+        
+        manifest = tmp_path / "cache" / ("b" * 64) / "manifest.json"
+        data = json.loads(manifest.read_text())
+        data["last_used"] = time.time() - 3 * 86400
+        manifest.write_text(json.dumps(data))
+        
+        assert cache.gc() == ["b" * 64]
+
+
+class TestFluentWrapperUDFCache:
+    """测试 compile_udf 使用构建缓存"""
+    
+    def test_second_compile_uses_cache(self, tmp_path, udf_source):
+        """测试源码未变化时跳过编译"""
+        wrapper = FluentWrapper(config_path="nonexistent.json")
+        wrapper.session = Mock()
+        wrapper.solver = Mock()
+        wrapper.udf_build_dir = str(tmp_path / "work")
+        wrapper.udf_cache = UDFBuildCache(cache_dir=str(tmp_path / "cache"))
+        compile_call = wrapper.solver.tui.define.user_defined.compiled_functions.compile
+        compile_call.side_effect = lambda lib_name, src_file_name_list: fake_build(tmp_path / "work" / lib_name)
+        
+        assert wrapper.compile_udf(str(udf_source))
+        assert wrapper.compile_udf(str(udf_source))
+        
+        assert compile_call.call_count == 1
+        assert wrapper.udf_cache.stats()["hits"] == 1
+    
+    def test_cache_keyed_on_launched_version(self, tmp_path, udf_source):
+        """测试不同 Fluent 版本的会话不复用彼此构建的库"""
+        wrapper = FluentWrapper(config_path="nonexistent.json")
+        wrapper.session = Mock()
+        wrapper.solver = Mock()
+        wrapper.udf_build_dir = str(tmp_path / "work")
+        wrapper.udf_cache = UDFBuildCache(cache_dir=str(tmp_path / "cache"))
+        compile_call = wrapper.solver.tui.define.user_defined.compiled_functions.compile
+        compile_call.side_effect = lambda lib_name, src_file_name_list: fake_build(tmp_path / "work" / lib_name)
+        
+        wrapper.fluent_version = "24.1.0"
+        assert wrapper.compile_udf(str(udf_source))
+        wrapper.fluent_version = "25.1.0"
+        assert wrapper.compile_udf(str(udf_source))
+        
+        assert compile_call.call_count == 2
+        assert wrapper.udf_cache.stats()["hits"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,160 @@
+"""
+单元测试 - 从最近的已收敛设计点热启动
+"""
+
+import os
+import pytest
+from src.fluent_integration.exceptions import ValidationError
+from src.fluent_integration.fake_backend import FakeFluentBackend
+from src.fluent_integration.fluent_wrapper import FluentWrapper
+from src.fluent_integration.sweep import SweepEngine
+from src.fluent_integration.warm_start import WarmStartRegistry, initialize_from_nearest
+
+
+def make_fake_wrapper():
+    """模块级工厂函数（process 模式需要可 pickle）"""
+    return FluentWrapper(config_path="nonexistent.json", launcher=FakeFluentBackend().launch_fluent)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """空注册表"""
+    registry = WarmStartRegistry(str(tmp_path / "solutions"))
+    yield registry
+    registry.close()
+
+
+def register(registry, tmp_path, params, mesh_key="mesh"):
+    """写一个数据文件并登记"""
+    data_file = registry.data_path(mesh_key, params)
+    (tmp_path / "solutions" / mesh_key).mkdir(parents=True, exist_ok=True)
+    with open(data_file, "wb") as f:
+        f.write(b"data")
+    registry.register(mesh_key, params, data_file)
+    return data_file
+
+
+class TestWarmStartRegistry:
+    """测试已收敛数据注册表"""
+    
+    def test_nearest_uses_normalized_distance(self, registry, tmp_path):
+        """测试各参数按取值范围归一化，量纲大的参数不主导距离"""
+        near = register(registry, tmp_path, {"velocity": 1.0, "temperature": 310.0})
+        register(registry, tmp_path, {"velocity": 3.0, "temperature": 300.0})
+        register(registry, tmp_path, {"velocity": 2.0, "temperature": 400.0})
+        
+        neighbor = registry.nearest("mesh", {"velocity": 1.2, "temperature": 300.0})
+        
+        assert neighbor["data_file"] == near
+        assert neighbor["distance"] > 0
+    
+    def test_distance_uses_fixed_scale(self, tmp_path):
+        """测试距离按固定尺度归一化，远离已登记点的设计点不会因范围伸缩而显得接近"""
+        registry = WarmStartRegistry(str(tmp_path / "solutions"), max_distance=1.0, scales={"velocity": 4.0})
+        register(registry, tmp_path, {"velocity": 1.0})
+        register(registry, tmp_path, {"velocity": 2.0})
+        
+        assert registry.nearest("mesh", {"velocity": 3.0})["distance"] == pytest.approx(0.25)
+        assert registry.nearest("mesh", {"velocity": 100.0}) is None
+        registry.close()
+    
+    def test_other_mesh_and_categorical_mismatch_excluded(self, registry, tmp_path):
+        """测试不同网格或非数值参数不同的解不作为初值"""
+        register(registry, tmp_path, {"velocity": 1.0, "model": "ke"}, mesh_key="other")
+        register(registry, tmp_path, {"velocity": 1.0, "model": "sst"})
+        
+        assert registry.nearest("mesh", {"velocity": 1.0, "model": "ke"}) is None
+        assert registry.nearest("mesh", {"velocity": 2.0, "model": "sst"}) is not None
+    
+    def test_max_distance(self, tmp_path):
+        """测试超过最大距离时不热启动"""
+        registry = WarmStartRegistry(str(tmp_path / "solutions"), max_distance=0.5)
+        register(registry, tmp_path, {"velocity": 1.0, "relax": 0.3})
+        register(registry, tmp_path, {"velocity": 2.0, "relax": 0.3})
+        
+        assert registry.nearest("mesh", {"velocity": 1.1, "relax": 0.3}) is not None
+        assert registry.nearest("mesh", {"velocity": 5.0, "relax": 0.3}) is None
+        registry.close()
+    
+    def test_deleted_data_file_ignored(self, registry, tmp_path):
+        """测试已删除的数据文件不再返回"""
+        data_file = register(registry, tmp_path, {"velocity": 1.0})
+        
+        os.remove(data_file)
+        
+        assert registry.nearest("mesh", {"velocity": 1.0}) is None
+    
+    def test_register_missing_file(self, registry):
+        """测试登记不存在的数据文件"""
+        with pytest.raises(ValidationError):
+            registry.register("mesh", {"velocity": 1.0}, "missing.dat.h5")
+
+
+class TestInitializeFromNearest:
+    """测试初始化与退回"""
+    
+    def test_fallback_without_neighbor(self, registry):
+        """测试没有邻居时常规初始化"""
+        wrapper = make_fake_wrapper()
+        wrapper.start_fluent()
+        
+        assert initialize_from_nearest(wrapper, registry, "mesh", {"velocity": 1.0}, "standard") is None
+        assert wrapper.solver.initialized_from == "standard"
+    
+    def test_reads_neighbor_data(self, registry, tmp_path):
+        """测试读入最近邻的数据文件"""
+        data_file = register(registry, tmp_path, {"velocity": 1.0})
+        wrapper = make_fake_wrapper()
+        wrapper.start_fluent()
+        
+        neighbor = initialize_from_nearest(wrapper, registry, "mesh", {"velocity": 2.0})
+        
+        assert neighbor["data_file"] == data_file
+        assert wrapper.solver.initialized_from == data_file
+
+
+class TestSweepWarmStart:
+    """测试扫描中的热启动"""
+    
+    def test_points_start_from_converged_neighbors(self, tmp_path):
+        """测试第一个点常规初始化，之后的点从已收敛的邻居初始化"""
+        case_file = tmp_path / "base.cas.h5"
+        case_file.write_bytes(b"case")
+        engine = SweepEngine(
+            parameters=SweepEngine.grid(velocity=[1, 2, 3]),
+            settings=["define/boundary-conditions/set/velocity-inlet inlet () vmag no {velocity} q"],
+            outputs=["drag"],
+            case_file=str(case_file),
+            iterations=10,
+            warm_start=True,
+            warm_start_dir=str(tmp_path / "solutions"),
+            workers=1,
+            executor="thread",
+            db_path=str(tmp_path / "sweep.sqlite"),
+            config_path="nonexistent.json",
+            wrapper_factory=make_fake_wrapper
+        )
+        
+        assert engine.spec["warm_start_scales"] == {"velocity": 2.0}
+        table = engine.run()
+        
+        assert table["status"].tolist() == ["done"] * 3
+        assert table["iterations"].tolist() == [10, 10, 10]
+        assert table["warm_start"][0] is None
+        assert table["warm_start"][2] == WarmStartRegistry(str(tmp_path / "solutions")).data_path(
+            WarmStartRegistry.mesh_key(str(case_file)), {"velocity": 2}
+        )
+    
+    def test_warm_start_requires_case_file(self, tmp_path):
+        """测试没有基准案例（网格不确定）时拒绝热启动"""
+        with pytest.raises(ValidationError):
+            SweepEngine(
+                parameters=[{"velocity": 1}],
+                settings=[],
+                warm_start=True,
+                config_path="nonexistent.json"
+            )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])